@@ -6,10 +6,8 @@ import re
 import sys
 from datetime import datetime
 from pathlib import Path
-from urllib.parse import urljoin
 
 import pandas as pd
-from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
 #TODO: DELETE DUPLICATES IN TABLE PRIOR TO DOWNLOADING PDFS
 #TODO: KEEP TRACK OF THIS DATA BY ADDING TO CSV FILE SHEET AND UPLOADING TO DATABASE
@@ -19,13 +17,24 @@ from playwright.async_api import async_playwright
 # Add the parent directory to the path so we can import from storage
 sys.path.append(str(Path(__file__).parent.parent))
 from storage.google_drive import DriveManager
+from scrapers.base.http_downloader import HTTPDownloader, PlaywrightFallback
+from scrapers.base.load_more_replay import extract_html, replay_load_more
+from scrapers.base.rate_limiter import throttled_goto
+from scrapers.base.replay_harness import attach_replay_harness
+from scrapers.base.resource_blocking import apply_blocking_profile, get_profile
+from scrapers.base.table_extraction import iter_table_rows
 
 # Set the client_secret.json path before importing config
 os.environ["GDRIVE_CREDS_JSON"] = str(Path(__file__).parent.parent / "storage" / "client_secret.json")
 
 # --- Constants from your script ---
 MN_URL = "https://www.cards.commerce.state.mn.us/franchise-registrations?doSearch=true&documentTitle=&franchisor=&franchiseName=&year=&fileNumber=&documentType=Clean+FDD&content="
+# "light" keeps stylesheets: load_all_results waits for the "Load more" button to be visible
+MN_BLOCKING_PROFILE = get_profile(os.environ.get("BLOCKING_PROFILE", "light"))
 BASE_URL = "https://www.cards.commerce.state.mn.us"
+LOAD_MORE_SELECTOR = 'button:has-text("Load more")'
+# "replay" fetches the pages behind "Load more" directly; "click" clicks through them
+MN_PAGINATION_MODE = os.environ.get("MN_PAGINATION_MODE", "replay")
 
 async def load_all_results(page):
     """
@@ -36,7 +45,7 @@ async def load_all_results(page):
     load_more_count = 0
     
     while True:
-        load_more_button = page.locator('button:has-text("Load more")')
+        load_more_button = page.locator(LOAD_MORE_SELECTOR)
         
         try:
             # Wait for a short period to see if the button is present and visible
@@ -58,44 +67,71 @@ async def load_all_results(page):
     print(f"Finished loading results. Clicked 'Load more' {load_more_count} times.")
     return load_more_count
 
-def parse_table_with_links(soup, base_url):
-    """
-    Parses the HTML table using BeautifulSoup to extract row data and hyperlinks.
-    
+def parse_table_with_links(html, base_url):
+    """Extract the results table rows and document links in one lxml pass.
+
     Returns:
         list: A list of lists containing the scraped data, with headers as the first item.
     """
-    table = soup.find('table', id='results')
-    if not table:
+    rows = iter_table_rows(html, table_id='results', base_url=base_url, line_separator=' | ')
+    headers = None
+    data_rows = []
+    for row in rows:
+        if row.is_header:
+            headers = headers or row.cells
+        else:
+            data_rows.append(row)
+    if not headers:
         return []
 
-    all_data = []
-
-    # Extract headers
-    headers = [th.text.strip() for th in table.select('thead th')]
     headers[1] = "Document Link"  # Rename for clarity
-    all_data.append(headers)
+    return [headers] + parse_result_rows(data_rows)
 
-    # Extract rows
-    rows = table.select('tbody tr')
+def parse_result_rows(rows):
+    """Turn table rows into cell text, replacing the Document cell with its link."""
+    parsed = []
     for row in rows:
-        cells = row.find_all(['th', 'td'])
-        row_data = [cell.text.strip().replace('\n', ' | ') for cell in cells]
-        
-        # Extract the hyperlink from the second cell (Document column)
-        link_tag = cells[1].find('a')
-        if link_tag and link_tag.has_attr('href'):
-            relative_url = link_tag['href']
-            full_url = urljoin(base_url, relative_url)
-            row_data[1] = full_url
-        else:
-            row_data[1] = cells[1].text.strip()
-            
-        all_data.append(row_data)
-        
-    return all_data
+        if row.is_header or len(row.cells) < 2:
+            continue
+        row_data = list(row.cells)
+        # The Document column holds the link to the filing
+        row_data[1] = row.link(1) or row_data[1]
+        parsed.append(row_data)
+    return parsed
+
+def parse_load_more_page(body):
+    """Parse the rows out of one replayed "Load more" response (HTML or JSON)."""
+    html = extract_html(body)
+    rows = list(iter_table_rows(html, table_id='results', base_url=BASE_URL, line_separator=' | '))
+    if not rows:
+        # Responses may carry bare rows without the surrounding table
+        rows = iter_table_rows(html, base_url=BASE_URL, line_separator=' | ')
+    return parse_result_rows(rows)
+
+async def load_all_table_data(page):
+    """
+    Return the full results table (headers first), replaying the "Load more"
+    requests when possible and clicking through the pages otherwise.
+    """
+    if MN_PAGINATION_MODE == "replay":
+        initial = parse_table_with_links(await page.content(), BASE_URL)
+        if initial:
+            more_rows = await replay_load_more(page, LOAD_MORE_SELECTOR, parse_load_more_page)
+            if more_rows is not None:
+                seen = {tuple(row) for row in initial[1:]}
+                for row in more_rows:
+                    if tuple(row) not in seen:
+                        seen.add(tuple(row))
+                        initial.append(row)
+                print(f"Loaded {len(initial) - 1} rows via request replay.")
+                return initial
+        print("Request replay unavailable, clicking through 'Load more' instead.")
 
-async def get_mn_registrations():
+    await load_all_results(page)
+    print("Extracting final table data...")
+    return parse_table_with_links(await page.content(), BASE_URL)
+
+async def get_mn_registrations(headless: bool = False):
     """
     Launches a browser, navigates to the MN franchise registrations page, loads all results,
     scrapes the complete table including document links, and saves it to a CSV.
@@ -111,8 +147,10 @@ async def get_mn_registrations():
     drive_manager = DriveManager(use_oauth2=True, token_file="mn_scraper_token.pickle")
     
     async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=False)
+        browser = await playwright.chromium.launch(headless=headless)
         context = await browser.new_context()
+        await attach_replay_harness(context)
+        await apply_blocking_profile(context, MN_BLOCKING_PROFILE)
         page = await context.new_page()
         
         try:
@@ -120,15 +158,8 @@ async def get_mn_registrations():
             await page.goto(MN_URL, wait_until='networkidle', timeout=60000)
             print("Page loaded successfully.")
             
-            # Use the load_all_results function to handle dynamic content
-            await load_all_results(page)
-            
-            print("Extracting final table data with BeautifulSoup for link extraction...")
-            raw_html = await page.content()
-            soup = BeautifulSoup(raw_html, 'html.parser')
-            
-            # Use the custom parser to get data and hyperlinks
-            scraped_data = parse_table_with_links(soup, BASE_URL)
+            # Load every page of results, including document links
+            scraped_data = await load_all_table_data(page)
             
             if len(scraped_data) > 1:
                 # Convert to pandas DataFrame for easy CSV saving
@@ -182,11 +213,40 @@ async def get_mn_registrations():
             await browser.close()
 
 
+PDF_FOLDER_ID = "16DZN-GCRq1ejSrjaVPCU0vjB_jgHptN7"  # PDF folder ID for MN
+
+
+def build_pdf_filename(franchisor: str, year: str, file_number: str) -> str:
+    """Create filename with convention: {Franchisor}_{Year}_{File Number}_MN.pdf"""
+    year_clean = str(year).replace('/', '-')
+    safe_franchisor = re.sub(r'[<>:"/\\|?*]', '_', str(franchisor))
+    safe_file_number = re.sub(r'[<>:"/\\|?*]', '_', str(file_number))
+    return f"{safe_franchisor}_{year_clean}_{safe_file_number}_MN.pdf"
+
+
+def upload_pdf(drive_manager: DriveManager, pdf_content: bytes, filename: str) -> None:
+    """Upload PDF content to Google Drive, saving locally if the upload fails."""
+    try:
+        file_id = drive_manager.upload_file(
+            file_content=pdf_content,
+            filename=filename,
+            parent_id=PDF_FOLDER_ID,
+            mime_type="application/pdf"
+        )
+        print(f"[SUCCESS] PDF uploaded to Google Drive: {filename} (ID: {file_id})")
+    except Exception as upload_error:
+        print(f"[ERROR] Error uploading PDF to Google Drive: {upload_error}")
+        # Fallback: save locally if upload fails
+        DOWNLOAD_DIR = Path(__file__).parent / "downloads" / "MN"
+        DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        fallback_path = DOWNLOAD_DIR / filename
+        fallback_path.write_bytes(pdf_content)
+        print(f"[WARNING] PDF saved locally as fallback: {fallback_path}")
+
+
 async def download_pdf(page, document_url: str, franchisor: str, year: str, file_number: str) -> None:
     """Download PDF file from the document link and upload to Google Drive."""
     
-    PDF_FOLDER_ID = "16DZN-GCRq1ejSrjaVPCU0vjB_jgHptN7"  # PDF folder ID for MN
-    
     # Initialize Google Drive Manager with OAuth2
     drive_manager = DriveManager(use_oauth2=True, token_file="mn_scraper_token.pickle")
     
@@ -194,7 +254,7 @@ async def download_pdf(page, document_url: str, franchisor: str, year: str, file
         print(f"Attempting to download PDF for {franchisor} (File Number: {file_number})")
         
         # Navigate to the document URL
-        await page.goto(document_url, wait_until='networkidle', timeout=60000)
+        await throttled_goto(page, document_url, wait_until='networkidle', timeout=60000)
         
         # Wait for the PDF to load - MN site typically loads PDF directly
         await page.wait_for_load_state('networkidle')
@@ -208,13 +268,7 @@ async def download_pdf(page, document_url: str, franchisor: str, year: str, file
         try:
             download = await download_info.value
             
-            # Format the year for filename
-            year_clean = str(year).replace('/', '-')
-            
-            # Create filename with convention: {Franchisor}_{Year}_{File Number}_MN.pdf
-            safe_franchisor = re.sub(r'[<>:"/\\|?*]', '_', str(franchisor))
-            safe_file_number = re.sub(r'[<>:"/\\|?*]', '_', str(file_number))
-            filename = f"{safe_franchisor}_{year_clean}_{safe_file_number}_MN.pdf"
+            filename = build_pdf_filename(franchisor, year, file_number)
             
             # Download to temporary location first
             temp_path = Path(await download.path())
@@ -268,54 +322,59 @@ async def download_pdf(page, document_url: str, franchisor: str, year: str, file
 
 #TODO: NEED TO MODIFY DATABASE SCHEMA AND PYDANTIC SCHEMAS TO MATGCH (MIN AMOUNT OF DATA)
 
-async def download_all_pdfs(df):
-    """Download all PDFs from the registration DataFrame."""
-    
-    PDF_FOLDER_ID = "16DZN-GCRq1ejSrjaVPCU0vjB_jgHptN7"  # PDF folder ID for MN
+async def download_all_pdfs(df, concurrency: int = 4, headless: bool = False):
+    """Download all PDFs from the registration DataFrame.
+
+    Document links from the results table point straight at the PDFs, so they
+    are fetched over a pooled HTTP client. A browser is only started for links
+    that turn out to need JavaScript.
+    """
     
     print(f"\nStarting PDF downloads for {len(df)} registrations...")
     
-    async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=False)
-        
-        # Configure downloads
-        context = await browser.new_context(
-            accept_downloads=True
+    # Initialize Google Drive Manager with OAuth2
+    drive_manager = DriveManager(use_oauth2=True, token_file="mn_scraper_token.pickle")
+    
+    rows_by_url = {}
+    for index, row in df.iterrows():
+        document_url = row.get('Document Link', '')
+        franchisor = row.get('Franchisor', 'Unknown')
+        if not document_url or not document_url.startswith('http'):
+            print(f"[WARNING] No valid document URL for {franchisor}")
+            continue
+        rows_by_url.setdefault(document_url, row)
+    
+    success_count = 0
+    
+    async def handle_result(result):
+        nonlocal success_count
+        row = rows_by_url[result.url]
+        franchisor = row.get('Franchisor', 'Unknown')
+        if not result.success:
+            print(f"[ERROR] Error downloading PDF for {franchisor}: {result.error}")
+            return
+        print(f"PDF downloaded for {franchisor} via {result.via}, size: {result.size} bytes")
+        filename = build_pdf_filename(
+            franchisor, row.get('Year', 'Unknown'), row.get('File Number', 'Unknown')
         )
-        page = await context.new_page()
-        
-        try:
-            success_count = 0
-            
-            for index, row in df.iterrows():
-                try:
-                    print(f"\nProcessing {index + 1} of {len(df)}")
-                    
-                    # Extract data from row
-                    document_url = row.get('Document Link', '')
-                    franchisor = row.get('Franchisor', 'Unknown')
-                    year = row.get('Year', 'Unknown')
-                    file_number = row.get('File Number', 'Unknown')
-                    
-                    if not document_url or not document_url.startswith('http'):
-                        print(f"[WARNING] No valid document URL for {franchisor}")
-                        continue
-                    
-                    await download_pdf(page, document_url, franchisor, year, file_number)
-                    success_count += 1
-                    
-                    # Small delay between downloads to be respectful
-                    await asyncio.sleep(2)
-                    
-                except Exception as row_error:
-                    print(f"[ERROR] Error processing row {index + 1}: {row_error}")
-                    continue
-            
-            print(f"\n[SUMMARY] Successfully processed {success_count} out of {len(df)} documents")
-            
-        finally:
-            await context.close()
-            await browser.close()
+        # Drive uploads are blocking; keep them off the event loop
+        await asyncio.to_thread(upload_pdf, drive_manager, result.content, filename)
+        result.content = None  # Release the buffer as soon as it is stored
+        success_count += 1
+    
+    fallback = PlaywrightFallback(headless=headless)
+    try:
+        async with HTTPDownloader(
+            browser_fallback=fallback, rate_limited=True, resumable=True
+        ) as downloader:
+            await downloader.download_many(
+                list(rows_by_url), concurrency=concurrency, on_result=handle_result
+            )
+            print(f"Downloader stats: {downloader.get_stats()}")
+    finally:
+        await fallback.close()
+    
+    print(f"\n[SUMMARY] Successfully processed {success_count} out of {len(df)} documents")
 
 
 async def main():
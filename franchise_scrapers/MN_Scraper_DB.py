@@ -8,17 +8,22 @@ import re
 import sys
 from datetime import datetime, date
 from pathlib import Path
-from urllib.parse import urljoin
 from typing import List, Dict, Optional
 
 import pandas as pd
-from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
 
 # Add the parent directory to the path so we can import from storage
 sys.path.append(str(Path(__file__).parent.parent))
 from storage.google_drive import DriveManager
 from franchise_scrapers.database_integration import get_scraper_database
+from scrapers.base.http_downloader import HTTPDownloader, PlaywrightFallback
+from scrapers.base.load_more_replay import extract_html, replay_load_more
+from scrapers.base.rate_limiter import throttled_goto
+from scrapers.base.replay_harness import attach_replay_harness
+from scrapers.base.registration_snapshot import RegistrationSnapshot
+from scrapers.base.resource_blocking import apply_blocking_profile, get_profile
+from scrapers.base.table_extraction import iter_table_rows
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -28,7 +33,12 @@ os.environ["GDRIVE_CREDS_JSON"] = str(Path(__file__).parent.parent / "storage" /
 
 # --- Constants ---
 MN_URL = "https://www.cards.commerce.state.mn.us/franchise-registrations?doSearch=true&documentTitle=&franchisor=&franchiseName=&year=&fileNumber=&documentType=Clean+FDD&content="
+# "light" keeps stylesheets: load_all_results waits for the "Load more" button to be visible
+MN_BLOCKING_PROFILE = get_profile(os.environ.get("BLOCKING_PROFILE", "light"))
 BASE_URL = "https://www.cards.commerce.state.mn.us"
+LOAD_MORE_SELECTOR = 'button:has-text("Load more")'
+# "replay" fetches the pages behind "Load more" directly; "click" clicks through them
+MN_PAGINATION_MODE = os.environ.get("MN_PAGINATION_MODE", "replay")
 CSV_FOLDER_ID = "1-maRo3S8fIZQUBsish35rUab1UcCT91R"  # CSV folder ID for MN
 PDF_FOLDER_ID = "16DZN-GCRq1ejSrjaVPCU0vjB_jgHptN7"  # PDF folder ID for MN
 
@@ -47,7 +57,7 @@ class MinnesotaScraperDB:
         load_more_count = 0
         
         while True:
-            load_more_button = page.locator('button:has-text("Load more")')
+            load_more_button = page.locator(LOAD_MORE_SELECTOR)
             
             try:
                 await load_more_button.wait_for(state='visible', timeout=10000)
@@ -66,37 +76,72 @@ class MinnesotaScraperDB:
         logger.info(f"Finished loading results. Clicked 'Load more' {load_more_count} times.")
         return load_more_count
 
-    def parse_table_with_links(self, soup, base_url):
-        """Parse the HTML table using BeautifulSoup to extract row data and hyperlinks."""
-        table = soup.find('table', id='results')
-        if not table:
-            return []
+    def parse_table_with_links(self, html, base_url):
+        """Extract the results table rows and document links in one lxml pass.
 
-        all_data = []
+        Returns:
+            list: A list of lists containing the scraped data, with headers as the first item.
+        """
+        rows = iter_table_rows(html, table_id='results', base_url=base_url, line_separator=' | ')
+        headers = None
+        data_rows = []
+        for row in rows:
+            if row.is_header:
+                headers = headers or row.cells
+            else:
+                data_rows.append(row)
+        if not headers:
+            return []
 
-        # Extract headers
-        headers = [th.text.strip() for th in table.select('thead th')]
         headers[1] = "Document Link"  # Rename for clarity
-        all_data.append(headers)
+        return [headers] + self.parse_result_rows(data_rows)
 
-        # Extract rows
-        rows = table.select('tbody tr')
+    def parse_result_rows(self, rows):
+        """Turn table rows into cell text, replacing the Document cell with its link."""
+        parsed = []
         for row in rows:
-            cells = row.find_all(['th', 'td'])
-            row_data = [cell.text.strip().replace('\n', ' | ') for cell in cells]
-            
-            # Extract the hyperlink from the second cell (Document column)
-            link_tag = cells[1].find('a')
-            if link_tag and link_tag.has_attr('href'):
-                relative_url = link_tag['href']
-                full_url = urljoin(base_url, relative_url)
-                row_data[1] = full_url
-            else:
-                row_data[1] = cells[1].text.strip()
-                
-            all_data.append(row_data)
-            
-        return all_data
+            if row.is_header or len(row.cells) < 2:
+                continue
+            row_data = list(row.cells)
+            # The Document column holds the link to the filing
+            row_data[1] = row.link(1) or row_data[1]
+            parsed.append(row_data)
+        return parsed
+
+    def parse_load_more_page(self, body):
+        """Parse the rows out of one replayed "Load more" response (HTML or JSON)."""
+        html = extract_html(body)
+        rows = list(iter_table_rows(html, table_id='results', base_url=BASE_URL, line_separator=' | '))
+        if not rows:
+            # Responses may carry bare rows without the surrounding table
+            rows = iter_table_rows(html, base_url=BASE_URL, line_separator=' | ')
+        return self.parse_result_rows(rows)
+
+    async def load_all_table_data(self, page):
+        """Return the full results table (headers first).
+
+        Replays the "Load more" requests when possible and clicks through the
+        pages otherwise.
+        """
+        if MN_PAGINATION_MODE == "replay":
+            initial = self.parse_table_with_links(await page.content(), BASE_URL)
+            if initial:
+                more_rows = await replay_load_more(
+                    page, LOAD_MORE_SELECTOR, self.parse_load_more_page
+                )
+                if more_rows is not None:
+                    seen = {tuple(row) for row in initial[1:]}
+                    for row in more_rows:
+                        if tuple(row) not in seen:
+                            seen.add(tuple(row))
+                            initial.append(row)
+                    logger.info(f"Loaded {len(initial) - 1} rows via request replay.")
+                    return initial
+            logger.info("Request replay unavailable, clicking through 'Load more' instead.")
+
+        await self.load_all_results(page)
+        logger.info("Extracting final table data...")
+        return self.parse_table_with_links(await page.content(), BASE_URL)
 
     async def get_mn_registrations(self):
         """Scrape Minnesota franchise registrations and save to CSV."""
@@ -109,6 +154,8 @@ class MinnesotaScraperDB:
         async with async_playwright() as playwright:
             browser = await playwright.chromium.launch(headless=False)
             context = await browser.new_context()
+            await attach_replay_harness(context)
+            await apply_blocking_profile(context, MN_BLOCKING_PROFILE)
             page = await context.new_page()
             
             try:
@@ -116,15 +163,8 @@ class MinnesotaScraperDB:
                 await page.goto(MN_URL, wait_until='networkidle', timeout=60000)
                 logger.info("Page loaded successfully.")
                 
-                # Load all results
-                await self.load_all_results(page)
-                
-                logger.info("Extracting final table data with BeautifulSoup...")
-                raw_html = await page.content()
-                soup = BeautifulSoup(raw_html, 'html.parser')
-                
-                # Parse table data
-                scraped_data = self.parse_table_with_links(soup, BASE_URL)
+                # Load all results and parse table data
+                scraped_data = await self.load_all_table_data(page)
                 
                 if len(scraped_data) > 1:
                     # Convert to pandas DataFrame
@@ -173,13 +213,58 @@ class MinnesotaScraperDB:
                 await context.close()
                 await browser.close()
 
+    def build_pdf_filename(self, franchisor: str, year: str, file_number: str) -> str:
+        """Create filename with convention: {Franchisor}_{Year}_{File Number}_MN.pdf"""
+        year_clean = str(year).replace('/', '-')
+        safe_franchisor = re.sub(r'[<>:"/\\|?*]', '_', str(franchisor))
+        safe_file_number = re.sub(r'[<>:"/\\|?*]', '_', str(file_number))
+        return f"{safe_franchisor}_{year_clean}_{safe_file_number}_MN.pdf"
+
+    def store_pdf(self, pdf_content: bytes, franchisor: str, year: str, file_number: str) -> Optional[Dict]:
+        """Upload downloaded PDF content and return metadata for database integration."""
+        filename = self.build_pdf_filename(franchisor, year, file_number)
+        try:
+            # Upload to Google Drive
+            file_id = self.drive_manager.upload_file(
+                file_content=pdf_content,
+                filename=filename,
+                parent_id=PDF_FOLDER_ID,
+                mime_type="application/pdf"
+            )
+            
+            logger.info(f"PDF uploaded to Google Drive: {filename} (ID: {file_id})")
+            
+            # Return metadata for database integration
+            pdf_info = {
+                "filename": filename,
+                "file_id": file_id,
+                "content": pdf_content,
+                "drive_path": f"/mn/{filename}",
+                "franchisor": franchisor,
+                "year": year,
+                "file_number": file_number
+            }
+            
+            self.downloaded_pdfs.append(pdf_info)
+            return pdf_info
+                
+        except Exception as upload_error:
+            logger.error(f"Error uploading PDF to Google Drive: {upload_error}")
+            # Fallback: save locally
+            download_dir = Path(__file__).parent / "downloads" / "MN"
+            download_dir.mkdir(parents=True, exist_ok=True)
+            fallback_path = download_dir / filename
+            fallback_path.write_bytes(pdf_content)
+            logger.warning(f"PDF saved locally as fallback: {fallback_path}")
+            return None
+
     async def download_pdf(self, page, document_url: str, franchisor: str, year: str, file_number: str) -> Optional[Dict]:
-        """Download PDF file and return metadata for database integration."""
+        """Download PDF file through the browser and return metadata for database integration."""
         try:
             logger.info(f"Attempting to download PDF for {franchisor} (File Number: {file_number})")
             
             # Navigate to the document URL
-            await page.goto(document_url, wait_until='networkidle', timeout=60000)
+            await throttled_goto(page, document_url, wait_until='networkidle', timeout=60000)
             await page.wait_for_load_state('networkidle')
             
             # Start waiting for the download
@@ -189,59 +274,20 @@ class MinnesotaScraperDB:
             try:
                 download = await download_info.value
                 
-                # Format filename
-                year_clean = str(year).replace('/', '-')
-                safe_franchisor = re.sub(r'[<>:"/\\|?*]', '_', str(franchisor))
-                safe_file_number = re.sub(r'[<>:"/\\|?*]', '_', str(file_number))
-                filename = f"{safe_franchisor}_{year_clean}_{safe_file_number}_MN.pdf"
-                
                 # Download to temporary location
                 temp_path = Path(await download.path())
                 
-                try:
-                    # Read the downloaded file
-                    with open(temp_path, 'rb') as f:
-                        pdf_content = f.read()
-                    
-                    logger.info(f"PDF downloaded, size: {len(pdf_content)} bytes")
-                    
-                    # Upload to Google Drive
-                    file_id = self.drive_manager.upload_file(
-                        file_content=pdf_content,
-                        filename=filename,
-                        parent_id=PDF_FOLDER_ID,
-                        mime_type="application/pdf"
-                    )
-                    
-                    logger.info(f"PDF uploaded to Google Drive: {filename} (ID: {file_id})")
-                    
-                    # Clean up temp file
-                    if temp_path.exists():
-                        temp_path.unlink()
-                    
-                    # Return metadata for database integration
-                    pdf_info = {
-                        "filename": filename,
-                        "file_id": file_id,
-                        "content": pdf_content,
-                        "drive_path": f"/mn/{filename}",
-                        "franchisor": franchisor,
-                        "year": year,
-                        "file_number": file_number
-                    }
-                    
-                    self.downloaded_pdfs.append(pdf_info)
-                    return pdf_info
-                        
-                except Exception as upload_error:
-                    logger.error(f"Error uploading PDF to Google Drive: {upload_error}")
-                    # Fallback: save locally
-                    download_dir = Path(__file__).parent / "downloads" / "MN"
-                    download_dir.mkdir(parents=True, exist_ok=True)
-                    fallback_path = download_dir / filename
-                    temp_path.rename(fallback_path)
-                    logger.warning(f"PDF saved locally as fallback: {fallback_path}")
-                    return None
+                # Read the downloaded file
+                with open(temp_path, 'rb') as f:
+                    pdf_content = f.read()
+                
+                logger.info(f"PDF downloaded, size: {len(pdf_content)} bytes")
+                
+                # Clean up temp file
+                if temp_path.exists():
+                    temp_path.unlink()
+                
+                return self.store_pdf(pdf_content, franchisor, year, file_number)
                     
             except Exception as download_error:
                 logger.warning(f"Could not download PDF directly: {download_error}")
@@ -251,51 +297,64 @@ class MinnesotaScraperDB:
             logger.error(f"Error accessing document for {franchisor}: {e}")
             return None
 
-    async def download_all_pdfs(self, df):
-        """Download all PDFs from the registration DataFrame."""
+    async def download_all_pdfs(self, df, concurrency: int = 4):
+        """Download all PDFs from the registration DataFrame.
+
+        Document links point straight at the PDFs, so they are fetched over a
+        pooled HTTP client; a browser is only started for links that need
+        JavaScript.
+        """
         logger.info(f"Starting PDF downloads for {len(df)} registrations...")
         
-        async with async_playwright() as playwright:
-            browser = await playwright.chromium.launch(headless=False)
-            context = await browser.new_context(accept_downloads=True)
-            page = await context.new_page()
-            
-            try:
-                success_count = 0
-                
-                for index, row in df.iterrows():
-                    try:
-                        logger.info(f"Processing {index + 1} of {len(df)}")
-                        
-                        # Extract data from row
-                        document_url = row.get('Document Link', '')
-                        franchisor = row.get('Franchisor', 'Unknown')
-                        year = row.get('Year', 'Unknown')
-                        file_number = row.get('File Number', 'Unknown')
-                        
-                        if not document_url or not document_url.startswith('http'):
-                            logger.warning(f"No valid document URL for {franchisor}")
-                            continue
-                        
-                        pdf_info = await self.download_pdf(page, document_url, franchisor, year, file_number)
-                        if pdf_info:
-                            success_count += 1
-                        
-                        # Small delay between downloads
-                        await asyncio.sleep(2)
-                        
-                    except Exception as row_error:
-                        logger.error(f"Error processing row {index + 1}: {row_error}")
-                        continue
-                
-                logger.info(f"Successfully processed {success_count} out of {len(df)} documents")
-                
-            finally:
-                await context.close()
-                await browser.close()
+        rows_by_url = {}
+        for index, row in df.iterrows():
+            document_url = row.get('Document Link', '')
+            if not document_url or not document_url.startswith('http'):
+                logger.warning(f"No valid document URL for {row.get('Franchisor', 'Unknown')}")
+                continue
+            rows_by_url.setdefault(document_url, row)
+        
+        success_count = 0
+        
+        async def handle_result(result):
+            nonlocal success_count
+            row = rows_by_url[result.url]
+            franchisor = row.get('Franchisor', 'Unknown')
+            if not result.success:
+                logger.error(f"Error downloading PDF for {franchisor}: {result.error}")
+                return
+            logger.info(f"PDF downloaded for {franchisor} via {result.via}, size: {result.size} bytes")
+            # Drive uploads are blocking; keep them off the event loop
+            pdf_info = await asyncio.to_thread(
+                self.store_pdf,
+                result.content,
+                franchisor,
+                row.get('Year', 'Unknown'),
+                row.get('File Number', 'Unknown'),
+            )
+            if pdf_info:
+                success_count += 1
+        
+        fallback = PlaywrightFallback(headless=False)
+        try:
+            async with HTTPDownloader(
+                browser_fallback=fallback, rate_limited=True, resumable=True
+            ) as downloader:
+                await downloader.download_many(
+                    list(rows_by_url), concurrency=concurrency, on_result=handle_result
+                )
+                logger.info(f"Downloader stats: {downloader.get_stats()}")
+        finally:
+            await fallback.close()
+        
+        logger.info(f"Successfully processed {success_count} out of {len(df)} documents")
 
-    async def run_full_scrape_with_db(self, max_pdfs: Optional[int] = None):
-        """Run complete scrape with database integration."""
+    async def run_full_scrape_with_db(self, max_pdfs: Optional[int] = None, incremental: bool = True):
+        """Run complete scrape with database integration.
+
+        In incremental mode only registrations that are new or changed since
+        the last run are downloaded and saved.
+        """
         try:
             # Step 1: Scrape registrations
             logger.info("Step 1: Scraping Minnesota registrations...")
@@ -305,6 +364,16 @@ class MinnesotaScraperDB:
                 logger.error("No registrations found, stopping.")
                 return
             
+            entries = []
+            snapshot = None
+            if incremental:
+                snapshot = RegistrationSnapshot("MN")
+                diff = snapshot.diff_dataframe(df, key_column='File Number')
+                snapshot.record(diff)
+                entries = diff.to_enqueue
+                df = df.iloc[[entry.position for entry in entries]]
+                logger.info(f"Incremental mode: {len(df)} new or changed registrations ({diff.summary()})")
+            
             # Step 2: Download PDFs (limit for testing)
             if max_pdfs:
                 df = df.head(max_pdfs)
@@ -313,6 +382,18 @@ class MinnesotaScraperDB:
             logger.info("Step 2: Downloading PDFs...")
             await self.download_all_pdfs(df)
             
+            if snapshot is not None:
+                # A filing has one row per year; only confirm the rows whose PDF was stored
+                stored_rows = {
+                    (str(pdf['file_number']).strip(), str(pdf['year']))
+                    for pdf in self.downloaded_pdfs
+                }
+                snapshot.mark_stored_many(
+                    (entry.key, entry.row_hash)
+                    for entry in entries
+                    if (entry.key, str(entry.record.get('Year', 'Unknown'))) in stored_rows
+                )
+            
             # Step 3: Process data and save to database
             logger.info("Step 3: Processing data and saving to database...")
             stats = self.db_integration.process_scraped_data(
@@ -4,19 +4,26 @@ import os
 import sys
 from datetime import datetime
 import io
+from urllib.parse import urljoin
 from playwright.async_api import Playwright, async_playwright, expect
-from bs4 import BeautifulSoup
 import pandas as pd
 from pandas import DataFrame as df
 
 # Add the parent directory to the path so we can import from storage
 sys.path.append(str(Path(__file__).parent.parent))
 from storage.google_drive import DriveManager
+from scrapers.base.details_crawler import DetailsCrawler
+from scrapers.base.http_downloader import HTTPDownloader
+from scrapers.base.rate_limiter import throttled_goto
+from scrapers.base.replay_harness import attach_replay_harness
+from scrapers.base.resource_blocking import apply_blocking_profile, get_profile
+from scrapers.base.table_extraction import extract_table
+from utils.scraping_utils import parse_dates
 
 # Set the client_secret.json path before importing config
 os.environ["GDRIVE_CREDS_JSON"] = str(Path(__file__).parent.parent / "storage" / "client_secret.json")
 
-async def get_active_registrations(playwright: Playwright) -> list:
+async def get_active_registrations(playwright: Playwright, headless: bool = False) -> list:
     """Get active franchise registrations from Wisconsin DFI site."""
     
     #DEFINE CONSTANTS
@@ -31,17 +38,17 @@ async def get_active_registrations(playwright: Playwright) -> list:
     drive_manager = DriveManager(use_oauth2=True, token_file="wi_scraper_token.pickle")
     
     #LAUNCH BROWSER    
-    browser = await playwright.chromium.launch(headless=False)
+    browser = await playwright.chromium.launch(headless=headless)
     context = await browser.new_context()
+    await attach_replay_harness(context)
+    await apply_blocking_profile(context, WI_BLOCKING_PROFILE)
     page = await context.new_page()
     
     try:
         #Get Active Registrations
         await page.goto("https://apps.dfi.wi.gov/apps/FranchiseEFiling/activeFilings.aspx", wait_until='networkidle')
         raw_html = await page.content()
-        soup = BeautifulSoup(raw_html, 'html.parser')
-        table = soup.find('table', id='ctl00_contentPlaceholder_grdActiveFilings')
-        df = pd.read_html(io.StringIO(str(table)))[0]
+        df = extract_table(raw_html, table_id='ctl00_contentPlaceholder_grdActiveFilings').to_dataframe()
         print(f"Found {len(df)} active registrations")
         
         #SAVE REGISTRATIONS TO CSV in Google Drive
@@ -76,6 +83,87 @@ async def get_active_registrations(playwright: Playwright) -> list:
         await browser.close()
 
 
+WI_SEARCH_URL = "https://apps.dfi.wi.gov/apps/FranchiseSearch/MainSearch.aspx"
+WI_PORTAL_HOST = "apps.dfi.wi.gov"
+WI_DETAILS_BASE_URL = "https://apps.dfi.wi.gov/apps/FranchiseSearch/"
+# Skip images/fonts/CSS/trackers on portal pages; set BLOCKING_PROFILE=none to load everything
+WI_BLOCKING_PROFILE = get_profile(os.environ.get("BLOCKING_PROFILE", "table_scraping"))
+
+
+async def process_franchise_name(page, name: str) -> int:
+    """Search one franchise name and download the PDFs for its active filings.
+
+    Returns:
+        Number of details pages visited for this name
+    """
+    print(f"Searching for: {name}")
+    await throttled_goto(page, WI_SEARCH_URL, wait_until='networkidle')
+    await page.locator("#txtName").click()
+    await page.locator("#txtName").fill(name)
+    await page.get_by_role("button", name="(S)earch").click()  # Fixed button selector
+    await page.wait_for_load_state('networkidle')
+
+    #Read the table of results and the Details links in a single pass
+    raw_html = await page.content()
+    table = extract_table(raw_html, table_id='grdSearchResults', base_url=WI_DETAILS_BASE_URL)
+
+    if not table.headers:
+        print(f"No search results table found for {name}")
+        return 0
+
+    # The Details link is in the last column (index 6), one URL per row
+    df = table.to_dataframe(link_columns={6: 'Details_URL'})
+    # Parse the effective dates of the whole column at once; values that
+    # are not dates are kept as scraped
+    if 'Effective Date' in df.columns:
+        effective = parse_dates(df['Effective Date'])
+        df['Effective Date'] = effective.dt.strftime('%Y-%m-%d').where(
+            effective.notna(), df['Effective Date']
+        )
+    print(f"Found {len(df)} search results")
+#TODO: DELETE DUPLICATES IN TABLE PRIOR TO DOWNLOADING PDFS
+
+    visited = 0
+    for index, row in df.iterrows():
+        try:
+            print(f"Processing row {index + 1} of {len(df)}")
+
+            # Check if we have a valid details URL
+            details_url = row.get('Details_URL')
+            if pd.isna(details_url) or details_url is None:
+                print(f"No details URL found for {row.get('Legal Name', 'Unknown')}")
+                continue
+
+            # Skip expired registrations if desired
+            if row['Expiration Date'] == "Expired":
+                print(f"Skipping expired registration for {row.get('Legal Name', 'Unknown')}")
+                continue
+
+            print("Processing row for: ", row['Legal Name'])
+            print(f"Details URL: {details_url}")
+#TODO: KEEP TRACK OF THIS DATA BY ADDING TO CSV FILE SHEET AND UPLOADING TO DATABASE
+#TODO: CONNECT THIS FLOW TO DATABASE UPOLOADS INCLUDING PDF URL 
+#TODO: ADD A CHECK TO SEE IF THE PDF HAS ALREADY BEEN DOWNLOADED
+            filing_number = row['File Number']
+            legal_name = row['Legal Name'] 
+            trade_name = row['Trade Name']
+            effective_date = row['Effective Date']
+            expiration_date = row['Expiration Date']
+            filing_status = row['Status']
+
+            # Navigate to the details page
+            await throttled_goto(page, details_url)
+            await page.wait_for_load_state('networkidle')
+            await download_pdf(page, details_url, legal_name, trade_name, effective_date, filing_number)
+            visited += 1
+
+        except Exception as row_error:
+            print(f"Error processing row for {row.get('Legal Name', 'Unknown')}: {row_error}")
+            continue
+
+    return visited
+
+
 async def search_franchise_details(playwright: Playwright, franchise_names: list) -> None:
     """Search for detailed information on individual franchises."""
     
@@ -84,95 +172,15 @@ async def search_franchise_details(playwright: Playwright, franchise_names: list
     #LAUNCH BROWSER    
     browser = await playwright.chromium.launch(headless=False)
     context = await browser.new_context()
+    await attach_replay_harness(context)
+    await apply_blocking_profile(context, WI_BLOCKING_PROFILE)
     page = await context.new_page()
     
     try:
         #GO TO MAIN SEARCH PAGE    
         for name in franchise_names:
             try:
-                print(f"Searching for: {name}")
-                await page.goto("https://apps.dfi.wi.gov/apps/FranchiseSearch/MainSearch.aspx", wait_until='networkidle')
-                await page.locator("#txtName").click()
-                await page.locator("#txtName").fill(name)
-                await page.get_by_role("button", name="(S)earch").click()  # Fixed button selector
-                await page.wait_for_load_state('networkidle')
-
-                #Read the table of results into dataframe and extract hyperlinks
-                raw_html = await page.content()
-                soup = BeautifulSoup(raw_html, 'html.parser')
-                table = soup.find('table', id='grdSearchResults')
-                
-                if not table:
-                    print(f"No search results table found for {name}")
-                    continue
-                
-                # Get the DataFrame with text content
-                try:
-                    df = pd.read_html(io.StringIO(str(table)))[0]
-                    print(f"Found {len(df)} search results")
-                except Exception as e:
-                    print(f"Error parsing table for {name}: {e}")
-                    continue
-                
-                # Extract hyperlinks from the Details column using BeautifulSoup
-                details_links = []
-                table_rows = table.find_all('tr')[1:]  # Skip header row
-    #TODO: DELETE DUPLICATES IN TABLE PRIOR TO DOWNLOADING PDFS
-                for tr in table_rows:
-                    cells = tr.find_all('td')
-                    if len(cells) >= 7:  # Make sure we have enough columns
-                        # The Details link is typically in the last column (index 6)
-                        details_cell = cells[6]
-                        link = details_cell.find('a')
-                        if link and link.get('href'):
-                            # Convert relative URL to absolute URL
-                            href = link.get('href')
-                            details_url = "https://apps.dfi.wi.gov/apps/FranchiseSearch/" + href
-                            details_links.append(details_url)
-                        else:
-                            details_links.append(None)  # No link found in this row
-                    else:
-                        details_links.append(None)  # Row doesn't have enough columns
-                
-                # Add the extracted links to the DataFrame (one URL per row)
-                df['Details_URL'] = details_links[:len(df)]
-                
-                for index, row in df.iterrows():
-                    try:
-                        print(f"Processing row {index + 1} of {len(df)}")
-                        
-                        # Check if we have a valid details URL
-                        details_url = row.get('Details_URL')
-                        if pd.isna(details_url) or details_url is None:
-                            print(f"No details URL found for {row.get('Legal Name', 'Unknown')}")
-                            continue
-                            
-                        # Skip expired registrations if desired
-                        if row['Expiration Date'] == "Expired":
-                            print(f"Skipping expired registration for {row.get('Legal Name', 'Unknown')}")
-                            continue
-                            
-                        print("Processing row for: ", row['Legal Name'])
-                        print(f"Details URL: {details_url}")
-      #TODO: KEEP TRACK OF THIS DATA BY ADDING TO CSV FILE SHEET AND UPLOADING TO DATABASE
-      #TODO: CONNECT THIS FLOW TO DATABASE UPOLOADS INCLUDING PDF URL 
-      #TODO: ADD A CHECK TO SEE IF THE PDF HAS ALREADY BEEN DOWNLOADED
-                        filing_number = row['File Number']
-                        legal_name = row['Legal Name'] 
-                        trade_name = row['Trade Name']
-                        effective_date = row['Effective Date']
-                        expiration_date = row['Expiration Date']
-                        filing_status = row['Status']
-                        
-                        # Navigate to the details page
-                        await page.goto(details_url)
-                        await page.wait_for_load_state('networkidle')
-                        await download_pdf(page, details_url, legal_name, trade_name, effective_date, filing_number)
-                        
-                    except Exception as row_error:
-                        print(f"Error processing row for {row.get('Legal Name', 'Unknown')}: {row_error}")
-                        continue
-                        
+                await process_franchise_name(page, name)
             except Exception as name_error:
                 print(f"Error processing franchise {name}: {name_error}")
                 continue
@@ -191,6 +199,64 @@ async def search_franchise_details(playwright: Playwright, franchise_names: list
             print(f"Error during cleanup: {cleanup_error}")
 
 
+async def search_franchise_details_concurrent(
+    franchise_names: list,
+    concurrency: int = None,
+    headless: bool = True,
+    item_timeout: float = 300.0,
+) -> dict:
+    """Search franchise details concurrently across pooled browser contexts.
+
+    Each franchise name is a work item; up to ``concurrency`` names are
+    searched at once, each in its own browser context.
+
+    Args:
+        franchise_names: Franchise names to search
+        concurrency: Number of parallel contexts (default: MAX_WORKERS env or portal default)
+        headless: Run the browser in headless mode
+        item_timeout: Maximum seconds to spend on one franchise name
+
+    Returns:
+        Crawl statistics including items/minute
+    """
+    if concurrency is None and os.environ.get("MAX_WORKERS"):
+        concurrency = int(os.environ["MAX_WORKERS"])
+
+    print(f"Searching details for {len(franchise_names)} franchises concurrently...")
+    crawler = DetailsCrawler(
+        handler=process_franchise_name,
+        concurrency=concurrency,
+        portal=WI_PORTAL_HOST,
+        headless=headless,
+        item_timeout=item_timeout,
+        blocking_profile=WI_BLOCKING_PROFILE,
+    )
+    results = await crawler.crawl(franchise_names)
+
+    for result in results:
+        if not result.success:
+            print(f"Error processing franchise {result.item}: {result.error}")
+
+    stats = crawler.get_stats()
+    print(
+        f"[SUMMARY] Processed {stats['processed']} franchises "
+        f"({stats['succeeded']} ok, {stats['failed']} failed, {stats['timed_out']} timed out) "
+        f"at {stats['items_per_minute']} items/min"
+    )
+    return stats
+
+
+async def fetch_pdf_over_http(page, href: str) -> bytes:
+    """Fetch a PDF link over plain HTTP using the browser session's cookies."""
+    url = urljoin(page.url, href)
+    # One client per call: concurrent crawler contexts each have their own
+    # portal session cookie, which must not be shared between them.
+    async with HTTPDownloader(rate_limited=True, resumable=True) as downloader:
+        await downloader.import_cookies(page.context)
+        result = await downloader.download(url)
+    return result.content
+
+
 async def download_pdf(page, details_url: str, legal_name: str, trade_name: str, effective_date: str, filing_number: str) -> None:
     """Download PDF file from the franchise details page and upload to Google Drive."""
     
@@ -219,11 +285,22 @@ async def download_pdf(page, details_url: str, legal_name: str, trade_name: str,
                 break
         
         if download_button:
-            # Start waiting for the download
-            async with page.expect_download() as download_info:
-                # Perform the action that initiates download
-                await download_button.first.click()
-            download = await download_info.value
+            # Plain links can be fetched over HTTP; postback buttons need the browser
+            pdf_content = None
+            href = await download_button.first.get_attribute("href")
+            if href and not href.lower().startswith("javascript"):
+                try:
+                    pdf_content = await fetch_pdf_over_http(page, href)
+                except Exception as http_error:
+                    print(f"[WARNING] HTTP download failed, using browser: {http_error}")
+            
+            download = None
+            if pdf_content is None:
+                # Start waiting for the download
+                async with page.expect_download() as download_info:
+                    # Perform the action that initiates download
+                    await download_button.first.click()
+                download = await download_info.value
             
             # Format the date from effective_date (assuming format like "2024-12-01")
             try:
@@ -266,12 +343,13 @@ async def download_pdf(page, details_url: str, legal_name: str, trade_name: str,
             filename = f"{safe_trade_name}_{formatted_date}_{safe_file_number}_WI.pdf"
             
             # Download to temporary location first
-            temp_path = Path(await download.path())
+            temp_path = Path(await download.path()) if download else None
             
             try:
                 # Read the downloaded file
-                with open(temp_path, 'rb') as f:
-                    pdf_content = f.read()
+                if temp_path:
+                    with open(temp_path, 'rb') as f:
+                        pdf_content = f.read()
                 
                 # Upload to Google Drive
                 file_id = drive_manager.upload_file(
@@ -283,7 +361,7 @@ async def download_pdf(page, details_url: str, legal_name: str, trade_name: str,
                 print(f"[SUCCESS] PDF uploaded to Google Drive: {filename} (ID: {file_id})")
                 
                 # Clean up the temporary download
-                if temp_path.exists():
+                if temp_path and temp_path.exists():
                     temp_path.unlink()
                     
             except Exception as upload_error:
@@ -291,7 +369,10 @@ async def download_pdf(page, details_url: str, legal_name: str, trade_name: str,
                 # Fallback: save locally if upload fails
                 DOWNLOAD_DIR = Path(__file__).parent / "downloads" / "WI"
                 DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
-                await download.save_as(DOWNLOAD_DIR / filename)
+                if download:
+                    await download.save_as(DOWNLOAD_DIR / filename)
+                else:
+                    (DOWNLOAD_DIR / filename).write_bytes(pdf_content)
                 print(f"[WARNING] PDF saved locally as fallback: {DOWNLOAD_DIR / filename}")
             
         else:
@@ -301,7 +382,7 @@ async def download_pdf(page, details_url: str, legal_name: str, trade_name: str,
         print(f"[ERROR] Error downloading PDF for {legal_name}: {e}")
 
 
-async def run(playwright: Playwright, max_franchises: int = None) -> None:
+async def run(playwright: Playwright, max_franchises: int = None, concurrent: bool = True) -> None:
     """Main function that orchestrates both scraping operations."""
     
     # First, get the list of active registrations
@@ -313,7 +394,11 @@ async def run(playwright: Playwright, max_franchises: int = None) -> None:
         print(f"Limited to first {max_franchises} franchises for testing")
     
     # Then search for detailed information on each franchise
-    await search_franchise_details(playwright, franchise_names)
+    if concurrent:
+        headless = os.environ.get("HEADLESS", "true").lower() != "false"
+        await search_franchise_details_concurrent(franchise_names, headless=headless)
+    else:
+        await search_franchise_details(playwright, franchise_names)
 
 
 if __name__ == "__main__":
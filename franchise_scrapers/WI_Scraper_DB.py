@@ -10,14 +10,17 @@ from pathlib import Path
 from typing import List, Dict, Optional
 
 import pandas as pd
-from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
 
 # Add the parent directory to the path so we can import from storage
 sys.path.append(str(Path(__file__).parent.parent))
 from storage.google_drive import DriveManager
 from franchise_scrapers.database_integration import get_scraper_database
+from scrapers.base.rate_limiter import throttled_goto
+from scrapers.base.replay_harness import attach_replay_harness
+from scrapers.base.table_extraction import extract_table
 from utils.logging import get_logger
+from utils.scraping_utils import parse_dates
 
 logger = get_logger(__name__)
 
@@ -27,6 +30,7 @@ os.environ["GDRIVE_CREDS_JSON"] = str(Path(__file__).parent.parent / "storage" /
 # --- Constants ---
 CSV_FOLDER_ID = "1BaJLNcxdVni0IztL5yh7wup8DcMMzxB5"  # CSV folder ID for WI
 PDF_FOLDER_ID = "1kvDCC7SXJciG1W6hksfAFJmNA0FRqLEB"  # PDF folder ID for WI
+WI_DETAILS_BASE_URL = "https://apps.dfi.wi.gov/apps/FranchiseSearch/"
 
 
 class WisconsinScraperDB:
@@ -49,20 +53,20 @@ class WisconsinScraperDB:
         async with async_playwright() as playwright:
             browser = await playwright.chromium.launch(headless=False)
             context = await browser.new_context()
+            await attach_replay_harness(context)
             page = await context.new_page()
             
             try:
                 # Get Active Registrations
                 await page.goto("https://apps.dfi.wi.gov/apps/FranchiseEFiling/activeFilings.aspx", wait_until='networkidle')
                 raw_html = await page.content()
-                soup = BeautifulSoup(raw_html, 'html.parser')
-                table = soup.find('table', id='ctl00_contentPlaceholder_grdActiveFilings')
+                table = extract_table(raw_html, table_id='ctl00_contentPlaceholder_grdActiveFilings')
                 
-                if not table:
+                if not table.headers:
                     logger.error("Could not find active registrations table")
                     return []
                 
-                df = pd.read_html(io.StringIO(str(table)))[0]
+                df = table.to_dataframe()
                 logger.info(f"Found {len(df)} active registrations")
                 
                 # Save registrations to CSV in Google Drive
@@ -221,55 +225,39 @@ class WisconsinScraperDB:
         async with async_playwright() as playwright:
             browser = await playwright.chromium.launch(headless=False)
             context = await browser.new_context()
+            await attach_replay_harness(context)
             page = await context.new_page()
             
             try:
                 for name in franchise_names:
                     try:
                         logger.info(f"Searching for: {name}")
-                        await page.goto("https://apps.dfi.wi.gov/apps/FranchiseSearch/MainSearch.aspx", wait_until='networkidle')
+                        await throttled_goto(page, "https://apps.dfi.wi.gov/apps/FranchiseSearch/MainSearch.aspx", wait_until='networkidle')
                         await page.locator("#txtName").click()
                         await page.locator("#txtName").fill(name)
                         await page.get_by_role("button", name="(S)earch").click()
                         await page.wait_for_load_state('networkidle')
 
-                        # Read the table of results
+                        # Read the table of results and the Details links in one pass
                         raw_html = await page.content()
-                        soup = BeautifulSoup(raw_html, 'html.parser')
-                        table = soup.find('table', id='grdSearchResults')
+                        table = extract_table(
+                            raw_html, table_id='grdSearchResults', base_url=WI_DETAILS_BASE_URL
+                        )
                         
-                        if not table:
+                        if not table.headers:
                             logger.warning(f"No search results table found for {name}")
                             continue
                         
-                        # Get the DataFrame with text content
-                        try:
-                            df = pd.read_html(io.StringIO(str(table)))[0]
-                            logger.info(f"Found {len(df)} search results")
-                        except Exception as e:
-                            logger.error(f"Error parsing table for {name}: {e}")
-                            continue
-                        
-                        # Extract hyperlinks from the Details column
-                        details_links = []
-                        table_rows = table.find_all('tr')[1:]  # Skip header row
-                        
-                        for tr in table_rows:
-                            cells = tr.find_all('td')
-                            if len(cells) >= 7:
-                                details_cell = cells[6]
-                                link = details_cell.find('a')
-                                if link and link.get('href'):
-                                    href = link.get('href')
-                                    details_url = "https://apps.dfi.wi.gov/apps/FranchiseSearch/" + href
-                                    details_links.append(details_url)
-                                else:
-                                    details_links.append(None)
-                            else:
-                                details_links.append(None)
-                        
-                        # Add the extracted links to the DataFrame
-                        df['Details_URL'] = details_links[:len(df)]
+                        # The Details link is in column 6, one URL per row
+                        df = table.to_dataframe(link_columns={6: 'Details_URL'})
+                        # Parse the effective dates of the whole column at once; values that
+                        # are not dates are kept as scraped
+                        if 'Effective Date' in df.columns:
+                            effective = parse_dates(df['Effective Date'])
+                            df['Effective Date'] = effective.dt.strftime('%Y-%m-%d').where(
+                                effective.notna(), df['Effective Date']
+                            )
+                        logger.info(f"Found {len(df)} search results")
                         
                         for index, row in df.iterrows():
                             try:
@@ -296,7 +284,7 @@ class WisconsinScraperDB:
                                 filing_status = row['Status']
                                 
                                 # Navigate to the details page
-                                await page.goto(details_url)
+                                await throttled_goto(page, details_url)
                                 await page.wait_for_load_state('networkidle')
                                 
                                 # Download PDF
@@ -305,9 +293,6 @@ class WisconsinScraperDB:
                                     effective_date, filing_number
                                 )
                                 
-                                # Small delay between downloads
-                                await asyncio.sleep(2)
-                                
                             except Exception as row_error:
                                 logger.error(f"Error processing row for {row.get('Legal Name', 'Unknown')}: {row_error}")
                                 continue
@@ -3,7 +3,7 @@
 import hashlib
 import sys
 from pathlib import Path
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, Iterable, List, Set, Tuple
 from uuid import UUID, uuid4
 from datetime import datetime, date
 import pandas as pd
@@ -11,20 +11,63 @@ import pandas as pd
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
+from scrapers.base.franchisor_cache import get_franchisor_cache, get_fresh_franchisor_cache
+from scrapers.base.known_documents import KnownDocumentFilter, get_known_documents
 from storage.database.manager import get_database_manager
 from models.franchisor import FranchisorCreate, Franchisor
 from models.fdd import FDDCreate, FDD, DocumentType, ProcessingStatus
 from models.scrape_metadata import ScrapeMetadataCreate, ScrapeStatus
 from utils.logging import get_logger
+from utils.scraping_utils import parse_dates
 
 logger = get_logger(__name__)
 
+# Column names of the scraped registration tables, by state
+STATE_COLUMNS = {
+    "MN": {"name": "Franchisor", "filing_number": "File Number", "date": "Year"},
+    "WI": {"name": "Legal Name", "filing_number": "File Number", "date": "Effective Date"},
+}
+
+# Values per IN (...) lookup, keeping PostgREST query strings short
+LOOKUP_CHUNK_SIZE = 200
+
+
+def _normalize_keys(values: pd.Series) -> pd.Series:
+    """Normalize join keys: stripped, lower-cased, empty for missing values."""
+    keys = values.astype(object).where(values.notna(), "").astype(str).str.strip().str.lower()
+    return keys.where(keys != "nan", "")
+
+
+def _to_dates(timestamps: pd.Series) -> pd.Series:
+    """Convert a datetime Series to ``date`` objects, with None for NaT."""
+    dates = timestamps.dt.date.astype(object)
+    dates[timestamps.isna()] = None
+    return dates
+
 
 class ScraperDatabaseIntegration:
     """Handles database operations for scrapers with deduplication."""
     
     def __init__(self):
         self.db = get_database_manager()
+        self._known_documents: Optional[KnownDocumentFilter] = None
+        self._known_documents_loaded = False
+        
+    def _get_known_documents(self) -> Optional[KnownDocumentFilter]:
+        """Local filter of stored FDDs, refreshed on first use.
+        
+        Returns None if the refresh failed: a stale filter could report a
+        stored document as new, so every check then goes to the database.
+        """
+        if not self._known_documents_loaded:
+            self._known_documents_loaded = True
+            known_documents = get_known_documents()
+            try:
+                known_documents.refresh(self.db)
+                self._known_documents = known_documents
+            except Exception as e:
+                logger.warning(f"Known document filter unavailable, using database checks: {e}")
+        return self._known_documents
         
     def find_or_create_franchisor(self, name: str, **kwargs) -> UUID:
         """Find existing franchisor or create new one.
@@ -40,6 +83,13 @@ class ScraperDatabaseIntegration:
             # Clean and normalize the name
             canonical_name = name.strip().title()
             
+            # Known franchisors resolve from the cache without a round trip
+            cache = get_fresh_franchisor_cache(self.db)
+            cached = cache.get_by_canonical_name(canonical_name) if cache else None
+            if cached:
+                logger.debug(f"Found cached franchisor: {canonical_name}")
+                return UUID(cached["id"])
+            
             # Search for existing franchisor by name
             existing = self.db.get_records_by_filter(
                 "franchisors", 
@@ -49,25 +99,12 @@ class ScraperDatabaseIntegration:
             
             if existing:
                 logger.debug(f"Found existing franchisor: {canonical_name}")
+                get_franchisor_cache().put(existing[0])
                 return UUID(existing[0]["id"])
             
-            # Create new franchisor using Pydantic validation
-            franchisor_data = FranchisorCreate(
-                canonical_name=canonical_name,
-                parent_company=kwargs.get("parent_company"),
-                website=kwargs.get("website"),
-                phone=kwargs.get("phone"),
-                email=kwargs.get("email"),
-                dba_names=kwargs.get("dba_names", [])
-            )
-            
-            # Convert to dict using model_dump for proper serialization
-            record = franchisor_data.model_dump(mode='json')
-            record["id"] = str(uuid4())
-            record["created_at"] = datetime.utcnow().isoformat()
-            record["updated_at"] = datetime.utcnow().isoformat()
-            
+            record = self._build_franchisor_record(canonical_name, **kwargs)
             self.db.execute_batch_insert("franchisors", [record])
+            get_franchisor_cache().put(record)
             
             logger.info(f"Created new franchisor: {canonical_name}")
             return UUID(record["id"])
@@ -76,6 +113,74 @@ class ScraperDatabaseIntegration:
             logger.error(f"Error finding/creating franchisor {name}: {e}")
             raise
     
+    def _build_franchisor_record(self, canonical_name: str, **kwargs) -> Dict:
+        """Validate and serialize a new franchisor row."""
+        # Create new franchisor using Pydantic validation
+        franchisor_data = FranchisorCreate(
+            canonical_name=canonical_name,
+            parent_company=kwargs.get("parent_company"),
+            website=kwargs.get("website"),
+            phone=kwargs.get("phone"),
+            email=kwargs.get("email"),
+            dba_names=kwargs.get("dba_names", [])
+        )
+        
+        # Convert to dict using model_dump for proper serialization
+        record = franchisor_data.model_dump(mode='json')
+        record["id"] = str(uuid4())
+        record["created_at"] = datetime.utcnow().isoformat()
+        record["updated_at"] = datetime.utcnow().isoformat()
+        return record
+    
+    def _fetch_by_values(self, table_name: str, column: str, values: Iterable) -> List[Dict]:
+        """Fetch rows whose column is in values, one IN query per chunk."""
+        unique = list(dict.fromkeys(v for v in values if v))
+        records = []
+        for i in range(0, len(unique), LOOKUP_CHUNK_SIZE):
+            records.extend(
+                self.db.get_records_by_filter(
+                    table_name, {column: unique[i:i + LOOKUP_CHUNK_SIZE]}
+                )
+            )
+        return records
+    
+    def find_or_create_franchisors(self, names: Iterable[str]) -> Tuple[Dict[str, UUID], Set[str]]:
+        """Resolve many franchisor names with set-based queries.
+        
+        Args:
+            names: Franchisor names (normalized like find_or_create_franchisor)
+            
+        Returns:
+            Tuple of (canonical name -> franchisor UUID, names that were created)
+        """
+        canonical_names = list(dict.fromkeys(
+            name.strip().title() for name in names if name and name.strip()
+        ))
+        cache = get_fresh_franchisor_cache(self.db)
+        existing = {
+            name: UUID(str(record["id"]))
+            for name, record in (cache.get_by_canonical_names(canonical_names) if cache else {}).items()
+        }
+        # Names the cache does not know may still have been stored by another run
+        fetched = self._fetch_by_values(
+            "franchisors", "canonical_name", [name for name in canonical_names if name not in existing]
+        )
+        get_franchisor_cache().put_many(fetched)
+        existing.update({record["canonical_name"]: UUID(str(record["id"])) for record in fetched})
+        
+        new_records = [
+            self._build_franchisor_record(name)
+            for name in canonical_names if name not in existing
+        ]
+        if new_records:
+            self.db.batch.batch_insert_chunked("franchisors", new_records)
+            get_franchisor_cache().put_many(new_records)
+            logger.info(f"Created {len(new_records)} new franchisors")
+        
+        resolved = dict(existing)
+        resolved.update({record["canonical_name"]: UUID(record["id"]) for record in new_records})
+        return resolved, {record["canonical_name"] for record in new_records}
+    
     def check_fdd_duplicate(self, 
                            franchisor_id: UUID, 
                            filing_state: str, 
@@ -95,6 +200,18 @@ class ScraperDatabaseIntegration:
             Existing FDD UUID if duplicate found, None otherwise
         """
         try:
+            # Documents the local filter has never seen are new without a
+            # database round trip; only possible hits are looked up
+            known_documents = self._get_known_documents()
+            if known_documents is not None:
+                if sha256_hash:
+                    if not known_documents.might_contain_hash(sha256_hash):
+                        return None
+                elif filing_number and not known_documents.might_contain_filing(
+                    filing_state, filing_number
+                ):
+                    return None
+            
             filters = {
                 "franchise_id": str(franchisor_id),
                 "filing_state": filing_state
@@ -160,32 +277,21 @@ class ScraperDatabaseIntegration:
             Created FDD UUID
         """
         try:
-            # Use Pydantic model for validation
-            fdd_data = FDDCreate(
-                franchise_id=franchisor_id,
-                issue_date=issue_date or date.today(),
-                amendment_date=amendment_date,
-                document_type=document_type,
+            record = self._build_fdd_record(
+                franchisor_id=franchisor_id,
                 filing_state=filing_state,
-                filing_number=filing_number,
-                drive_path=drive_path,
                 drive_file_id=drive_file_id,
+                drive_path=drive_path,
+                filing_number=filing_number,
+                issue_date=issue_date,
+                amendment_date=amendment_date,
+                document_type=document_type,
                 sha256_hash=sha256_hash,
-                total_pages=total_pages,
-                language_code="en"
+                total_pages=total_pages
             )
-            
-            # Convert to dict and add additional fields
-            record = fdd_data.model_dump(mode='json')
-            fdd_id = uuid4()
-            record["id"] = str(fdd_id)
-            record["is_amendment"] = document_type == DocumentType.AMENDMENT
-            record["processing_status"] = ProcessingStatus.PENDING.value
-            record["needs_review"] = False
-            record["created_at"] = datetime.utcnow().isoformat()
-            
             self.db.execute_batch_insert("fdds", [record])
             
+            fdd_id = UUID(record["id"])
             logger.info(f"Created FDD record: {fdd_id}")
             return fdd_id
             
@@ -193,6 +299,42 @@ class ScraperDatabaseIntegration:
             logger.error(f"Error creating FDD record: {e}")
             raise
     
+    def _build_fdd_record(self,
+                          franchisor_id: UUID,
+                          filing_state: str,
+                          drive_file_id: str,
+                          drive_path: str,
+                          filing_number: Optional[str] = None,
+                          issue_date: Optional[date] = None,
+                          amendment_date: Optional[date] = None,
+                          document_type: DocumentType = DocumentType.INITIAL,
+                          sha256_hash: Optional[str] = None,
+                          total_pages: Optional[int] = None) -> Dict:
+        """Validate and serialize a new FDD row."""
+        # Use Pydantic model for validation
+        fdd_data = FDDCreate(
+            franchise_id=franchisor_id,
+            issue_date=issue_date or date.today(),
+            amendment_date=amendment_date,
+            document_type=document_type,
+            filing_state=filing_state,
+            filing_number=filing_number,
+            drive_path=drive_path,
+            drive_file_id=drive_file_id,
+            sha256_hash=sha256_hash,
+            total_pages=total_pages,
+            language_code="en"
+        )
+        
+        # Convert to dict and add additional fields
+        record = fdd_data.model_dump(mode='json')
+        record["id"] = str(uuid4())
+        record["is_amendment"] = document_type == DocumentType.AMENDMENT
+        record["processing_status"] = ProcessingStatus.PENDING.value
+        record["needs_review"] = False
+        record["created_at"] = datetime.utcnow().isoformat()
+        return record
+    
     def calculate_pdf_hash(self, pdf_content: bytes) -> str:
         """Calculate SHA256 hash of PDF content."""
         return hashlib.sha256(pdf_content).hexdigest()
@@ -226,10 +368,9 @@ class ScraperDatabaseIntegration:
             Created scrape metadata UUID
         """
         try:
-            # Create using Pydantic model for validation
-            metadata = ScrapeMetadataCreate(
+            record = self._build_scrape_metadata_record(
                 fdd_id=fdd_id,
-                source_name=source_name.upper(),
+                source_name=source_name,
                 source_url=source_url,
                 download_url=download_url,
                 portal_id=portal_id,
@@ -237,18 +378,12 @@ class ScraperDatabaseIntegration:
                 effective_date=effective_date,
                 scrape_status=scrape_status,
                 failure_reason=failure_reason,
-                filing_metadata=filing_metadata or {},
-                downloaded_at=datetime.utcnow() if scrape_status == ScrapeStatus.DOWNLOADED else None
+                filing_metadata=filing_metadata
             )
-            
-            # Convert to dict and add ID
-            record = metadata.model_dump(mode='json')
-            metadata_id = uuid4()
-            record["id"] = str(metadata_id)
-            record["created_at"] = datetime.utcnow().isoformat()
-            
             self.db.execute_batch_insert("scrape_metadata", [record])
             
+            metadata_id = UUID(record["id"])
+            
             logger.info(f"Created scrape metadata: {metadata_id}")
             return metadata_id
             
@@ -256,12 +391,50 @@ class ScraperDatabaseIntegration:
             logger.error(f"Error creating scrape metadata: {e}")
             raise
     
+    def _build_scrape_metadata_record(self,
+                                      fdd_id: UUID,
+                                      source_name: str,
+                                      source_url: str,
+                                      download_url: Optional[str] = None,
+                                      portal_id: Optional[str] = None,
+                                      registration_status: Optional[str] = None,
+                                      effective_date: Optional[date] = None,
+                                      scrape_status: ScrapeStatus = ScrapeStatus.DOWNLOADED,
+                                      failure_reason: Optional[str] = None,
+                                      filing_metadata: Optional[Dict] = None) -> Dict:
+        """Validate and serialize a new scrape metadata row."""
+        # Create using Pydantic model for validation
+        metadata = ScrapeMetadataCreate(
+            fdd_id=fdd_id,
+            source_name=source_name.upper(),
+            source_url=source_url,
+            download_url=download_url,
+            portal_id=portal_id,
+            registration_status=registration_status,
+            effective_date=effective_date,
+            scrape_status=scrape_status,
+            failure_reason=failure_reason,
+            filing_metadata=filing_metadata or {},
+            downloaded_at=datetime.utcnow() if scrape_status == ScrapeStatus.DOWNLOADED else None
+        )
+        
+        # Convert to dict and add ID
+        record = metadata.model_dump(mode='json')
+        record["id"] = str(uuid4())
+        record["created_at"] = datetime.utcnow().isoformat()
+        return record
+    
     def process_scraped_data(self, 
                            scraped_df: pd.DataFrame, 
                            state_code: str,
                            pdf_downloads: List[Dict]) -> Dict[str, int]:
         """Process scraped data and save to database with deduplication.
         
+        Rows are joined to downloads on normalized filing number (falling back
+        to franchisor name), franchisors are resolved in bulk, and FDD and
+        scrape metadata rows are inserted in bulk, so the number of database
+        round trips does not grow with the number of rows.
+        
         Args:
             scraped_df: DataFrame with scraped registration data
             state_code: State code (MN, WI)
@@ -280,149 +453,84 @@ class ScraperDatabaseIntegration:
         }
         
         try:
-            # Create a mapping of PDF downloads by filename or identifier
-            pdf_map = {}
-            for pdf_info in pdf_downloads:
-                # Use filename as key, removing file extension
-                key = Path(pdf_info["filename"]).stem
-                pdf_map[key] = pdf_info
-            
-            for index, row in scraped_df.iterrows():
+            columns = STATE_COLUMNS.get(state_code)
+            if columns is None:
+                logger.warning(f"Unknown state code: {state_code}")
+                return stats
+            if scraped_df.empty:
+                return stats
+            
+            rows = self._scraped_rows(scraped_df, state_code, columns)
+            named = rows["franchisor_name"].str.strip() != ""
+            if (~named).any():
+                logger.warning(f"No franchisor name in {int((~named).sum())} rows")
+            rows = rows[named].copy()
+            if rows.empty:
+                logger.info(f"Processing complete: {stats}")
+                return stats
+            
+            # Resolve every franchisor in a few set-based queries
+            rows["canonical_name"] = rows["franchisor_name"].str.strip().str.title()
+            franchisor_ids, created = self.find_or_create_franchisors(rows["canonical_name"])
+            rows["franchisor_id"] = rows["canonical_name"].map(franchisor_ids)
+            was_created = rows["canonical_name"].isin(created)
+            stats["franchisors_created"] = int(was_created.sum())
+            stats["franchisors_found"] = int((~was_created).sum())
+            
+            # Join rows to their downloads
+            rows = self._match_downloads(rows, pdf_downloads)
+            unmatched = rows["pdf_index"].isna()
+            if unmatched.any():
+                logger.warning(f"No PDF found for {int(unmatched.sum())} rows")
+            rows = rows[~unmatched].copy()
+            if rows.empty:
+                logger.info(f"Processing complete: {stats}")
+                return stats
+            rows["pdf_index"] = rows["pdf_index"].astype(int)
+            
+            # Hash each matched PDF once for deduplication
+            hashes = {
+                index: self.calculate_pdf_hash(pdf_downloads[index]["content"])
+                for index in rows["pdf_index"].unique()
+            }
+            rows["sha256_hash"] = rows["pdf_index"].map(hashes)
+            
+            # Duplicates: hash already stored, or repeated within this batch.
+            # Only hashes the local filter may have seen are looked up.
+            known_documents = self._get_known_documents()
+            candidates = list(hashes.values())
+            if known_documents is not None:
+                candidates = known_documents.possible_hashes(candidates)
+            known = {
+                record["sha256_hash"]
+                for record in self._fetch_by_values("fdds", "sha256_hash", candidates)
+            }
+            duplicate = rows["sha256_hash"].isin(known) | rows["sha256_hash"].duplicated()
+            stats["fdds_duplicates"] = int(duplicate.sum())
+            rows = rows[~duplicate]
+            
+            fdd_records, metadata_records = self._build_batch_records(
+                rows, state_code, pdf_downloads, stats
+            )
+            
+            if fdd_records:
                 try:
-                    # Extract franchisor name (column names vary by state)
-                    if state_code == "MN":
-                        franchisor_name = row.get("Franchisor", "")
-                        filing_number = row.get("File Number", "")
-                        year = row.get("Year", "")
-                    elif state_code == "WI":
-                        franchisor_name = row.get("Legal Name", "")
-                        filing_number = row.get("File Number", "")
-                        effective_date_str = row.get("Effective Date", "")
-                    else:
-                        logger.warning(f"Unknown state code: {state_code}")
-                        continue
-                    
-                    if not franchisor_name:
-                        logger.warning(f"No franchisor name in row {index}")
-                        continue
-                    
-                    # Find or create franchisor
-                    franchisor_id = self.find_or_create_franchisor(franchisor_name)
-                    if franchisor_id:
-                        # Check if this was a new creation
-                        existing = self.db.get_records_by_filter(
-                            "franchisors", 
-                            {"id": str(franchisor_id)},
-                            limit=1
-                        )
-                        if existing and existing[0]["created_at"] == existing[0]["updated_at"]:
-                            stats["franchisors_created"] += 1
-                        else:
-                            stats["franchisors_found"] += 1
-                    
-                    # Look for corresponding PDF download
-                    pdf_info = None
-                    for key, pdf_data in pdf_map.items():
-                        if (franchisor_name.lower() in key.lower() or 
-                            filing_number in key):
-                            pdf_info = pdf_data
-                            break
-                    
-                    if not pdf_info:
-                        logger.warning(f"No PDF found for {franchisor_name}")
-                        continue
-                    
-                    # Calculate PDF hash for deduplication
-                    pdf_hash = self.calculate_pdf_hash(pdf_info["content"])
-                    
-                    # Parse dates
-                    issue_date = None
-                    if state_code == "MN" and year:
-                        try:
-                            issue_date = date(int(year), 1, 1)  # Use Jan 1 as default
-                        except ValueError:
-                            pass
-                    elif state_code == "WI" and effective_date_str:
-                        try:
-                            issue_date = datetime.strptime(effective_date_str, "%Y-%m-%d").date()
-                        except ValueError:
-                            try:
-                                issue_date = datetime.strptime(effective_date_str, "%m/%d/%Y").date()
-                            except ValueError:
-                                pass
-                    
-                    # Check for duplicates
-                    duplicate_id = self.check_fdd_duplicate(
-                        franchisor_id=franchisor_id,
-                        filing_state=state_code,
-                        filing_number=filing_number,
-                        issue_date=issue_date,
-                        sha256_hash=pdf_hash
-                    )
-                    
-                    if duplicate_id:
-                        stats["fdds_duplicates"] += 1
-                        logger.info(f"Skipping duplicate FDD for {franchisor_name}")
-                        continue
-                    
-                    # Create FDD record
-                    fdd_id = self.create_fdd_record(
-                        franchisor_id=franchisor_id,
-                        filing_state=state_code,
-                        drive_file_id=pdf_info["file_id"],
-                        drive_path=pdf_info.get("drive_path", f"/{state_code.lower()}/{pdf_info['filename']}"),
-                        filing_number=filing_number,
-                        issue_date=issue_date,
-                        sha256_hash=pdf_hash,
-                        total_pages=pdf_info.get("total_pages")
-                    )
-                    
-                    if fdd_id:
-                        stats["fdds_created"] += 1
-                        logger.info(f"Created FDD record for {franchisor_name}: {fdd_id}")
-                        
-                        # Create scrape metadata record
-                        try:
-                            # Extract metadata from row
-                            source_url = row.get("Document Link", "") or row.get("Details Link", "")
-                            download_url = row.get("PDF Link", "") or row.get("Download Link", "")
-                            
-                            # Parse effective date if available
-                            effective_date = None
-                            if state_code == "WI" and effective_date_str:
-                                try:
-                                    effective_date = datetime.strptime(effective_date_str, "%Y-%m-%d").date()
-                                except ValueError:
-                                    try:
-                                        effective_date = datetime.strptime(effective_date_str, "%m/%d/%Y").date()
-                                    except ValueError:
-                                        pass
-                            
-                            # Create metadata record
-                            self.create_scrape_metadata(
-                                fdd_id=fdd_id,
-                                source_name=state_code,
-                                source_url=source_url,
-                                download_url=download_url,
-                                portal_id=filing_number,
-                                registration_status=row.get("Status", "Registered"),
-                                effective_date=effective_date,
-                                scrape_status=ScrapeStatus.DOWNLOADED,
-                                filing_metadata={
-                                    "year": row.get("Year"),
-                                    "trade_name": row.get("Trade Name"),
-                                    "notes": row.get("Notes"),
-                                    "row_index": index
-                                }
-                            )
-                        except Exception as metadata_error:
-                            logger.error(f"Error creating scrape metadata: {metadata_error}")
-                            # Don't fail the whole process for metadata errors
-                    
-                except Exception as row_error:
-                    stats["errors"] += 1
-                    logger.error(f"Error processing row {index}: {row_error}")
-                    continue
+                    self.db.batch.batch_insert_chunked("fdds", fdd_records)
+                    stats["fdds_created"] = len(fdd_records)
+                    if known_documents is not None:
+                        known_documents.add_records(fdd_records)
+                        known_documents.save()
+                except Exception as insert_error:
+                    stats["errors"] += len(fdd_records)
+                    logger.error(f"Error creating FDD records: {insert_error}")
+                    metadata_records = []
+            
+            if metadata_records:
+                try:
+                    self.db.batch.batch_insert_chunked("scrape_metadata", metadata_records)
+                except Exception as metadata_error:
+                    logger.error(f"Error creating scrape metadata: {metadata_error}")
+                    # Don't fail the whole process for metadata errors
             
             logger.info(f"Processing complete: {stats}")
             return stats
@@ -431,6 +539,132 @@ class ScraperDatabaseIntegration:
             logger.error(f"Error processing scraped data: {e}")
             raise
     
+    def _scraped_rows(self, scraped_df: pd.DataFrame, state_code: str, columns: Dict[str, str]) -> pd.DataFrame:
+        """Select and normalize the columns used for persistence."""
+        def column(name: str, default=None) -> pd.Series:
+            if name in scraped_df.columns:
+                return scraped_df[name]
+            return pd.Series(default, index=scraped_df.index, dtype=object)
+        
+        rows = pd.DataFrame({
+            "row_index": scraped_df.index,
+            "franchisor_name": column(columns["name"], "").fillna("").astype(str).values,
+            "filing_number": column(columns["filing_number"], "").fillna("").astype(str).values,
+        })
+        rows["number_key"] = _normalize_keys(rows["filing_number"])
+        rows["name_key"] = _normalize_keys(rows["franchisor_name"])
+        
+        # Parse issue dates for the whole column at once
+        raw_dates = column(columns["date"]).reset_index(drop=True)
+        if state_code == "MN":
+            years = pd.to_numeric(raw_dates, errors="coerce")
+            years = years.where((years >= 1) & (years <= 9999) & (years % 1 == 0))
+            issue_dates = pd.to_datetime(
+                pd.DataFrame({"year": years, "month": 1, "day": 1}), errors="coerce"
+            )  # Use Jan 1 as default
+            effective_dates = pd.Series(pd.NaT, index=rows.index)
+        else:
+            issue_dates = parse_dates(raw_dates)
+            effective_dates = issue_dates
+        rows["issue_date"] = _to_dates(issue_dates)
+        rows["effective_date"] = _to_dates(effective_dates)
+        
+        def first_present(*names: str) -> pd.Series:
+            result = pd.Series("", index=scraped_df.index, dtype=object)
+            for name in reversed(names):
+                values = column(name)
+                result = values.where(values.notna() & (values.astype(str) != ""), result)
+            return result.reset_index(drop=True)
+        
+        rows["source_url"] = first_present("Document Link", "Details Link")
+        rows["download_url"] = first_present("PDF Link", "Download Link")
+        rows["registration_status"] = column("Status", "Registered").fillna("Registered").reset_index(drop=True)
+        for name, key in (("Year", "year"), ("Trade Name", "trade_name"), ("Notes", "notes")):
+            values = column(name).reset_index(drop=True)
+            rows[key] = values.astype(object).where(values.notna(), None)
+        return rows
+    
+    def _match_downloads(self, rows: pd.DataFrame, pdf_downloads: List[Dict]) -> pd.DataFrame:
+        """Attach the index of each row's PDF download (NaN if none).
+        
+        Rows match on filing number first and franchisor name second; when
+        several downloads share a key, the first one wins.
+        """
+        pdfs = pd.DataFrame({
+            "pdf_index": range(len(pdf_downloads)),
+            "number_key": [
+                info.get("file_number") or info.get("filing_number")
+                # Scraper filenames end in _{filing number}_{state}.pdf
+                or (Path(info["filename"]).stem.rsplit("_", 2)[-2]
+                    if Path(info["filename"]).stem.count("_") >= 2 else "")
+                for info in pdf_downloads
+            ],
+            "name_key": [
+                info.get("franchisor") or info.get("legal_name") or ""
+                for info in pdf_downloads
+            ],
+        })
+        pdfs["number_key"] = _normalize_keys(pdfs["number_key"])
+        pdfs["name_key"] = _normalize_keys(pdfs["name_key"])
+        
+        by_number = pdfs.loc[pdfs["number_key"] != "", ["number_key", "pdf_index"]] \
+            .drop_duplicates("number_key")
+        by_name = pdfs.loc[pdfs["name_key"] != "", ["name_key", "pdf_index"]] \
+            .drop_duplicates("name_key").rename(columns={"pdf_index": "pdf_by_name"})
+        
+        matched = rows.merge(by_number, on="number_key", how="left")
+        matched = matched.merge(by_name, on="name_key", how="left")
+        matched["pdf_index"] = matched["pdf_index"].fillna(matched["pdf_by_name"])
+        return matched.drop(columns=["pdf_by_name"])
+    
+    def _build_batch_records(self,
+                             rows: pd.DataFrame,
+                             state_code: str,
+                             pdf_downloads: List[Dict],
+                             stats: Dict[str, int]) -> Tuple[List[Dict], List[Dict]]:
+        """Build validated FDD and scrape metadata rows for new documents."""
+        fdd_records = []
+        metadata_records = []
+        for row in rows.to_dict("records"):
+            try:
+                pdf_info = pdf_downloads[row["pdf_index"]]
+                fdd_record = self._build_fdd_record(
+                    franchisor_id=row["franchisor_id"],
+                    filing_state=state_code,
+                    drive_file_id=pdf_info["file_id"],
+                    drive_path=pdf_info.get("drive_path", f"/{state_code.lower()}/{pdf_info['filename']}"),
+                    filing_number=row["filing_number"],
+                    issue_date=row["issue_date"],
+                    sha256_hash=row["sha256_hash"],
+                    total_pages=pdf_info.get("total_pages")
+                )
+            except Exception as row_error:
+                stats["errors"] += 1
+                logger.error(f"Error processing row {row['row_index']}: {row_error}")
+                continue
+            fdd_records.append(fdd_record)
+            
+            try:
+                metadata_records.append(self._build_scrape_metadata_record(
+                    fdd_id=UUID(fdd_record["id"]),
+                    source_name=state_code,
+                    source_url=row["source_url"] or "",
+                    download_url=row["download_url"] or "",
+                    portal_id=row["filing_number"],
+                    registration_status=row["registration_status"],
+                    effective_date=row["effective_date"],
+                    scrape_status=ScrapeStatus.DOWNLOADED,
+                    filing_metadata={
+                        "year": row["year"],
+                        "trade_name": row["trade_name"],
+                        "notes": row["notes"],
+                        "row_index": row["row_index"]
+                    }
+                ))
+            except Exception as metadata_error:
+                logger.error(f"Error creating scrape metadata: {metadata_error}")
+        return fdd_records, metadata_records
+    
     def get_duplicate_fdds(self) -> List[Dict]:
         """Find all duplicate FDDs in the database."""
         try:
@@ -312,8 +312,22 @@ async def health_check():
 @click.option("--parallel", is_flag=True, help="Run states in parallel")
 @click.option("--limit", type=int, help="Limit number of documents to process")
 @click.option("--skip-download", is_flag=True, help="Skip downloading documents")
+@click.option(
+    "--max-browsers", type=int, help="Global cap on browser contexts (parallel runs)"
+)
+@click.option(
+    "--max-http", type=int, help="Global cap on HTTP connections (parallel runs)"
+)
+@click.option("--max-llm", type=int, help="Global cap on LLM calls (parallel runs)")
 async def run_all(
-    days: int, state: str, parallel: bool, limit: Optional[int], skip_download: bool
+    days: int,
+    state: str,
+    parallel: bool,
+    limit: Optional[int],
+    skip_download: bool,
+    max_browsers: Optional[int] = None,
+    max_http: Optional[int] = None,
+    max_llm: Optional[int] = None,
 ):
     """Run complete pipeline for all configured states"""
     from datetime import timedelta
@@ -339,36 +353,34 @@ async def run_all(
 
     # Run scrapers
     if parallel and state == "all":
-        # Run states in parallel
-        tasks = []
-        # Always include Minnesota when state is "all"
-        from workflows.base_state_flow import scrape_state_flow
-        from workflows.state_configs import MINNESOTA_CONFIG, WISCONSIN_CONFIG
-
-        tasks.append(
-            scrape_state_flow.fn(
-                state_config=MINNESOTA_CONFIG,
-                download_documents=download_documents,
-                max_documents=max_documents,
-            )
-        )
+        # Run every configured state concurrently; browser contexts, HTTP
+        # connections and LLM calls are capped globally and shared fairly
+        from utils.resource_budget import ResourceBudget
+        from workflows.multi_state import run_states_in_parallel
 
-        # Always include Wisconsin when state is "all"
-        tasks.append(
-            scrape_state_flow.fn(
-                state_config=WISCONSIN_CONFIG,
-                download_documents=download_documents,
-                max_documents=max_documents,
-            )
+        budget = ResourceBudget.from_env(
+            browser=max_browsers, http=max_http, llm=max_llm
+        )
+        run_results = await run_states_in_parallel(
+            budget=budget,
+            download_documents=download_documents,
+            max_documents=max_documents,
         )
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Flow {i} failed: {result}")
+        for state_code, summary in run_results["states"].items():
+            if summary["status"] == "completed":
+                logger.info(
+                    f"{state_code} completed in {summary['elapsed_seconds']}s "
+                    f"({summary['documents_downloaded']} documents, "
+                    f"{summary['documents_per_second']} docs/s)"
+                )
             else:
-                logger.info(f"Flow {i} completed successfully")
+                logger.error(f"{state_code} failed: {summary['error']}")
+        logger.info(
+            f"All states finished in {run_results['wall_clock_seconds']}s "
+            f"(slowest state {run_results['slowest_state_seconds']}s, "
+            f"{run_results['sequential_seconds']}s if run one after another)"
+        )
     else:
         # Run states sequentially
         await scrape(state=state, limit=max_documents, test_mode=skip_download)
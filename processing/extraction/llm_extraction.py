@@ -38,6 +38,7 @@ from models.item21_financials import Item21FinancialsResponse
 from utils.prompt_loader import get_prompt_loader
 from utils.extraction_monitoring import get_extraction_monitor, MonitoredExtraction
 from utils.logging import PipelineLogger, get_logs_dir
+from utils.resource_budget import RESOURCE_LLM, get_resource_budget
 from scrapers.base.exceptions import (
     LLMExtractionException,
     ModelInitializationError,
@@ -280,22 +281,44 @@ class ModelSelector:
 
 
 class ConnectionPool:
-    """Connection pool for async LLM clients."""
+    """Connection pool for async LLM clients.
+
+    When a global resource budget is active (parallel multi-state runs), each
+    connection also takes an LLM slot from it, shared fairly between states.
+    """
 
     def __init__(self, max_connections: int = 10):
         self.max_connections = max_connections
         self.semaphore = asyncio.Semaphore(max_connections)
         self._active_connections = 0
+        # Budget slots held per task: (limiter, tenant)
+        self._budget_slots: Dict[Any, List[Tuple[Any, str]]] = defaultdict(list)
 
     async def acquire(self):
         """Acquire a connection from the pool."""
         await self.semaphore.acquire()
+        budget = get_resource_budget()
+        if budget is not None:
+            limiter = budget.limiter(RESOURCE_LLM)
+            try:
+                tenant = await limiter.acquire()
+            except BaseException:
+                self.semaphore.release()
+                raise
+            self._budget_slots[asyncio.current_task()].append((limiter, tenant))
         self._active_connections += 1
         logger.debug(f"Acquired connection, active: {self._active_connections}")
 
     def release(self):
         """Release a connection back to the pool."""
         self._active_connections -= 1
+        task = asyncio.current_task()
+        held = self._budget_slots.get(task)
+        if held:
+            limiter, tenant = held.pop()
+            limiter.release(tenant)
+            if not held:
+                del self._budget_slots[task]
         self.semaphore.release()
         logger.debug(f"Released connection, active: {self._active_connections}")
 
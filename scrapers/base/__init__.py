@@ -1,9 +1,32 @@
 """Base scraper components."""
 
-from scrapers.base.base_scraper import BaseScraper, DocumentMetadata
 from scrapers.base.session_pool import SessionPool
+from scrapers.base.batch_similarity import BatchSimilarityScorer, SimilarityEdge, group_edges
+from scrapers.base.details_crawler import DetailsCrawler, CrawlResult, CrawlStats
+from scrapers.base.download_queue import DownloadQueue, DownloadJob
+from scrapers.base.http_downloader import (
+    HTTPDownloader,
+    DownloadProgress,
+    DownloadResult,
+    StreamedDownload,
+    log_download_progress,
+)
+from scrapers.base.franchisor_cache import FranchisorCache, get_franchisor_cache
+from scrapers.base.known_documents import KnownDocumentFilter, get_known_documents
+from scrapers.base.load_more_replay import LoadMoreReplayer, replay_load_more
+from scrapers.base.name_index import NameBlockingIndex
 from scrapers.base.pdf_cache import PDFCache
+from scrapers.base.rate_limiter import AdaptiveRateLimiter, get_rate_limiter
+from scrapers.base.replay_harness import FixtureArchive, ReplayHarness, use_replay_harness
+from scrapers.base.resource_blocking import BlockingProfile, TABLE_SCRAPING_PROFILE, LIGHT_PROFILE
+from scrapers.base.registration_snapshot import RegistrationSnapshot, SnapshotDiff
 from scrapers.base.similarity import SimilarityCalculator
+from scrapers.base.table_extraction import (
+    ExtractedTable,
+    TableRow,
+    extract_table,
+    iter_table_rows,
+)
 from scrapers.base.exceptions import (
     ScraperError,
     NavigationTimeoutError,
@@ -12,13 +35,45 @@ from scrapers.base.exceptions import (
 )
 
 __all__ = [
-    "BaseScraper",
-    "DocumentMetadata",
     "SessionPool",
+    "BatchSimilarityScorer",
+    "SimilarityEdge",
+    "group_edges",
+    "DetailsCrawler",
+    "CrawlResult",
+    "CrawlStats",
+    "DownloadQueue",
+    "DownloadJob",
+    "HTTPDownloader",
+    "DownloadResult",
+    "StreamedDownload",
+    "DownloadProgress",
+    "log_download_progress",
+    "FranchisorCache",
+    "get_franchisor_cache",
+    "KnownDocumentFilter",
+    "get_known_documents",
+    "LoadMoreReplayer",
+    "replay_load_more",
+    "NameBlockingIndex",
     "PDFCache",
+    "AdaptiveRateLimiter",
+    "get_rate_limiter",
+    "FixtureArchive",
+    "ReplayHarness",
+    "use_replay_harness",
+    "BlockingProfile",
+    "TABLE_SCRAPING_PROFILE",
+    "LIGHT_PROFILE",
+    "RegistrationSnapshot",
+    "SnapshotDiff",
     "SimilarityCalculator",
+    "ExtractedTable",
+    "TableRow",
+    "extract_table",
+    "iter_table_rows",
     "ScraperError",
     "NavigationTimeoutError",
     "DownloadError",
     "CacheError",
-]
\ No newline at end of file
+]
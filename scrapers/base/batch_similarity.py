@@ -0,0 +1,220 @@
+"""Batch franchisor deduplication over the whole corpus.
+
+Comparing every franchisor with every other through
+:meth:`SimilarityCalculator.calculate_similarity` is O(N²) pure-Python
+fuzzy matching. :class:`BatchSimilarityScorer` normalizes every name once,
+then works through the distinct normalized names in blocks: each name is
+looked up in a :class:`NameBlockingIndex` over the corpus, and only the
+candidates after it in the block order are scored, so each pair is scored
+once. Blocks are spread over a process pool, each worker building its own
+index when it starts.
+
+The result is an edge list of franchisor pairs scoring at least the
+threshold, with the same scores ``calculate_similarity`` gives.
+:func:`group_edges` turns it into per-franchisor match lists in the format
+of ``find_similar_franchisors``, ready for ``merge_recommendation``.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from scrapers.base.name_index import NameBlockingIndex
+from scrapers.base.similarity import SimilarityCalculator
+from utils.logging import get_logger
+
+
+DEFAULT_BLOCK_SIZE = 500
+
+# Per-process state of pool workers, set by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+@dataclass(frozen=True)
+class SimilarityEdge:
+    """Two franchisors whose best name pair scores at least the threshold."""
+
+    source_id: Hashable
+    target_id: Hashable
+    score: float
+
+
+def _identity(name: str) -> str:
+    return name
+
+
+def _init_worker(names: List[str], threshold: float):
+    calculator = SimilarityCalculator()
+    index = NameBlockingIndex(_identity, word_overlap_weight=calculator.WORD_OVERLAP_WEIGHT)
+    for position, name in enumerate(names):
+        index.add(position, [name])
+    _worker.update(names=names, threshold=threshold, index=index, score=calculator.score_normalized)
+
+
+def _score_block(bounds: Tuple[int, int]) -> List[Tuple[int, int, float]]:
+    """Score the names in ``[start, stop)`` against the names after them."""
+    names, threshold = _worker["names"], _worker["threshold"]
+    index, score = _worker["index"], _worker["score"]
+    edges = []
+    for i in range(*bounds):
+        name = names[i]
+        for other, positions in index.candidates(name, threshold).items():
+            j = next(iter(positions))
+            if j <= i:
+                continue
+            pair_score = score(name, other)
+            if pair_score >= threshold:
+                edges.append((i, j, pair_score))
+    return edges
+
+
+class BatchSimilarityScorer:
+    """Scores all franchisor pairs of a corpus above a threshold.
+
+    Args:
+        threshold: Minimum similarity of an emitted edge
+        workers: Worker processes (default: CPU count); 1 scores in-process
+        block_size: Distinct names per unit of work handed to a worker
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        workers: Optional[int] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ):
+        self.threshold = threshold
+        self.workers = workers or os.cpu_count() or 1
+        self.block_size = block_size
+        self.calculator = SimilarityCalculator(threshold)
+        self.logger = get_logger(__name__)
+        self._normalized: Dict[str, str] = {}
+
+    def normalize(self, name: str) -> str:
+        """Normalized form of a name, computed once per distinct name."""
+        normalized = self._normalized.get(name)
+        if normalized is None:
+            normalized = self._normalized[name] = self.calculator.normalize_name(name)
+        return normalized
+
+    def score_corpus(self, franchisors: Iterable[Dict]) -> List[SimilarityEdge]:
+        """Score every pair of franchisors, canonical and trade names alike.
+
+        Franchisors sharing a normalized name are linked with score 1.0.
+        Names normalizing to the empty string are skipped, since the
+        substring rule would match them with every name.
+
+        Returns:
+            Edges ordered by score descending; ``source_id`` is the
+            franchisor that came first in ``franchisors``
+        """
+        start = time.perf_counter()
+        order: Dict[Hashable, int] = {}
+        positions: Dict[str, int] = {}
+        names: List[str] = []
+        ids_of: List[List[Hashable]] = []
+        for franchisor in franchisors:
+            franchisor_id = franchisor["id"]
+            order.setdefault(franchisor_id, len(order))
+            for name in SimilarityCalculator._franchisor_names(franchisor):
+                normalized = self.normalize(name) if name else ""
+                if not normalized:
+                    continue
+                position = positions.get(normalized)
+                if position is None:
+                    position = positions[normalized] = len(names)
+                    names.append(normalized)
+                    ids_of.append([])
+                if franchisor_id not in ids_of[position]:
+                    ids_of[position].append(franchisor_id)
+
+        best: Dict[Tuple[Hashable, Hashable], float] = {}
+
+        def link(id_a, id_b, score):
+            if id_a == id_b:
+                return
+            key = (id_a, id_b) if order[id_a] < order[id_b] else (id_b, id_a)
+            if score > best.get(key, 0.0):
+                best[key] = score
+
+        for ids in ids_of:
+            for a in range(len(ids)):
+                for b in range(a + 1, len(ids)):
+                    link(ids[a], ids[b], 1.0)
+
+        name_pairs = 0
+        for i, j, score in self._score_names(names):
+            name_pairs += 1
+            for id_a in ids_of[i]:
+                for id_b in ids_of[j]:
+                    link(id_a, id_b, score)
+
+        edges = [SimilarityEdge(a, b, round(score, 3)) for (a, b), score in best.items()]
+        edges.sort(key=lambda edge: (-edge.score, order[edge.source_id], order[edge.target_id]))
+        self.logger.info(
+            f"Scored {len(order)} franchisors ({len(names)} distinct names) in "
+            f"{time.perf_counter() - start:.1f}s: {name_pairs} name pairs, {len(edges)} edges "
+            f"at threshold {self.threshold}"
+        )
+        return edges
+
+    def recommend_merges(self, franchisors: Iterable[Dict]) -> Dict[Hashable, Dict]:
+        """Run ``merge_recommendation`` for every franchisor with matches.
+
+        Returns:
+            Recommendation per franchisor id, for those that got one
+        """
+        franchisors = list(franchisors)
+        matches = group_edges(self.score_corpus(franchisors), franchisors)
+        recommendations = {}
+        for franchisor_id, similar in matches.items():
+            recommendation = self.calculator.merge_recommendation(similar)
+            if recommendation is not None:
+                recommendations[franchisor_id] = recommendation
+        return recommendations
+
+    def _score_names(self, names: List[str]) -> Iterable[Tuple[int, int, float]]:
+        blocks = [
+            (start, min(start + self.block_size, len(names)))
+            for start in range(0, len(names), self.block_size)
+        ]
+        if self.workers <= 1 or len(blocks) <= 1:
+            _init_worker(names, self.threshold)
+            try:
+                for block in blocks:
+                    yield from _score_block(block)
+            finally:
+                _worker.clear()
+            return
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(names, self.threshold),
+        ) as pool:
+            for edges in pool.map(_score_block, blocks):
+                yield from edges
+
+
+def group_edges(edges: Iterable[SimilarityEdge], franchisors: Iterable[Dict]) -> Dict[Hashable, List[Dict]]:
+    """Match lists per franchisor, shaped like ``find_similar_franchisors`` results.
+
+    Each list holds the franchisor's neighbours sorted by score descending,
+    then canonical name, so it can be passed to ``merge_recommendation``.
+    """
+    records = {franchisor["id"]: franchisor for franchisor in franchisors}
+    matches: Dict[Hashable, List[Dict]] = {}
+    for edge in edges:
+        for own_id, other_id in ((edge.source_id, edge.target_id), (edge.target_id, edge.source_id)):
+            other = records[other_id]
+            matches.setdefault(own_id, []).append({
+                "id": other["id"],
+                "canonical_name": other["canonical_name"],
+                "trade_names": SimilarityCalculator._franchisor_names(other)[1:],
+                "score": edge.score,
+                "match_type": "exact" if edge.score == 1.0 else "fuzzy",
+            })
+    for similar in matches.values():
+        similar.sort(key=lambda x: (-x["score"], x["canonical_name"]))
+    return matches
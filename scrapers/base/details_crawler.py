@@ -0,0 +1,247 @@
+"""Concurrent details-page crawler built on the browser session pool."""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from playwright.async_api import Page
+
+from utils.logging import get_logger
+from scrapers.base.session_pool import SessionPool
+from scrapers.base.resource_blocking import BlockingProfile, TABLE_SCRAPING_PROFILE
+
+
+# Default number of concurrent browser contexts per portal host. State portals
+# differ in how much parallel traffic they tolerate, so keep these conservative.
+DEFAULT_PORTAL_CONCURRENCY: Dict[str, int] = {
+    "apps.dfi.wi.gov": 4,
+    "www.cards.commerce.state.mn.us": 2,
+}
+DEFAULT_CONCURRENCY = 2
+
+
+def get_portal_concurrency(portal: Optional[str]) -> int:
+    """Get the default concurrency for a portal host."""
+    if not portal:
+        return DEFAULT_CONCURRENCY
+    return DEFAULT_PORTAL_CONCURRENCY.get(portal.lower(), DEFAULT_CONCURRENCY)
+
+
+@dataclass
+class CrawlResult:
+    """Outcome of crawling a single work item."""
+
+    item: Any
+    success: bool
+    result: Any = None
+    error: Optional[str] = None
+    timed_out: bool = False
+    elapsed_seconds: float = 0.0
+
+
+@dataclass
+class CrawlStats:
+    """Throughput statistics for a crawl run."""
+
+    total_items: int = 0
+    processed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def items_per_minute(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.processed / elapsed * 60 if elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "total_items": self.total_items,
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+            "items_per_minute": round(self.items_per_minute, 2),
+        }
+
+
+ItemHandler = Callable[[Page, Any], Awaitable[Any]]
+
+
+class DetailsCrawler:
+    """Fans work items out across pooled browser contexts.
+
+    Items are placed on a queue and drained by ``concurrency`` workers. Each
+    worker acquires a context from the :class:`SessionPool`, opens a fresh page
+    and runs ``handler(page, item)`` under a per-item timeout, so a single hung
+    details page cannot stall the whole crawl.
+    """
+
+    def __init__(
+        self,
+        handler: ItemHandler,
+        concurrency: Optional[int] = None,
+        portal: Optional[str] = None,
+        headless: bool = True,
+        item_timeout: float = 120.0,
+        session_pool: Optional[SessionPool] = None,
+        progress_interval: int = 25,
+        blocking_profile: Optional[BlockingProfile] = TABLE_SCRAPING_PROFILE,
+    ):
+        self.handler = handler
+        self.concurrency = max(1, concurrency or get_portal_concurrency(portal))
+        self.portal = portal
+        self.headless = headless
+        self.item_timeout = item_timeout
+        self.progress_interval = progress_interval
+        self.blocking_profile = blocking_profile
+        self._session_pool = session_pool
+        self._owns_pool = session_pool is None
+        self.stats = CrawlStats()
+        self.logger = get_logger(__name__)
+
+    async def _process_item(self, pool: SessionPool, item: Any) -> CrawlResult:
+        """Run the handler for one item inside a pooled context."""
+        start = time.monotonic()
+        async with pool.acquire_session(host=self.portal) as context:
+            page = await context.new_page()
+            try:
+                result = await asyncio.wait_for(
+                    self.handler(page, item), timeout=self.item_timeout
+                )
+                return CrawlResult(
+                    item=item,
+                    success=True,
+                    result=result,
+                    elapsed_seconds=time.monotonic() - start,
+                )
+            except asyncio.TimeoutError:
+                return CrawlResult(
+                    item=item,
+                    success=False,
+                    error=f"Timed out after {self.item_timeout}s",
+                    timed_out=True,
+                    elapsed_seconds=time.monotonic() - start,
+                )
+            except Exception as e:
+                return CrawlResult(
+                    item=item,
+                    success=False,
+                    error=str(e),
+                    elapsed_seconds=time.monotonic() - start,
+                )
+            finally:
+                try:
+                    await page.close()
+                except Exception as e:
+                    self.logger.debug(f"Error closing crawler page: {e}")
+
+    def _record(self, result: CrawlResult):
+        """Update statistics and emit periodic progress."""
+        self.stats.processed += 1
+        if result.success:
+            self.stats.succeeded += 1
+        else:
+            self.stats.failed += 1
+            if result.timed_out:
+                self.stats.timed_out += 1
+            self.logger.warning(f"Crawl item failed: {result.item!r}: {result.error}")
+
+        if (
+            self.stats.processed % self.progress_interval == 0
+            or self.stats.processed == self.stats.total_items
+        ):
+            self.logger.info(
+                f"Crawled {self.stats.processed}/{self.stats.total_items} items "
+                f"({self.stats.items_per_minute:.1f} items/min)"
+            )
+
+    async def _worker(
+        self, worker_id: int, pool: SessionPool, queue: asyncio.Queue, results: List
+    ):
+        """Drain the work queue until a stop sentinel is received."""
+        while True:
+            entry = await queue.get()
+            try:
+                if entry is None:
+                    return
+                index, item = entry
+                result = await self._process_item(pool, item)
+                results[index] = result
+                self._record(result)
+            except Exception as e:
+                # Pool failures must not kill the worker; the item is reported
+                # as failed and the worker moves on to the next one.
+                index, item = entry
+                result = CrawlResult(item=item, success=False, error=str(e))
+                results[index] = result
+                self._record(result)
+                self.logger.error(f"Crawler worker {worker_id} error: {e}")
+            finally:
+                queue.task_done()
+
+    async def crawl(self, items: Iterable[Any]) -> List[CrawlResult]:
+        """Crawl all items concurrently.
+
+        Args:
+            items: Work items passed one at a time to the handler
+
+        Returns:
+            Crawl results in the same order as the input items
+        """
+        items = list(items)
+        self.stats = CrawlStats(total_items=len(items))
+        if not items:
+            self.stats.finished_at = time.monotonic()
+            return []
+
+        pool = self._session_pool
+        if pool is None:
+            pool = SessionPool(
+                max_sessions=self.concurrency,
+                min_sessions=self.concurrency,
+                headless=self.headless,
+                blocking_profile=self.blocking_profile,
+            )
+        workers_count = min(self.concurrency, len(items))
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for entry in enumerate(items):
+            queue.put_nowait(entry)
+        for _ in range(workers_count):
+            queue.put_nowait(None)
+
+        results: List[Optional[CrawlResult]] = [None] * len(items)
+        self.logger.info(
+            f"Starting crawl of {len(items)} items with {workers_count} workers "
+            f"(portal: {self.portal or 'default'}, timeout: {self.item_timeout}s)"
+        )
+
+        try:
+            await pool.initialize()
+            await asyncio.gather(
+                *(
+                    self._worker(worker_id, pool, queue, results)
+                    for worker_id in range(workers_count)
+                )
+            )
+        finally:
+            self.stats.finished_at = time.monotonic()
+            if self._owns_pool:
+                await pool.cleanup()
+
+        self.logger.info(f"Crawl finished: {self.stats.to_dict()}")
+        return results
+
+    def get_stats(self) -> dict:
+        """Get crawl statistics."""
+        return self.stats.to_dict()
@@ -0,0 +1,363 @@
+"""Durable, lease-based job queue for document downloads.
+
+Each document to download is a row in a SQLite journal with a state:
+
+    queued -> downloading -> stored
+                   |
+                   +-> queued (retry, after a backoff) -> ... -> failed
+
+Workers claim jobs under a time-limited lease. A worker that dies simply lets
+its lease expire and the job becomes claimable again, so a crashed or killed
+run resumes where it stopped. Several workers, in one process or many, can
+drain the same queue because claims run inside ``BEGIN IMMEDIATE``
+transactions.
+"""
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.logging import get_logger
+from utils.scraping_utils import calculate_retry_delay
+
+
+STATE_QUEUED = "queued"
+STATE_DOWNLOADING = "downloading"
+STATE_STORED = "stored"
+STATE_FAILED = "failed"
+STATES = (STATE_QUEUED, STATE_DOWNLOADING, STATE_STORED, STATE_FAILED)
+
+
+@dataclass
+class DownloadJob:
+    """A claimed download job."""
+
+    job_id: str
+    source: str
+    url: Optional[str]
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    lease_owner: Optional[str] = None
+    lease_expires: float = 0.0
+    last_error: Optional[str] = None
+
+
+class DownloadQueue:
+    """SQLite-backed journal of document download jobs.
+
+    Jobs are keyed by a caller-chosen ``job_id`` that must be stable across
+    runs (e.g. state + filing number + row hash), so re-enqueueing the same
+    document after a crash finds the existing job instead of starting over.
+    """
+
+    def __init__(
+        self,
+        db_path: Path = Path(".cache/queues/downloads.db"),
+        lease_seconds: float = 600.0,
+        max_attempts: int = 3,
+        retry_base_delay: float = 30.0,
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.logger = get_logger(__name__)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self, immediate: bool = False):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    url TEXT,
+                    payload TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    available_at REAL NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_claim "
+                "ON jobs (source, state, available_at)"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def enqueue(
+        self, source: str, jobs: Iterable[Tuple[str, Optional[str], Dict[str, Any]]]
+    ) -> Dict[str, int]:
+        """Add jobs, leaving already-known jobs in their current state.
+
+        Unfinished jobs get their payload refreshed so that workers use the
+        latest metadata; stored and failed jobs are left untouched.
+
+        Args:
+            source: Queue partition, usually the state code
+            jobs: ``(job_id, url, payload)`` tuples
+
+        Returns:
+            Counts of ``added`` and ``existing`` jobs
+        """
+        now = time.time()
+        rows = [
+            (job_id, source, url, json.dumps(payload, default=str), STATE_QUEUED,
+             self.max_attempts, now, now)
+            for job_id, url, payload in jobs
+        ]
+        with self._connect(immediate=True) as conn:
+            before = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO jobs (job_id, source, url, payload, state, max_attempts, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET "
+                "payload = excluded.payload, url = excluded.url, "
+                "updated_at = excluded.updated_at "
+                f"WHERE jobs.state IN ('{STATE_QUEUED}', '{STATE_DOWNLOADING}')",
+                rows,
+            )
+            added = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] - before
+        return {"added": added, "existing": len(rows) - added}
+
+    def claim(
+        self,
+        source: str,
+        worker_id: str,
+        limit: int = 1,
+        lease_seconds: Optional[float] = None,
+    ) -> List[DownloadJob]:
+        """Lease up to ``limit`` runnable jobs to a worker.
+
+        Runnable jobs are queued jobs past their retry backoff, and
+        downloading jobs whose lease expired (their worker died). Expired jobs
+        that already used all their attempts are marked failed instead.
+        """
+        now = time.time()
+        lease_expires = now + (lease_seconds or self.lease_seconds)
+        with self._connect(immediate=True) as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, last_error = COALESCE(last_error, ?), "
+                "lease_owner = NULL, updated_at = ? "
+                "WHERE source = ? AND state = ? AND lease_expires < ? "
+                "AND attempts >= max_attempts",
+                (STATE_FAILED, "lease expired", now, source, STATE_DOWNLOADING, now),
+            )
+            rows = conn.execute(
+                "SELECT job_id, source, url, payload, attempts, max_attempts, last_error "
+                "FROM jobs WHERE source = ? AND ("
+                "(state = ? AND available_at <= ?) OR (state = ? AND lease_expires < ?)"
+                ") ORDER BY created_at, job_id LIMIT ?",
+                (source, STATE_QUEUED, now, STATE_DOWNLOADING, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, updated_at = ? WHERE job_id = ?",
+                [(STATE_DOWNLOADING, worker_id, lease_expires, now, row[0]) for row in rows],
+            )
+        return [
+            DownloadJob(
+                job_id=job_id,
+                source=src,
+                url=url,
+                payload=json.loads(payload),
+                attempts=attempts + 1,
+                max_attempts=max_attempts,
+                lease_owner=worker_id,
+                lease_expires=lease_expires,
+                last_error=last_error,
+            )
+            for job_id, src, url, payload, attempts, max_attempts, last_error in rows
+        ]
+
+    def heartbeat(
+        self, job_ids: Iterable[str], worker_id: str, lease_seconds: Optional[float] = None
+    ) -> int:
+        """Extend the lease on jobs a worker still holds.
+
+        Returns:
+            Number of leases extended; jobs lost to another worker are skipped
+        """
+        now = time.time()
+        lease_expires = now + (lease_seconds or self.lease_seconds)
+        with self._connect(immediate=True) as conn:
+            cursor = conn.executemany(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE job_id = ? AND lease_owner = ? AND state = ?",
+                [(lease_expires, now, job_id, worker_id, STATE_DOWNLOADING) for job_id in job_ids],
+            )
+            return cursor.rowcount
+
+    def complete(
+        self, job_id: str, worker_id: str, result: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Mark a leased job as stored."""
+        return self.complete_many([job_id], worker_id, result) == 1
+
+    def complete_many(
+        self, job_ids: Iterable[str], worker_id: str, result: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """Mark several leased jobs as stored."""
+        now = time.time()
+        encoded = json.dumps(result, default=str) if result is not None else None
+        with self._connect(immediate=True) as conn:
+            cursor = conn.executemany(
+                "UPDATE jobs SET state = ?, result = ?, lease_owner = NULL, "
+                "lease_expires = 0, updated_at = ? "
+                "WHERE job_id = ? AND lease_owner = ? AND state = ?",
+                [(STATE_STORED, encoded, now, job_id, worker_id, STATE_DOWNLOADING)
+                 for job_id in job_ids],
+            )
+            return cursor.rowcount
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True) -> str:
+        """Record a failed attempt.
+
+        The job is queued again after an exponential backoff while it has
+        attempts left (and ``retry`` is true), and marked failed otherwise.
+
+        Returns:
+            The job's new state
+        """
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs "
+                "WHERE job_id = ? AND lease_owner = ? AND state = ?",
+                (job_id, worker_id, STATE_DOWNLOADING),
+            ).fetchone()
+            if row is None:
+                # Lease was lost; whoever holds the job now decides its fate
+                return STATE_DOWNLOADING
+            attempts, max_attempts = row
+            if retry and attempts < max_attempts:
+                state = STATE_QUEUED
+                available_at = now + calculate_retry_delay(
+                    attempts - 1, base_delay=self.retry_base_delay, max_delay=3600.0
+                )
+            else:
+                state = STATE_FAILED
+                available_at = 0
+            conn.execute(
+                "UPDATE jobs SET state = ?, available_at = ?, last_error = ?, "
+                "lease_owner = NULL, lease_expires = 0, updated_at = ? WHERE job_id = ?",
+                (state, available_at, error[:2000], now, job_id),
+            )
+        return state
+
+    def release(self, worker_id: str) -> int:
+        """Return every job leased by a worker to the queue.
+
+        Used when a worker stops early; the attempts it used still count.
+        """
+        with self._connect(immediate=True) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = ?, lease_owner = NULL, lease_expires = 0, "
+                "updated_at = ? WHERE lease_owner = ? AND state = ?",
+                (STATE_QUEUED, time.time(), worker_id, STATE_DOWNLOADING),
+            )
+            return cursor.rowcount
+
+    def defer(self, job_ids: Iterable[str], worker_id: str, delay: float) -> int:
+        """Hand leased jobs back for a later claim without using an attempt.
+
+        For jobs that cannot be settled yet, e.g. a duplicate of a document
+        another worker is still storing.
+
+        Returns:
+            Number of jobs deferred; jobs lost to another worker are skipped
+        """
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            cursor = conn.executemany(
+                "UPDATE jobs SET state = ?, attempts = MAX(attempts - 1, 0), "
+                "available_at = ?, lease_owner = NULL, lease_expires = 0, updated_at = ? "
+                "WHERE job_id = ? AND lease_owner = ? AND state = ?",
+                [(STATE_QUEUED, now + delay, now, job_id, worker_id, STATE_DOWNLOADING)
+                 for job_id in job_ids],
+            )
+            return cursor.rowcount
+
+    def requeue_failed(self, source: str) -> int:
+        """Give failed jobs a fresh set of attempts."""
+        with self._connect(immediate=True) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = ?, attempts = 0, available_at = 0, updated_at = ? "
+                "WHERE source = ? AND state = ?",
+                (STATE_QUEUED, time.time(), source, STATE_FAILED),
+            )
+            return cursor.rowcount
+
+    def pending_count(self, source: str) -> int:
+        """Number of jobs not yet stored or failed."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE source = ? AND state IN (?, ?)",
+                (source, STATE_QUEUED, STATE_DOWNLOADING),
+            ).fetchone()[0]
+
+    def get_states(self, job_ids: Iterable[str]) -> Dict[str, str]:
+        """Current state of each known job; unknown jobs are left out."""
+        job_ids = list(job_ids)
+        states: Dict[str, str] = {}
+        with self._connect() as conn:
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(job_ids), 500):
+                chunk = job_ids[i:i + 500]
+                states.update(
+                    conn.execute(
+                        "SELECT job_id, state FROM jobs WHERE job_id IN "
+                        f"({', '.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                )
+        return states
+
+    def get_stats(self, source: Optional[str] = None) -> dict:
+        """Get job counts per state."""
+        query = "SELECT state, COUNT(*), SUM(attempts) FROM jobs"
+        params: tuple = ()
+        if source:
+            query += " WHERE source = ?"
+            params = (source,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " GROUP BY state", params).fetchall()
+        stats = {state: 0 for state in STATES}
+        attempts = 0
+        for state, count, state_attempts in rows:
+            stats[state] = count
+            attempts += state_attempts or 0
+        stats["total"] = sum(stats[state] for state in STATES)
+        stats["attempts"] = attempts
+        return stats
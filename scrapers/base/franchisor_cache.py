@@ -0,0 +1,264 @@
+"""Process-wide in-memory cache of franchisor names.
+
+Every resolution path (similarity lookups, entity resolution, the scraper
+database integration and the state download flows) used to ask the
+database for franchisors again. The cache holds the id, canonical name,
+DBA names and ``updated_at`` of every franchisor, with their normalized
+forms in a :class:`NameBlockingIndex`:
+
+- exact lookups by canonical name or id are dict lookups
+- fuzzy lookups get their candidates from the index
+
+It is loaded once, then brought up to date with one query for franchisors
+updated since the last refresh, at most every ``max_age``. Franchisors
+created or changed by this process are written through with :meth:`put`.
+Deletions by other processes are only seen by the periodic full reload,
+so callers treat a miss as "ask the database", never as "does not exist".
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+from scrapers.base.name_index import NameBlockingIndex
+from scrapers.base.similarity import SimilarityCalculator
+from scrapers.base.watermark import read_since
+from utils.logging import get_logger
+
+
+CACHED_FIELDS = ("id", "canonical_name", "dba_names", "updated_at")
+# Seconds between incremental refreshes triggered by lookups
+DEFAULT_MAX_AGE = 60.0
+# A full reload drops franchisors deleted (e.g. merged) by other processes
+FULL_RELOAD_INTERVAL = timedelta(hours=1)
+REFRESH_PAGE_SIZE = 5000
+
+logger = get_logger(__name__)
+
+
+class FranchisorCache:
+    """Franchisor id, names and normalized names, kept in memory.
+
+    Safe to share between threads; the state download flows refresh it from
+    worker threads while lookups run.
+
+    Args:
+        max_age: Seconds after which :meth:`refresh_if_stale` refreshes
+        full_reload_interval: Age after which a refresh reloads everything
+    """
+
+    def __init__(
+        self,
+        max_age: float = DEFAULT_MAX_AGE,
+        full_reload_interval: timedelta = FULL_RELOAD_INTERVAL,
+    ):
+        self.max_age = max_age
+        self.full_reload_interval = full_reload_interval
+        self.normalize = SimilarityCalculator().normalize_name
+        self.watermark: Optional[datetime] = None
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._by_canonical: Dict[str, str] = {}
+        self._index = self._new_index()
+        self._refreshed_at: Optional[float] = None
+        self._loaded_at: Optional[datetime] = None
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "refreshes": 0, "rows_read": 0}
+
+    def _new_index(self) -> NameBlockingIndex:
+        return NameBlockingIndex(
+            self.normalize, word_overlap_weight=SimilarityCalculator.WORD_OVERLAP_WEIGHT
+        )
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    # -- write-through -----------------------------------------------------
+
+    def put(self, record: Mapping[str, Any]):
+        """Add or replace a franchisor, e.g. right after creating it."""
+        with self._lock:
+            self._put(record)
+
+    def put_many(self, records: Iterable[Mapping[str, Any]]) -> int:
+        """Add or replace franchisors; returns the number of records."""
+        count = 0
+        with self._lock:
+            for record in records:
+                self._put(record)
+                count += 1
+        return count
+
+    def _put(self, record: Mapping[str, Any]):
+        franchisor_id = str(record["id"])
+        cached = {field: record.get(field) for field in CACHED_FIELDS}
+        cached["id"] = franchisor_id
+        cached["dba_names"] = list(cached["dba_names"] or [])
+        self._drop(franchisor_id)
+        self._records[franchisor_id] = cached
+        if cached["canonical_name"]:
+            self._by_canonical[cached["canonical_name"]] = franchisor_id
+        self._index.add(franchisor_id, [cached["canonical_name"], *cached["dba_names"]])
+
+    def remove(self, franchisor_id: Any):
+        """Forget a franchisor, e.g. after merging it into another."""
+        with self._lock:
+            self._drop(str(franchisor_id))
+
+    def _drop(self, franchisor_id: str):
+        previous = self._records.pop(franchisor_id, None)
+        if previous is None:
+            return
+        if self._by_canonical.get(previous["canonical_name"]) == franchisor_id:
+            del self._by_canonical[previous["canonical_name"]]
+        self._index.remove(franchisor_id)
+
+    # -- lookups -----------------------------------------------------------
+
+    def get(self, franchisor_id: Any) -> Optional[Dict[str, Any]]:
+        """Cached franchisor by id."""
+        with self._lock:
+            record = self._records.get(str(franchisor_id))
+            return dict(record) if record is not None else None
+
+    def get_by_canonical_name(self, canonical_name: str) -> Optional[Dict[str, Any]]:
+        """Cached franchisor with exactly this canonical name."""
+        with self._lock:
+            franchisor_id = self._by_canonical.get(canonical_name)
+            self._stats["hits" if franchisor_id is not None else "misses"] += 1
+            return dict(self._records[franchisor_id]) if franchisor_id is not None else None
+
+    def get_by_canonical_names(self, canonical_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Cached franchisors for the names that have one."""
+        return {
+            name: record
+            for name in dict.fromkeys(canonical_names)
+            if name and (record := self.get_by_canonical_name(name)) is not None
+        }
+
+    def find_by_normalized_name(self, name: str) -> List[Dict[str, Any]]:
+        """Franchisors with a canonical or DBA name normalizing like ``name``."""
+        with self._lock:
+            ids = self._index.ids_of(self.normalize(name))
+            return [dict(self._records[franchisor_id]) for franchisor_id in ids]
+
+    def candidates(self, name: str, threshold: float) -> Dict[str, List[Dict[str, Any]]]:
+        """Fuzzy match candidates for ``name``.
+
+        Returns:
+            Mapping of normalized candidate name to the franchisors carrying
+            it; scoring with ``SimilarityCalculator.score_normalized`` keeps
+            the ones reaching ``threshold``
+        """
+        with self._lock:
+            return {
+                normalized: [dict(self._records[franchisor_id]) for franchisor_id in ids]
+                for normalized, ids in self._index.candidates(name, threshold).items()
+            }
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Every cached franchisor."""
+        with self._lock:
+            return [dict(record) for record in self._records.values()]
+
+    def names_of(self, franchisor_id: Any) -> Set[str]:
+        """Normalized names of a cached franchisor."""
+        with self._lock:
+            return self._index.names_of(str(franchisor_id))
+
+    # -- refresh -----------------------------------------------------------
+
+    @property
+    def is_stale(self) -> bool:
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.max_age
+
+    def refresh_if_stale(self, db_manager) -> int:
+        """Refresh if the last refresh is older than ``max_age``.
+
+        Returns:
+            Number of ``franchisors`` rows read
+        """
+        if not self.is_stale:
+            return 0
+        return self.refresh(db_manager)
+
+    def refresh(self, db_manager, page_size: int = REFRESH_PAGE_SIZE) -> int:
+        """Read franchisors updated since the last refresh.
+
+        The first refresh, and any refresh after ``full_reload_interval``,
+        reads every franchisor and replaces the cached ones.
+
+        Returns:
+            Number of ``franchisors`` rows read
+        """
+        started = datetime.utcnow()
+        full_reload = (
+            self._loaded_at is None or started - self._loaded_at >= self.full_reload_interval
+        )
+        rows: List[Dict[str, Any]] = []
+        _, watermark = read_since(
+            db_manager,
+            "franchisors",
+            CACHED_FIELDS,
+            "updated_at",
+            None if full_reload else self.watermark,
+            rows.extend,
+            page_size,
+        )
+
+        with self._lock:
+            if full_reload:
+                self._records = {}
+                self._by_canonical = {}
+                self._index = self._new_index()
+                self._loaded_at = started
+            for record in rows:
+                self._put(record)
+            self.watermark = watermark
+            self._refreshed_at = time.monotonic()
+            self._stats["refreshes"] += 1
+            self._stats["rows_read"] += len(rows)
+        logger.info(
+            "franchisor_cache_refreshed",
+            rows=len(rows),
+            franchisors=len(self._records),
+            full_reload=full_reload,
+            watermark=self.watermark.isoformat(),
+        )
+        return len(rows)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Size, refresh counts and exact-lookup outcomes since start-up."""
+        with self._lock:
+            return {
+                "franchisors": len(self._records),
+                "watermark": self.watermark.isoformat() if self.watermark else None,
+                **self._stats,
+            }
+
+
+_cache: Optional[FranchisorCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_franchisor_cache() -> FranchisorCache:
+    """Get the process-wide franchisor cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FranchisorCache()
+        return _cache
+
+
+def get_fresh_franchisor_cache(db_manager) -> Optional[FranchisorCache]:
+    """The process-wide cache, refreshed if stale.
+
+    Returns None if the refresh failed, so the caller asks the database.
+    """
+    cache = get_franchisor_cache()
+    try:
+        cache.refresh_if_stale(db_manager)
+    except Exception as e:
+        logger.warning("franchisor_cache_refresh_failed", error=str(e), error_type=type(e).__name__)
+        return None
+    return cache
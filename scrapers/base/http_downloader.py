@@ -0,0 +1,1023 @@
+"""HTTP download engine for state portal documents.
+
+Most portal PDFs live at URLs that are already known from the results table,
+so they can be fetched with a plain pooled HTTP client instead of driving a
+full browser page. Playwright is kept as a fallback for links that only work
+with JavaScript.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from utils.logging import get_logger
+from utils.resource_budget import RESOURCE_HTTP, resource_slot
+from utils.scraping_utils import calculate_retry_delay, get_default_headers
+from scrapers.base.rate_limiter import (
+    AdaptiveRateLimiter,
+    get_rate_limiter,
+    parse_retry_after,
+)
+from scrapers.base.exceptions import DownloadError
+from scrapers.base.pdf_cache import PDFCache
+from scrapers.base.replay_harness import attach_replay_harness, replay_transport
+
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Status codes worth retrying; anything else is treated as a hard failure.
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# Chunk size for streamed downloads. Only one chunk per download is held in
+# memory, so large FDDs don't drive up peak RSS.
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Interrupted streamed downloads are kept here so that a retry, or a later
+# run, can resume them with a Range request instead of starting from byte 0.
+DEFAULT_PARTIAL_DIR = Path(".cache/partials")
+# Partial downloads untouched for this long are considered abandoned.
+PARTIAL_MAX_AGE_SECONDS = 2 * 24 * 3600
+# Bytes transferred between two progress callbacks of one download.
+PROGRESS_INTERVAL_BYTES = 8 * 1024 * 1024
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)", re.IGNORECASE)
+
+BrowserFallback = Callable[[str], Awaitable[bytes]]
+
+
+@dataclass
+class DownloadResult:
+    """Result of downloading a single URL."""
+
+    url: str
+    content: Optional[bytes] = None
+    status_code: Optional[int] = None
+    content_type: Optional[str] = None
+    via: str = "http"  # "http", "cache" or "browser"
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.error is None and self.content is not None
+
+    @property
+    def size(self) -> int:
+        return len(self.content) if self.content else 0
+
+
+@dataclass
+class StreamedDownload:
+    """A document streamed to a local file and hashed on the way."""
+
+    url: str
+    path: Path
+    sha256: str
+    size: int
+    content_type: Optional[str] = None
+    status_code: Optional[int] = None
+    via: str = "http"
+    elapsed_seconds: float = 0.0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    resumed_from: int = 0  # bytes kept from an interrupted earlier attempt
+
+    def read_bytes(self) -> bytes:
+        """Load the whole document; only for callers that really need bytes."""
+        return self.path.read_bytes()
+
+    def cleanup(self):
+        """Delete the local file if it still exists."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class DownloadProgress:
+    """Progress of one streamed download, passed to progress callbacks."""
+
+    url: str
+    bytes_done: int
+    total_bytes: Optional[int]
+    resumed_from: int = 0
+    elapsed_seconds: float = 0.0
+    done: bool = False
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if not self.total_bytes:
+            return None
+        return min(1.0, self.bytes_done / self.total_bytes)
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Transfer rate of this attempt, excluding resumed bytes."""
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return (self.bytes_done - self.resumed_from) / self.elapsed_seconds
+
+
+ProgressCallback = Callable[[DownloadProgress], Any]
+
+
+def log_download_progress(
+    pipeline_logger, event: str = "document_download_progress", **context: Any
+) -> ProgressCallback:
+    """Build a progress callback that reports to a ``PipelineLogger``.
+
+    Intermediate updates are logged at debug level, completed downloads at
+    info level.
+    """
+
+    def report(progress: DownloadProgress):
+        log = pipeline_logger.info if progress.done else pipeline_logger.debug
+        fraction = progress.fraction
+        log(
+            event,
+            url=progress.url,
+            bytes_done=progress.bytes_done,
+            total_bytes=progress.total_bytes,
+            percent=round(fraction * 100, 1) if fraction is not None else None,
+            resumed_from=progress.resumed_from,
+            mb_per_second=round(progress.bytes_per_second / 1024 / 1024, 2),
+            done=progress.done,
+            **context,
+        )
+
+    return report
+
+
+class _ProgressReporter:
+    """Throttles progress callbacks for one download attempt."""
+
+    def __init__(
+        self,
+        callback: Optional[ProgressCallback],
+        url: str,
+        total: Optional[int],
+        resumed_from: int,
+    ):
+        self.callback = callback
+        self.url = url
+        self.total = total
+        self.resumed_from = resumed_from
+        self.started = time.monotonic()
+        self._next_at = resumed_from + PROGRESS_INTERVAL_BYTES
+
+    def update(self, done: int):
+        if self.callback is not None and done >= self._next_at:
+            self._next_at = done + PROGRESS_INTERVAL_BYTES
+            self._emit(done, False)
+
+    def finish(self, done: int):
+        if self.callback is not None:
+            self._emit(done, True)
+
+    def _emit(self, done: int, finished: bool):
+        try:
+            self.callback(
+                DownloadProgress(
+                    url=self.url,
+                    bytes_done=done,
+                    total_bytes=self.total,
+                    resumed_from=self.resumed_from,
+                    elapsed_seconds=time.monotonic() - self.started,
+                    done=finished,
+                )
+            )
+        except Exception as e:
+            get_logger(__name__).debug(f"Progress callback failed for {self.url}: {e}")
+
+
+class _PartialDownload:
+    """On-disk state of an interrupted download: the body prefix written so
+    far, plus the validator needed to resume it safely with ``If-Range``."""
+
+    def __init__(self, partial_dir: Path, url: str):
+        key = hashlib.sha256(url.encode()).hexdigest()[:32]
+        self.path = partial_dir / f"{key}.part"
+        self.meta_path = partial_dir / f"{key}.json"
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Resume state, or None if there is nothing that can be resumed."""
+        try:
+            meta = json.loads(self.meta_path.read_text())
+            size = self.path.stat().st_size
+        except (OSError, ValueError):
+            return None
+        if not size or not meta.get("validator"):
+            return None
+        meta["size"] = size
+        return meta
+
+    def save(self, validator: Optional[str], total: Optional[int], content_type: Optional[str]):
+        if validator is None:
+            # Without a validator a resumed body could mix two versions
+            self.meta_path.unlink(missing_ok=True)
+            return
+        self.meta_path.write_text(
+            json.dumps({"validator": validator, "total": total, "content_type": content_type})
+        )
+
+    def discard(self):
+        self.path.unlink(missing_ok=True)
+        self.meta_path.unlink(missing_ok=True)
+
+
+def _range_validator(response: httpx.Response) -> Optional[str]:
+    """Validator usable in ``If-Range``: a strong ETag, else Last-Modified."""
+    if response.headers.get("accept-ranges", "").lower() == "none":
+        return None
+    etag = response.headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("last-modified")
+
+
+def _body_length(response: httpx.Response) -> Optional[int]:
+    """Decoded body size announced by a 200 response, if it is reliable."""
+    if response.headers.get("content-encoding", "identity").lower() != "identity":
+        return None
+    length = response.headers.get("content-length")
+    return int(length) if length and length.isdigit() else None
+
+
+def _hash_file(path: Path) -> "hashlib._Hash":
+    """SHA-256 state over an existing file, ready to be continued."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest
+
+
+def _new_temp_path(dest_dir: Optional[Path]) -> Path:
+    fd, tmp_name = tempfile.mkstemp(suffix=".pdf.part", dir=dest_dir)
+    os.close(fd)
+    return Path(tmp_name)
+
+
+def is_pdf_response(content_type: Optional[str], content: bytes) -> bool:
+    """Check whether a response body is a PDF document."""
+    if content[:5] == b"%PDF-":
+        return True
+    return bool(content_type) and "application/pdf" in content_type.lower()
+
+
+class _RetryableDownload(Exception):
+    """Transient HTTP status seen while streaming."""
+
+
+class _NotModified(Exception):
+    """Server answered 304 to a conditional request."""
+
+
+class _RestartDownload(Exception):
+    """A partial download cannot be resumed and must start over."""
+
+
+class HTTPDownloader:
+    """Pooled async HTTP client for document downloads.
+
+    Features:
+    - Keep-alive connection pooling shared by all downloads
+    - Cookie handoff from a Playwright browser context
+    - Retries with exponential backoff on transient failures
+    - Browser fallback for links that return an HTML page instead of a PDF
+    - Bounded-concurrency ``download_many()``
+    - Streaming ``download_to_file()`` with incremental SHA256 hashing
+    - Conditional requests (ETag/Last-Modified) against an optional
+      :class:`PDFCache`; a 304 is served from the cache
+    - Optional adaptive per-host rate limiting (``rate_limited=True``) shared
+      with every other downloader and scraper hitting the same portal
+    - Optional resumable downloads (``resumable=True``): interrupted transfers
+      keep their partial file and continue with an HTTP Range request on
+      the next attempt or run; the size, and SHA-256 when known, are
+      verified at the end
+    - Progress callbacks, e.g. :func:`log_download_progress`
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 10,
+        timeout: float = 60.0,
+        max_retries: int = 3,
+        headers: Optional[Dict[str, str]] = None,
+        browser_fallback: Optional[BrowserFallback] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache: Optional[PDFCache] = None,
+        rate_limited: bool = False,
+        resumable: bool = False,
+        partial_dir: Path = DEFAULT_PARTIAL_DIR,
+        progress: Optional[ProgressCallback] = None,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.browser_fallback = browser_fallback
+        self.cache = cache
+        self.rate_limited = rate_limited
+        self.partial_dir = Path(partial_dir) if resumable else None
+        self.progress = progress
+        self._partial_locks: Dict[str, asyncio.Lock] = {}
+        self._headers = {**get_default_headers(), "User-Agent": DEFAULT_USER_AGENT}
+        # Document downloads are not navigations; don't advertise them as such.
+        for key in ("Sec-Fetch-Dest", "Sec-Fetch-Mode", "Sec-Fetch-User"):
+            self._headers.pop(key, None)
+        if headers:
+            self._headers.update(headers)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.logger = get_logger(__name__)
+        self._stats = {
+            "requests": 0,
+            "http_downloads": 0,
+            "browser_fallbacks": 0,
+            "retries": 0,
+            "failures": 0,
+            "bytes_downloaded": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "cache_revalidations": 0,
+            "resumed_downloads": 0,
+            "bytes_resumed": 0,
+        }
+
+    async def __aenter__(self) -> "HTTPDownloader":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Get the underlying HTTP client, creating it on first use."""
+        if self._client is None:
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+            )
+            self._client = httpx.AsyncClient(
+                headers=self._headers,
+                timeout=httpx.Timeout(self.timeout),
+                limits=limits,
+                follow_redirects=True,
+                # Recorded to or served from fixtures when a harness is active
+                transport=replay_transport(self._transport, limits),
+            )
+        return self._client
+
+    async def start(self):
+        """Create the pooled HTTP client."""
+        _ = self.client
+        if self.partial_dir is not None:
+            self.partial_dir.mkdir(parents=True, exist_ok=True)
+            self._prune_partials()
+
+    def _prune_partials(self):
+        """Delete partial downloads abandoned long ago."""
+        cutoff = time.time() - PARTIAL_MAX_AGE_SECONDS
+        for path in self.partial_dir.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+    async def close(self):
+        """Close the HTTP client and release pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def set_cookies(self, cookies: Iterable[Dict[str, Any]]):
+        """Load cookies in Playwright's ``context.cookies()`` format."""
+        count = 0
+        for cookie in cookies:
+            self.client.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+            )
+            count += 1
+        self.logger.debug(f"Loaded {count} cookies into HTTP client")
+
+    async def import_cookies(self, context, urls: Optional[List[str]] = None):
+        """Hand off the cookies of a browser context to the HTTP client.
+
+        Use this when a portal sets a session cookie in the browser that the
+        document links require.
+        """
+        cookies = await context.cookies(urls) if urls else await context.cookies()
+        self.set_cookies(cookies)
+
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers from cached validators."""
+        if self.cache is None:
+            return {}
+        validators = self.cache.get_validators(url)
+        if not validators:
+            return {}
+        headers = {}
+        if validators["etag"]:
+            headers["If-None-Match"] = validators["etag"]
+        if validators["last_modified"]:
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def _cached_entry(self, url: str) -> Optional[Tuple[str, Path]]:
+        """Hash and path of the cached body for a URL that answered 304."""
+        validators = self.cache.get_validators(url) if self.cache else None
+        if not validators:
+            return None
+        path = self.cache.get_by_hash(validators["hash"])
+        return (validators["hash"], path) if path else None
+
+    def _store_in_cache(self, url: str, response: httpx.Response, content: bytes):
+        """Cache a fresh document together with its validators."""
+        if self.cache is None:
+            return
+        self._stats["cache_misses"] += 1
+        filename = Path(urlparse(url).path).name or "document.pdf"
+        _, hash_value = self.cache.add(content, url, filename)
+        self.cache.set_validators(
+            url,
+            hash_value,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
+
+    async def _throttle(self, url: str) -> Optional[AdaptiveRateLimiter]:
+        """Wait for the host's rate limiter, if rate limiting is enabled."""
+        if not self.rate_limited:
+            return None
+        limiter = get_rate_limiter(url)
+        await limiter.acquire()
+        return limiter
+
+    @staticmethod
+    def _report(
+        limiter: Optional[AdaptiveRateLimiter],
+        response: Optional[httpx.Response],
+        started: float,
+    ):
+        """Feed a response (or None for a transport error) to the limiter."""
+        if limiter is None:
+            return
+        if response is None:
+            limiter.record(None, time.monotonic() - started)
+            return
+        limiter.record(
+            response.status_code,
+            time.monotonic() - started,
+            retry_after=parse_retry_after(response.headers.get("retry-after")),
+        )
+
+    async def _fetch(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """GET a URL with retries on transient errors."""
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries):
+            if attempt:
+                self._stats["retries"] += 1
+                await asyncio.sleep(calculate_retry_delay(attempt - 1))
+            limiter = await self._throttle(url)
+            requested = time.monotonic()
+            try:
+                self._stats["requests"] += 1
+                async with resource_slot(RESOURCE_HTTP):
+                    response = await self.client.get(url, headers=headers)
+                self._report(limiter, response, requested)
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    last_error = DownloadError(
+                        f"HTTP {response.status_code} for {url}"
+                    )
+                    continue
+                return response
+            except httpx.TransportError as e:
+                self._report(limiter, None, requested)
+                last_error = e
+                self.logger.debug(f"Transport error for {url} (attempt {attempt + 1}): {e}")
+        raise DownloadError(f"Failed to download {url}: {last_error}")
+
+    async def _download_via_browser(self, url: str, start: float) -> DownloadResult:
+        """Fetch a URL through the Playwright fallback."""
+        self._stats["browser_fallbacks"] += 1
+        content = await self.browser_fallback(url)
+        self._stats["bytes_downloaded"] += len(content)
+        return DownloadResult(
+            url=url,
+            content=content,
+            content_type="application/pdf",
+            via="browser",
+            elapsed_seconds=time.monotonic() - start,
+        )
+
+    async def download(self, url: str) -> DownloadResult:
+        """Download a single document.
+
+        Raises:
+            DownloadError: If the document cannot be fetched by HTTP or fallback
+        """
+        if self.partial_dir is not None:
+            return await self._download_resumable(url)
+
+        start = time.monotonic()
+        response = await self._fetch(url, headers=self._conditional_headers(url))
+
+        if response.status_code == 304:
+            self._stats["cache_revalidations"] += 1
+            cached = self._cached_entry(url)
+            if cached is not None:
+                self._stats["cache_hits"] += 1
+                content = cached[1].read_bytes()
+                return DownloadResult(
+                    url=url,
+                    content=content,
+                    status_code=304,
+                    content_type="application/pdf",
+                    via="cache",
+                    elapsed_seconds=time.monotonic() - start,
+                )
+            # Cached copy vanished since the request was sent; fetch it again
+            response = await self._fetch(url)
+
+        if response.status_code >= 400:
+            raise DownloadError(f"HTTP {response.status_code} for {url}")
+
+        content_type = response.headers.get("content-type")
+        content = response.content
+        if not is_pdf_response(content_type, content):
+            # The link led to an HTML page (viewer, postback form, JS redirect),
+            # so only a real browser can get at the document.
+            if self.browser_fallback is None:
+                raise DownloadError(
+                    f"Expected PDF from {url}, got {content_type or 'unknown content'}"
+                )
+            self.logger.info(f"Falling back to browser download for {url}")
+            return await self._download_via_browser(url, start)
+
+        self._stats["http_downloads"] += 1
+        self._stats["bytes_downloaded"] += len(content)
+        self._store_in_cache(url, response, content)
+        return DownloadResult(
+            url=url,
+            content=content,
+            status_code=response.status_code,
+            content_type=content_type,
+            elapsed_seconds=time.monotonic() - start,
+        )
+
+    async def _download_resumable(self, url: str) -> DownloadResult:
+        """In-memory download on top of the resumable streaming path."""
+        streamed = await self.download_to_file(url)
+        try:
+            content = streamed.read_bytes()
+        finally:
+            streamed.cleanup()
+        return DownloadResult(
+            url=url,
+            content=content,
+            status_code=streamed.status_code,
+            content_type=streamed.content_type,
+            via=streamed.via,
+            elapsed_seconds=streamed.elapsed_seconds,
+        )
+
+    async def download_to_file(
+        self,
+        url: str,
+        dest_dir: Optional[Path] = None,
+        expected_sha256: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> StreamedDownload:
+        """Stream a document to a temp file, hashing it incrementally.
+
+        The caller owns the returned file and should move it into storage or
+        call :meth:`StreamedDownload.cleanup`. With ``resumable=True`` the
+        body is written to a partial file that survives transport errors
+        (and crashed runs) and is resumed with a Range request.
+
+        Args:
+            url: Document URL
+            dest_dir: Directory for the temp file (default: system temp dir)
+            expected_sha256: Known hash of the document; a mismatch is an error
+            progress: Progress callback (default: the downloader's)
+
+        Raises:
+            DownloadError: If the document cannot be fetched by HTTP or
+                fallback, or does not match ``expected_sha256``
+        """
+        if self.partial_dir is None:
+            return await self._download_to_file(url, dest_dir, expected_sha256, progress, None)
+        # One partial file per URL: concurrent downloads of a URL take turns
+        async with self._partial_locks.setdefault(url, asyncio.Lock()):
+            return await self._download_to_file(
+                url, dest_dir, expected_sha256, progress,
+                _PartialDownload(self.partial_dir, url),
+            )
+
+    async def _download_to_file(
+        self,
+        url: str,
+        dest_dir: Optional[Path],
+        expected_sha256: Optional[str],
+        progress: Optional[ProgressCallback],
+        partial: Optional[_PartialDownload],
+    ) -> StreamedDownload:
+        start = time.monotonic()
+        if dest_dir is not None:
+            dest_dir.mkdir(parents=True, exist_ok=True)
+        progress = progress or self.progress
+
+        headers = self._conditional_headers(url)
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries):
+            if attempt:
+                self._stats["retries"] += 1
+                await asyncio.sleep(calculate_retry_delay(attempt - 1))
+            resume = partial.load() if partial is not None else None
+            target = partial.path if partial is not None else _new_temp_path(dest_dir)
+
+            def drop():
+                if partial is not None:
+                    partial.discard()
+                else:
+                    target.unlink(missing_ok=True)
+
+            try:
+                result = await self._stream_into(
+                    url, target, start, {} if resume else headers, resume, partial, progress
+                )
+            except _NotModified:
+                self._stats["cache_revalidations"] += 1
+                drop()
+                cached = self._cached_entry(url)
+                if cached is not None:
+                    return self._streamed_from_cache(
+                        url, *cached, _new_temp_path(dest_dir), start
+                    )
+                # Cached copy vanished since the request was sent; fetch it again
+                headers = {}
+                continue
+            except _RestartDownload as e:
+                last_error = e
+                drop()
+                self.logger.info(f"Restarting download of {url} from the beginning: {e}")
+                continue
+            except (_RetryableDownload, httpx.TransportError) as e:
+                last_error = e
+                if partial is None:
+                    target.unlink(missing_ok=True)
+                self.logger.debug(f"Stream error for {url} (attempt {attempt + 1}): {e}")
+                continue
+            except DownloadError:
+                drop()
+                raise
+            except BaseException:
+                # Cancelled or crashed: a partial download is kept for next time
+                if partial is None:
+                    target.unlink(missing_ok=True)
+                raise
+
+            if result is None:
+                # Not a PDF; only a real browser can get at the document.
+                drop()
+                return await self._download_to_file_via_browser(url, dest_dir, start)
+
+            if expected_sha256 and result.sha256 != expected_sha256:
+                drop()
+                last_error = DownloadError(
+                    f"SHA-256 mismatch for {url}: got {result.sha256[:16]}, "
+                    f"expected {expected_sha256[:16]}"
+                )
+                if result.resumed_from:
+                    # The spliced body may be corrupt; try once more from zero
+                    self.logger.warning(f"{last_error}; retrying without resume")
+                    continue
+                raise last_error
+
+            if partial is not None:
+                result.path = self._claim_partial(partial, dest_dir)
+            self._store_file_in_cache(result)
+            return result
+
+        raise DownloadError(f"Failed to download {url}: {last_error}")
+
+    @staticmethod
+    def _claim_partial(partial: _PartialDownload, dest_dir: Optional[Path]) -> Path:
+        """Hand a completed partial file over to the caller as a temp file."""
+        final = _new_temp_path(dest_dir)
+        try:
+            os.replace(partial.path, final)
+        except OSError:
+            # Different filesystem
+            shutil.move(str(partial.path), str(final))
+        partial.discard()
+        return final
+
+    def _streamed_from_cache(
+        self, url: str, hash_value: str, cached: Path, tmp_path: Path, start: float
+    ) -> StreamedDownload:
+        """Serve a 304 by hardlinking the cached object to the temp path."""
+        self._stats["cache_hits"] += 1
+        tmp_path.unlink(missing_ok=True)
+        self.cache.link(hash_value, tmp_path)
+        return StreamedDownload(
+            url=url,
+            path=tmp_path,
+            sha256=hash_value,
+            size=tmp_path.stat().st_size,
+            content_type="application/pdf",
+            status_code=304,
+            via="cache",
+            elapsed_seconds=time.monotonic() - start,
+        )
+
+    def _store_file_in_cache(self, result: StreamedDownload):
+        """Move a fresh streamed download into the cache and link it back."""
+        if self.cache is None:
+            return
+        self._stats["cache_misses"] += 1
+        filename = Path(urlparse(result.url).path).name or "document.pdf"
+        self.cache.add_file(result.path, result.url, filename, hash_value=result.sha256)
+        self.cache.link(result.sha256, result.path)
+        self.cache.set_validators(
+            result.url, result.sha256, result.etag, result.last_modified
+        )
+
+    async def _stream_into(
+        self,
+        url: str,
+        target: Path,
+        start: float,
+        headers: Optional[Dict[str, str]],
+        resume: Optional[Dict[str, Any]],
+        partial: Optional[_PartialDownload],
+        progress: Optional[ProgressCallback],
+    ) -> Optional[StreamedDownload]:
+        """Stream one response into ``target``; None means the body is not a PDF."""
+        limiter = await self._throttle(url)
+        # The connection is held until the body has been read
+        async with resource_slot(RESOURCE_HTTP):
+            return await self._receive(
+                url, target, start, headers, resume, partial, progress, limiter
+            )
+
+    async def _receive(
+        self,
+        url: str,
+        target: Path,
+        start: float,
+        headers: Optional[Dict[str, str]],
+        resume: Optional[Dict[str, Any]],
+        partial: Optional[_PartialDownload],
+        progress: Optional[ProgressCallback],
+        limiter: Optional[AdaptiveRateLimiter],
+    ) -> Optional[StreamedDownload]:
+        offset = resume["size"] if resume else 0
+        if offset:
+            headers = {
+                **(headers or {}),
+                "Range": f"bytes={offset}-",
+                "If-Range": resume["validator"],
+            }
+        requested = time.monotonic()
+        self._stats["requests"] += 1
+        try:
+            response = await self.client.send(
+                self.client.build_request("GET", url, headers=headers), stream=True
+            )
+        except httpx.TransportError:
+            self._report(limiter, None, requested)
+            raise
+        # Latency to response headers is what reflects server load
+        self._report(limiter, response, requested)
+        try:
+            status = response.status_code
+            if status == 304:
+                raise _NotModified(url)
+            if status == 416 and offset:
+                raise _RestartDownload(f"range {offset}- not satisfiable")
+            if status in RETRYABLE_STATUS_CODES:
+                raise _RetryableDownload(f"HTTP {status} for {url}")
+            if status >= 400:
+                raise DownloadError(f"HTTP {status} for {url}")
+
+            content_type = response.headers.get("content-type")
+            if status == 206 and offset:
+                match = _CONTENT_RANGE.match(response.headers.get("content-range", ""))
+                if not match or int(match.group(1)) != offset:
+                    raise _RestartDownload("server resumed at an unexpected offset")
+                total = int(match.group(3)) if match.group(3) != "*" else resume.get("total")
+                content_type = content_type or resume.get("content_type")
+                validator = resume["validator"]
+                # The kept prefix was checked to be a PDF when it was written
+                digest, size, mode, checked = _hash_file(target), offset, "ab", True
+                self._stats["resumed_downloads"] += 1
+                self._stats["bytes_resumed"] += offset
+            else:
+                # Whole body: the server ignored the range, or the document
+                # changed since the partial was written
+                offset = 0
+                total = _body_length(response)
+                validator = _range_validator(response)
+                digest, size, mode, checked = hashlib.sha256(), 0, "wb", False
+            if partial is not None:
+                partial.save(validator, total, content_type)
+
+            reporter = _ProgressReporter(progress, url, total, offset)
+            with open(target, mode) as f:
+                async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                    if not checked:
+                        checked = True
+                        if not is_pdf_response(content_type, chunk):
+                            return None
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+                    self._stats["bytes_downloaded"] += len(chunk)
+                    reporter.update(size)
+            if not checked and not is_pdf_response(content_type, b""):
+                return None
+        finally:
+            await response.aclose()
+
+        if total is not None and size != total:
+            # Keep what we have; the next attempt resumes from here
+            raise _RetryableDownload(f"Truncated body for {url}: {size}/{total} bytes")
+        reporter.finish(size)
+
+        self._stats["http_downloads"] += 1
+        return StreamedDownload(
+            url=url,
+            path=target,
+            sha256=digest.hexdigest(),
+            size=size,
+            content_type=content_type,
+            status_code=status,
+            elapsed_seconds=time.monotonic() - start,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+            resumed_from=offset,
+        )
+
+    async def _download_to_file_via_browser(
+        self, url: str, dest_dir: Optional[Path], start: float
+    ) -> StreamedDownload:
+        """Write a browser-fallback download to a temp file."""
+        if self.browser_fallback is None:
+            raise DownloadError(f"Expected PDF from {url}, got a non-PDF response")
+        self.logger.info(f"Falling back to browser download for {url}")
+        result = await self._download_via_browser(url, start)
+        fd, tmp_name = tempfile.mkstemp(suffix=".pdf.part", dir=dest_dir)
+        with os.fdopen(fd, "wb") as f:
+            f.write(result.content)
+        return StreamedDownload(
+            url=url,
+            path=Path(tmp_name),
+            sha256=hashlib.sha256(result.content).hexdigest(),
+            size=result.size,
+            content_type=result.content_type,
+            via="browser",
+            elapsed_seconds=time.monotonic() - start,
+        )
+
+    async def download_many(
+        self,
+        urls: Iterable[str],
+        concurrency: int = 4,
+        on_result: Optional[Callable[[DownloadResult], Any]] = None,
+    ) -> List[DownloadResult]:
+        """Download many documents with bounded concurrency.
+
+        Failures do not abort the batch; they are returned as results with
+        ``error`` set.
+
+        Args:
+            urls: URLs to download
+            concurrency: Maximum number of downloads in flight
+            on_result: Optional callback invoked as each download completes
+
+        Returns:
+            Download results in the same order as ``urls``
+        """
+        urls = list(urls)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        # Counted before ``on_result`` runs, since callbacks may release
+        # ``content`` once they have written it somewhere
+        succeeded = 0
+
+        async def _bounded(url: str) -> DownloadResult:
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    result = await self.download(url)
+                except Exception as e:
+                    self._stats["failures"] += 1
+                    self.logger.error(f"Download failed for {url}: {e}")
+                    result = DownloadResult(
+                        url=url, error=str(e), elapsed_seconds=time.monotonic() - start
+                    )
+                nonlocal succeeded
+                succeeded += result.success
+                if on_result is not None:
+                    try:
+                        outcome = on_result(result)
+                        if asyncio.iscoroutine(outcome):
+                            await outcome
+                    except Exception as e:
+                        self.logger.error(f"Result callback failed for {url}: {e}")
+                return result
+
+        results = await asyncio.gather(*(_bounded(url) for url in urls))
+        self.logger.info(
+            f"Downloaded {succeeded}/{len(urls)} documents "
+            f"({self._stats['browser_fallbacks']} via browser)"
+        )
+        return list(results)
+
+    def get_stats(self) -> dict:
+        """Get downloader statistics."""
+        return dict(self._stats)
+
+
+class PlaywrightFallback:
+    """Lazily-started browser used only for links that need JavaScript.
+
+    The browser is launched on the first fallback download, so runs where
+    every document is reachable over plain HTTP never start Chromium.
+    """
+
+    def __init__(self, headless: bool = True, timeout: float = 60.0):
+        self.headless = headless
+        self.timeout = timeout
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._lock = asyncio.Lock()
+        self.logger = get_logger(__name__)
+
+    async def _ensure_context(self):
+        async with self._lock:
+            if self._context is None:
+                from playwright.async_api import async_playwright
+
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(
+                    headless=self.headless
+                )
+                self._context = await self._browser.new_context(accept_downloads=True)
+                await attach_replay_harness(self._context)
+        return self._context
+
+    async def __call__(self, url: str) -> bytes:
+        """Download a document by letting the browser navigate to it."""
+        context = await self._ensure_context()
+        page = await context.new_page()
+        try:
+            async with page.expect_download(timeout=self.timeout * 1000) as download_info:
+                try:
+                    await page.goto(url, timeout=self.timeout * 1000)
+                except Exception:
+                    # Navigations that turn into downloads abort the goto.
+                    pass
+            download = await download_info.value
+            path = await download.path()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            await page.close()
+
+    async def close(self):
+        """Close the browser if it was started."""
+        for closer in (self._context, self._browser):
+            if closer is not None:
+                try:
+                    await closer.close()
+                except Exception as e:
+                    self.logger.debug(f"Error closing fallback browser: {e}")
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._context = self._browser = self._playwright = None
@@ -0,0 +1,306 @@
+"""Local Bloom filter of documents already stored in the ``fdds`` table.
+
+Duplicate checks used to ask the database about every candidate document.
+The filter holds the ``sha256_hash`` of every stored FDD and its
+(filing state, filing number) pair. A negative answer is exact, so
+"definitely new" documents skip the database entirely and only possible
+hits (including the configured false-positive rate) go to the database.
+
+The filter is persisted under ``.cache`` between runs and brought up to date
+at start-up with one incremental query for FDDs created since the last
+refresh. Documents stored by this process are added as they are written.
+A Bloom filter cannot forget: FDDs deleted from the database stay possible
+hits, which only costs the database lookup the check would have made anyway.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from scrapers.base.watermark import parse_timestamp, read_since
+from utils.logging import get_logger
+
+
+DEFAULT_FILTER_PATH = Path(".cache/known_documents/fdds.bloom")
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.001
+REFRESH_PAGE_SIZE = 5000
+_FORMAT_VERSION = 1
+
+
+def hash_key(sha256_hash: str) -> str:
+    """Filter key of a document content hash."""
+    return f"sha:{sha256_hash.strip().lower()}"
+
+
+def filing_key(filing_state: str, filing_number: Any) -> str:
+    """Filter key of a state filing, normalized like the snapshot keys."""
+    number = " ".join(str(filing_number).split()).upper()
+    return f"filing:{filing_state.strip().upper()}:{number}"
+
+
+class KnownDocumentFilter:
+    """Bloom filter of stored FDD hashes and filings.
+
+    Sized for ``capacity`` keys at ``error_rate`` false positives, using
+    ``k`` bit positions per key derived by double hashing one blake2b digest.
+    Safe to share between the concurrent state flows of one process.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = DEFAULT_FILTER_PATH,
+        capacity: int = DEFAULT_CAPACITY,
+        error_rate: float = DEFAULT_ERROR_RATE,
+    ):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate in (0, 1)")
+        self.path = Path(path) if path is not None else None
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+        # Keys added while a larger copy is being rebuilt, replayed into it
+        self._rebuild_keys: Optional[List[str]] = None
+        self._stats = {"definitely_new": 0, "possible_hits": 0}
+        self.logger = get_logger(__name__)
+        if self.path is not None:
+            self._load()
+
+    # -- bit operations ----------------------------------------------------
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _add_key(self, key: str) -> bool:
+        """Set the bits of a key; returns True if the key was not yet present."""
+        added = False
+        for position in self._positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        if self._rebuild_keys is not None:
+            self._rebuild_keys.append(key)
+        return added
+
+    def _contains_key(self, key: str) -> bool:
+        found = all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+        self._stats["possible_hits" if found else "definitely_new"] += 1
+        return found
+
+    # -- public API --------------------------------------------------------
+
+    def add(
+        self,
+        sha256_hash: Optional[str] = None,
+        filing_state: Optional[str] = None,
+        filing_number: Optional[Any] = None,
+    ):
+        """Record a stored document by content hash and/or filing."""
+        with self._lock:
+            if sha256_hash:
+                self._add_key(hash_key(sha256_hash))
+            if filing_state and filing_number:
+                self._add_key(filing_key(filing_state, filing_number))
+
+    def add_records(self, records: Iterable[Mapping[str, Any]]) -> int:
+        """Add ``fdds`` rows; returns the number of rows read."""
+        rows = 0
+        with self._lock:
+            for record in records:
+                rows += 1
+                if record.get("sha256_hash"):
+                    self._add_key(hash_key(record["sha256_hash"]))
+                if record.get("filing_state") and record.get("filing_number"):
+                    self._add_key(filing_key(record["filing_state"], record["filing_number"]))
+        return rows
+
+    def might_contain_hash(self, sha256_hash: str) -> bool:
+        """False means the hash is definitely not stored."""
+        with self._lock:
+            return self._contains_key(hash_key(sha256_hash))
+
+    def might_contain_filing(self, filing_state: str, filing_number: Any) -> bool:
+        """False means the filing is definitely not stored."""
+        with self._lock:
+            return self._contains_key(filing_key(filing_state, filing_number))
+
+    def possible_hashes(self, hashes: Iterable[str]) -> list:
+        """The hashes that may be stored, in order; the rest are new."""
+        return [h for h in hashes if h and self.might_contain_hash(h)]
+
+    @property
+    def is_saturated(self) -> bool:
+        return self.count > self.capacity
+
+    def refresh(self, db_manager, page_size: int = REFRESH_PAGE_SIZE) -> int:
+        """Add FDDs created since the last refresh.
+
+        A filter holding more keys than it was sized for is rebuilt at twice
+        the capacity from a full scan, keeping the false-positive rate near
+        ``error_rate``. The larger copy is filled on the side and swapped in
+        once complete, so lookups during the scan keep their answers.
+
+        Returns:
+            Number of ``fdds`` rows read
+        """
+        if self.is_saturated:
+            return self._rebuild(db_manager, self.capacity * 2, page_size)
+        full_scan = self.watermark is None
+        rows, self.watermark = read_since(
+            db_manager,
+            "fdds",
+            ("sha256_hash", "filing_state", "filing_number", "created_at"),
+            "created_at",
+            self.watermark,
+            self.add_records,
+            page_size,
+        )
+        self.logger.info(
+            "known_documents_refreshed",
+            rows=rows,
+            keys=self.count,
+            full_scan=full_scan,
+            watermark=self.watermark.isoformat(),
+        )
+        return rows
+
+    def _rebuild(self, db_manager, capacity: int, page_size: int) -> int:
+        """Fill a filter of ``capacity`` from a full scan, then swap it in."""
+        self.logger.info("known_documents_resized", old_capacity=self.capacity, capacity=capacity)
+        with self._lock:
+            self._rebuild_keys = []
+        try:
+            fresh = KnownDocumentFilter(None, capacity, self.error_rate)
+            rows = fresh.refresh(db_manager, page_size)
+        except BaseException:
+            with self._lock:
+                self._rebuild_keys = None
+            raise
+        with self._lock:
+            # Documents stored during the scan may have been missed by it
+            for key in self._rebuild_keys:
+                fresh._add_key(key)
+            self._rebuild_keys = None
+            self.capacity = fresh.capacity
+            self.num_bits = fresh.num_bits
+            self.num_hashes = fresh.num_hashes
+            self._bits = fresh._bits
+            self.count = fresh.count
+            self.watermark = fresh.watermark
+        return rows
+
+    # -- persistence -------------------------------------------------------
+
+    def _header(self) -> Dict[str, Any]:
+        return {
+            "version": _FORMAT_VERSION,
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+        }
+
+    def _read(self) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                bits = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning("known_documents_unreadable", path=str(self.path), error=str(e))
+            return None
+        if header.get("version") != _FORMAT_VERSION or len(bits) != (header["num_bits"] + 7) // 8:
+            self.logger.warning("known_documents_incompatible", path=str(self.path))
+            return None
+        return header, bits
+
+    def _load(self):
+        stored = self._read()
+        if stored is None:
+            return
+        header, bits = stored
+        self.capacity = header["capacity"]
+        self.error_rate = header["error_rate"]
+        self.num_bits = header["num_bits"]
+        self.num_hashes = header["num_hashes"]
+        self._bits = bytearray(bits)
+        self.count = header["count"]
+        self.watermark = parse_timestamp(header["watermark"])
+
+    def save(self):
+        """Persist the filter atomically, merged with any newer copy on disk.
+
+        Another process may have saved since this filter was loaded; its bits
+        are OR-ed in so neither run's additions are lost.
+        """
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            stored = self._read()
+            if stored is not None:
+                header, bits = stored
+                if header["num_bits"] == self.num_bits and header["num_hashes"] == self.num_hashes:
+                    self._bits = bytearray(a | b for a, b in zip(self._bits, bits))
+                    self.count = max(self.count, header["count"])
+                    other = parse_timestamp(header["watermark"])
+                    # Each copy covers every FDD up to its own watermark
+                    if other and (self.watermark is None or other > self.watermark):
+                        self.watermark = other
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(json.dumps(self._header()).encode("utf-8") + b"\n")
+                    f.write(self._bits)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Key count, sizing and lookup outcomes since start-up."""
+        with self._lock:
+            return {
+                "keys": self.count,
+                "capacity": self.capacity,
+                "error_rate": self.error_rate,
+                "size_bytes": len(self._bits),
+                "watermark": self.watermark.isoformat() if self.watermark else None,
+                **self._stats,
+            }
+
+
+_filters: Dict[Path, KnownDocumentFilter] = {}
+_filters_lock = threading.Lock()
+
+
+def get_known_documents(path: Path = DEFAULT_FILTER_PATH) -> KnownDocumentFilter:
+    """Get the process-wide filter persisted at ``path``."""
+    key = Path(path).resolve()
+    with _filters_lock:
+        if key not in _filters:
+            _filters[key] = KnownDocumentFilter(path)
+        return _filters[key]
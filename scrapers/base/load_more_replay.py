@@ -0,0 +1,295 @@
+"""Replay the XHR behind a "Load more" button instead of clicking it.
+
+Clicking "Load more" costs a visibility wait plus a ``networkidle`` wait per
+page, and the DOM grows with every click. The request the button fires is
+usually a plain GET/POST with a page or offset parameter, so after capturing
+it once we can request the following pages directly, several at a time, and
+parse each page as it arrives.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from utils.logging import get_logger
+from scrapers.base.rate_limiter import get_rate_limiter
+from scrapers.base.replay_harness import harness_fetch
+
+
+logger = get_logger(__name__)
+
+# Parameter names that count pages (step 1) or rows (step = page size).
+PAGE_PARAMETER_NAMES = ("page", "pagenumber", "page_number", "pageindex", "pg", "p")
+OFFSET_PARAMETER_NAMES = ("offset", "start", "skip", "from", "startrow")
+
+# Headers Playwright reports that must not be replayed verbatim.
+_SKIP_HEADERS = {"content-length", "cookie", "host", "connection", "accept-encoding"}
+
+
+@dataclass
+class CapturedRequest:
+    """A request observed while clicking a "Load more" button."""
+
+    url: str
+    method: str = "GET"
+    headers: Dict[str, str] = field(default_factory=dict)
+    post_data: Optional[str] = None
+
+
+@dataclass
+class PageParameter:
+    """Where the page counter lives in a captured request and how it advances."""
+
+    name: str
+    location: str  # "query" or "body"
+    first_value: int
+    step: int
+
+    def value_for(self, index: int) -> int:
+        """Parameter value for the ``index``-th page after the initial one."""
+        return self.first_value + index * self.step
+
+
+def find_page_parameter(request: CapturedRequest) -> Optional[PageParameter]:
+    """Guess which query/form parameter pages through the results.
+
+    Returns:
+        The page parameter, or None if no known page/offset parameter holds
+        an integer
+    """
+    candidates = [("query", parse_qsl(urlparse(request.url).query, keep_blank_values=True))]
+    if request.post_data and "=" in request.post_data:
+        candidates.append(("body", parse_qsl(request.post_data, keep_blank_values=True)))
+
+    for location, pairs in candidates:
+        for name, value in pairs:
+            if not value.isdigit():
+                continue
+            key = name.lower()
+            if key in PAGE_PARAMETER_NAMES:
+                return PageParameter(name, location, int(value), 1)
+            if key in OFFSET_PARAMETER_NAMES and int(value) > 0:
+                # The first "Load more" skips exactly one page of rows
+                return PageParameter(name, location, int(value), int(value))
+    return None
+
+
+def _replace_param(encoded: str, name: str, value: int) -> str:
+    pairs = [
+        (key, str(value) if key == name else val)
+        for key, val in parse_qsl(encoded, keep_blank_values=True)
+    ]
+    return urlencode(pairs)
+
+
+def build_page_request(
+    request: CapturedRequest, parameter: PageParameter, index: int
+) -> CapturedRequest:
+    """Rewrite a captured request to fetch another page."""
+    value = parameter.value_for(index)
+    if parameter.location == "query":
+        parts = urlparse(request.url)
+        url = urlunparse(parts._replace(query=_replace_param(parts.query, parameter.name, value)))
+        return CapturedRequest(url, request.method, request.headers, request.post_data)
+    post_data = _replace_param(request.post_data or "", parameter.name, value)
+    return CapturedRequest(request.url, request.method, request.headers, post_data)
+
+
+def extract_html(body: str) -> str:
+    """Return the HTML carried by a response body.
+
+    Handles plain HTML and JSON payloads, including Drupal-style AJAX command
+    lists where the markup sits in ``data``/``html`` fields.
+    """
+    stripped = body.lstrip()
+    if not stripped.startswith(("{", "[")):
+        return body
+    try:
+        payload = json.loads(stripped)
+    except ValueError:
+        return body
+
+    fragments: List[str] = []
+
+    def collect(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in ("data", "html", "content") and isinstance(value, str):
+                    fragments.append(value)
+                else:
+                    collect(value)
+        elif isinstance(node, list):
+            for item in node:
+                collect(item)
+
+    collect(payload)
+    return "\n".join(fragments)
+
+
+async def capture_load_more(
+    page, selector: str, timeout: float = 10000
+) -> Optional[CapturedRequest]:
+    """Click a "Load more" button once and capture the XHR/fetch it fires.
+
+    Returns:
+        The captured request, or None if the click fired no XHR/fetch
+    """
+    try:
+        async with page.expect_request(
+            lambda r: r.resource_type in ("xhr", "fetch"), timeout=timeout
+        ) as request_info:
+            await page.locator(selector).click(timeout=timeout)
+        request = await request_info.value
+        headers = await request.all_headers()
+    except Exception as e:
+        logger.debug(f"No load-more request captured: {e}")
+        return None
+    return CapturedRequest(
+        url=request.url,
+        method=request.method,
+        headers={
+            key: value
+            for key, value in headers.items()
+            if not key.startswith(":") and key.lower() not in _SKIP_HEADERS
+        },
+        post_data=request.post_data,
+    )
+
+
+class LoadMoreReplayer:
+    """Fetch the pages behind a captured "Load more" request concurrently.
+
+    Pages are fetched ``concurrency`` at a time through a Playwright
+    ``APIRequestContext`` (``context.request``), which shares the browser's
+    cookies. Each page is parsed as soon as it arrives; pages are yielded in
+    order and paging stops at the first page without new rows.
+    """
+
+    def __init__(
+        self,
+        request_context,
+        captured: CapturedRequest,
+        parameter: PageParameter,
+        parse_page: Callable[[str], Sequence],
+        concurrency: int = 4,
+        max_pages: int = 1000,
+        timeout: float = 30000,
+    ):
+        self.request_context = request_context
+        self.captured = captured
+        self.parameter = parameter
+        self.parse_page = parse_page
+        self.concurrency = max(1, concurrency)
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.limiter = get_rate_limiter(captured.url)
+        self.stats = {"pages": 0, "rows": 0, "elapsed_seconds": 0.0}
+
+    async def _fetch_page(self, index: int) -> Sequence:
+        request = build_page_request(self.captured, self.parameter, index)
+        await self.limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = await harness_fetch(
+                self.request_context,
+                request.url,
+                method=request.method,
+                headers=request.headers,
+                data=request.post_data,
+                timeout=self.timeout,
+            )
+        except Exception:
+            self.limiter.record(None, time.monotonic() - started)
+            raise
+        self.limiter.record(response.status, time.monotonic() - started)
+        if response.status >= 400:
+            raise RuntimeError(f"HTTP {response.status} replaying page {index}: {request.url}")
+        return self.parse_page(await response.text())
+
+    async def pages(self) -> AsyncIterator[Sequence]:
+        """Yield the parsed rows of each page, in page order."""
+        start = time.monotonic()
+        pending: Dict[int, asyncio.Task] = {}
+        next_index = 0
+        seen_last = None
+        try:
+            for index in range(self.max_pages):
+                # Keep a window of requests in flight ahead of the consumer
+                while next_index < self.max_pages and len(pending) < self.concurrency:
+                    pending[next_index] = asyncio.create_task(self._fetch_page(next_index))
+                    next_index += 1
+                rows = await pending.pop(index)
+                # An empty page, or a server clamping to its last page, ends paging
+                if not rows or rows == seen_last:
+                    break
+                seen_last = rows
+                self.stats["pages"] += 1
+                self.stats["rows"] += len(rows)
+                yield rows
+        finally:
+            for task in pending.values():
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending.values(), return_exceptions=True)
+            self.stats["elapsed_seconds"] = round(time.monotonic() - start, 3)
+
+
+async def replay_load_more(
+    page,
+    selector: str,
+    parse_page: Callable[[str], Sequence],
+    concurrency: int = 4,
+    max_pages: int = 1000,
+) -> Optional[List]:
+    """Load every page behind a "Load more" button via request replay.
+
+    Args:
+        page: Playwright page showing the first page of results
+        selector: Selector of the "Load more" button
+        parse_page: Turns a response body into a list of rows
+        concurrency: Pages fetched in parallel
+        max_pages: Safety cap on replayed pages
+
+    Returns:
+        Rows from all pages after the initial one (an empty list if there is
+        no "Load more" button), or None if the request could not be replayed
+        and the caller should fall back to clicking
+    """
+    button = page.locator(selector)
+    if not await button.is_visible():
+        return []
+
+    captured = await capture_load_more(page, selector)
+    if captured is None:
+        return None
+    parameter = find_page_parameter(captured)
+    if parameter is None:
+        logger.info(f"No page parameter found in load-more request {captured.url}")
+        return None
+
+    replayer = LoadMoreReplayer(
+        page.context.request,
+        captured,
+        parameter,
+        parse_page,
+        concurrency=concurrency,
+        max_pages=max_pages,
+    )
+    rows: List = []
+    try:
+        async for page_rows in replayer.pages():
+            rows.extend(page_rows)
+    except Exception as e:
+        logger.warning(f"Load-more replay failed, falling back to clicking: {e}")
+        return None
+    if not rows:
+        # The captured page itself parsed to nothing; the format is not understood
+        return None
+    logger.info(
+        f"Replayed {replayer.stats['pages']} load-more pages "
+        f"({replayer.stats['rows']} rows) in {replayer.stats['elapsed_seconds']}s"
+    )
+    return rows
@@ -0,0 +1,243 @@
+"""In-memory blocking index for fuzzy franchisor name lookups.
+
+Scoring a name against every franchisor is an O(N) scan of pure-Python
+fuzzy matching. The index keeps cheap per-name features so a lookup only
+scores the names that can still reach the threshold under each rule of
+:meth:`SimilarityCalculator.score_normalized`:
+
+- substring rule: names the query contains, and names carrying every
+  n-gram of the query, found through an n-gram posting index
+- word overlap: names sharing enough word tokens, through a token index
+- ``SequenceMatcher`` ratio: names whose character-count bound
+  ``2 * |common characters| / (|q| + |c|)`` (``SequenceMatcher.quick_ratio``)
+  reaches the threshold, since no alignment can match more characters
+
+Every rule is an upper bound, so the candidates hold every name that scores
+at least the threshold. The bounds are evaluated for all indexed names at
+once with numpy: ``bincount`` over the posting lists of the query's blocks
+and per-character count columns. Names are added incrementally; posting
+arrays are rebuilt only after they changed.
+"""
+
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+import numpy as np
+
+
+class _Postings:
+    """Block -> slots of the names carrying it, as lists and cached arrays."""
+
+    def __init__(self):
+        self._lists: Dict[str, List[int]] = defaultdict(list)
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def add(self, block: str, slot: int):
+        self._lists[block].append(slot)
+        self._arrays.pop(block, None)
+
+    def array(self, block: str) -> Optional[np.ndarray]:
+        cached = self._arrays.get(block)
+        if cached is None:
+            slots = self._lists.get(block)
+            if not slots:
+                return None
+            cached = self._arrays[block] = np.array(slots, dtype=np.int64)
+        return cached
+
+    def counts(self, blocks: Iterable[str], size: int) -> np.ndarray:
+        """Number of the given blocks each slot carries."""
+        arrays = [a for a in (self.array(block) for block in blocks) if a is not None]
+        if not arrays:
+            return np.zeros(size, dtype=np.int64)
+        return np.bincount(np.concatenate(arrays), minlength=size)
+
+
+class _CharCounts:
+    """Per-character count columns over slots, grown by doubling."""
+
+    def __init__(self, capacity: int = 1024):
+        self._capacity = capacity
+        self._columns: Dict[str, np.ndarray] = {}
+        self.lengths = np.zeros(capacity, dtype=np.int32)
+
+    def add(self, slot: int, text: str):
+        if slot >= self._capacity:
+            self._grow(max(slot + 1, self._capacity * 2))
+        for char, count in Counter(text).items():
+            column = self._columns.get(char)
+            if column is None:
+                column = self._columns[char] = np.zeros(self._capacity, dtype=np.int32)
+            column[slot] = count
+        self.lengths[slot] = len(text)
+
+    def _grow(self, capacity: int):
+        def grown(array):
+            bigger = np.zeros(capacity, dtype=array.dtype)
+            bigger[:len(array)] = array
+            return bigger
+
+        self._columns = {char: grown(column) for char, column in self._columns.items()}
+        self.lengths = grown(self.lengths)
+        self._capacity = capacity
+
+    def common(self, text: str, size: int) -> np.ndarray:
+        """Characters each slot has in common with ``text``, counted as multisets."""
+        common = np.zeros(size, dtype=np.int32)
+        for char, count in Counter(text).items():
+            column = self._columns.get(char)
+            if column is not None:
+                common += np.minimum(column[:size], count)
+        return common
+
+
+class NameBlockingIndex:
+    """Blocks normalized names by word token, character n-gram and character count.
+
+    Args:
+        normalize: Name normalization shared with the scorer
+        ngram_size: Length of the character n-grams
+        word_overlap_weight: Weight of the word-overlap score in the scorer,
+            used to bound the words a candidate must share
+    """
+
+    def __init__(
+        self,
+        normalize: Callable[[str], str],
+        ngram_size: int = 3,
+        word_overlap_weight: float = 0.9,
+    ):
+        self.normalize = normalize
+        self.ngram_size = ngram_size
+        self.word_overlap_weight = word_overlap_weight
+        # Every distinct normalized name gets a slot; a removed name leaves
+        # its slot behind, revived if the name is added again
+        self._slots: Dict[str, int] = {}
+        self._slot_names: List[Optional[str]] = []
+        self._gram_sizes: List[int] = []
+        self._token_sizes: List[int] = []
+        self._sizes_cache = None
+        self._chars = _CharCounts()
+        self._ids: Dict[str, Set[Hashable]] = {}
+        self._names: Dict[Hashable, Set[str]] = defaultdict(set)
+        self._grams = _Postings()
+        self._tokens = _Postings()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, entry_id: Hashable) -> bool:
+        return entry_id in self._names
+
+    def ngrams(self, normalized: str) -> Set[str]:
+        """Character n-grams of a name: the ones any string containing it carries."""
+        n = self.ngram_size
+        return {normalized[i:i + n] for i in range(len(normalized) - n + 1)}
+
+    def add(self, entry_id: Hashable, names: Iterable[Optional[str]]):
+        """Index the names of an entry (canonical name, trade names, ...)."""
+        for name in names:
+            if name is None:
+                continue
+            normalized = self.normalize(name)
+            self._names[entry_id].add(normalized)
+            if normalized in self._ids:
+                self._ids[normalized].add(entry_id)
+                continue
+            self._ids[normalized] = {entry_id}
+            slot = self._slots.get(normalized)
+            if slot is None:
+                slot = self._new_slot(normalized)
+            self._slot_names[slot] = normalized
+
+    def _new_slot(self, normalized: str) -> int:
+        slot = len(self._slot_names)
+        self._slots[normalized] = slot
+        self._slot_names.append(normalized)
+        grams = self.ngrams(normalized)
+        tokens = set(normalized.split())
+        self._gram_sizes.append(len(grams))
+        self._token_sizes.append(len(tokens))
+        self._sizes_cache = None
+        self._chars.add(slot, normalized)
+        for gram in grams:
+            self._grams.add(gram, slot)
+        for token in tokens:
+            self._tokens.add(token, slot)
+        return slot
+
+    def remove(self, entry_id: Hashable):
+        """Drop an entry, e.g. before re-adding it under new names."""
+        for normalized in self._names.pop(entry_id, ()):
+            ids = self._ids[normalized]
+            ids.discard(entry_id)
+            if not ids:
+                del self._ids[normalized]
+                self._slot_names[self._slots[normalized]] = None
+
+    def names_of(self, entry_id: Hashable) -> Set[str]:
+        """Normalized names indexed for an entry."""
+        return set(self._names.get(entry_id, ()))
+
+    def ids_of(self, normalized: str) -> Set[Hashable]:
+        """Entries carrying a normalized name (exact match)."""
+        return set(self._ids.get(normalized, ()))
+
+    def _sizes(self):
+        if self._sizes_cache is None:
+            self._sizes_cache = tuple(
+                np.array(sizes, dtype=np.int64)
+                for sizes in (self._gram_sizes, self._token_sizes)
+            )
+        return self._sizes_cache
+
+    def candidates(self, name: str, threshold: float) -> Dict[str, Set[Hashable]]:
+        """Normalized names that may score ``threshold`` against ``name``.
+
+        Returns:
+            Mapping of candidate normalized name to the ids carrying it
+        """
+        query = self.normalize(name)
+        if not query:
+            # The empty name is a substring of every name
+            return {normalized: set(ids) for normalized, ids in self._ids.items()}
+
+        found: Set[str] = set()
+        size = len(self._slot_names)
+        gram_sizes, token_sizes = self._sizes()
+
+        # Substring rule. A name contained in the query has all its n-grams
+        # among the query's (names shorter than n always pass and are checked
+        # directly); a name containing the query carries all of its n-grams.
+        grams = self.ngrams(query)
+        shared = self._grams.counts(grams, size)
+        for slot in np.flatnonzero(shared >= gram_sizes):
+            normalized = self._slot_names[slot]
+            if normalized is not None and normalized in query:
+                found.add(normalized)
+        if grams:
+            matches = shared == len(grams)
+        else:
+            # Too short for n-grams: look for names containing it directly
+            matches = np.zeros(size, dtype=bool)
+            found.update(normalized for normalized in self._ids if query in normalized)
+
+        # SequenceMatcher ratio 2 M / (|q| + |c|), where the matched
+        # characters M never exceed the characters in common
+        common = self._chars.common(query, size)
+        matches |= 2 * common >= threshold * (len(query) + self._chars.lengths[:size]) - 1e-9
+
+        # Weighted word overlap |q & c| / max(|q|, |c|) reaching the threshold
+        query_tokens = set(query.split())
+        if query_tokens and threshold <= self.word_overlap_weight:
+            shared = self._tokens.counts(query_tokens, size)
+            longest = np.maximum(token_sizes, len(query_tokens))
+            matches |= (shared > 0) & (
+                shared * self.word_overlap_weight >= threshold * longest - 1e-9
+            )
+
+        for slot in np.flatnonzero(matches):
+            normalized = self._slot_names[slot]
+            if normalized is not None:
+                found.add(normalized)
+        return {normalized: set(self._ids[normalized]) for normalized in found}
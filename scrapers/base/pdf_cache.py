@@ -2,27 +2,43 @@
 
 import hashlib
 import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Dict, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from datetime import datetime
 
 from utils.logging import get_logger
 from scrapers.base.exceptions import CacheError
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 
 class PDFCache:
     """Manages PDF caching for deduplication and faster processing.
-    
+
     Features:
     - SHA256 hash-based deduplication
     - URL-based cache lookups
-    - Persistent cache index
+    - Persistent SQLite index (WAL mode, safe to share between processes)
     - Automatic cache expiration
-    - Size-based cache management
+    - Size-based LRU eviction using a running byte total
+    - Content-addressed, sharded storage: identical documents (e.g. the same
+      FDD published by MN and WI) are stored once, URLs are index-only aliases
+    - Atomic writes (temp file + rename) under per-hash cross-process locks
     """
-    
+
     def __init__(
-        self, 
+        self,
         cache_dir: Path = Path(".cache/pdfs"),
         max_size_gb: float = 10.0,
         expiry_days: int = 30
@@ -31,134 +47,256 @@ class PDFCache:
         self.max_size_gb = max_size_gb
         self.expiry_days = expiry_days
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        
-        self._hash_index: Dict[str, Dict] = {}  # hash -> {path, url, timestamp}
-        self._url_index: Dict[str, str] = {}  # URL -> hash mapping
+        self._tmp_dir = self.cache_dir / "tmp"
+        self._tmp_dir.mkdir(exist_ok=True)
+        self._locks_dir = self.cache_dir / "locks"
+        self._locks_dir.mkdir(exist_ok=True)
         self.logger = get_logger(__name__)
-        
-        self._index_file = self.cache_dir / "index.json"
-        self._load_index()
+
+        self._db_file = self.cache_dir / "index.db"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self._db_file, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._init_db()
+        self._migrate_json_index()
         self._cleanup_expired()
-    
-    def _load_index(self):
-        """Load cache index from disk."""
-        if self._index_file.exists():
+
+    @property
+    def max_size_bytes(self) -> int:
+        return int(self.max_size_gb * 1024 * 1024 * 1024)
+
+    def _init_db(self):
+        """Create the index schema."""
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    hash TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    url TEXT,
+                    filename TEXT,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entries_created_at ON entries(created_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_hash ON urls(hash)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS http_validators (
+                    url TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) "
+                "SELECT 'total_size', COALESCE(SUM(size), 0) FROM entries"
+            )
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in a write transaction shared safely across processes."""
+        with self._lock:
             try:
-                with open(self._index_file) as f:
-                    data = json.load(f)
-                    self._hash_index = data.get("hashes", {})
-                    self._url_index = data.get("urls", {})
-                    self.logger.info(f"Loaded cache index with {len(self._hash_index)} entries")
-            except Exception as e:
-                self.logger.error(f"Failed to load cache index: {e}")
-                self._hash_index = {}
-                self._url_index = {}
-    
-    def _save_index(self):
-        """Save cache index to disk."""
+                self._conn.execute("BEGIN IMMEDIATE")
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                self._rollback()
+                raise CacheError(f"Cache index update failed: {e}")
+            except BaseException:
+                self._rollback()
+                raise
+
+    def _rollback(self):
+        if self._conn.in_transaction:
+            self._conn.execute("ROLLBACK")
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _migrate_json_index(self):
+        """Import entries from the legacy ``index.json`` index, once."""
+        json_file = self.cache_dir / "index.json"
+        if not json_file.exists():
+            return
         try:
-            with open(self._index_file, 'w') as f:
-                json.dump({
-                    "hashes": self._hash_index,
-                    "urls": self._url_index,
-                    "version": "1.0",
-                    "updated": datetime.now().isoformat()
-                }, f, indent=2)
+            with open(json_file) as f:
+                data = json.load(f)
         except Exception as e:
-            raise CacheError(f"Failed to save cache index: {e}")
-    
+            self.logger.error(f"Failed to load legacy cache index: {e}")
+            return
+
+        rows = []
+        for hash_value, info in data.get("hashes", {}).items():
+            path = Path(info["path"])
+            if not path.exists():
+                continue
+            created = datetime.fromisoformat(info["timestamp"]).timestamp()
+            rows.append((
+                hash_value, str(path), info.get("url"), info.get("filename"),
+                path.stat().st_size, created, created,
+            ))
+        migrated = {row[0] for row in rows}
+        with self._transaction() as conn:
+            for row in rows:
+                self._insert_entry(conn, *row)
+            conn.executemany(
+                "INSERT OR IGNORE INTO urls (url, hash) VALUES (?, ?)",
+                [
+                    (url, hash_value) for url, hash_value in data.get("urls", {}).items()
+                    if hash_value in migrated
+                ],
+            )
+        json_file.rename(json_file.with_suffix(".json.migrated"))
+        self.logger.info(f"Migrated {len(rows)} entries from legacy cache index")
+
+    @staticmethod
+    def _insert_entry(conn, hash_value, path, url, filename, size, created, accessed) -> bool:
+        """Insert an entry and update the running total. Returns False if present."""
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO entries "
+            "(hash, path, url, filename, size, created_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (hash_value, path, url, filename, size, created, accessed),
+        )
+        if cursor.rowcount:
+            conn.execute(
+                "UPDATE meta SET value = value + ? WHERE key = 'total_size'", (size,)
+            )
+            return True
+        return False
+
+    def _delete_entries(self, conn, hash_values) -> int:
+        """Delete entries and their files; returns the number of bytes freed."""
+        freed = 0
+        for hash_value in hash_values:
+            row = conn.execute(
+                "SELECT path, size FROM entries WHERE hash = ?", (hash_value,)
+            ).fetchone()
+            if row is None:
+                continue
+            path, size = row
+            conn.execute("DELETE FROM entries WHERE hash = ?", (hash_value,))
+            conn.execute("DELETE FROM urls WHERE hash = ?", (hash_value,))
+            conn.execute("DELETE FROM http_validators WHERE hash = ?", (hash_value,))
+            freed += size
+            try:
+                Path(path).unlink()
+            except FileNotFoundError:
+                pass
+        if freed:
+            conn.execute(
+                "UPDATE meta SET value = value - ? WHERE key = 'total_size'", (freed,)
+            )
+        return freed
+
     def _cleanup_expired(self):
         """Remove expired cache entries."""
-        now = datetime.now()
-        expired = []
-        
-        for hash_value, info in self._hash_index.items():
-            timestamp = datetime.fromisoformat(info["timestamp"])
-            if now - timestamp > timedelta(days=self.expiry_days):
-                expired.append(hash_value)
-        
-        for hash_value in expired:
-            self._remove_entry(hash_value)
-        
+        cutoff = time.time() - self.expiry_days * 86400
+        with self._transaction() as conn:
+            expired = [
+                row[0] for row in conn.execute(
+                    "SELECT hash FROM entries WHERE created_at < ?", (cutoff,)
+                ).fetchall()
+            ]
+            self._delete_entries(conn, expired)
+
         if expired:
             self.logger.info(f"Cleaned up {len(expired)} expired cache entries")
-            self._save_index()
-    
+
     def _remove_entry(self, hash_value: str):
         """Remove a cache entry."""
-        if hash_value in self._hash_index:
-            info = self._hash_index[hash_value]
-            path = Path(info["path"])
-            
-            # Remove file
-            if path.exists():
-                path.unlink()
-            
-            # Remove from URL index
-            if info["url"] in self._url_index:
-                del self._url_index[info["url"]]
-            
-            # Remove from hash index
-            del self._hash_index[hash_value]
-    
+        with self._transaction() as conn:
+            self._delete_entries(conn, [hash_value])
+
+    def _total_size(self, conn=None) -> int:
+        sql = "SELECT value FROM meta WHERE key = 'total_size'"
+        row = conn.execute(sql).fetchone() if conn else self._query(sql)[0]
+        return row[0]
+
     def _check_size_limit(self):
-        """Check and enforce cache size limit."""
-        total_size = sum(
-            Path(info["path"]).stat().st_size 
-            for info in self._hash_index.values() 
-            if Path(info["path"]).exists()
-        )
-        
-        if total_size > self.max_size_gb * 1024 * 1024 * 1024:
-            # Remove oldest entries until under limit
-            sorted_entries = sorted(
-                self._hash_index.items(),
-                key=lambda x: x[1]["timestamp"]
+        """Evict least recently used entries once the size limit is exceeded."""
+        limit = self.max_size_bytes
+        with self._transaction() as conn:
+            total_size = self._total_size(conn)
+            if total_size <= limit:
+                return
+
+            # Evict down to the 90% threshold
+            target = limit * 0.9
+            cursor = conn.execute(
+                "SELECT hash, size FROM entries ORDER BY last_access ASC"
             )
-            
-            while total_size > self.max_size_gb * 1024 * 1024 * 1024 * 0.9:  # 90% threshold
-                if not sorted_entries:
+            victims = []
+            for hash_value, size in cursor:
+                if total_size <= target:
                     break
-                    
-                hash_value, info = sorted_entries.pop(0)
-                file_size = Path(info["path"]).stat().st_size
-                self._remove_entry(hash_value)
-                total_size -= file_size
-            
-            self._save_index()
-    
+                victims.append(hash_value)
+                total_size -= size
+            evicted = len(victims)
+            self._delete_entries(conn, victims)
+
+        self.logger.info(f"Evicted {evicted} least recently used cache entries")
+
+    def _touch(self, hash_value: str):
+        """Record an access for LRU eviction."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE entries SET last_access = ? WHERE hash = ?",
+                (time.time(), hash_value),
+            )
+
     def calculate_hash(self, content: bytes) -> str:
         """Calculate SHA256 hash of content."""
         return hashlib.sha256(content).hexdigest()
-    
+
     def get_by_url(self, url: str) -> Optional[Path]:
         """Get cached PDF by URL."""
-        if url in self._url_index:
-            hash_value = self._url_index[url]
-            if hash_value in self._hash_index:
-                path = Path(self._hash_index[hash_value]["path"])
-                if path.exists():
-                    self.logger.debug(f"Cache hit for URL: {url}")
-                    return path
-                else:
-                    # File missing, cleanup index
-                    self._remove_entry(hash_value)
-                    self._save_index()
-        return None
-    
+        rows = self._query("SELECT hash FROM urls WHERE url = ?", (url,))
+        if not rows:
+            return None
+        path = self.get_by_hash(rows[0][0])
+        if path:
+            self.logger.debug(f"Cache hit for URL: {url}")
+        return path
+
     def get_by_hash(self, hash_value: str) -> Optional[Path]:
         """Get cached PDF by hash."""
-        if hash_value in self._hash_index:
-            path = Path(self._hash_index[hash_value]["path"])
-            if path.exists():
-                self.logger.debug(f"Cache hit for hash: {hash_value[:8]}...")
-                return path
-            else:
-                # File missing, cleanup index
-                self._remove_entry(hash_value)
-                self._save_index()
+        rows = self._query("SELECT path FROM entries WHERE hash = ?", (hash_value,))
+        if not rows:
+            return None
+        path = Path(rows[0][0])
+        if path.exists():
+            self.logger.debug(f"Cache hit for hash: {hash_value[:8]}...")
+            self._touch(hash_value)
+            return path
+        # File missing, cleanup index
+        self._remove_entry(hash_value)
         return None
-    
+
     def exists(self, url: str = None, hash_value: str = None) -> bool:
         """Check if PDF exists in cache."""
         if url:
@@ -166,58 +304,203 @@ class PDFCache:
         if hash_value:
             return self.get_by_hash(hash_value) is not None
         return False
-    
-    def add(self, content: bytes, url: str, filename: str) -> Tuple[Path, str]:
-        """Add PDF to cache and return path and hash."""
-        hash_value = self.calculate_hash(content)
-        
-        # Check if already cached
-        if hash_value in self._hash_index:
+
+    def _cache_path(self, hash_value: str) -> Path:
+        """Build the content-addressed path for a document.
+
+        Objects are sharded two levels deep by hash prefix
+        (``objects/ab/cd/<hash>.pdf``) to keep directories small.
+        """
+        return (
+            self.cache_dir / "objects" / hash_value[:2] / hash_value[2:4]
+            / f"{hash_value}.pdf"
+        )
+
+    @contextmanager
+    def _hash_lock(self, hash_value: str):
+        """Hold an exclusive cross-process lock for a content hash.
+
+        Locks are striped over 256 lock files by hash prefix, so concurrent
+        writers of the same document serialize without creating one lock file
+        per cached PDF.
+        """
+        lock_path = self._locks_dir / f"{hash_value[:2]}.lock"
+        with open(lock_path, "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _get_cached_path(self, hash_value: str, url: str) -> Optional[Path]:
+        """Return the existing path for a hash, aliasing ``url`` to it."""
+        path = self.get_by_hash(hash_value)
+        if path:
             self.logger.info(f"PDF already cached: {hash_value[:8]}...")
-            path = Path(self._hash_index[hash_value]["path"])
-            if path.exists():
-                return path, hash_value
-        
-        # Create safe filename
-        safe_filename = "".join(c for c in filename if c.isalnum() or c in "._- ")[:100]
-        file_path = self.cache_dir / f"{hash_value[:8]}_{safe_filename}"
-        
-        # Save to cache
-        try:
-            with open(file_path, 'wb') as f:
-                f.write(content)
-        except Exception as e:
-            raise CacheError(f"Failed to write cache file: {e}")
-        
-        # Update indices
-        self._hash_index[hash_value] = {
-            "path": str(file_path),
-            "url": url,
-            "timestamp": datetime.now().isoformat(),
-            "filename": filename,
-            "size": len(content)
-        }
-        self._url_index[url] = hash_value
-        
-        self._save_index()
+            self._add_url(url, hash_value)
+        return path
+
+    def _add_url(self, url: str, hash_value: str):
+        """Alias a URL to cached content (index-only, no extra file)."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)", (url, hash_value)
+            )
+
+    def _index_entry(self, hash_value: str, file_path: Path, url: str, filename: str, size: int):
+        """Record a newly cached file in the index."""
+        now = time.time()
+        with self._transaction() as conn:
+            self._insert_entry(conn, hash_value, str(file_path), url, filename, size, now, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)", (url, hash_value)
+            )
         self._check_size_limit()
-        
+
         self.logger.info(f"Cached PDF: {filename} -> {hash_value[:8]}...")
+
+    def _publish(self, temp_path: Path, hash_value: str) -> Path:
+        """Atomically move a fully written temp file to its object path."""
+        file_path = self._cache_path(hash_value)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, file_path)
+        return file_path
+
+    def _temp_path(self) -> Path:
+        fd, name = tempfile.mkstemp(suffix=".part", dir=self._tmp_dir)
+        os.close(fd)
+        return Path(name)
+
+    def add(self, content: bytes, url: str, filename: str) -> Tuple[Path, str]:
+        """Add PDF to cache and return path and hash."""
+        hash_value = self.calculate_hash(content)
+
+        with self._hash_lock(hash_value):
+            # Check if already cached
+            cached = self._get_cached_path(hash_value, url)
+            if cached:
+                return cached, hash_value
+
+            # Write to a temp file, then rename so readers never see partial files
+            temp_path = self._temp_path()
+            try:
+                with open(temp_path, 'wb') as f:
+                    f.write(content)
+                file_path = self._publish(temp_path, hash_value)
+            except Exception as e:
+                temp_path.unlink(missing_ok=True)
+                raise CacheError(f"Failed to write cache file: {e}")
+
+            self._index_entry(hash_value, file_path, url, filename, len(content))
+        return file_path, hash_value
+
+    def add_file(
+        self, source_path: Path, url: str, filename: str, hash_value: Optional[str] = None
+    ) -> Tuple[Path, str]:
+        """Move a downloaded file into the cache and return path and hash.
+
+        Use this for streamed downloads: the file is moved (not copied or read
+        into memory) and ``hash_value`` can be passed in when it was computed
+        while downloading. The source file is consumed either way.
+        """
+        source_path = Path(source_path)
+        if hash_value is None:
+            digest = hashlib.sha256()
+            with open(source_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            hash_value = digest.hexdigest()
+
+        with self._hash_lock(hash_value):
+            cached = self._get_cached_path(hash_value, url)
+            if cached:
+                source_path.unlink(missing_ok=True)
+                return cached, hash_value
+
+            size = source_path.stat().st_size
+            try:
+                try:
+                    file_path = self._publish(source_path, hash_value)
+                except OSError:
+                    # Source is on another filesystem; copy next to the store first
+                    temp_path = self._temp_path()
+                    shutil.move(str(source_path), temp_path)
+                    file_path = self._publish(temp_path, hash_value)
+            except Exception as e:
+                raise CacheError(f"Failed to move file into cache: {e}")
+
+            self._index_entry(hash_value, file_path, url, filename, size)
         return file_path, hash_value
-    
+
+    def link(self, hash_value: str, dest_path: Path) -> Path:
+        """Expose a cached document under a readable name without copying it.
+
+        A hardlink is used where the filesystem allows it, a copy otherwise.
+        """
+        source = self.get_by_hash(hash_value)
+        if source is None:
+            raise CacheError(f"No cached document for hash {hash_value[:8]}...")
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source, dest_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copy2(source, dest_path)
+        return dest_path
+
+    def get_validators(self, url: str) -> Optional[Dict[str, Optional[str]]]:
+        """Get the stored HTTP validators for a URL whose content is still cached."""
+        rows = self._query(
+            "SELECT hash, etag, last_modified FROM http_validators WHERE url = ?", (url,)
+        )
+        if not rows or self.get_by_hash(rows[0][0]) is None:
+            return None
+        hash_value, etag, last_modified = rows[0]
+        return {"hash": hash_value, "etag": etag, "last_modified": last_modified}
+
+    def set_validators(
+        self,
+        url: str,
+        hash_value: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """Store the ETag/Last-Modified returned with a cached document."""
+        if not etag and not last_modified:
+            return
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_validators "
+                "(url, hash, etag, last_modified, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (url, hash_value, etag, last_modified, time.time()),
+            )
+
+    def close(self):
+        """Close the index database connection."""
+        with self._lock:
+            self._conn.close()
+
     def get_stats(self) -> dict:
         """Get cache statistics."""
-        total_size = sum(
-            Path(info["path"]).stat().st_size 
-            for info in self._hash_index.values() 
-            if Path(info["path"]).exists()
-        )
-        
+        total_entries = self._query("SELECT COUNT(*) FROM entries")[0][0]
+        unique_urls = self._query("SELECT COUNT(*) FROM urls")[0][0]
+        total_size = self._total_size()
+
         return {
-            "total_entries": len(self._hash_index),
-            "unique_urls": len(self._url_index),
+            "total_entries": total_entries,
+            "unique_urls": unique_urls,
             "total_size_mb": round(total_size / 1024 / 1024, 2),
             "size_limit_gb": self.max_size_gb,
             "expiry_days": self.expiry_days,
             "cache_dir": str(self.cache_dir)
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,306 @@
+"""Adaptive per-host rate limiting for portal requests.
+
+Each portal host gets a token bucket whose refill rate adapts AIMD-style:
+the rate creeps up additively while responses are healthy and is cut
+multiplicatively on 429/5xx responses or slow responses. Bucket state lives in
+a backend, either in memory (shared by all coroutines in the process) or in
+SQLite (shared by every process on the machine), so parallel state flows
+hitting the same host are coordinated.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Callable, Dict, Optional, TypeVar
+from urllib.parse import urlparse
+
+from utils.logging import get_logger
+
+
+T = TypeVar("T")
+
+# Starting request rates (requests/second) for known portals.
+DEFAULT_PORTAL_RATES: Dict[str, float] = {
+    "apps.dfi.wi.gov": 1.0,
+    "www.cards.commerce.state.mn.us": 1.0,
+}
+DEFAULT_RATE = 1.0
+
+# Status codes that signal the portal wants us to slow down.
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+@dataclass
+class BucketState:
+    """Persisted state of one host's token bucket."""
+
+    rate: float
+    tokens: float
+    updated_at: float
+    blocked_until: float = 0.0
+    last_decrease: float = 0.0
+
+
+class MemoryRateBackend:
+    """Bucket state shared by all limiters in this process."""
+
+    def __init__(self):
+        self._states: Dict[str, BucketState] = {}
+        self._lock = threading.Lock()
+
+    def update(
+        self, host: str, default: BucketState, fn: Callable[[BucketState], T]
+    ) -> T:
+        """Atomically read-modify-write a host's bucket state."""
+        with self._lock:
+            state = self._states.setdefault(host, replace(default))
+            return fn(state)
+
+
+class SQLiteRateBackend:
+    """Bucket state shared across processes through a SQLite file."""
+
+    def __init__(self, db_path: Path = Path(".cache/rate_limits.db")):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.db_path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS buckets (
+                host TEXT PRIMARY KEY,
+                rate REAL NOT NULL,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL,
+                last_decrease REAL NOT NULL
+            )
+            """
+        )
+
+    def update(
+        self, host: str, default: BucketState, fn: Callable[[BucketState], T]
+    ) -> T:
+        """Atomically read-modify-write a host's bucket state."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT rate, tokens, updated_at, blocked_until, last_decrease "
+                    "FROM buckets WHERE host = ?",
+                    (host,),
+                ).fetchone()
+                state = BucketState(*row) if row else replace(default)
+                result = fn(state)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets "
+                    "(host, rate, tokens, updated_at, blocked_until, last_decrease) "
+                    "VALUES (:host, :rate, :tokens, :updated_at, :blocked_until, :last_decrease)",
+                    {"host": host, **asdict(state)},
+                )
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+
+
+class AdaptiveRateLimiter:
+    """AIMD token-bucket rate limiter for a single host.
+
+    Usage::
+
+        limiter = get_rate_limiter("apps.dfi.wi.gov")
+        await limiter.acquire()
+        start = time.monotonic()
+        response = await client.get(url)
+        limiter.record(response.status_code, time.monotonic() - start)
+    """
+
+    def __init__(
+        self,
+        host: str,
+        initial_rate: Optional[float] = None,
+        min_rate: float = 0.1,
+        max_rate: float = 10.0,
+        burst: float = 2.0,
+        additive_increase: float = 0.05,
+        decrease_factor: float = 0.5,
+        slow_response_seconds: float = 10.0,
+        decrease_cooldown: float = 2.0,
+        backend=None,
+    ):
+        self.host = host.lower()
+        self.initial_rate = initial_rate or DEFAULT_PORTAL_RATES.get(self.host, DEFAULT_RATE)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.slow_response_seconds = slow_response_seconds
+        self.decrease_cooldown = decrease_cooldown
+        self.backend = backend or MemoryRateBackend()
+        self.logger = get_logger(__name__)
+        self._stats = {
+            "acquired": 0,
+            "waited_seconds": 0.0,
+            "increases": 0,
+            "decreases": 0,
+            "throttled_responses": 0,
+        }
+
+    def _default_state(self) -> BucketState:
+        return BucketState(rate=self.initial_rate, tokens=self.burst, updated_at=time.time())
+
+    def _refill(self, state: BucketState, now: float):
+        elapsed = max(0.0, now - state.updated_at)
+        state.tokens = min(self.burst, state.tokens + elapsed * state.rate)
+        state.updated_at = now
+
+    def _try_take(self, state: BucketState) -> float:
+        """Take a token if available; otherwise return seconds to wait."""
+        now = time.time()
+        self._refill(state, now)
+        if now < state.blocked_until:
+            return state.blocked_until - now
+        if state.tokens >= 1.0:
+            state.tokens -= 1.0
+            return 0.0
+        return (1.0 - state.tokens) / state.rate
+
+    async def acquire(self):
+        """Wait until a request to this host is allowed."""
+        waited = 0.0
+        while True:
+            wait = self.backend.update(self.host, self._default_state(), self._try_take)
+            if wait <= 0:
+                break
+            waited += wait
+            await asyncio.sleep(wait)
+        self._stats["acquired"] += 1
+        self._stats["waited_seconds"] += waited
+
+    def record(
+        self,
+        status_code: Optional[int],
+        latency: float,
+        retry_after: Optional[float] = None,
+    ):
+        """Feed a response back so the rate can adapt.
+
+        Args:
+            status_code: HTTP status, or None if the request failed outright
+            latency: Seconds the request took
+            retry_after: Seconds from a Retry-After header, if any
+        """
+        throttled = status_code is None or status_code in THROTTLE_STATUS_CODES or status_code >= 500
+        slow = latency >= self.slow_response_seconds
+        if throttled:
+            self._stats["throttled_responses"] += 1
+
+        def adapt(state: BucketState) -> Optional[float]:
+            now = time.time()
+            self._refill(state, now)
+            if retry_after:
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+                state.tokens = 0.0
+            if throttled or slow:
+                # One decrease per cooldown window, so a burst of in-flight
+                # failures doesn't collapse the rate to the floor
+                if now - state.last_decrease < self.decrease_cooldown:
+                    return None
+                state.rate = max(self.min_rate, state.rate * self.decrease_factor)
+                state.tokens = min(state.tokens, 0.0)
+                state.last_decrease = now
+                return -state.rate
+            state.rate = min(self.max_rate, state.rate + self.additive_increase)
+            return state.rate
+
+        new_rate = self.backend.update(self.host, self._default_state(), adapt)
+        if new_rate is None:
+            return
+        if new_rate < 0:
+            self._stats["decreases"] += 1
+            self.logger.info(
+                f"Slowing down {self.host} to {-new_rate:.2f} req/s "
+                f"(status {status_code}, {latency:.1f}s)"
+            )
+        else:
+            self._stats["increases"] += 1
+
+    @property
+    def current_rate(self) -> float:
+        return self.backend.update(self.host, self._default_state(), lambda s: s.rate)
+
+    def get_stats(self) -> dict:
+        """Get limiter statistics."""
+        return {
+            "host": self.host,
+            "current_rate": round(self.current_rate, 3),
+            **{
+                key: round(value, 3) if isinstance(value, float) else value
+                for key, value in self._stats.items()
+            },
+        }
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_default_backend = None
+_registry_lock = threading.Lock()
+
+
+def get_default_backend():
+    """Get the process-wide backend.
+
+    Set ``RATE_LIMIT_DB`` to a SQLite path to share limits across processes.
+    """
+    global _default_backend
+    with _registry_lock:
+        if _default_backend is None:
+            db_path = os.environ.get("RATE_LIMIT_DB")
+            _default_backend = (
+                SQLiteRateBackend(Path(db_path)) if db_path else MemoryRateBackend()
+            )
+        return _default_backend
+
+
+def get_rate_limiter(host_or_url: str) -> AdaptiveRateLimiter:
+    """Get the shared limiter for a host (or the host of a URL)."""
+    host = (urlparse(host_or_url).hostname or host_or_url).lower()
+    backend = get_default_backend()
+    with _registry_lock:
+        if host not in _limiters:
+            _limiters[host] = AdaptiveRateLimiter(host, backend=backend)
+        return _limiters[host]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+async def throttled_goto(page, url: str, **kwargs):
+    """``page.goto`` that waits for and reports to the host's rate limiter."""
+    limiter = get_rate_limiter(url)
+    await limiter.acquire()
+    start = time.monotonic()
+    try:
+        response = await page.goto(url, **kwargs)
+    except Exception:
+        limiter.record(None, time.monotonic() - start)
+        raise
+    limiter.record(response.status if response else 200, time.monotonic() - start)
+    return response
@@ -0,0 +1,267 @@
+"""Persisted snapshots of state registration tables for incremental scraping."""
+
+import hashlib
+import json
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from utils.logging import get_logger
+
+
+# Fields of a discovered document that identify its content. These names are
+# shared by DocumentMetadata and the filing_metadata stored with each scrape.
+DOCUMENT_FIELDS = (
+    "franchise_name",
+    "filing_number",
+    "filing_date",
+    "document_type",
+    "download_url",
+)
+
+STATUS_PENDING = "pending"
+STATUS_STORED = "stored"
+
+
+def _field_value(record: Any, name: str) -> Any:
+    """Read a field from a mapping, a pandas row or a plain object."""
+    if isinstance(record, Mapping) or hasattr(record, "get"):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def compute_row_hash(record: Any, fields: Optional[Sequence[str]] = None) -> str:
+    """Compute a stable content hash for a registration row.
+
+    Args:
+        record: Mapping, pandas row or object holding the row values
+        fields: Fields to include (default: all keys of a mapping)
+
+    Returns:
+        SHA256 hex digest of the normalized row content
+    """
+    if fields is None:
+        fields = sorted(record.keys())
+    normalized = {}
+    for name in fields:
+        value = _field_value(record, name)
+        if value is None or (isinstance(value, float) and value != value):
+            normalized[name] = ""
+        else:
+            normalized[name] = " ".join(str(value).split())
+    payload = json.dumps(normalized, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SnapshotEntry:
+    """A scraped row with its snapshot key and content hash."""
+
+    key: str
+    row_hash: str
+    record: Any
+    position: int
+
+
+@dataclass
+class SnapshotDiff:
+    """Difference between a fresh scrape and the persisted snapshot."""
+
+    new: List[SnapshotEntry] = field(default_factory=list)
+    changed: List[SnapshotEntry] = field(default_factory=list)
+    unchanged: List[SnapshotEntry] = field(default_factory=list)
+    removed: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def to_enqueue(self) -> List[SnapshotEntry]:
+        """Rows that need downloading: new filings and changed ones."""
+        return sorted(self.new + self.changed, key=lambda e: e.position)
+
+    def summary(self) -> dict:
+        return {
+            "new": len(self.new),
+            "changed": len(self.changed),
+            "unchanged": len(self.unchanged),
+            "removed": len(self.removed),
+        }
+
+
+class RegistrationSnapshot:
+    """Snapshot of the last scraped registration table for one state portal.
+
+    Rows are keyed by filing number plus a hash of the row content, so a
+    filing with several documents (one row per year or document) keeps one
+    entry per row. A row is only considered unchanged once its documents have
+    been stored; rows that were enqueued but never confirmed stay ``pending``
+    and are enqueued again on the next run.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        db_path: Path = Path(".cache/snapshots/registrations.db"),
+    ):
+        self.source = source.upper()
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = get_logger(__name__)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS registrations (
+                    source TEXT NOT NULL,
+                    filing_number TEXT NOT NULL,
+                    row_hash TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL,
+                    PRIMARY KEY (source, filing_number, row_hash)
+                )
+                """
+            )
+
+    def _load(self) -> dict:
+        """Load the status of every stored row, keyed by (filing, row hash)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT filing_number, row_hash, status FROM registrations "
+                "WHERE source = ?",
+                (self.source,),
+            ).fetchall()
+        return {(filing, row_hash): status for filing, row_hash, status in rows}
+
+    def diff(
+        self,
+        records: Iterable[Any],
+        key_field: str = "filing_number",
+        fields: Optional[Sequence[str]] = None,
+    ) -> SnapshotDiff:
+        """Compare scraped rows against the snapshot.
+
+        Args:
+            records: Scraped rows (mappings, pandas rows or objects)
+            key_field: Field holding the filing number
+            fields: Fields included in the row hash (default: all mapping keys)
+
+        Returns:
+            SnapshotDiff classifying every row
+        """
+        statuses = self._load()
+        known_filings = {filing for filing, _ in statuses}
+        result = SnapshotDiff()
+        seen_rows = set()
+
+        for position, record in enumerate(records):
+            key = str(_field_value(record, key_field) or "").strip()
+            entry = SnapshotEntry(
+                key=key,
+                row_hash=compute_row_hash(record, fields),
+                record=record,
+                position=position,
+            )
+            seen_rows.add((key, entry.row_hash))
+            status = statuses.get((key, entry.row_hash))
+            if status == STATUS_STORED:
+                result.unchanged.append(entry)
+            elif status == STATUS_PENDING or key in known_filings:
+                result.changed.append(entry)
+            else:
+                result.new.append(entry)
+
+        # Per row: a filing that gained or lost a document keeps the rows
+        # that are still listed
+        result.removed = sorted(set(statuses) - seen_rows)
+        self.logger.info(f"{self.source} registration snapshot diff: {result.summary()}")
+        return result
+
+    def diff_documents(self, documents: Iterable[Any]) -> SnapshotDiff:
+        """Diff discovered document metadata using the standard document fields."""
+        return self.diff(documents, key_field="filing_number", fields=DOCUMENT_FIELDS)
+
+    def diff_dataframe(self, df, key_column: str) -> SnapshotDiff:
+        """Diff a scraped registration DataFrame, hashing every column."""
+        columns = list(df.columns)
+        return self.diff(
+            (row for _, row in df.iterrows()), key_field=key_column, fields=columns
+        )
+
+    def record(self, diff: SnapshotDiff):
+        """Persist a diff as the new snapshot.
+
+        Enqueued rows are stored as ``pending`` until :meth:`mark_stored` is
+        called; rows that disappeared from the portal are dropped.
+        """
+        now = datetime.utcnow().isoformat()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE registrations SET last_seen = ? "
+                "WHERE source = ? AND filing_number = ? AND row_hash = ?",
+                [(now, self.source, e.key, e.row_hash) for e in diff.unchanged],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO registrations "
+                "(source, filing_number, row_hash, status, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (self.source, e.key, e.row_hash, STATUS_PENDING, now, now)
+                    for e in diff.to_enqueue
+                ],
+            )
+            conn.executemany(
+                "DELETE FROM registrations WHERE source = ? AND filing_number = ? "
+                "AND row_hash = ?",
+                [(self.source, filing, row_hash) for filing, row_hash in diff.removed],
+            )
+
+    def mark_stored(self, filing_number: str, row_hash: str):
+        """Confirm that the documents for a row were stored."""
+        self.mark_stored_many([(filing_number, row_hash)])
+
+    def mark_stored_many(self, rows: Iterable[Tuple[str, str]]):
+        """Confirm several stored rows at once."""
+        now = datetime.utcnow().isoformat()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO registrations "
+                "(source, filing_number, row_hash, status, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(source, filing_number, row_hash) "
+                "DO UPDATE SET status = excluded.status, last_seen = excluded.last_seen",
+                [
+                    (self.source, str(filing).strip(), row_hash, STATUS_STORED, now, now)
+                    for filing, row_hash in rows
+                ],
+            )
+
+    def get_stats(self) -> dict:
+        """Get snapshot statistics."""
+        with self._connect() as conn:
+            counts = dict(
+                conn.execute(
+                    "SELECT status, COUNT(*) FROM registrations WHERE source = ? "
+                    "GROUP BY status",
+                    (self.source,),
+                ).fetchall()
+            )
+        return {
+            "source": self.source,
+            "stored_rows": counts.get(STATUS_STORED, 0),
+            "pending_rows": counts.get(STATUS_PENDING, 0),
+            "db_path": str(self.db_path),
+        }
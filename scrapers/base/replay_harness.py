@@ -0,0 +1,585 @@
+"""Record portal traffic into a fixture archive and replay it offline.
+
+Scraper throughput cannot be measured, or regressions caught, while every run
+depends on live state portals. In record mode the portal HTML, XHR and PDF
+responses that browser contexts and :class:`HTTPDownloader` clients receive
+are saved to a :class:`FixtureArchive`. In replay mode a local HTTP stand-in
+(:class:`ReplayServer`) serves those fixtures instead: browser requests are
+routed to it and HTTP clients get a transport that rewrites URLs onto it, so
+the scraper code runs unchanged, over real sockets, without network access.
+
+The harness is picked up from the environment (``SCRAPER_FIXTURE_MODE`` set
+to ``record`` or ``replay``, ``SCRAPER_FIXTURE_DIR`` for the archive) or
+installed explicitly with :func:`use_replay_harness`. Without either, the
+hooks are no-ops.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from utils.logging import get_logger
+
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODES = (MODE_RECORD, MODE_REPLAY)
+
+DEFAULT_FIXTURE_DIR = Path(".cache/fixtures")
+
+# Query parameters that only bust caches (jQuery's "_=<timestamp>")
+IGNORED_QUERY_PARAMS = frozenset({"_"})
+
+# Bodies are stored decoded, so encoding and framing headers are dropped
+_DROPPED_HEADERS = frozenset(
+    {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+)
+
+# Partial and conditional responses depend on request headers the key ignores
+_UNRECORDED_STATUS = frozenset({206, 304, 416})
+
+MISS_HEADER = "X-Replay-Miss"
+
+KIND_PAGE = "page"
+KIND_DOCUMENT = "document"
+KIND_ASSET = "asset"
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for fixture lookup.
+
+    Drops the fragment and cache-busting parameters and sorts the query.
+    """
+    parts = urlsplit(url)
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in IGNORED_QUERY_PARAMS
+    )
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(query), "")
+    )
+
+
+def fixture_key(method: str, url: str, body: Optional[bytes] = None) -> str:
+    """Lookup key of a request; request bodies (form posts) are part of it."""
+    key = f"{method.upper()} {normalize_url(url)}"
+    if body:
+        key += " " + hashlib.sha256(body).hexdigest()[:16]
+    return key
+
+
+def content_kind(content_type: str) -> str:
+    """Classify a response as a page, a document (PDF) or a page asset."""
+    content_type = content_type.lower()
+    if "pdf" in content_type or "octet-stream" in content_type:
+        return KIND_DOCUMENT
+    if any(t in content_type for t in ("html", "json", "xml", "text/plain")):
+        return KIND_PAGE
+    return KIND_ASSET
+
+
+@dataclass
+class Fixture:
+    """One recorded response."""
+
+    key: str
+    method: str
+    url: str
+    status: int
+    headers: List[Tuple[str, str]]
+    body_sha256: str
+    size: int
+    recorded_at: float = field(default_factory=time.time)
+
+    @property
+    def content_type(self) -> str:
+        for name, value in self.headers:
+            if name.lower() == "content-type":
+                return value.split(";")[0].strip().lower()
+        return ""
+
+    @property
+    def kind(self) -> str:
+        return content_kind(self.content_type)
+
+
+class FixtureArchive:
+    """Directory of recorded responses.
+
+    Layout::
+
+        index.jsonl        one fixture per line, later lines win
+        bodies/<sha256>    response bodies, stored once per distinct content
+
+    Appending to the index as responses arrive keeps a recording usable even
+    if the run is killed part way.
+    """
+
+    def __init__(self, root: Path = DEFAULT_FIXTURE_DIR):
+        self.root = Path(root)
+        self.bodies_dir = self.root / "bodies"
+        self.index_path = self.root / "index.jsonl"
+        self.logger = get_logger(__name__)
+        self._fixtures: Dict[str, Fixture] = {}
+        self._recorded: Counter = Counter()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                data["headers"] = [tuple(header) for header in data["headers"]]
+                fixture = Fixture(**data)
+                self._fixtures[fixture.key] = fixture
+
+    def __len__(self) -> int:
+        return len(self._fixtures)
+
+    def get(self, method: str, url: str, body: Optional[bytes] = None) -> Optional[Fixture]:
+        """Find the fixture recorded for a request."""
+        return self._fixtures.get(fixture_key(method, url, body))
+
+    def read_body(self, fixture: Fixture) -> bytes:
+        return (self.bodies_dir / fixture.body_sha256).read_bytes()
+
+    @staticmethod
+    def should_record(status: int) -> bool:
+        return status not in _UNRECORDED_STATUS
+
+    def put(
+        self,
+        method: str,
+        url: str,
+        status: int,
+        headers: Iterable[Tuple[str, str]],
+        body: bytes,
+        request_body: Optional[bytes] = None,
+    ) -> Fixture:
+        """Store a response (with its decoded body)."""
+        digest = hashlib.sha256(body).hexdigest()
+        fixture = Fixture(
+            key=fixture_key(method, url, request_body),
+            method=method.upper(),
+            url=url,
+            status=status,
+            headers=[(name, value) for name, value in headers
+                     if name.lower() not in _DROPPED_HEADERS],
+            body_sha256=digest,
+            size=len(body),
+        )
+        with self._lock:
+            self.bodies_dir.mkdir(parents=True, exist_ok=True)
+            path = self.bodies_dir / digest
+            if not path.exists():
+                temp_path = path.with_suffix(".tmp")
+                temp_path.write_bytes(body)
+                temp_path.replace(path)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(fixture)) + "\n")
+            self._fixtures[fixture.key] = fixture
+            self._recorded[fixture.kind] += 1
+        self.logger.debug(f"Recorded {fixture.key} ({status}, {len(body)} bytes)")
+        return fixture
+
+    def get_stats(self) -> dict:
+        """Get fixture counts, and what this process recorded."""
+        kinds = Counter(fixture.kind for fixture in self._fixtures.values())
+        return {
+            "fixtures": len(self._fixtures),
+            "bytes": sum(fixture.size for fixture in self._fixtures.values()),
+            "by_kind": dict(kinds),
+            "recorded": dict(self._recorded),
+        }
+
+
+class ReplayServer:
+    """Local HTTP stand-in that serves a fixture archive.
+
+    ``https://host/path?query`` is served at
+    ``http://127.0.0.1:<port>/https/host/path?query`` (see :meth:`url_for`).
+    Requests without a fixture get a 404 carrying an ``X-Replay-Miss``
+    header. ``latency`` adds a fixed delay per response to mimic a portal's
+    round trip.
+    """
+
+    def __init__(
+        self,
+        archive: FixtureArchive,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+    ):
+        self.archive = archive
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.logger = get_logger(__name__)
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats: Counter = Counter()
+        self._missed: List[str] = []
+
+    def start(self):
+        """Start serving in a background thread."""
+        if self._server is not None:
+            return
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="replay-server", daemon=True
+        )
+        self._thread.start()
+        self.logger.info(
+            f"Replay server on {self.base_url} serving {len(self.archive)} fixtures"
+        )
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=5)
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def url_for(self, url: str) -> str:
+        """Stand-in URL for an original URL."""
+        parts = urlsplit(url)
+        stand_in = f"{self.base_url}/{parts.scheme}/{parts.netloc}{parts.path or '/'}"
+        return f"{stand_in}?{parts.query}" if parts.query else stand_in
+
+    @staticmethod
+    def original_url(path: str) -> str:
+        """Original URL for the path of a stand-in request."""
+        scheme, _, rest = path.lstrip("/").partition("/")
+        return f"{scheme}://{rest}"
+
+    def serve(
+        self, method: str, path: str, body: Optional[bytes]
+    ) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        """Look up the response to a stand-in request."""
+        if self.latency:
+            time.sleep(self.latency)
+        url = self.original_url(path)
+        fixture = self.archive.get(method, url, body)
+        if fixture is None and method.upper() == "HEAD":
+            fixture = self.archive.get("GET", url)
+        with self._lock:
+            self._stats["requests"] += 1
+            if fixture is None:
+                self._stats["misses"] += 1
+                if len(self._missed) < 20:
+                    self._missed.append(f"{method} {url}")
+            else:
+                self._stats[fixture.kind + "s"] += 1
+                self._stats["bytes"] += fixture.size
+        if fixture is None:
+            self.logger.warning(f"No fixture for {method} {url}")
+            return 404, [("Content-Type", "text/plain"), (MISS_HEADER, "1")], (
+                f"No fixture for {method} {url}".encode()
+            )
+        return fixture.status, fixture.headers, self.archive.read_body(fixture)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else None
+                status, headers, content = server.serve(self.command, self.path, body)
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(content)
+
+            do_GET = do_POST = do_HEAD = do_PUT = do_DELETE = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self._stats["requests"],
+                "pages": self._stats[KIND_PAGE + "s"],
+                "documents": self._stats[KIND_DOCUMENT + "s"],
+                "assets": self._stats[KIND_ASSET + "s"],
+                "misses": self._stats["misses"],
+                "bytes": self._stats["bytes"],
+                "missed_urls": list(self._missed),
+            }
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """httpx transport that saves every response it passes through."""
+
+    def __init__(self, archive: FixtureArchive, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.archive = archive
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request_body = await request.aread()
+        response = await self._transport.handle_async_request(request)
+        if not self.archive.should_record(response.status_code):
+            return response
+        # Read (and decode) the body once, store it, and hand out a copy
+        body = await response.aread()
+        fixture = self.archive.put(
+            request.method, str(request.url), response.status_code,
+            response.headers.multi_items(), body, request_body,
+        )
+        return httpx.Response(
+            response.status_code,
+            headers=fixture.headers,
+            content=body,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """httpx transport that sends every request to the replay server."""
+
+    def __init__(self, server: ReplayServer, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.server = server
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        stand_in = httpx.Request(
+            request.method,
+            self.server.url_for(str(request.url)),
+            headers=[(k, v) for k, v in request.headers.raw if k.lower() != b"host"],
+            content=body,
+            extensions=request.extensions,
+        )
+        return await self._transport.handle_async_request(stand_in)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class ReplayHarness:
+    """Record or replay the traffic of browser contexts and HTTP clients."""
+
+    def __init__(
+        self,
+        mode: str,
+        fixture_dir: Path = DEFAULT_FIXTURE_DIR,
+        latency: float = 0.0,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode: {mode}. Available: {list(MODES)}")
+        self.mode = mode
+        self.archive = FixtureArchive(fixture_dir)
+        self.server = ReplayServer(self.archive, latency=latency) if mode == MODE_REPLAY else None
+        self.logger = get_logger(__name__)
+
+    @classmethod
+    def from_env(cls) -> Optional["ReplayHarness"]:
+        """Build a harness from ``SCRAPER_FIXTURE_*`` variables, if set."""
+        mode = os.getenv("SCRAPER_FIXTURE_MODE", "").strip().lower()
+        if not mode:
+            return None
+        return cls(
+            mode,
+            Path(os.getenv("SCRAPER_FIXTURE_DIR", str(DEFAULT_FIXTURE_DIR))),
+            latency=float(os.getenv("SCRAPER_FIXTURE_LATENCY", "0")),
+        )
+
+    def start(self):
+        if self.server is not None:
+            self.server.start()
+
+    def close(self):
+        if self.server is not None:
+            self.server.stop()
+
+    def http_transport(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        limits: Optional[httpx.Limits] = None,
+    ) -> Optional[httpx.AsyncBaseTransport]:
+        """Transport for an HTTP client.
+
+        A transport the caller supplied (e.g. a mock) is returned unchanged.
+        """
+        if transport is not None:
+            return transport
+        network = httpx.AsyncHTTPTransport(limits=limits or httpx.Limits())
+        if self.mode == MODE_RECORD:
+            return RecordingTransport(self.archive, network)
+        self.start()
+        return ReplayTransport(self.server, network)
+
+    async def attach(self, context):
+        """Route a Playwright BrowserContext (or Page) through the harness.
+
+        Call before :func:`apply_blocking_profile`: Playwright runs the most
+        recently added route first, so blocked requests never get here.
+        """
+        if self.mode == MODE_RECORD:
+            await context.route("**/*", self._record_route)
+        else:
+            self.start()
+            await context.route("**/*", self._replay_route)
+
+    async def fetch(self, request_context, url: str, method: str = "GET", data=None, **kwargs):
+        """``APIRequestContext.fetch`` through the harness.
+
+        ``context.request`` does not go through routes, so code that fetches
+        with it (e.g. "Load more" replay) calls this instead.
+        """
+        if self.mode == MODE_REPLAY:
+            self.start()
+            return await request_context.fetch(
+                self.server.url_for(url), method=method, data=data, **kwargs
+            )
+        response = await request_context.fetch(url, method=method, data=data, **kwargs)
+        if self.archive.should_record(response.status):
+            self.archive.put(
+                method, url, response.status,
+                [(h["name"], h["value"]) for h in response.headers_array],
+                await response.body(),
+                data.encode() if isinstance(data, str) else data,
+            )
+        return response
+
+    async def _record_route(self, route):
+        request = route.request
+        try:
+            response = await route.fetch(max_redirects=0)
+        except Exception as e:
+            self.logger.debug(f"Recording fetch failed for {request.url}: {e}")
+            await route.abort()
+            return
+        if self.archive.should_record(response.status):
+            body = await response.body()
+            self.archive.put(
+                request.method, request.url, response.status,
+                [(h["name"], h["value"]) for h in response.headers_array],
+                body, request.post_data_buffer,
+            )
+        await route.fulfill(response=response)
+
+    async def _replay_route(self, route):
+        request = route.request
+        try:
+            response = await route.fetch(
+                url=self.server.url_for(request.url), max_redirects=0
+            )
+        except Exception as e:
+            self.logger.debug(f"Replay fetch failed for {request.url}: {e}")
+            await route.abort()
+            return
+        await route.fulfill(response=response)
+
+    def get_stats(self) -> dict:
+        """Archive stats, plus pages and documents handled in this process."""
+        stats = {"mode": self.mode, "archive": self.archive.get_stats()}
+        if self.server is not None:
+            served = self.server.get_stats()
+            stats["server"] = served
+            stats["pages"] = served["pages"]
+            stats["documents"] = served["documents"]
+        else:
+            recorded = stats["archive"]["recorded"]
+            stats["pages"] = recorded.get(KIND_PAGE, 0)
+            stats["documents"] = recorded.get(KIND_DOCUMENT, 0)
+        return stats
+
+
+_active_harness: Optional[ReplayHarness] = None
+_env_harness: Optional[ReplayHarness] = None
+_env_checked = False
+
+
+def get_replay_harness() -> Optional[ReplayHarness]:
+    """Return the active harness, or the one configured in the environment."""
+    global _env_harness, _env_checked
+    if _active_harness is not None:
+        return _active_harness
+    if not _env_checked:
+        _env_checked = True
+        _env_harness = ReplayHarness.from_env()
+        if _env_harness is not None:
+            atexit.register(_env_harness.close)
+    return _env_harness
+
+
+@contextmanager
+def use_replay_harness(harness: Optional[ReplayHarness]):
+    """Make ``harness`` the active harness for the duration of the block."""
+    global _active_harness
+    previous = _active_harness
+    _active_harness = harness
+    if harness is not None:
+        harness.start()
+    try:
+        yield harness
+    finally:
+        _active_harness = previous
+        if harness is not None:
+            harness.close()
+
+
+async def attach_replay_harness(context) -> bool:
+    """Route a browser context through the active harness, if there is one."""
+    harness = get_replay_harness()
+    if harness is None:
+        return False
+    await harness.attach(context)
+    return True
+
+
+async def harness_fetch(request_context, url: str, **kwargs):
+    """``request_context.fetch(url, ...)`` through the active harness, if any."""
+    harness = get_replay_harness()
+    if harness is None:
+        return await request_context.fetch(url, **kwargs)
+    return await harness.fetch(request_context, url, **kwargs)
+
+
+def replay_transport(
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    limits: Optional[httpx.Limits] = None,
+) -> Optional[httpx.AsyncBaseTransport]:
+    """Transport for an HTTP client under the active harness, if there is one."""
+    harness = get_replay_harness()
+    if harness is None:
+        return transport
+    return harness.http_transport(transport, limits)
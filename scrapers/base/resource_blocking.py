@@ -0,0 +1,130 @@
+"""Request-interception profiles that keep scraper pages lean.
+
+The state portals are scraped for HTML tables and PDF links only, so images,
+fonts, media and third-party analytics add latency and bandwidth to every
+navigation without contributing anything.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import FrozenSet, Optional, Tuple
+
+from utils.logging import get_logger
+
+
+# Third-party hosts that only serve analytics, ads or chat widgets.
+TRACKER_URL_PATTERNS: Tuple[str, ...] = (
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+    r"googlesyndication\.com",
+    r"facebook\.(net|com)/tr",
+    r"connect\.facebook\.net",
+    r"hotjar\.com",
+    r"newrelic\.com",
+    r"nr-data\.net",
+    r"clarity\.ms",
+    r"siteimproveanalytics\.com",
+    r"addthis\.com",
+)
+
+
+@dataclass(frozen=True)
+class BlockingProfile:
+    """Resource types and URL patterns to abort during navigation."""
+
+    name: str
+    resource_types: FrozenSet[str] = frozenset()
+    url_patterns: Tuple[str, ...] = ()
+    _pattern: Optional[re.Pattern] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.url_patterns:
+            object.__setattr__(
+                self, "_pattern", re.compile("|".join(self.url_patterns), re.IGNORECASE)
+            )
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """Check whether a request should be aborted."""
+        if resource_type in self.resource_types:
+            return True
+        return bool(self._pattern and self._pattern.search(url))
+
+
+# Table scraping needs the HTML, scripts that render/paginate it, and XHR.
+TABLE_SCRAPING_PROFILE = BlockingProfile(
+    name="table_scraping",
+    resource_types=frozenset({"image", "media", "font", "stylesheet"}),
+    url_patterns=TRACKER_URL_PATTERNS,
+)
+
+# Keeps stylesheets for pages where the scraper relies on CSS visibility
+# (e.g. waiting for a "Load more" button to become visible).
+LIGHT_PROFILE = BlockingProfile(
+    name="light",
+    resource_types=frozenset({"image", "media", "font"}),
+    url_patterns=TRACKER_URL_PATTERNS,
+)
+
+PROFILES = {
+    profile.name: profile for profile in (TABLE_SCRAPING_PROFILE, LIGHT_PROFILE)
+}
+
+
+class BlockingStats:
+    """Counts of aborted and allowed requests for a routed target."""
+
+    def __init__(self):
+        self.blocked: Counter = Counter()
+        self.allowed = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "blocked": sum(self.blocked.values()),
+            "blocked_by_type": dict(self.blocked),
+            "allowed": self.allowed,
+        }
+
+
+def get_profile(name: Optional[str]) -> Optional[BlockingProfile]:
+    """Look up a profile by name; ``None``/"none" disables blocking."""
+    if not name or name.lower() == "none":
+        return None
+    try:
+        return PROFILES[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown blocking profile: {name}. Available: {sorted(PROFILES)}")
+
+
+async def apply_blocking_profile(
+    target, profile: Optional[BlockingProfile], stats: Optional[BlockingStats] = None
+) -> Optional[BlockingStats]:
+    """Install a blocking route on a Playwright BrowserContext or Page.
+
+    Args:
+        target: BrowserContext or Page to route
+        profile: Profile to apply; ``None`` leaves the target untouched
+        stats: Optional stats collector to update
+
+    Returns:
+        The stats collector in use, or None if no profile was applied
+    """
+    if profile is None:
+        return None
+    stats = stats or BlockingStats()
+    logger = get_logger(__name__)
+
+    async def handle_route(route):
+        request = route.request
+        if profile.should_block(request.resource_type, request.url):
+            stats.blocked[request.resource_type] += 1
+            await route.abort()
+        else:
+            stats.allowed += 1
+            # Hand over to routes installed earlier (e.g. fixture replay)
+            await route.fallback()
+
+    await target.route("**/*", handle_route)
+    logger.debug(f"Applied '{profile.name}' resource blocking profile")
+    return stats
@@ -1,127 +1,429 @@
 """Browser session pool for efficient scraping."""
 
 import asyncio
-from typing import Optional, List
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
 from contextlib import asynccontextmanager
 
 from playwright.async_api import Browser, BrowserContext, async_playwright
 
 from utils.logging import get_logger
+from utils.resource_budget import RESOURCE_BROWSER, resource_slot
 from scrapers.base.exceptions import SessionPoolError
+from scrapers.base.replay_harness import attach_replay_harness
+from scrapers.base.resource_blocking import (
+    BlockingProfile,
+    BlockingStats,
+    TABLE_SCRAPING_PROFILE,
+    apply_blocking_profile,
+)
+
+
+@dataclass
+class PooledSession:
+    """A browser context tracked by the pool."""
+
+    context: BrowserContext
+    created_at: float = field(default_factory=time.monotonic)
+    uses: int = 0
+    acquired_at: Optional[float] = None
+    idle_since: float = field(default_factory=time.monotonic)
 
 
 class SessionPool:
     """Manages browser session reuse for faster scraping.
-    
-    This class implements a pool of browser contexts that can be reused
-    across multiple scraping operations, significantly reducing the overhead
-    of creating new browser instances for each request.
+
+    This class implements an elastic pool of browser contexts that can be
+    reused across multiple scraping operations, significantly reducing the
+    overhead of creating new browser instances for each request.
+
+    Features:
+    - Grows on demand from ``min_sessions`` up to ``max_sessions``, and
+      closes contexts above ``min_sessions`` once idle for
+      ``idle_timeout_seconds``; recycled contexts are replaced up to
+      ``min_sessions``
+    - Health probe on checkout; dead contexts are replaced, and the browser
+      is relaunched if it has crashed
+    - Contexts are recycled after ``max_uses`` checkouts, after
+      ``max_age_seconds`` (checked on checkout and release), or when a page
+      left site storage behind
+    - Optional per-host concurrency caps
+    - Request-interception profile that aborts images, fonts, stylesheets
+      and trackers (on by default; pass ``blocking_profile=None`` to disable)
+    - Wait-time and utilisation metrics in :meth:`get_stats`
     """
-    
-    def __init__(self, max_sessions: int = 3, headless: bool = True):
-        self.max_sessions = max_sessions
+
+    def __init__(
+        self,
+        max_sessions: int = 3,
+        headless: bool = True,
+        min_sessions: int = 1,
+        max_uses: int = 50,
+        max_age_seconds: float = 15 * 60,
+        idle_timeout_seconds: float = 5 * 60,
+        per_host_limits: Optional[Dict[str, int]] = None,
+        probe_timeout: float = 5.0,
+        blocking_profile: Optional[BlockingProfile] = TABLE_SCRAPING_PROFILE,
+    ):
+        self.max_sessions = max(1, max_sessions)
+        self.min_sessions = max(0, min(min_sessions, self.max_sessions))
         self.headless = headless
-        self._sessions: List[BrowserContext] = []
-        self._available: asyncio.Queue = asyncio.Queue()
+        self.max_uses = max_uses
+        self.max_age_seconds = max_age_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.probe_timeout = probe_timeout
+        self.blocking_profile = blocking_profile
+        self._blocking_stats = BlockingStats()
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {
+            host.lower(): asyncio.Semaphore(max(1, limit))
+            for host, limit in (per_host_limits or {}).items()
+        }
+        self._idle: Deque[PooledSession] = deque()
+        self._in_use: Dict[int, PooledSession] = {}
+        self._size = 0  # idle + in use + being created
+        self._condition = asyncio.Condition()
         self._browser: Optional[Browser] = None
         self._playwright = None
+        self._browser_lock = asyncio.Lock()
         self.logger = get_logger(__name__)
         self._initialized = False
-        
+        self._started_at = time.monotonic()
+        self._busy_seconds = 0.0
+        self._stats = {
+            "acquisitions": 0,
+            "created": 0,
+            "recycled": 0,
+            "trimmed": 0,
+            "unhealthy": 0,
+            "browser_restarts": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    async def _launch_browser(self) -> Browser:
+        """Start Playwright (once) and launch Chromium."""
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch(
+            headless=self.headless,
+            args=[
+                '--disable-blink-features=AutomationControlled',
+                '--disable-dev-shm-usage',
+                '--no-sandbox',
+                '--disable-setuid-sandbox',
+                '--disable-gpu'
+            ]
+        )
+
+    async def _ensure_browser(self) -> Browser:
+        """Return a connected browser, relaunching it after a crash."""
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._browser is not None:
+                    self._stats["browser_restarts"] += 1
+                    self.logger.warning("Browser disconnected, relaunching")
+                    # Contexts of the dead browser are unusable
+                    self._size -= len(self._idle)
+                    self._idle.clear()
+                self._browser = await self._launch_browser()
+            return self._browser
+
+    async def _create_session(self) -> PooledSession:
+        """Create a new browser context."""
+        browser = await self._ensure_browser()
+        context = await browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            extra_http_headers={
+                'Accept-Language': 'en-US,en;q=0.9',
+                'Accept-Encoding': 'gzip, deflate, br',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+            }
+        )
+        await attach_replay_harness(context)
+        await apply_blocking_profile(context, self.blocking_profile, self._blocking_stats)
+        self._stats["created"] += 1
+        return PooledSession(context=context)
+
     async def initialize(self):
-        """Initialize the browser and session pool."""
+        """Initialize the browser and pre-create the minimum number of sessions."""
         if self._initialized:
             return
-            
+
         try:
-            self._playwright = await async_playwright().start()
-            self._browser = await self._playwright.chromium.launch(
-                headless=self.headless,
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-dev-shm-usage',
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-gpu'
-                ]
-            )
-            
-            # Pre-create sessions
-            for i in range(self.max_sessions):
-                context = await self._browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    extra_http_headers={
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-                    }
-                )
-                self._sessions.append(context)
-                await self._available.put(context)
-                self.logger.debug(f"Created session {i+1}/{self.max_sessions}")
-            
+            await self._ensure_browser()
+            for i in range(self.min_sessions):
+                session = await self._create_session()
+                async with self._condition:
+                    self._size += 1
+                    self._idle.append(session)
+                self.logger.debug(f"Created session {i+1}/{self.min_sessions}")
+
             self._initialized = True
-            self.logger.info(f"Session pool initialized with {self.max_sessions} sessions")
-            
+            self._started_at = time.monotonic()
+            self.logger.info(
+                f"Session pool initialized with {self.min_sessions} sessions "
+                f"(max {self.max_sessions})"
+            )
+
         except Exception as e:
             raise SessionPoolError(f"Failed to initialize session pool: {e}")
-    
+
+    def _recycle_reason(self, session: PooledSession) -> Optional[str]:
+        """Return why a session should be recycled, if it should."""
+        if self.max_uses and session.uses >= self.max_uses:
+            return f"used {session.uses} times"
+        age = time.monotonic() - session.created_at
+        if self.max_age_seconds and age >= self.max_age_seconds:
+            return f"{age:.0f}s old"
+        return None
+
+    async def _is_healthy(self, session: PooledSession) -> bool:
+        """Probe a context; crashed contexts or browsers fail the probe."""
+        if self._browser is None or not self._browser.is_connected():
+            return False
+        try:
+            await asyncio.wait_for(session.context.cookies(), self.probe_timeout)
+            return True
+        except Exception as e:
+            self.logger.debug(f"Session health probe failed: {e}")
+            return False
+
+    async def _close(self, session: PooledSession, reason: str):
+        """Close the context of a session that no longer holds a slot."""
+        self.logger.debug(f"Recycling session: {reason}")
+        try:
+            await session.context.close()
+        except Exception as e:
+            self.logger.debug(f"Error closing recycled context: {e}")
+
+    async def _discard(self, session: PooledSession, reason: str):
+        """Close a session, free its slot and top the pool back up."""
+        async with self._condition:
+            self._size -= 1
+            self._condition.notify()
+        await self._close(session, reason)
+        await self._replenish()
+
+    async def _replenish(self):
+        """Create idle sessions until the pool is back at ``min_sessions``."""
+        while True:
+            async with self._condition:
+                if not self._initialized or self._size >= self.min_sessions:
+                    return
+                self._size += 1
+            try:
+                session = await self._create_session()
+            except Exception as e:
+                async with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                self.logger.warning(f"Failed to replenish session pool: {e}")
+                return
+            async with self._condition:
+                self._idle.append(session)
+                self._condition.notify()
+
+    def _take_expired_idle(self) -> List[PooledSession]:
+        """Remove sessions idle past the timeout while above ``min_sessions``.
+
+        Must be called holding ``_condition``. Sessions are checked out most
+        recently used first, so the longest idle ones are at the left.
+        """
+        now = time.monotonic()
+        expired = []
+        while (
+            self._idle
+            and self._size > self.min_sessions
+            and now - self._idle[0].idle_since >= self.idle_timeout_seconds
+        ):
+            expired.append(self._idle.popleft())
+            self._size -= 1
+        if expired:
+            self._stats["trimmed"] += len(expired)
+            self._condition.notify(len(expired))
+        return expired
+
+    async def _checkout(self) -> PooledSession:
+        """Take an idle healthy session, or create one if below capacity."""
+        while True:
+            create = False
+            async with self._condition:
+                expired = self._take_expired_idle()
+                while not self._idle and self._size >= self.max_sessions:
+                    await self._condition.wait()
+                if self._idle:
+                    session = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+            for stale in expired:
+                await self._close(stale, "idle timeout")
+
+            if create:
+                try:
+                    return await self._create_session()
+                except Exception as e:
+                    async with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise SessionPoolError(f"Failed to create browser context: {e}")
+
+            # Sessions can age past max_age_seconds while idle
+            reason = self._recycle_reason(session)
+            if reason:
+                self._stats["recycled"] += 1
+                await self._discard(session, reason)
+                continue
+            if await self._is_healthy(session):
+                return session
+            self._stats["unhealthy"] += 1
+            await self._discard(session, "failed health probe")
+
+    async def _reset(self, session: PooledSession) -> Optional[str]:
+        """Clean a session for reuse; returns a reason if it must be recycled."""
+        context = session.context
+        try:
+            for page in list(context.pages):
+                await page.close()
+            await context.clear_cookies()
+            # Playwright cannot wipe localStorage/IndexedDB of a live context,
+            # so a context that picked up site storage is replaced instead.
+            state = await context.storage_state()
+            if state.get("origins"):
+                return "site storage left behind"
+        except Exception as e:
+            return f"reset failed: {e}"
+        return self._recycle_reason(session)
+
+    async def _release(self, session: PooledSession):
+        """Return a session to the pool or recycle it."""
+        self._in_use.pop(id(session), None)
+        if session.acquired_at is not None:
+            self._busy_seconds += time.monotonic() - session.acquired_at
+            session.acquired_at = None
+        session.uses += 1
+
+        reason = await self._reset(session)
+        if reason:
+            self._stats["recycled"] += 1
+            await self._discard(session, reason)
+            return
+        async with self._condition:
+            session.idle_since = time.monotonic()
+            self._idle.append(session)
+            self._condition.notify()
+            expired = self._take_expired_idle()
+        for stale in expired:
+            await self._close(stale, "idle timeout")
+
     @asynccontextmanager
-    async def acquire_session(self):
-        """Acquire a browser session from the pool."""
+    async def acquire_session(self, host: Optional[str] = None):
+        """Acquire a browser session from the pool.
+
+        Args:
+            host: Portal host; if it has a per-host cap, the caller waits for
+                a slot for that host before taking a session
+        """
         if not self._initialized:
             await self.initialize()
-            
-        context = await self._available.get()
-        self.logger.debug(f"Acquired session, {self._available.qsize()} remaining")
-        
+
+        start = time.monotonic()
+        semaphore = self._host_semaphores.get(host.lower()) if host else None
+        if semaphore is not None:
+            await semaphore.acquire()
         try:
-            yield context
+            # Checked-out contexts also count against the global budget when
+            # several state flows share the machine
+            async with resource_slot(RESOURCE_BROWSER):
+                session = await self._checkout()
+
+                waited = time.monotonic() - start
+                self._stats["acquisitions"] += 1
+                self._stats["total_wait_seconds"] += waited
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+                session.acquired_at = time.monotonic()
+                self._in_use[id(session)] = session
+                self.logger.debug(
+                    f"Acquired session after {waited:.2f}s, {len(self._idle)} idle"
+                )
+
+                try:
+                    yield session.context
+                finally:
+                    await self._release(session)
+                    self.logger.debug(f"Released session, {len(self._idle)} idle")
         finally:
-            # Clear cookies and storage but keep session alive
-            await context.clear_cookies()
-            await context.storage_state(path=None)  # Clear storage
-            await self._available.put(context)
-            self.logger.debug(f"Released session, {self._available.qsize()} available")
-    
+            if semaphore is not None:
+                semaphore.release()
+
     async def cleanup(self):
         """Clean up all sessions and browser."""
-        if not self._initialized:
+        if not self._initialized and self._browser is None:
             return
-            
+
         self.logger.info("Cleaning up session pool")
-        
+
         # Close all contexts
-        for context in self._sessions:
+        sessions = list(self._idle) + list(self._in_use.values())
+        for session in sessions:
             try:
-                await context.close()
+                await session.context.close()
             except Exception as e:
                 self.logger.error(f"Error closing context: {e}")
-        
+
         # Close browser
         if self._browser:
             try:
                 await self._browser.close()
             except Exception as e:
                 self.logger.error(f"Error closing browser: {e}")
-        
+
         # Stop playwright
         if self._playwright:
             try:
                 await self._playwright.stop()
             except Exception as e:
                 self.logger.error(f"Error stopping playwright: {e}")
-        
-        self._sessions.clear()
+
+        self._idle.clear()
+        self._in_use.clear()
+        self._size = 0
+        self._browser = None
+        self._playwright = None
         self._initialized = False
         self.logger.info("Session pool cleaned up")
-    
+
     def get_stats(self) -> dict:
         """Get session pool statistics."""
+        now = time.monotonic()
+        in_use = len(self._in_use)
+        busy = self._busy_seconds + sum(
+            now - s.acquired_at for s in self._in_use.values() if s.acquired_at
+        )
+        elapsed = now - self._started_at
+        acquisitions = self._stats["acquisitions"]
         return {
-            "total_sessions": self.max_sessions,
-            "available_sessions": self._available.qsize(),
-            "in_use_sessions": self.max_sessions - self._available.qsize(),
-            "initialized": self._initialized
-        }
\ No newline at end of file
+            "total_sessions": self._size,
+            "available_sessions": len(self._idle),
+            "in_use_sessions": in_use,
+            "min_sessions": self.min_sessions,
+            "max_sessions": self.max_sessions,
+            "initialized": self._initialized,
+            "utilization": round(in_use / self.max_sessions, 3),
+            "average_utilization": (
+                round(busy / (elapsed * self.max_sessions), 3) if elapsed > 0 else 0.0
+            ),
+            "average_wait_seconds": (
+                round(self._stats["total_wait_seconds"] / acquisitions, 3)
+                if acquisitions else 0.0
+            ),
+            **{
+                key: round(value, 3) if isinstance(value, float) else value
+                for key, value in self._stats.items()
+            },
+            "blocking_profile": self.blocking_profile.name if self.blocking_profile else None,
+            "requests": self._blocking_stats.to_dict(),
+        }
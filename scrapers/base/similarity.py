@@ -1,18 +1,28 @@
 """Franchisor similarity calculations for deduplication."""
 
 import re
-from typing import List, Dict, Optional
+import time
+from typing import Any, List, Dict, Iterable, Optional
 from difflib import SequenceMatcher
 
+from scrapers.base.name_index import NameBlockingIndex
 from storage.database.manager import get_database_manager
 from utils.logging import get_logger
 
+# Franchisors read per page when the index is built from the database
+INDEX_PAGE_SIZE = 1000
 
 class SimilarityCalculator:
     """Calculates similarity between franchisors for deduplication.
     
     This class helps identify when different spellings or variations
     of franchisor names actually refer to the same entity.
+    
+    Franchisor lookups only score the candidates of a :class:`NameBlockingIndex`:
+    the one of the process-wide franchisor cache, or one built from given
+    records with :meth:`build_index`. If the cache cannot be refreshed, an
+    index is built from the database instead. New franchisors are added with
+    :meth:`index_franchisor`.
     """
     
     # Common franchisor name suffixes to normalize
@@ -39,10 +49,17 @@ class SimilarityCalculator:
         r'\b(Services|Service|Svcs)',
     ]
     
+    _SPECIAL_CHARS = re.compile(r'[^\w\s-]')
+    _SEPARATORS = re.compile(r'[-\s]+')
+    # Weight of word overlap relative to sequence matching
+    WORD_OVERLAP_WEIGHT = 0.9
+    
     def __init__(self, similarity_threshold: float = 0.85):
         self.similarity_threshold = similarity_threshold
         self.logger = get_logger(__name__)
         self._suffix_pattern = self._compile_suffix_pattern()
+        self._index: Optional[NameBlockingIndex] = None
+        self._franchisors: Dict[Any, Dict] = {}
     
     def _compile_suffix_pattern(self) -> re.Pattern:
         """Compile regex pattern for suffix removal."""
@@ -62,10 +79,10 @@ class SimilarityCalculator:
         normalized = self._suffix_pattern.sub('', name)
         
         # Remove special characters but keep spaces
-        normalized = re.sub(r'[^\w\s-]', ' ', normalized)
+        normalized = self._SPECIAL_CHARS.sub(' ', normalized)
         
         # Replace multiple spaces/hyphens with single space
-        normalized = re.sub(r'[-\s]+', ' ', normalized)
+        normalized = self._SEPARATORS.sub(' ', normalized)
         
         # Remove leading/trailing whitespace and convert to lowercase
         normalized = normalized.strip().lower()
@@ -79,9 +96,10 @@ class SimilarityCalculator:
         - 1.0 = exact match
         - 0.0 = completely different
         """
-        norm1 = self.normalize_name(name1)
-        norm2 = self.normalize_name(name2)
-        
+        return self.score_normalized(self.normalize_name(name1), self.normalize_name(name2))
+    
+    def score_normalized(self, norm1: str, norm2: str) -> float:
+        """Similarity score of two names already passed through normalize_name."""
         # Exact match after normalization
         if norm1 == norm2:
             return 1.0
@@ -101,10 +119,76 @@ class SimilarityCalculator:
         if words1 and words2:
             overlap = len(words1 & words2) / max(len(words1), len(words2))
             # Take the maximum of sequence matching and word overlap
-            ratio = max(ratio, overlap * 0.9)  # Slightly penalize word-only matches
+            ratio = max(ratio, overlap * self.WORD_OVERLAP_WEIGHT)  # Slightly penalize word-only matches
         
         return ratio
     
+    @staticmethod
+    def _franchisor_names(franchisor: Dict) -> List[str]:
+        return [franchisor.get("canonical_name")] + list(
+            franchisor.get("trade_names") or franchisor.get("dba_names") or []
+        )
+    
+    def build_index(self, franchisors: Iterable[Dict]) -> NameBlockingIndex:
+        """Replace the lookup index with one over the given franchisor records."""
+        self._index = NameBlockingIndex(
+            self.normalize_name, word_overlap_weight=self.WORD_OVERLAP_WEIGHT
+        )
+        self._franchisors = {}
+        for franchisor in franchisors:
+            self.index_franchisor(franchisor)
+        return self._index
+    
+    def index_franchisor(self, franchisor: Dict):
+        """Add or update one franchisor record in the lookup index."""
+        if self._index is None:
+            # Imported here: the cache normalizes names with this class
+            from scrapers.base.franchisor_cache import get_franchisor_cache
+            
+            get_franchisor_cache().put(franchisor)
+            return
+        franchisor_id = franchisor["id"]
+        if franchisor_id in self._index:
+            self._index.remove(franchisor_id)
+        self._franchisors[franchisor_id] = franchisor
+        self._index.add(franchisor_id, self._franchisor_names(franchisor))
+    
+    def _load_index(self, db) -> NameBlockingIndex:
+        """Build the index from every franchisor in the database, page by page."""
+        start = time.perf_counter()
+        franchisors = []
+        page = 1
+        while True:
+            result = db.get_records_paginated(
+                "franchisors", page=page, page_size=INDEX_PAGE_SIZE, order_by="id"
+            )
+            franchisors.extend(result["records"])
+            if not result["pagination"]["has_next"]:
+                break
+            page += 1
+        index = self.build_index(franchisors)
+        self.logger.info(
+            f"Indexed {len(index)} franchisors for similarity lookups "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return index
+    
+    def _candidates(self, name: str, threshold: float) -> Dict[str, List[Dict]]:
+        """Candidate franchisor records per normalized name."""
+        if self._index is None:
+            from scrapers.base.franchisor_cache import get_fresh_franchisor_cache
+            
+            db = get_database_manager()
+            cache = get_fresh_franchisor_cache(db)
+            if cache is not None:
+                return cache.candidates(name, threshold)
+            # The cache could not be refreshed; use an index of our own
+            self._load_index(db)
+        return {
+            normalized: [self._franchisors[franchisor_id] for franchisor_id in franchisor_ids]
+            for normalized, franchisor_ids in self._index.candidates(name, threshold).items()
+        }
+    
     def find_similar_franchisors(
         self, 
         name: str, 
@@ -113,6 +197,11 @@ class SimilarityCalculator:
     ) -> List[Dict]:
         """Find similar franchisors in database.
         
+        Only the candidates of the blocking index are scored. Without an
+        index from :meth:`build_index`, the process-wide franchisor cache is
+        used, refreshed from the database when stale; if that refresh fails,
+        the index is built from the database.
+        
         Args:
             name: Franchisor name to search for
             threshold: Similarity threshold (default: self.similarity_threshold)
@@ -125,30 +214,29 @@ class SimilarityCalculator:
             threshold = self.similarity_threshold
             
         try:
-            db = get_database_manager()
+            query = self.normalize_name(name)
             
-            # Get all franchisors (consider adding pagination for large datasets)
-            all_franchisors = db.get_all_records("franchisors", limit=10000)
+            # Best score per franchisor over its canonical and trade names
+            scores: Dict[Any, float] = {}
+            franchisors: Dict[Any, Dict] = {}
+            for normalized, candidates in self._candidates(name, threshold).items():
+                score = self.score_normalized(query, normalized)
+                if score < threshold:
+                    continue
+                for franchisor in candidates:
+                    franchisors[franchisor["id"]] = franchisor
+                    scores[franchisor["id"]] = max(score, scores.get(franchisor["id"], 0.0))
             
             similar = []
-            for franchisor in all_franchisors:
-                # Calculate similarity for canonical name
-                score = self.calculate_similarity(name, franchisor["canonical_name"])
-                
-                # Also check trade names if available
-                if franchisor.get("trade_names"):
-                    for trade_name in franchisor["trade_names"]:
-                        trade_score = self.calculate_similarity(name, trade_name)
-                        score = max(score, trade_score)
-                
-                if score >= threshold:
-                    similar.append({
-                        "id": franchisor["id"],
-                        "canonical_name": franchisor["canonical_name"],
-                        "trade_names": franchisor.get("trade_names", []),
-                        "score": round(score, 3),
-                        "match_type": "exact" if score == 1.0 else "fuzzy"
-                    })
+            for franchisor_id, score in scores.items():
+                franchisor = franchisors[franchisor_id]
+                similar.append({
+                    "id": franchisor["id"],
+                    "canonical_name": franchisor["canonical_name"],
+                    "trade_names": self._franchisor_names(franchisor)[1:],
+                    "score": round(score, 3),
+                    "match_type": "exact" if score == 1.0 else "fuzzy"
+                })
             
             # Sort by score descending, then by name for stability
             similar.sort(key=lambda x: (-x["score"], x["canonical_name"]))
@@ -156,7 +244,7 @@ class SimilarityCalculator:
             # Limit results
             similar = similar[:limit]
             
-            self.logger.info(
+            self.logger.debug(
                 f"Found {len(similar)} similar franchisors for '{name}' "
                 f"(threshold: {threshold})"
             )
@@ -0,0 +1,169 @@
+"""Single-pass HTML table extraction shared by the state portal scrapers.
+
+Portal result tables used to be parsed twice: once for cell text (usually
+``pd.read_html``) and once more with BeautifulSoup to pick up the links.
+This module walks the document once with lxml's C parser and yields every
+row with its cell text and hrefs side by side. Rows are streamed and
+discarded as soon as they are yielded, so memory stays flat even for the
+multi-thousand-row MN results table.
+"""
+
+import io
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Union
+from urllib.parse import urljoin
+
+import pandas as pd
+from lxml import etree
+
+
+_CELL_TAGS = ("td", "th")
+
+
+@dataclass
+class TableRow:
+    """One table row: cell text and the first link of each cell."""
+
+    cells: List[str]
+    links: List[Optional[str]]
+    is_header: bool = False
+
+    def link(self, index: int) -> Optional[str]:
+        """Link of a cell, or None if the cell has none (or does not exist)."""
+        return self.links[index] if index < len(self.links) else None
+
+
+@dataclass
+class ExtractedTable:
+    """A whole table: header cells plus data rows."""
+
+    headers: List[str] = field(default_factory=list)
+    rows: List[TableRow] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def to_dataframe(
+        self, link_columns: Optional[Dict[Union[str, int], str]] = None
+    ) -> pd.DataFrame:
+        """Build a DataFrame of cell text.
+
+        Args:
+            link_columns: Maps a header (or a column index) to the name of an
+                extra column that receives the links of that column, e.g.
+                ``{"Details": "Details_URL"}``
+
+        Rows shorter or longer than the header are padded or truncated.
+        """
+        width = len(self.headers) or max((len(row.cells) for row in self.rows), default=0)
+        columns = self.headers or list(range(width))
+        data = [
+            (row.cells + [None] * width)[:width] for row in self.rows
+        ]
+        df = pd.DataFrame(data, columns=columns)
+        for header, column in (link_columns or {}).items():
+            index = header if isinstance(header, int) else self.headers.index(header)
+            df[column] = [row.link(index) for row in self.rows]
+        return df
+
+
+def _cell_text(cell, line_separator: Optional[str]) -> str:
+    text = "".join(cell.itertext())
+    if line_separator is None:
+        # Same normalisation as pd.read_html: collapse all whitespace
+        return " ".join(text.split())
+    return text.strip().replace("\n", line_separator)
+
+
+def _cell_link(cell, base_url: Optional[str]) -> Optional[str]:
+    for anchor in cell.iter("a"):
+        href = anchor.get("href")
+        if href:
+            return urljoin(base_url, href.strip()) if base_url else href.strip()
+    return None
+
+
+def _owning_table(row):
+    parent = row.getparent()
+    while parent is not None and parent.tag != "table":
+        parent = parent.getparent()
+    return parent
+
+
+def _release(element):
+    """Free a processed row and the already-processed siblings before it."""
+    element.clear()
+    parent = element.getparent()
+    if parent is None:
+        return
+    while element.getprevious() is not None:
+        del parent[0]
+
+
+def iter_table_rows(
+    html: Union[str, bytes],
+    table_id: Optional[str] = None,
+    base_url: Optional[str] = None,
+    line_separator: Optional[str] = None,
+) -> Iterator[TableRow]:
+    """Stream the rows of an HTML table in one parsing pass.
+
+    Args:
+        html: Page or fragment markup
+        table_id: Only yield rows whose nearest enclosing ``<table>`` has
+            this id; rows of nested tables (e.g. pagers) are skipped. With
+            None every row of the document is yielded.
+        base_url: Resolve relative hrefs against this URL
+        line_separator: Keep line breaks inside cells, replaced by this
+            string; by default whitespace is collapsed like ``pd.read_html``
+
+    Yields:
+        Rows in document order. ``is_header`` is set for rows in ``<thead>``
+        and rows made only of ``<th>`` cells.
+    """
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    parser_events = etree.iterparse(
+        io.BytesIO(html), events=("end",), tag="tr", html=True, encoding="utf-8"
+    )
+    for _, row in parser_events:
+        if table_id is not None:
+            table = _owning_table(row)
+            if table is None or table.get("id") != table_id:
+                # Rows of other tables are released too, unless they may be
+                # nested inside the table we are after
+                if table is None or not any(
+                    t.get("id") == table_id for t in table.iterancestors("table")
+                ):
+                    _release(row)
+                continue
+        cells = [child for child in row if child.tag in _CELL_TAGS]
+        if cells:
+            parent = row.getparent()
+            yield TableRow(
+                cells=[_cell_text(cell, line_separator) for cell in cells],
+                links=[_cell_link(cell, base_url) for cell in cells],
+                is_header=(parent is not None and parent.tag == "thead")
+                or all(cell.tag == "th" for cell in cells),
+            )
+        _release(row)
+
+
+def extract_table(
+    html: Union[str, bytes],
+    table_id: Optional[str] = None,
+    base_url: Optional[str] = None,
+    line_separator: Optional[str] = None,
+) -> ExtractedTable:
+    """Extract a whole table; the first header row becomes the headers.
+
+    See :func:`iter_table_rows` for the arguments.
+    """
+    table = ExtractedTable()
+    for row in iter_table_rows(html, table_id, base_url, line_separator):
+        if row.is_header:
+            if not table.headers and not table.rows:
+                table.headers = row.cells
+            continue
+        table.rows.append(row)
+    return table
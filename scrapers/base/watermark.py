@@ -0,0 +1,76 @@
+"""Incremental reads of a table by a timestamp watermark.
+
+The known-documents filter, the franchisor cache and the embedding index
+each keep a local copy of a table current the same way: read the rows whose
+timestamp column is at or after the last watermark, page by page, and move
+the watermark to the newest timestamp seen. :func:`read_since` is that loop.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Rows written shortly before a read can commit after it with an earlier
+# timestamp; each read re-reads this window before the watermark
+REFRESH_OVERLAP = timedelta(minutes=10)
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def read_since(
+    db_manager,
+    table: str,
+    fields: Sequence[str],
+    column: str,
+    watermark: Optional[datetime],
+    on_page: Callable[[List[Dict[str, Any]]], Any],
+    page_size: int,
+    where: Optional[Callable[[Any], Any]] = None,
+) -> Tuple[int, datetime]:
+    """Read the rows of ``table`` changed since ``watermark``.
+
+    Args:
+        db_manager: Database manager providing ``query()``
+        table: Table to read
+        fields: Columns to select
+        column: Timestamp column the watermark tracks
+        watermark: Watermark of the previous read; None reads every row
+        on_page: Called with each page of rows as it is read
+        page_size: Rows per query
+        where: Optional function adding filters to each page query
+
+    Returns:
+        Number of rows read and the watermark for the next read
+    """
+    since = watermark - REFRESH_OVERLAP if watermark else None
+    started = datetime.utcnow()
+    latest = watermark
+    rows = 0
+    offset = 0
+    while True:
+        query = db_manager.query().table(table).select(*fields)
+        if where is not None:
+            query = where(query)
+        if since is not None:
+            query = query.where(column, ">=", since)
+        page = query.order_by(column).order_by("id").limit(page_size).offset(offset).execute()
+        on_page(page)
+        rows += len(page)
+        for record in page:
+            changed_at = parse_timestamp(record.get(column))
+            if changed_at is not None:
+                changed_at = changed_at.replace(tzinfo=None)
+                if latest is None or changed_at > latest:
+                    latest = changed_at
+        if len(page) < page_size:
+            break
+        offset += page_size
+    # Never move past the moment the read started: rows written during it
+    # are picked up by the overlap window of the next read
+    return rows, min(latest, started) if latest else started
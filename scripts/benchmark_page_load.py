@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Page Load Benchmark for Resource Blocking Profiles
+==================================================
+
+Loads portal pages repeatedly with and without a request-interception
+profile and reports load time, request counts and transferred bytes.
+
+Usage:
+    python scripts/benchmark_page_load.py --portal wi --runs 5
+    python scripts/benchmark_page_load.py --url https://example.com --profile light
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path so we can import from scrapers
+sys.path.append(str(Path(__file__).parent.parent))
+
+from playwright.async_api import async_playwright
+
+from scrapers.base.resource_blocking import apply_blocking_profile, get_profile
+
+
+PORTAL_URLS = {
+    "wi": "https://apps.dfi.wi.gov/apps/FranchiseEFiling/activeFilings.aspx",
+    "mn": (
+        "https://www.cards.commerce.state.mn.us/franchise-registrations?doSearch=true"
+        "&documentTitle=&franchisor=&franchiseName=&year=&fileNumber="
+        "&documentType=Clean+FDD&content="
+    ),
+}
+
+
+async def measure(browser, url: str, profile, wait_until: str) -> dict:
+    """Load a page once in a fresh context and collect metrics."""
+    context = await browser.new_context()
+    stats = await apply_blocking_profile(context, profile)
+    page = await context.new_page()
+
+    transferred = 0
+    finished = 0
+
+    async def on_finished(request):
+        nonlocal transferred, finished
+        finished += 1
+        try:
+            sizes = await request.sizes()
+            transferred += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        except Exception:
+            pass
+
+    page.on("requestfinished", lambda request: asyncio.ensure_future(on_finished(request)))
+
+    start = time.perf_counter()
+    await page.goto(url, wait_until=wait_until, timeout=120000)
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.5)  # let pending size lookups finish
+
+    await context.close()
+    return {
+        "seconds": elapsed,
+        "requests": finished,
+        "blocked": stats.to_dict()["blocked"] if stats else 0,
+        "kilobytes": transferred / 1024,
+    }
+
+
+def summarize(label: str, samples: list) -> dict:
+    """Print and return the median of each metric."""
+    summary = {
+        key: statistics.median(sample[key] for sample in samples)
+        for key in samples[0]
+    }
+    print(
+        f"{label:<16} load {summary['seconds']:.2f}s  "
+        f"requests {summary['requests']:.0f}  blocked {summary['blocked']:.0f}  "
+        f"transferred {summary['kilobytes']:.0f} KB"
+    )
+    return summary
+
+
+async def run_benchmark(url: str, profile_name: str, runs: int, wait_until: str, headless: bool):
+    profile = get_profile(profile_name)
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=headless)
+        try:
+            results = {"baseline": [], profile_name: []}
+            # Interleave runs so network conditions affect both sides equally
+            for i in range(runs):
+                results["baseline"].append(await measure(browser, url, None, wait_until))
+                results[profile_name].append(await measure(browser, url, profile, wait_until))
+                print(f"Run {i + 1}/{runs} complete")
+        finally:
+            await browser.close()
+
+    print("\n" + "=" * 70)
+    print(f"Page load benchmark: {url}")
+    print(f"Median of {runs} runs, wait_until={wait_until}")
+    print("=" * 70)
+    baseline = summarize("baseline", results["baseline"])
+    blocked = summarize(profile_name, results[profile_name])
+    if baseline["seconds"] > 0:
+        print(f"\nLoad time change: {(blocked['seconds'] / baseline['seconds'] - 1) * 100:+.1f}%")
+    if baseline["kilobytes"] > 0:
+        print(f"Bytes change:     {(blocked['kilobytes'] / baseline['kilobytes'] - 1) * 100:+.1f}%")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark page loads with and without resource blocking",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--portal", choices=sorted(PORTAL_URLS), default="wi", help="State portal to load")
+    target.add_argument("--url", help="Custom URL to load")
+    parser.add_argument("--profile", default="table_scraping", help="Blocking profile to compare")
+    parser.add_argument("--runs", type=int, default=5, help="Number of runs per variant")
+    parser.add_argument("--wait-until", default="networkidle", choices=["load", "domcontentloaded", "networkidle"])
+    parser.add_argument("--headed", action="store_true", help="Show the browser window")
+    args = parser.parse_args()
+
+    url = args.url or PORTAL_URLS[args.portal]
+    asyncio.run(run_benchmark(url, args.profile, args.runs, args.wait_until, not args.headed))
+
+
+if __name__ == "__main__":
+    main()
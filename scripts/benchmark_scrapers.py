@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Offline Scraper Throughput Benchmark
+====================================
+
+Runs the MN and WI scraping pipelines against recorded portal fixtures and
+reports pages/sec, documents/sec and peak RSS, so performance regressions in
+scraping code show up without network access.
+
+Record fixtures once (live portals, network required), then replay them:
+
+    python scripts/benchmark_scrapers.py --state mn --record --limit 50
+    python scripts/benchmark_scrapers.py --state all --runs 3
+
+Each run happens in a fresh subprocess so peak RSS is measured per run.
+Google Drive uploads are replaced by a sink that only counts documents, and
+the portal rate limiters are opened up (``--portal-rate``) so the numbers
+reflect scraper code rather than politeness delays.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path so we can import from scrapers
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scrapers.base.rate_limiter import get_rate_limiter
+from scrapers.base.replay_harness import (
+    DEFAULT_FIXTURE_DIR,
+    MODE_RECORD,
+    MODE_REPLAY,
+    ReplayHarness,
+    use_replay_harness,
+)
+
+
+STATES = ("mn", "wi")
+PORTAL_HOSTS = {
+    "mn": "www.cards.commerce.state.mn.us",
+    "wi": "apps.dfi.wi.gov",
+}
+
+
+class DiscardingDrive:
+    """Stands in for DriveManager: counts uploads instead of storing them."""
+
+    documents = 0
+    bytes = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def upload_file(self, file_content, filename, parent_id=None, mime_type=None, **kwargs):
+        if mime_type == "application/pdf":
+            DiscardingDrive.documents += 1
+            DiscardingDrive.bytes += len(file_content or b"")
+        return f"benchmark-{DiscardingDrive.documents}"
+
+
+async def run_mn(limit: int):
+    from franchise_scrapers import MN_Scraper
+
+    MN_Scraper.DriveManager = DiscardingDrive
+    df = await MN_Scraper.get_mn_registrations(headless=True)
+    if limit:
+        df = df.head(limit)
+    if not df.empty:
+        await MN_Scraper.download_all_pdfs(df, headless=True)
+
+
+async def run_wi(limit: int):
+    from playwright.async_api import async_playwright
+    from franchise_scrapers import WI_Scraper
+
+    WI_Scraper.DriveManager = DiscardingDrive
+    async with async_playwright() as playwright:
+        names = await WI_Scraper.get_active_registrations(playwright, headless=True)
+    if limit:
+        names = names[:limit]
+    await WI_Scraper.search_franchise_details_concurrent(names, headless=True)
+
+
+PIPELINES = {"mn": run_mn, "wi": run_wi}
+
+
+def open_rate_limits(state: str, rate: float):
+    """Raise the portal's request rate so throttling does not dominate."""
+    limiter = get_rate_limiter(PORTAL_HOSTS[state])
+    limiter.initial_rate = limiter.max_rate = rate
+    limiter.burst = max(limiter.burst, rate)
+
+
+def measure_once(args) -> dict:
+    """Run one pipeline in this process and return its metrics."""
+    mode = MODE_RECORD if args.record else MODE_REPLAY
+    harness = ReplayHarness(mode, args.fixtures / args.state, latency=args.latency_ms / 1000)
+    if args.portal_rate > 0:
+        open_rate_limits(args.state, args.portal_rate)
+
+    start = time.perf_counter()
+    with use_replay_harness(harness):
+        asyncio.run(PIPELINES[args.state](args.limit))
+        stats = harness.get_stats()
+    elapsed = time.perf_counter() - start
+
+    usage_self = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    usage_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        "state": args.state,
+        "mode": mode,
+        "seconds": elapsed,
+        "pages": stats["pages"],
+        "documents": DiscardingDrive.documents,
+        "documents_fetched": stats["documents"],
+        "pages_per_second": stats["pages"] / elapsed if elapsed > 0 else 0.0,
+        "documents_per_second": DiscardingDrive.documents / elapsed if elapsed > 0 else 0.0,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": usage_self / 1024,
+        "peak_child_rss_mb": usage_children / 1024,
+        "misses": stats.get("server", {}).get("misses", 0),
+        "missed_urls": stats.get("server", {}).get("missed_urls", [])[:5],
+    }
+
+
+def run_subprocess(args, state: str) -> dict:
+    """Run one measurement in a fresh interpreter."""
+    command = [
+        sys.executable, __file__, "--state", state, "--single",
+        "--fixtures", str(args.fixtures), "--limit", str(args.limit),
+        "--latency-ms", str(args.latency_ms), "--portal-rate", str(args.portal_rate),
+    ]
+    if args.record:
+        command.append("--record")
+    completed = subprocess.run(command, capture_output=True, text=True, env=os.environ.copy())
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(
+        f"{state} benchmark run failed (exit {completed.returncode}):\n{completed.stderr[-2000:]}"
+    )
+
+
+def summarize(state: str, samples: list) -> dict:
+    """Print and return the median of each metric."""
+    keys = ("seconds", "pages", "documents", "pages_per_second",
+            "documents_per_second", "peak_rss_mb", "peak_child_rss_mb", "misses")
+    summary = {key: statistics.median(sample[key] for sample in samples) for key in keys}
+    print(
+        f"{state.upper():<4} {summary['seconds']:7.1f}s  "
+        f"pages {summary['pages']:6.0f} ({summary['pages_per_second']:6.2f}/s)  "
+        f"documents {summary['documents']:5.0f} ({summary['documents_per_second']:5.2f}/s)  "
+        f"peak RSS {summary['peak_rss_mb']:6.0f} MB (children {summary['peak_child_rss_mb']:.0f} MB)"
+    )
+    if summary["misses"]:
+        print(f"     {summary['misses']:.0f} requests had no fixture, e.g. {samples[0]['missed_urls']}")
+    return summary
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the MN/WI scraping pipelines against recorded fixtures",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--state", choices=STATES + ("all",), default="all", help="Pipeline to run")
+    parser.add_argument("--record", action="store_true", help="Run live and record fixtures")
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURE_DIR, help="Fixture archive root")
+    parser.add_argument("--runs", type=int, default=3, help="Number of runs per state")
+    parser.add_argument("--limit", type=int, default=0, help="Max documents (MN) or franchises (WI); 0 = all")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per replayed response")
+    parser.add_argument("--portal-rate", type=float, default=1000.0,
+                        help="Portal request rate during the run; 0 keeps the live rates")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(measure_once(args)))
+        return
+
+    states = STATES if args.state == "all" else (args.state,)
+    runs = 1 if args.record else args.runs
+    results = {}
+    for state in states:
+        samples = []
+        for i in range(runs):
+            samples.append(run_subprocess(args, state))
+            print(f"{state.upper()} run {i + 1}/{runs} complete")
+        results[state] = samples
+
+    print("\n" + "=" * 70)
+    print(f"Scraper benchmark ({'recording' if args.record else 'replay'}), median of {runs} runs")
+    print("=" * 70)
+    summaries = {state: summarize(state, samples) for state, samples in results.items()}
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+
+
+if __name__ == "__main__":
+    main()
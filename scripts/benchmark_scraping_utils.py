@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Scraped Table Cleaning Benchmark
+================================
+
+Times the field parsers of utils.scraping_utils on a synthetic scraped table
+(100k rows by default), three ways:
+
+- per-row:   the scalar parser called for every cell, memoization bypassed
+             (how table post-processing used to work)
+- memoized:  the scalar parser called for every cell with its result cache
+- batch:     the Series variant, e.g. ``parse_dates(df["Effective Date"])``
+
+Usage:
+    python scripts/benchmark_scraping_utils.py --rows 100000 --runs 3
+    python scripts/benchmark_scraping_utils.py --distinct 0.5
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path so we can import from utils
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from utils import scraping_utils as su
+
+
+# column -> (scalar parser, batch parser)
+PARSERS = {
+    "Effective Date": (su.parse_date_formats, su.parse_dates),
+    "File Number": (su.extract_filing_number, su.extract_filing_numbers),
+    "Size": (su.parse_file_size, su.parse_file_sizes),
+    "Location": (su.extract_state_code, su.extract_state_codes),
+    "Legal Name": (su.format_franchise_name, su.format_franchise_names),
+    "Address": (su.parse_address, su.parse_addresses),
+}
+
+STATES = sorted(su.STATE_CODES)
+DATE_STYLES = ("%m/%d/%Y", "%Y-%m-%d", "%B %d, %Y", "%d-%b-%Y", "%b %Y")
+SUFFIXES = ("", " LLC", ", Inc.", " Corp.", " (USA)", " Corporation")
+
+
+def synthetic_table(rows: int, distinct: float, seed: int = 7) -> pd.DataFrame:
+    """Build a scraped-registrations table with a given share of distinct values."""
+    rng = random.Random(seed)
+    pool = max(1, int(rows * distinct))
+
+    def value(make):
+        return [make(rng.randrange(pool)) for _ in range(rows)]
+
+    def date(n):
+        day = pd.Timestamp("2015-01-01") + pd.Timedelta(days=n % 3650)
+        return day.strftime(DATE_STYLES[n % len(DATE_STYLES)])
+
+    return pd.DataFrame({
+        "Effective Date": value(date),
+        "File Number": value(lambda n: f"File Number: {100000 + n}" if n % 3 else f"#{n:06d}"),
+        "Size": value(lambda n: f"{(n % 5000) / 10:.1f} {('KB', 'MB', 'bytes')[n % 3]}"),
+        "Location": value(lambda n: f"Suite {n}, Springfield, {STATES[n % len(STATES)]}"),
+        "Legal Name": value(lambda n: f"franchise brand {n}{SUFFIXES[n % len(SUFFIXES)]}"),
+        "Address": value(
+            lambda n: f"{n} Main St, City {n % 500}, {STATES[n % len(STATES)]} {10000 + n % 89999}"
+        ),
+    })
+
+
+def clear_caches():
+    for scalar, _ in PARSERS.values():
+        if hasattr(scalar, "cache_clear"):
+            scalar.cache_clear()
+    su._parse_address.cache_clear()
+
+
+def per_row(column: pd.Series, scalar):
+    # Bypass the memo so every cell is parsed like before
+    parse = getattr(scalar, "__wrapped__", scalar)
+    if scalar is su.parse_address:
+        parse = lambda value: dict(zip(su.ADDRESS_FIELDS, su._parse_address.__wrapped__(value)))
+    return [parse(value) for value in column]
+
+
+def memoized(column: pd.Series, scalar):
+    return [scalar(value) for value in column]
+
+
+def batch(column: pd.Series, batch_parser):
+    return batch_parser(column)
+
+
+def timed(func, *args) -> float:
+    clear_caches()
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark scalar vs batch scraped-field parsers",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows in the synthetic table")
+    parser.add_argument("--distinct", type=float, default=0.05,
+                        help="Share of distinct values per column (portal tables repeat a lot)")
+    parser.add_argument("--runs", type=int, default=3, help="Number of runs per strategy")
+    args = parser.parse_args()
+
+    df = synthetic_table(args.rows, args.distinct)
+    # Unparseable cells would only log warnings; keep the output readable
+    su.logger.warning = lambda *a, **k: None
+
+    results = {}
+    for name, (scalar, batch_parser) in PARSERS.items():
+        column = df[name]
+        samples = {"per-row": [], "memoized": [], "batch": []}
+        for _ in range(args.runs):
+            samples["per-row"].append(timed(per_row, column, scalar))
+            samples["memoized"].append(timed(memoized, column, scalar))
+            samples["batch"].append(timed(batch, column, batch_parser))
+        results[name] = {key: statistics.median(values) for key, values in samples.items()}
+        print(f"{name} done")
+
+    print("\n" + "=" * 70)
+    print(f"Field parsing benchmark: {args.rows} rows, {args.distinct:.0%} distinct values")
+    print(f"Median of {args.runs} runs")
+    print("=" * 70)
+    print(f"{'column':<16}{'per-row':>12}{'memoized':>12}{'batch':>12}{'speedup':>10}")
+    totals = {"per-row": 0.0, "memoized": 0.0, "batch": 0.0}
+    for name, timings in results.items():
+        for key in totals:
+            totals[key] += timings[key]
+        print(
+            f"{name:<16}{timings['per-row'] * 1000:10.0f}ms{timings['memoized'] * 1000:10.0f}ms"
+            f"{timings['batch'] * 1000:10.0f}ms{timings['per-row'] / timings['batch']:9.1f}x"
+        )
+    print(
+        f"{'total':<16}{totals['per-row'] * 1000:10.0f}ms{totals['memoized'] * 1000:10.0f}ms"
+        f"{totals['batch'] * 1000:10.0f}ms{totals['per-row'] / totals['batch']:9.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
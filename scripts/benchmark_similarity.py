@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Franchisor Deduplication Benchmark
+==================================
+
+Times a full-corpus dedup pass over a synthetic franchisor corpus:
+
+- pairwise:  calculate_similarity for every pair, estimated from a sample
+             of pairs (the full run is O(N²))
+- batch:     BatchSimilarityScorer.score_corpus, blocked and pooled
+
+Usage:
+    python scripts/benchmark_similarity.py --franchisors 20000
+    python scripts/benchmark_similarity.py --franchisors 50000 --workers 8
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path so we can import from scrapers
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scrapers.base.batch_similarity import BatchSimilarityScorer
+from scrapers.base.similarity import SimilarityCalculator
+
+
+WORDS = (
+    "anytime fitness snap gold gym pizza burger king hut subway kumon mathnasium "
+    "goddard primrose school learning center kids care home instead senior right "
+    "at comfort keepers molly maid merry maids jan pro coverall servpro paul davis "
+    "great clips sport clips super cuts hair salon massage envy hand stone auto "
+    "midas meineke jiffy lube tutor time sylvan huntington code ninjas bricks"
+).split()
+SUFFIXES = ("", " LLC", ", Inc.", " Corp.", " Franchising LLC", " Services")
+
+
+def synthetic_corpus(size: int, seed: int = 11):
+    """Franchisor records with suffix, typo and trade-name variants."""
+    rng = random.Random(seed)
+    records = []
+    for n in range(size):
+        words = rng.sample(WORDS, rng.randint(2, 4))
+        if n % 10 == 0:
+            # Typo in a word
+            word = words[0]
+            i = rng.randrange(len(word))
+            words[0] = word[:i] + word[i + 1:]
+        name = " ".join(words).title() + rng.choice(SUFFIXES)
+        dba_names = [" ".join(words[:2]).title()] if n % 4 == 0 else []
+        records.append({"id": n, "canonical_name": name, "dba_names": dba_names})
+    return records
+
+
+def pairwise_estimate(franchisors, samples: int = 20000) -> float:
+    """Seconds a pairwise calculate_similarity pass would take."""
+    calc = SimilarityCalculator()
+    rng = random.Random(3)
+    start = time.perf_counter()
+    for _ in range(samples):
+        a, b = rng.sample(franchisors, 2)
+        max(
+            calc.calculate_similarity(x, y)
+            for x in calc._franchisor_names(a) if x
+            for y in calc._franchisor_names(b) if y
+        )
+    per_pair = (time.perf_counter() - start) / samples
+    return per_pair * len(franchisors) * (len(franchisors) - 1) / 2
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark pairwise vs batch franchisor deduplication",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--franchisors", type=int, default=20_000, help="Corpus size")
+    parser.add_argument("--threshold", type=float, default=0.85, help="Similarity threshold")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--block-size", type=int, default=500, help="Distinct names per work unit")
+    args = parser.parse_args()
+
+    franchisors = synthetic_corpus(args.franchisors)
+    pairwise = pairwise_estimate(franchisors)
+
+    scorer = BatchSimilarityScorer(args.threshold, workers=args.workers, block_size=args.block_size)
+    start = time.perf_counter()
+    edges = scorer.score_corpus(franchisors)
+    batch = time.perf_counter() - start
+
+    print("\n" + "=" * 60)
+    print(f"Dedup pass: {args.franchisors} franchisors, threshold {args.threshold}, "
+          f"{scorer.workers} workers")
+    print("=" * 60)
+    print(f"pairwise (estimated): {pairwise / 60:10.1f} min")
+    print(f"batch:                {batch / 60:10.1f} min  ({len(edges)} edges)")
+    print(f"speedup:              {pairwise / batch:10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Table Extraction Benchmark
+==========================
+
+Compares the ways the portal scrapers have parsed result tables:
+
+- bs4:        BeautifulSoup html.parser, text and links per cell (old MN path)
+- read_html:  pandas.read_html for text plus a BeautifulSoup pass for the
+              links (old WI path)
+- lxml:       the shared single-pass extractor in scrapers.base.table_extraction
+
+Usage:
+    python scripts/benchmark_table_extraction.py --rows 5000 --runs 5
+    python scripts/benchmark_table_extraction.py --html saved_page.html --table-id results
+"""
+
+import argparse
+import io
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from urllib.parse import urljoin
+
+# Add the parent directory to the path so we can import from scrapers
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from scrapers.base.table_extraction import extract_table
+
+
+BASE_URL = "https://www.cards.commerce.state.mn.us"
+
+
+def synthetic_table(rows: int) -> str:
+    """Build a results page shaped like the MN registrations table."""
+    body = "".join(
+        f"<tr><td>Franchisor {i}\n<br>Brand {i}</td>"
+        f"<td><a href='/documents/{i}.pdf'>Clean FDD</a></td>"
+        f"<td>F-{i:06d}</td><td>2024</td><td>05/0{i % 9 + 1}/2024</td>"
+        f"<td><a href='details.aspx?id={i}'>Details</a></td></tr>"
+        for i in range(rows)
+    )
+    return (
+        "<html><head><title>Results</title></head><body><div class='wrapper'>"
+        "<table id='results'><thead><tr><th>Franchisor</th><th>Document</th>"
+        "<th>File Number</th><th>Year</th><th>Received</th><th>Details</th></tr></thead>"
+        f"<tbody>{body}</tbody></table></div></body></html>"
+    )
+
+
+def parse_bs4(html: str, table_id: str) -> int:
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table", id=table_id)
+    rows = 0
+    for row in table.select("tbody tr"):
+        cells = row.find_all(["th", "td"])
+        [cell.text.strip() for cell in cells]
+        [urljoin(BASE_URL, a["href"]) for cell in cells for a in cell.find_all("a", href=True)[:1]]
+        rows += 1
+    return rows
+
+
+def parse_read_html(html: str, table_id: str) -> int:
+    df = pd.read_html(io.StringIO(html), attrs={"id": table_id})[0]
+    table = BeautifulSoup(html, "html.parser").find("table", id=table_id)
+    for row in table.find_all("tr")[1:]:
+        [urljoin(BASE_URL, a["href"]) for cell in row.find_all("td") for a in cell.find_all("a", href=True)[:1]]
+    return len(df)
+
+
+def parse_lxml(html: str, table_id: str) -> int:
+    table = extract_table(html, table_id=table_id, base_url=BASE_URL)
+    table.to_dataframe()
+    return len(table)
+
+
+PARSERS = {
+    "bs4": parse_bs4,
+    "read_html": parse_read_html,
+    "lxml": parse_lxml,
+}
+
+
+def measure(parser, html: str, table_id: str) -> dict:
+    """Parse once and collect time and peak memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = parser(html, table_id)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "rows": rows, "peak_mb": peak / 1024 / 1024}
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark HTML table extraction strategies",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--rows", type=int, default=5000, help="Rows in the synthetic table")
+    source.add_argument("--html", type=Path, help="Saved portal page to parse instead")
+    parser.add_argument("--table-id", default="results", help="id of the table to extract")
+    parser.add_argument("--runs", type=int, default=5, help="Number of runs per parser")
+    parser.add_argument("--only", choices=sorted(PARSERS), nargs="+", help="Parsers to run")
+    args = parser.parse_args()
+
+    html = args.html.read_text(encoding="utf-8") if args.html else synthetic_table(args.rows)
+    names = args.only or list(PARSERS)
+
+    results = {name: [] for name in names}
+    # Interleave runs so background load affects every parser equally
+    for i in range(args.runs):
+        for name in names:
+            results[name].append(measure(PARSERS[name], html, args.table_id))
+        print(f"Run {i + 1}/{args.runs} complete")
+
+    print("\n" + "=" * 70)
+    print(f"Table extraction benchmark: {len(html) / 1024:.0f} KB of HTML")
+    print(f"Median of {args.runs} runs")
+    print("=" * 70)
+    medians = {}
+    for name in names:
+        samples = results[name]
+        medians[name] = statistics.median(sample["seconds"] for sample in samples)
+        print(
+            f"{name:<12} {medians[name] * 1000:8.1f} ms  "
+            f"rows {samples[0]['rows']:>7}  "
+            f"peak {statistics.median(s['peak_mb'] for s in samples):6.1f} MB"
+        )
+    if "lxml" in medians:
+        for name in names:
+            if name != "lxml" and medians["lxml"] > 0:
+                print(f"lxml speedup vs {name}: {medians[name] / medians['lxml']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,8 +15,14 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import io
+import sys
+from pathlib import Path
 from typing import List, Optional, Dict, Any
 
+# Add the parent directory to the path so we can import from scrapers
+sys.path.append(str(Path(__file__).parent.parent))
+from scrapers.base.table_extraction import extract_table
+
 
 class HTMLTableExtractor:
     """Class to extract tables from HTML and convert to DataFrames."""
@@ -104,6 +110,37 @@ class HTMLTableExtractor:
             print(f"Error with BeautifulSoup extraction: {e}")
             return pd.DataFrame()
     
+    def method5_lxml_single_pass(
+        self,
+        html_content: str,
+        table_id: Optional[str] = None,
+        base_url: Optional[str] = None,
+        link_columns: Optional[Dict[Any, str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Method 5: Single lxml pass for text and links (fastest)
+        
+        Uses the shared extractor in scrapers.base.table_extraction, which the
+        portal scrapers use too.
+        
+        Args:
+            html_content: HTML string
+            table_id: id of the table to extract (default: every row in the page)
+            base_url: Resolve relative links against this URL
+            link_columns: Header (or column index) -> name of a link column to add
+            
+        Returns:
+            Single DataFrame
+        """
+        try:
+            table = extract_table(html_content, table_id=table_id, base_url=base_url)
+            df = table.to_dataframe(link_columns=link_columns)
+            print(f"Extracted table with {len(df)} rows and {len(df.columns)} columns")
+            return df
+        except Exception as e:
+            print(f"Error with lxml extraction: {e}")
+            return pd.DataFrame()
+    
     def method3_selenium_table_extraction(self, driver, table_selector: str) -> pd.DataFrame:
         """
         Method 3: Extract table using Selenium WebDriver
@@ -332,6 +369,11 @@ def example_static_html_table():
     print("\n--- Method 2: BeautifulSoup Manual ---")
     df2 = extractor.method2_beautifulsoup_manual(html_content, "#sample-table")
     print(df2)
+    
+    # Method 5: single lxml pass
+    print("\n--- Method 5: lxml Single Pass ---")
+    df5 = extractor.method5_lxml_single_pass(html_content, table_id="sample-table")
+    print(df5)
 
 
 def example_web_table_extraction():
@@ -50,9 +50,16 @@ def extract_wisconsin_franchise_table(save_csv: bool = True, clean_data: bool =
         # The Wisconsin table ID
         table_selector = "#ctl00_contentPlaceholder_grdActiveFilings"
         
-        # Method 1: Try Selenium cell-by-cell extraction (most reliable for dynamic tables)
-        print("\n🔍 Method 1: Selenium Cell-by-Cell Extraction")
-        df = extractor.method4_selenium_cell_by_cell(scraper.driver, table_selector)
+        # Method 1: Single lxml pass over the page source (fastest)
+        print("\n🔍 Method 1: lxml Single Pass")
+        df = extractor.method5_lxml_single_pass(
+            scraper.get_page_source(), table_id=table_selector.lstrip("#")
+        )
+        
+        if df.empty:
+            # Selenium cell-by-cell extraction (slow, but sees dynamic content)
+            print("\n🔍 Method 1b: Selenium Cell-by-Cell Extraction")
+            df = extractor.method4_selenium_cell_by_cell(scraper.driver, table_selector)
         
         if df.empty:
             print("⚠️  Cell-by-cell extraction failed, trying alternative methods...")
@@ -18,7 +18,7 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload, MediaIoBaseUpload
 
 from config import get_settings
 from utils.logging import get_logger
@@ -266,14 +266,52 @@ class DriveManager:
         Raises:
             HttpError: If upload fails
         """
+        media = MediaIoBaseUpload(
+            io.BytesIO(file_content), mimetype=mime_type, resumable=resumable
+        )
+        return self._upload_media(
+            media, filename, parent_id, len(file_content), resumable
+        )
+
+    def upload_file_from_path(
+        self,
+        file_path: Path,
+        filename: str,
+        parent_id: str,
+        mime_type: str = "application/pdf",
+        resumable: bool = True,
+    ) -> str:
+        """Upload a local file to Google Drive without loading it into memory.
+
+        Args:
+            file_path: Path of the file to upload
+            filename: Name for the uploaded file
+            parent_id: Parent folder ID
+            mime_type: MIME type of the file
+            resumable: Whether to use resumable upload for large files
+
+        Returns:
+            Uploaded file ID
+
+        Raises:
+            HttpError: If upload fails
+        """
+        file_size = Path(file_path).stat().st_size
+        media = MediaFileUpload(
+            str(file_path),
+            mimetype=mime_type,
+            resumable=resumable,
+            chunksize=5 * 1024 * 1024,
+        )
+        return self._upload_media(media, filename, parent_id, file_size, resumable)
+
+    def _upload_media(
+        self, media, filename: str, parent_id: str, file_size: int, resumable: bool
+    ) -> str:
+        """Run a media upload, in chunks for large resumable uploads."""
         try:
             file_metadata = {"name": filename, "parents": [parent_id]}
 
-            # Create media upload object
-            media = MediaIoBaseUpload(
-                io.BytesIO(file_content), mimetype=mime_type, resumable=resumable
-            )
-
             # Upload the file
             request = self.service.files().create(
                 body=file_metadata, media_body=media, fields="id"
@@ -282,7 +320,7 @@ class DriveManager:
             file_id = None
             response = None
 
-            if resumable and len(file_content) > 5 * 1024 * 1024:  # 5MB threshold
+            if resumable and file_size > 5 * 1024 * 1024:  # 5MB threshold
                 # Resumable upload for large files
                 while response is None:
                     status, response = request.next_chunk()
@@ -302,7 +340,7 @@ class DriveManager:
                 filename=filename,
                 file_id=file_id,
                 parent_id=parent_id,
-                file_size=len(file_content),
+                file_size=file_size,
             )
             return file_id
 
@@ -311,7 +349,7 @@ class DriveManager:
                 "Failed to upload file to Google Drive",
                 filename=filename,
                 parent_id=parent_id,
-                file_size=len(file_content),
+                file_size=file_size,
                 error=str(e),
             )
             raise
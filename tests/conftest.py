@@ -0,0 +1,73 @@
+# ABOUTME: Shared fixtures for the test suite
+# ABOUTME: Provides a fake database for watermark refreshes (scrapers.base.watermark.read_since)
+
+import pytest
+
+
+class FakeQuery:
+    def __init__(self, db):
+        self.db = db
+        self.since = None
+        self.not_null = []
+        self._limit = None
+        self._offset = 0
+
+    def table(self, name):
+        assert name == self.db.table
+        return self
+
+    def select(self, *fields):
+        return self
+
+    def where_null(self, column, is_null=True):
+        assert not is_null
+        self.not_null.append(column)
+        return self
+
+    def where(self, column, operator="=", value=None):
+        assert (column, operator) == (self.db.column, ">=")
+        self.since = value
+        return self
+
+    def order_by(self, column, direction="asc"):
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def offset(self, count):
+        self._offset = count
+        return self
+
+    def execute(self):
+        self.db.queries.append(self.since)
+        rows = [
+            r for r in self.db.rows
+            if (self.since is None or r[self.db.column] >= self.since)
+            and all(r.get(column) is not None for column in self.not_null)
+        ]
+        return rows[self._offset:self._offset + self._limit]
+
+
+class FakeDatabase:
+    """One table read by watermark; ``queries`` records the ``since`` of each page."""
+
+    def __init__(self, table, column, rows):
+        self.table = table
+        self.column = column
+        self.rows = rows
+        self.queries = []
+
+    def query(self):
+        return FakeQuery(self)
+
+
+@pytest.fixture
+def watermark_db():
+    """Factory for a fake database manager serving one table to refreshes."""
+
+    def make(table, column, rows):
+        return FakeDatabase(table, column, rows)
+
+    return make
@@ -0,0 +1,207 @@
+# ABOUTME: Test suite for the set-based scraper database integration
+# ABOUTME: Uses an in-memory fake database that counts round trips
+
+import hashlib
+from uuid import uuid4
+
+import pandas as pd
+import pytest
+
+from franchise_scrapers import database_integration
+from franchise_scrapers.database_integration import ScraperDatabaseIntegration
+from scrapers.base.franchisor_cache import FranchisorCache
+from scrapers.base.known_documents import KnownDocumentFilter
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+
+    def batch_insert_chunked(self, table_name, records, chunk_size=None):
+        return self.db.execute_batch_insert(table_name, records)
+
+
+class FakeDatabase:
+    """Stores rows per table and counts every call that would hit the network."""
+
+    def __init__(self):
+        self.tables = {"franchisors": [], "fdds": [], "scrape_metadata": []}
+        self.round_trips = 0
+        self.batch = FakeBatch(self)
+
+    def get_records_by_filter(self, table_name, filters, limit=None, order_by=None):
+        self.round_trips += 1
+        records = self.tables[table_name]
+        for column, value in filters.items():
+            allowed = set(value) if isinstance(value, list) else {value}
+            records = [r for r in records if r.get(column) in allowed]
+        return records[:limit] if limit else records
+
+    def execute_batch_insert(self, table_name, records):
+        self.round_trips += 1
+        self.tables[table_name].extend(records)
+        return len(records)
+
+
+def pdf(content, **fields):
+    return {
+        "filename": f"{fields.get('franchisor', 'x')}_2024_{fields.get('file_number', '0')}_MN.pdf",
+        "file_id": f"drive-{uuid4().hex[:8]}",
+        "content": content,
+        **fields,
+    }
+
+
+@pytest.fixture
+def integration():
+    integration = ScraperDatabaseIntegration()
+    integration.db = FakeDatabase()
+    return integration
+
+
+class TestProcessScrapedData:
+    """Test cases for ScraperDatabaseIntegration.process_scraped_data."""
+
+    def test_mn_rows_are_matched_resolved_and_inserted(self, integration):
+        """Rows join to downloads by file number; everything is written in bulk."""
+        integration.db.tables["franchisors"].append(
+            {"id": str(uuid4()), "canonical_name": "Existing Brand"}
+        )
+        df = pd.DataFrame({
+            "Franchisor": ["existing brand", "New Brand", "Another", "No Pdf"],
+            "Document Link": [f"https://example.com/doc/{i}" for i in range(4)],
+            "Year": ["2024", "2023", "2024", "2024"],
+            "File Number": ["F-1", "F-2", "F-3", "F-4"],
+        })
+        downloads = [
+            pdf(b"%PDF one", franchisor="Existing Brand", file_number="F-1"),
+            pdf(b"%PDF two", franchisor="New Brand", file_number="F-2"),
+            pdf(b"%PDF three", franchisor="Another", file_number="F-3"),
+        ]
+
+        stats = integration.process_scraped_data(df, "MN", downloads)
+
+        assert stats == {
+            "total_scraped": 4,
+            "franchisors_created": 3,
+            "franchisors_found": 1,
+            "fdds_created": 3,
+            "fdds_duplicates": 0,
+            "errors": 0,
+        }
+        fdds = integration.db.tables["fdds"]
+        assert {f["filing_number"] for f in fdds} == {"F-1", "F-2", "F-3"}
+        assert {f["sha256_hash"] for f in fdds} == {
+            hashlib.sha256(d["content"]).hexdigest() for d in downloads
+        }
+        assert fdds[0]["issue_date"] == "2024-01-01"
+        metadata = integration.db.tables["scrape_metadata"]
+        assert {m["fdd_id"] for m in metadata} == {f["id"] for f in fdds}
+        assert metadata[0]["source_url"] == "https://example.com/doc/0"
+        # franchisor lookup + insert, hash lookup, fdd insert, metadata insert
+        assert integration.db.round_trips == 5
+
+    def test_duplicates_by_stored_hash_and_within_batch(self, integration):
+        """Known hashes and repeated PDFs in one batch are counted as duplicates."""
+        stored = b"%PDF stored"
+        integration.db.tables["fdds"].append(
+            {"id": str(uuid4()), "sha256_hash": hashlib.sha256(stored).hexdigest()}
+        )
+        df = pd.DataFrame({
+            "Legal Name": ["Alpha Inc", "Beta LLC", "Beta LLC"],
+            "File Number": ["W-1", "W-2", "W-3"],
+            "Effective Date": ["2024-03-01", "03/15/2024", "bad"],
+            "Details Link": ["https://example.com/wi/1", "https://example.com/wi/2", ""],
+        })
+        downloads = [
+            pdf(stored, legal_name="Alpha Inc", filing_number="W-1"),
+            pdf(b"%PDF beta", legal_name="Beta LLC", filing_number="W-2"),
+        ]
+
+        stats = integration.process_scraped_data(df, "WI", downloads)
+
+        # W-3 has no PDF of its own and falls back to the Beta LLC name match
+        assert stats["fdds_duplicates"] == 2
+        assert stats["fdds_created"] == 1
+        fdd = integration.db.tables["fdds"][-1]
+        assert fdd["issue_date"] == "2024-03-15"
+        assert integration.db.tables["scrape_metadata"][0]["effective_date"] == "2024-03-15"
+
+    def test_rows_without_name_or_pdf_are_skipped(self, integration):
+        """Nameless rows and rows without downloads produce no writes."""
+        df = pd.DataFrame({
+            "Franchisor": ["", None, "Lonely"],
+            "File Number": ["F-1", "F-2", ""],
+        })
+
+        stats = integration.process_scraped_data(df, "MN", [])
+
+        assert stats["fdds_created"] == 0
+        assert stats["franchisors_created"] == 1
+        assert integration.db.tables["fdds"] == []
+
+
+class TestKnownDocumentFilter:
+    """Test that the local filter spares round trips for new documents."""
+
+    @pytest.fixture
+    def filtered(self, integration, tmp_path):
+        integration._known_documents = KnownDocumentFilter(tmp_path / "f.bloom", capacity=100)
+        integration._known_documents_loaded = True
+        return integration
+
+    def test_unseen_documents_skip_the_database(self, filtered):
+        stored = hashlib.sha256(b"%PDF stored").hexdigest()
+        fdd_id = str(uuid4())
+        filtered.db.tables["fdds"].append({"id": fdd_id, "sha256_hash": stored})
+        filtered._known_documents.add(sha256_hash=stored)
+
+        new = filtered.check_fdd_duplicate(uuid4(), "MN", sha256_hash="0" * 64)
+        assert new is None
+        assert filtered.db.round_trips == 0
+
+        duplicate = filtered.check_fdd_duplicate(uuid4(), "MN", sha256_hash=stored)
+        assert str(duplicate) == fdd_id
+        assert filtered.db.round_trips == 2
+
+    def test_created_fdds_are_added_to_the_filter(self, filtered):
+        df = pd.DataFrame({
+            "Legal Name": ["Alpha Inc"],
+            "File Number": ["W-1"],
+            "Effective Date": ["2024-03-01"],
+            "Details Link": ["https://example.com/wi/1"],
+        })
+        content = b"%PDF alpha"
+
+        filtered.process_scraped_data(df, "WI", [pdf(content, legal_name="Alpha Inc", filing_number="W-1")])
+
+        known = filtered._known_documents
+        assert known.might_contain_hash(hashlib.sha256(content).hexdigest())
+        assert known.might_contain_filing("WI", "W-1")
+        assert known.path.exists()
+
+
+class TestFranchisorCache:
+    """Test that cached franchisors resolve without round trips."""
+
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        cache = FranchisorCache()
+        monkeypatch.setattr(database_integration, "get_fresh_franchisor_cache", lambda db: cache)
+        monkeypatch.setattr(database_integration, "get_franchisor_cache", lambda: cache)
+        return cache
+
+    def test_cached_names_skip_lookup_and_creates_write_through(self, integration, cache):
+        cached_id = str(uuid4())
+        cache.put({"id": cached_id, "canonical_name": "Cached Brand"})
+
+        resolved, created = integration.find_or_create_franchisors(["cached brand", "New Brand"])
+
+        assert str(resolved["Cached Brand"]) == cached_id
+        assert created == {"New Brand"}
+        # One lookup and one insert, both for the new name only
+        assert integration.db.round_trips == 2
+        assert cache.get_by_canonical_name("New Brand")["id"] == str(resolved["New Brand"])
+
+        assert integration.find_or_create_franchisor("new brand") == resolved["New Brand"]
+        assert integration.db.round_trips == 2
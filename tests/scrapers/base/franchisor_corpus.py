@@ -0,0 +1,24 @@
+# ABOUTME: Synthetic franchisor records shared by the similarity test suites
+# ABOUTME: Random multi-word brand names with legal suffixes and optional typos
+
+import random
+
+WORDS = ["pizza", "burger", "fitness", "clean", "kids", "learning", "auto", "care",
+         "coffee", "hair", "pet", "home", "express", "grill", "smart", "tutor"]
+
+
+def franchisor(n, name, dba_names=None):
+    return {"id": n, "canonical_name": name, "dba_names": dba_names or []}
+
+
+def corpus(size, seed, typo_rate=0.0):
+    """``size`` franchisors from a seeded generator; ``typo_rate`` of them drop a letter."""
+    rng = random.Random(seed)
+    records = []
+    for n in range(size):
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 3))).title()
+        if typo_rate and rng.random() < typo_rate:
+            i = rng.randrange(len(name))
+            name = name[:i] + name[i + 1:]
+        records.append(franchisor(n, name + rng.choice(["", " LLC", " Inc."])))
+    return records
@@ -0,0 +1,82 @@
+# ABOUTME: Test suite for batch franchisor deduplication
+# ABOUTME: Compares the edge list with pairwise calculate_similarity and checks grouping
+
+from scrapers.base.batch_similarity import BatchSimilarityScorer, SimilarityEdge, group_edges
+from scrapers.base.similarity import SimilarityCalculator
+from tests.scrapers.base.franchisor_corpus import corpus, franchisor
+
+
+def pairwise(franchisors, threshold):
+    calc = SimilarityCalculator()
+    edges = {}
+    for a in range(len(franchisors)):
+        for b in range(a + 1, len(franchisors)):
+            score = max(
+                calc.calculate_similarity(x, y)
+                for x in calc._franchisor_names(franchisors[a]) if x
+                for y in calc._franchisor_names(franchisors[b]) if y
+            )
+            if score >= threshold:
+                edges[(franchisors[a]["id"], franchisors[b]["id"])] = round(score, 3)
+    return edges
+
+
+class TestBatchSimilarityScorer:
+    """Test the scored edge list."""
+
+    def test_edges_match_pairwise_scores(self):
+        franchisors = corpus(size=300, seed=5, typo_rate=0.3)
+
+        edges = BatchSimilarityScorer(threshold=0.8, workers=1, block_size=64).score_corpus(franchisors)
+
+        assert {(e.source_id, e.target_id): e.score for e in edges} == pairwise(franchisors, 0.8)
+        assert [e.score for e in edges] == sorted((e.score for e in edges), reverse=True)
+
+    def test_process_pool_gives_same_edges(self):
+        franchisors = corpus(size=120, seed=5, typo_rate=0.3)
+
+        in_process = BatchSimilarityScorer(workers=1, block_size=16).score_corpus(franchisors)
+        pooled = BatchSimilarityScorer(workers=2, block_size=16).score_corpus(franchisors)
+
+        assert pooled == in_process
+
+    def test_shared_and_trade_names(self):
+        franchisors = [
+            franchisor("a", "Mathnasium LLC", dba_names=["Math Learning Center"]),
+            franchisor("b", "Mathnasium, Inc."),
+            franchisor("c", "Math Learning Centre"),
+            franchisor("d", "LLC"),
+        ]
+
+        edges = BatchSimilarityScorer(workers=1).score_corpus(franchisors)
+
+        assert SimilarityEdge("a", "b", 1.0) in edges
+        assert ("a", "c") in {(e.source_id, e.target_id) for e in edges}
+        assert all("d" not in (e.source_id, e.target_id) for e in edges)
+
+
+class TestMergeRecommendations:
+    """Test feeding the edge list to merge_recommendation."""
+
+    def test_group_edges_and_recommend(self):
+        franchisors = [
+            franchisor(1, "Anytime Fitness", dba_names=["Anytime Fitness Gym"]),
+            franchisor(2, "Anytime Fitness LLC"),
+            franchisor(3, "Snap Fitness"),
+        ]
+        edges = [SimilarityEdge(1, 2, 1.0)]
+
+        matches = group_edges(edges, franchisors)
+
+        assert matches[2] == [{
+            "id": 1,
+            "canonical_name": "Anytime Fitness",
+            # DBA names, as find_similar_franchisors returns them
+            "trade_names": ["Anytime Fitness Gym"],
+            "score": 1.0,
+            "match_type": "exact",
+        }]
+        assert 3 not in matches
+        recommendations = BatchSimilarityScorer(workers=1).recommend_merges(franchisors)
+        assert recommendations[1]["recommended_id"] == 2
+        assert recommendations[2]["recommended_id"] == 1
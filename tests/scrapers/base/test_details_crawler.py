@@ -0,0 +1,115 @@
+# ABOUTME: Test suite for the concurrent DetailsCrawler
+# ABOUTME: Uses an in-memory fake session pool so no real browser is launched
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from scrapers.base.details_crawler import DetailsCrawler, get_portal_concurrency
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+class FakePool:
+    """Minimal stand-in for SessionPool that tracks concurrent use."""
+
+    def __init__(self, size):
+        self.contexts = [FakeContext() for _ in range(size)]
+        self._available = asyncio.Queue()
+        for context in self.contexts:
+            self._available.put_nowait(context)
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    async def initialize(self):
+        pass
+
+    async def cleanup(self):
+        pass
+
+    @asynccontextmanager
+    async def acquire_session(self, host=None):
+        context = await self._available.get()
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        try:
+            yield context
+        finally:
+            self.in_use -= 1
+            self._available.put_nowait(context)
+
+
+class TestDetailsCrawler:
+    """Test suite for DetailsCrawler."""
+
+    @pytest.mark.asyncio
+    async def test_crawl_preserves_order_and_runs_concurrently(self):
+        pool = FakePool(3)
+
+        async def handler(page, item):
+            await asyncio.sleep(0.01)
+            return item * 2
+
+        crawler = DetailsCrawler(handler, concurrency=3, session_pool=pool)
+        results = await crawler.crawl(range(9))
+
+        assert [r.result for r in results] == [i * 2 for i in range(9)]
+        assert all(r.success for r in results)
+        assert pool.peak_in_use == 3
+        assert all(p.closed for c in pool.contexts for p in c.pages)
+
+        stats = crawler.get_stats()
+        assert stats["processed"] == 9
+        assert stats["succeeded"] == 9
+        assert stats["items_per_minute"] > 0
+
+    @pytest.mark.asyncio
+    async def test_timeouts_and_errors_are_reported(self):
+        pool = FakePool(2)
+
+        async def handler(page, item):
+            if item == "slow":
+                await asyncio.sleep(1)
+            if item == "bad":
+                raise ValueError("boom")
+            return item
+
+        crawler = DetailsCrawler(
+            handler, concurrency=2, session_pool=pool, item_timeout=0.05
+        )
+        results = await crawler.crawl(["ok", "slow", "bad"])
+
+        assert results[0].success
+        assert results[1].timed_out and not results[1].success
+        assert results[2].error == "boom"
+
+        stats = crawler.get_stats()
+        assert stats["failed"] == 2
+        assert stats["timed_out"] == 1
+
+    @pytest.mark.asyncio
+    async def test_empty_crawl(self):
+        crawler = DetailsCrawler(lambda page, item: None, session_pool=FakePool(1))
+        assert await crawler.crawl([]) == []
+
+    def test_portal_concurrency(self):
+        assert get_portal_concurrency("apps.dfi.wi.gov") == 4
+        assert get_portal_concurrency("unknown.example.com") == 2
+        assert get_portal_concurrency(None) == 2
@@ -0,0 +1,175 @@
+# ABOUTME: Test suite for the SQLite download job queue
+# ABOUTME: Covers idempotent enqueue, leases, retries and concurrent claiming
+
+import threading
+import time
+
+import pytest
+
+from scrapers.base.download_queue import (
+    STATE_DOWNLOADING,
+    STATE_FAILED,
+    STATE_QUEUED,
+    STATE_STORED,
+    DownloadQueue,
+)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return DownloadQueue(db_path=tmp_path / "downloads.db", retry_base_delay=0.0)
+
+
+def jobs(count, prefix="MN"):
+    return [
+        (f"{prefix}:{i}", f"https://example.com/{i}.pdf", {"index": i})
+        for i in range(count)
+    ]
+
+
+class TestDownloadQueue:
+    """Test cases for DownloadQueue."""
+
+    def test_enqueue_is_idempotent(self, queue):
+        """Re-enqueueing a run's documents keeps the existing jobs."""
+        assert queue.enqueue("MN", jobs(3)) == {"added": 3, "existing": 0}
+        assert queue.enqueue("MN", jobs(4)) == {"added": 1, "existing": 3}
+        assert queue.pending_count("MN") == 4
+        assert queue.pending_count("WI") == 0
+
+    def test_stored_jobs_are_not_redone(self, queue):
+        """Completed jobs survive a re-enqueue and are never claimed again."""
+        queue.enqueue("MN", jobs(2))
+        claimed = queue.claim("MN", "w1", limit=2)
+        assert queue.complete_many([job.job_id for job in claimed], "w1") == 2
+
+        queue.enqueue("MN", jobs(2))
+
+        assert queue.claim("MN", "w2", limit=10) == []
+        assert queue.get_stats("MN")[STATE_STORED] == 2
+
+    def test_claim_leases_jobs(self, queue):
+        """Claimed jobs carry their payload and are hidden from other workers."""
+        queue.enqueue("MN", jobs(3))
+
+        first = queue.claim("MN", "w1", limit=2)
+        second = queue.claim("MN", "w2", limit=2)
+
+        assert [job.payload["index"] for job in first] == [0, 1]
+        assert [job.job_id for job in second] == ["MN:2"]
+        assert first[0].attempts == 1
+        assert queue.get_stats("MN")[STATE_DOWNLOADING] == 3
+
+    def test_expired_lease_is_reclaimed(self, queue):
+        """A job whose worker died becomes claimable once its lease expires."""
+        queue.enqueue("MN", jobs(1))
+        queue.claim("MN", "dead", lease_seconds=0.01)
+        time.sleep(0.02)
+
+        [job] = queue.claim("MN", "w2")
+
+        assert job.attempts == 2
+        # The dead worker can no longer complete the job
+        assert not queue.complete(job.job_id, "dead")
+        assert queue.complete(job.job_id, "w2")
+
+    def test_heartbeat_keeps_lease(self, queue):
+        """Heartbeats extend leases only for the worker holding them."""
+        queue.enqueue("MN", jobs(1))
+        queue.claim("MN", "w1", lease_seconds=0.05)
+
+        assert queue.heartbeat(["MN:0"], "w1", lease_seconds=60) == 1
+        assert queue.heartbeat(["MN:0"], "w2") == 0
+        time.sleep(0.06)
+        assert queue.claim("MN", "w2") == []
+
+    def test_fail_retries_then_gives_up(self, queue):
+        """Failures requeue the job until its attempts run out."""
+        queue = DownloadQueue(db_path=queue.db_path, max_attempts=2, retry_base_delay=0.0)
+        queue.enqueue("MN", jobs(1))
+
+        [job] = queue.claim("MN", "w1")
+        assert queue.fail(job.job_id, "w1", "timeout") == STATE_QUEUED
+        [job] = queue.claim("MN", "w1")
+        assert queue.fail(job.job_id, "w1", "timeout") == STATE_FAILED
+
+        assert queue.claim("MN", "w1") == []
+        assert queue.requeue_failed("MN") == 1
+        assert queue.claim("MN", "w1")[0].last_error == "timeout"
+
+    def test_fail_backoff_delays_retry(self, tmp_path):
+        """A retried job is not claimable until its backoff has passed."""
+        queue = DownloadQueue(db_path=tmp_path / "q.db", retry_base_delay=60.0)
+        queue.enqueue("MN", jobs(1))
+        [job] = queue.claim("MN", "w1")
+
+        assert queue.fail(job.job_id, "w1", "HTTP 503") == STATE_QUEUED
+        assert queue.claim("MN", "w1") == []
+        assert queue.pending_count("MN") == 1
+
+    def test_non_retryable_failure(self, queue):
+        """Failures without retry go straight to failed."""
+        queue.enqueue("MN", jobs(1))
+        [job] = queue.claim("MN", "w1")
+
+        assert queue.fail(job.job_id, "w1", "No download URL", retry=False) == STATE_FAILED
+
+    def test_release_returns_leased_jobs(self, queue):
+        """Releasing a worker makes its jobs claimable immediately."""
+        queue.enqueue("MN", jobs(2))
+        queue.claim("MN", "w1", limit=2)
+
+        assert queue.release("w1") == 2
+        assert len(queue.claim("MN", "w2", limit=2)) == 2
+
+    def test_defer_returns_job_without_using_an_attempt(self, queue):
+        """Deferred jobs wait out the delay and keep their attempts."""
+        queue.enqueue("MN", jobs(1))
+        [job] = queue.claim("MN", "w1")
+
+        assert queue.defer([job.job_id], "w2", delay=0) == 0
+        assert queue.defer([job.job_id], "w1", delay=60) == 1
+        assert queue.claim("MN", "w1") == []
+        assert queue.get_stats("MN")[STATE_QUEUED] == 1
+        assert queue.get_stats("MN")["attempts"] == 0
+
+    def test_get_states_reports_known_jobs(self, queue):
+        """Finished jobs can be looked up before their documents are re-enqueued."""
+        queue.enqueue("MN", jobs(3))
+        first, second = queue.claim("MN", "w1", limit=2)
+        queue.complete(first.job_id, "w1")
+        queue.fail(second.job_id, "w1", "HTTP 404", retry=False)
+
+        assert queue.get_states(["MN:0", "MN:1", "MN:2", "MN:9"]) == {
+            "MN:0": STATE_STORED,
+            "MN:1": STATE_FAILED,
+            "MN:2": STATE_QUEUED,
+        }
+
+    def test_concurrent_workers_never_share_a_job(self, queue):
+        """Workers on separate connections claim disjoint sets of jobs."""
+        queue.enqueue("MN", jobs(200))
+        claimed = {}
+
+        def worker(worker_id):
+            own = DownloadQueue(db_path=queue.db_path)
+            mine = []
+            while True:
+                batch = own.claim("MN", worker_id, limit=7)
+                if not batch:
+                    break
+                mine.extend(job.job_id for job in batch)
+                own.complete_many([job.job_id for job in batch], worker_id)
+            claimed[worker_id] = mine
+
+        threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        all_claimed = [job_id for mine in claimed.values() for job_id in mine]
+        assert len(all_claimed) == len(set(all_claimed)) == 200
+        stats = queue.get_stats("MN")
+        assert stats[STATE_STORED] == stats["total"] == 200
+        assert stats["attempts"] == 200
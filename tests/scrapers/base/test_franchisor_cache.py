@@ -0,0 +1,143 @@
+# ABOUTME: Test suite for the process-wide franchisor name cache
+# ABOUTME: Covers exact and fuzzy lookups, write-through and watermark refreshes
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from scrapers.base import franchisor_cache
+from scrapers.base.franchisor_cache import FranchisorCache
+from scrapers.base.similarity import SimilarityCalculator
+from scrapers.base.watermark import REFRESH_OVERLAP
+
+
+START = datetime(2024, 1, 1)
+
+
+def row(n, name, hours=0, dba_names=None):
+    return {
+        "id": f"id-{n}",
+        "canonical_name": name,
+        "dba_names": dba_names or [],
+        "updated_at": START + timedelta(hours=hours),
+    }
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    cache = FranchisorCache()
+    monkeypatch.setattr(franchisor_cache, "_cache", cache)
+    return cache
+
+
+class TestLookups:
+    """Test exact, normalized and fuzzy lookups."""
+
+    def test_exact_normalized_and_fuzzy(self):
+        cache = FranchisorCache()
+        cache.put_many([
+            row(1, "Anytime Fitness", dba_names=["Anytime Fitness LLC"]),
+            row(2, "Snap Fitness"),
+        ])
+
+        assert cache.get_by_canonical_name("Anytime Fitness")["id"] == "id-1"
+        assert cache.get_by_canonical_name("anytime fitness") is None
+        assert [r["id"] for r in cache.find_by_normalized_name("ANYTIME FITNESS, Inc.")] == ["id-1"]
+        assert "snap fitness" in cache.candidates("Snap Fitnes", 0.85)
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    def test_put_replaces_renamed_and_remove_forgets(self):
+        cache = FranchisorCache()
+        cache.put(row(1, "Old Name"))
+
+        cache.put(row(1, "New Name"))
+        assert cache.get_by_canonical_name("Old Name") is None
+        assert cache.names_of("id-1") == {"new name"}
+
+        cache.remove("id-1")
+        assert cache.get("id-1") is None
+        assert cache.candidates("New Name", 0.85) == {}
+
+
+class TestRefresh:
+    """Test loading and incremental refreshes from the database."""
+
+    def test_incremental_refresh_uses_watermark(self, watermark_db):
+        db = watermark_db(
+            "franchisors", "updated_at", [row(n, f"Brand {n}", hours=n) for n in range(5)]
+        )
+        cache = FranchisorCache()
+
+        assert cache.refresh(db, page_size=2) == 5
+        assert db.queries == [None, None, None]
+        assert cache.watermark == START + timedelta(hours=4)
+
+        db.rows.append(row(2, "Brand Two Renamed", hours=5))
+        db.queries.clear()
+        cache.refresh(db)
+
+        assert db.queries == [START + timedelta(hours=4) - REFRESH_OVERLAP]
+        assert cache.get_by_canonical_name("Brand Two Renamed")["id"] == "id-2"
+        assert cache.get_by_canonical_name("Brand 2") is None
+        assert len(cache) == 5
+
+    def test_full_reload_drops_deleted_franchisors(self, watermark_db):
+        db = watermark_db("franchisors", "updated_at", [row(1, "Kept"), row(2, "Merged Away")])
+        cache = FranchisorCache(full_reload_interval=timedelta(0))
+        cache.refresh(db)
+
+        del db.rows[1]
+        cache.refresh(db)
+
+        assert db.queries == [None, None]
+        assert cache.get("id-2") is None
+
+    def test_refresh_if_stale_respects_max_age(self, watermark_db):
+        db = watermark_db("franchisors", "updated_at", [row(1, "Brand")])
+        cache = FranchisorCache(max_age=3600)
+
+        cache.refresh_if_stale(db)
+        cache.refresh_if_stale(db)
+
+        assert len(db.queries) == 1
+
+    def test_failed_refresh_returns_no_cache(self, watermark_db, shared_cache):
+        assert franchisor_cache.get_fresh_franchisor_cache(object()) is None
+        db = watermark_db("franchisors", "updated_at", [])
+        assert franchisor_cache.get_fresh_franchisor_cache(db) is shared_cache
+
+
+class TestSimilarityThroughCache:
+    """Test SimilarityCalculator lookups served by the shared cache."""
+
+    def test_find_similar_uses_cache_and_write_through(self, watermark_db, shared_cache, monkeypatch):
+        db = watermark_db("franchisors", "updated_at", [
+            row(1, "Goddard School"),
+            row(2, "Primrose", dba_names=["Primrose Schools"]),
+        ])
+        monkeypatch.setattr("scrapers.base.similarity.get_database_manager", lambda: db)
+        calc = SimilarityCalculator()
+
+        assert calc.find_similar_franchisors("Primrose Schools")[0]["id"] == "id-2"
+        assert calc.find_similar_franchisors("The Goddard School")[0]["id"] == "id-1"
+        calc.index_franchisor(row(3, "Kiddie Academy"))
+        assert calc.find_similar_franchisors("Kiddie Academy LLC")[0]["id"] == "id-3"
+        assert len(db.queries) == 1
+
+    def test_failed_refresh_falls_back_to_database(self, shared_cache, monkeypatch):
+        class PagedDatabase:
+            def query(self):
+                raise ConnectionError("query builder unavailable")
+
+            def get_records_paginated(self, table_name, page, page_size, order_by):
+                assert table_name == "franchisors"
+                records = [row(1, "Goddard School"), row(2, "Primrose", dba_names=["Primrose Schools"])]
+                return {"records": records, "pagination": {"has_next": False}}
+
+        monkeypatch.setattr("scrapers.base.similarity.get_database_manager", PagedDatabase)
+        calc = SimilarityCalculator()
+
+        match = calc.find_similar_franchisors("Primrose Schools")[0]
+        assert match["id"] == "id-2"
+        assert match["trade_names"] == ["Primrose Schools"]
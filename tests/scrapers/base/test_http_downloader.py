@@ -0,0 +1,399 @@
+# ABOUTME: Test suite for the pooled HTTP document downloader
+# ABOUTME: Uses httpx.MockTransport so no network access is required
+
+import hashlib
+
+import httpx
+import pytest
+
+from scrapers.base.exceptions import DownloadError
+from scrapers.base.http_downloader import (
+    STREAM_CHUNK_SIZE,
+    HTTPDownloader,
+    is_pdf_response,
+    log_download_progress,
+)
+from scrapers.base.pdf_cache import PDFCache
+
+PDF_BYTES = b"%PDF-1.4\n" + b"x" * 1024
+
+
+def make_transport(routes, calls=None):
+    """Build a mock transport from a {path: (status, headers, body)} map."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if calls is not None:
+            calls.append(request)
+        status, headers, body = routes[request.url.path]
+        return httpx.Response(status, headers=headers, content=body)
+
+    return httpx.MockTransport(handler)
+
+
+class DroppingStream(httpx.AsyncByteStream):
+    """Body stream that dies with a connection reset after ``cut`` bytes."""
+
+    def __init__(self, body, cut):
+        self.body = body
+        self.cut = cut
+
+    async def __aiter__(self):
+        yield self.body[: self.cut]
+        raise httpx.ReadError("connection reset by peer")
+
+
+def resumable_handler(body, calls, cut=None, honour_range=True):
+    """Serve ``body`` with a strong ETag; the first response drops at ``cut``."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        headers = {"content-type": "application/pdf", "etag": '"v1"', "accept-ranges": "bytes"}
+        range_header = request.headers.get("range")
+        if range_header and honour_range and request.headers.get("if-range") == '"v1"':
+            first = int(range_header.split("=")[1].rstrip("-"))
+            headers["content-range"] = f"bytes {first}-{len(body) - 1}/{len(body)}"
+            return httpx.Response(206, headers=headers, content=body[first:])
+        headers["content-length"] = str(len(body))
+        if cut is not None and len(calls) == 1:
+            return httpx.Response(200, headers=headers, stream=DroppingStream(body, cut))
+        return httpx.Response(200, headers=headers, content=body)
+
+    return handler
+
+
+class TestHTTPDownloader:
+    """Test suite for HTTPDownloader."""
+
+    def test_is_pdf_response(self):
+        assert is_pdf_response(None, PDF_BYTES)
+        assert is_pdf_response("application/pdf", b"")
+        assert not is_pdf_response("text/html", b"<html></html>")
+
+    @pytest.mark.asyncio
+    async def test_download_pdf(self):
+        transport = make_transport(
+            {"/doc.pdf": (200, {"content-type": "application/pdf"}, PDF_BYTES)}
+        )
+        async with HTTPDownloader(transport=transport) as downloader:
+            result = await downloader.download("https://portal.test/doc.pdf")
+
+        assert result.success
+        assert result.via == "http"
+        assert result.content == PDF_BYTES
+
+    @pytest.mark.asyncio
+    async def test_html_response_uses_browser_fallback(self):
+        transport = make_transport(
+            {"/viewer": (200, {"content-type": "text/html"}, b"<html>viewer</html>")}
+        )
+        fallback_urls = []
+
+        async def fallback(url):
+            fallback_urls.append(url)
+            return PDF_BYTES
+
+        async with HTTPDownloader(
+            transport=transport, browser_fallback=fallback
+        ) as downloader:
+            result = await downloader.download("https://portal.test/viewer")
+
+        assert result.via == "browser"
+        assert fallback_urls == ["https://portal.test/viewer"]
+        assert downloader.get_stats()["browser_fallbacks"] == 1
+
+    @pytest.mark.asyncio
+    async def test_html_response_without_fallback_fails(self):
+        transport = make_transport(
+            {"/viewer": (200, {"content-type": "text/html"}, b"<html></html>")}
+        )
+        async with HTTPDownloader(transport=transport) as downloader:
+            with pytest.raises(DownloadError):
+                await downloader.download("https://portal.test/viewer")
+
+    @pytest.mark.asyncio
+    async def test_download_many_reports_failures_in_order(self):
+        transport = make_transport(
+            {
+                "/a.pdf": (200, {"content-type": "application/pdf"}, PDF_BYTES),
+                "/missing.pdf": (404, {}, b""),
+                "/b.pdf": (200, {}, PDF_BYTES),
+            }
+        )
+        seen = []
+        async with HTTPDownloader(transport=transport) as downloader:
+            results = await downloader.download_many(
+                [
+                    "https://portal.test/a.pdf",
+                    "https://portal.test/missing.pdf",
+                    "https://portal.test/b.pdf",
+                ],
+                concurrency=2,
+                on_result=lambda r: seen.append(r.url),
+            )
+
+        assert [r.success for r in results] == [True, False, True]
+        assert "404" in results[1].error
+        assert len(seen) == 3
+
+    @pytest.mark.asyncio
+    async def test_download_many_survives_failing_callback(self):
+        transport = make_transport(
+            {
+                "/a.pdf": (200, {"content-type": "application/pdf"}, PDF_BYTES),
+                "/b.pdf": (200, {"content-type": "application/pdf"}, PDF_BYTES),
+            }
+        )
+
+        def handle(result):
+            if result.url.endswith("a.pdf"):
+                raise RuntimeError("storage unavailable")
+            result.content = None
+
+        async with HTTPDownloader(transport=transport) as downloader:
+            results = await downloader.download_many(
+                ["https://portal.test/a.pdf", "https://portal.test/b.pdf"],
+                on_result=handle,
+            )
+
+        assert len(results) == 2
+        assert results[0].success
+
+    @pytest.mark.asyncio
+    async def test_cookie_handoff(self):
+        calls = []
+        transport = make_transport(
+            {"/doc.pdf": (200, {"content-type": "application/pdf"}, PDF_BYTES)},
+            calls,
+        )
+        async with HTTPDownloader(transport=transport) as downloader:
+            downloader.set_cookies(
+                [{"name": "ASP.NET_SessionId", "value": "abc", "domain": "portal.test"}]
+            )
+            await downloader.download("https://portal.test/doc.pdf")
+
+        assert "ASP.NET_SessionId=abc" in calls[0].headers["cookie"]
+
+    @pytest.mark.asyncio
+    async def test_download_to_file_streams_and_hashes(self, tmp_path):
+        big_pdf = b"%PDF-1.7\n" + b"y" * (3 * 1024 * 1024)
+        transport = make_transport(
+            {"/big.pdf": (200, {"content-type": "application/pdf"}, big_pdf)}
+        )
+        async with HTTPDownloader(transport=transport) as downloader:
+            streamed = await downloader.download_to_file(
+                "https://portal.test/big.pdf", dest_dir=tmp_path
+            )
+
+        assert streamed.path.parent == tmp_path
+        assert streamed.size == len(big_pdf)
+        assert streamed.sha256 == hashlib.sha256(big_pdf).hexdigest()
+        assert streamed.read_bytes() == big_pdf
+        streamed.cleanup()
+        assert not streamed.path.exists()
+
+    @pytest.mark.asyncio
+    async def test_download_to_file_uses_fallback_and_leaves_no_partials(self, tmp_path):
+        transport = make_transport(
+            {
+                "/viewer": (200, {"content-type": "text/html"}, b"<html></html>"),
+                "/gone.pdf": (404, {}, b""),
+            }
+        )
+
+        async def fallback(url):
+            return PDF_BYTES
+
+        async with HTTPDownloader(
+            transport=transport, browser_fallback=fallback
+        ) as downloader:
+            streamed = await downloader.download_to_file(
+                "https://portal.test/viewer", dest_dir=tmp_path
+            )
+            with pytest.raises(DownloadError):
+                await downloader.download_to_file(
+                    "https://portal.test/gone.pdf", dest_dir=tmp_path
+                )
+
+        assert streamed.via == "browser"
+        assert streamed.sha256 == hashlib.sha256(PDF_BYTES).hexdigest()
+        assert list(tmp_path.iterdir()) == [streamed.path]
+
+    @pytest.mark.asyncio
+    async def test_conditional_requests_served_from_cache(self, tmp_path):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200,
+                headers={
+                    "content-type": "application/pdf",
+                    "etag": '"v1"',
+                    "last-modified": "Wed, 01 May 2024 00:00:00 GMT",
+                },
+                content=PDF_BYTES,
+            )
+
+        cache = PDFCache(cache_dir=tmp_path / "cache")
+        transport = httpx.MockTransport(handler)
+        async with HTTPDownloader(transport=transport, cache=cache) as downloader:
+            first = await downloader.download("https://portal.test/doc.pdf")
+            second = await downloader.download("https://portal.test/doc.pdf")
+            streamed = await downloader.download_to_file(
+                "https://portal.test/doc.pdf", dest_dir=tmp_path / "tmp"
+            )
+            stats = downloader.get_stats()
+
+        assert first.via == "http"
+        assert second.via == "cache" and second.content == PDF_BYTES
+        assert streamed.via == "cache" and streamed.read_bytes() == PDF_BYTES
+        assert "if-none-match" not in calls[0].headers
+        assert calls[1].headers["if-modified-since"] == "Wed, 01 May 2024 00:00:00 GMT"
+        assert stats["cache_misses"] == 1
+        assert stats["cache_hits"] == 2
+        assert stats["cache_revalidations"] == 2
+
+        # A changed document answers 200 to the same validators: not a revalidation
+        changed = httpx.MockTransport(
+            lambda request: httpx.Response(
+                200, headers={"content-type": "application/pdf"}, content=PDF_BYTES + b"\n"
+            )
+        )
+        async with HTTPDownloader(transport=changed, cache=cache) as downloader:
+            await downloader.download("https://portal.test/doc.pdf")
+            assert downloader.get_stats()["cache_revalidations"] == 0
+
+        # Cleaning up the caller's file must not touch the cached object
+        streamed.cleanup()
+        assert cache.get_by_url("https://portal.test/doc.pdf") is not None
+
+    @pytest.mark.asyncio
+    async def test_streamed_download_is_cached(self, tmp_path):
+        transport = make_transport(
+            {"/doc.pdf": (200, {"content-type": "application/pdf", "etag": '"a"'}, PDF_BYTES)}
+        )
+        cache = PDFCache(cache_dir=tmp_path / "cache")
+        async with HTTPDownloader(transport=transport, cache=cache) as downloader:
+            streamed = await downloader.download_to_file(
+                "https://portal.test/doc.pdf", dest_dir=tmp_path / "tmp"
+            )
+
+        assert streamed.read_bytes() == PDF_BYTES
+        assert cache.get_validators("https://portal.test/doc.pdf")["etag"] == '"a"'
+        streamed.cleanup()
+        assert cache.get_by_hash(streamed.sha256).read_bytes() == PDF_BYTES
+
+
+class TestResumableDownloads:
+    """Test cases for Range-resumed streamed downloads."""
+
+    BODY = b"%PDF-1.7\n" + bytes(range(256)) * 12288  # ~3 MB
+    # Bodies are written in whole chunks, so a drop mid-chunk keeps the
+    # chunks before it
+    CUT = 2 * STREAM_CHUNK_SIZE + 1000
+
+    @pytest.mark.asyncio
+    async def test_dropped_transfer_resumes_with_range(self, tmp_path):
+        calls = []
+        transport = httpx.MockTransport(resumable_handler(self.BODY, calls, cut=self.CUT))
+        async with HTTPDownloader(
+            transport=transport, resumable=True, partial_dir=tmp_path / "partials"
+        ) as downloader:
+            streamed = await downloader.download_to_file(
+                "https://portal.test/big.pdf",
+                dest_dir=tmp_path / "out",
+                expected_sha256=hashlib.sha256(self.BODY).hexdigest(),
+            )
+            stats = downloader.get_stats()
+
+        assert streamed.read_bytes() == self.BODY
+        assert streamed.resumed_from == 2 * STREAM_CHUNK_SIZE
+        assert calls[1].headers["range"] == f"bytes={2 * STREAM_CHUNK_SIZE}-"
+        assert calls[1].headers["if-range"] == '"v1"'
+        assert stats["resumed_downloads"] == 1
+        assert stats["bytes_downloaded"] == len(self.BODY)
+        assert list((tmp_path / "partials").iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_partial_survives_into_next_run(self, tmp_path):
+        """A run that gives up keeps its partial; the next run resumes it."""
+        calls = []
+        transport = httpx.MockTransport(resumable_handler(self.BODY, calls, cut=STREAM_CHUNK_SIZE + 5))
+        partials = tmp_path / "partials"
+        async with HTTPDownloader(
+            transport=transport, resumable=True, partial_dir=partials, max_retries=1
+        ) as downloader:
+            with pytest.raises(DownloadError):
+                await downloader.download_to_file("https://portal.test/big.pdf")
+        assert len(list(partials.glob("*.part"))) == 1
+
+        async with HTTPDownloader(
+            transport=transport, resumable=True, partial_dir=partials
+        ) as downloader:
+            result = await downloader.download("https://portal.test/big.pdf")
+
+        assert result.content == self.BODY
+        assert calls[-1].headers["range"] == f"bytes={STREAM_CHUNK_SIZE}-"
+
+    @pytest.mark.asyncio
+    async def test_server_ignoring_range_restarts_cleanly(self, tmp_path):
+        calls = []
+        transport = httpx.MockTransport(
+            resumable_handler(self.BODY, calls, cut=self.CUT, honour_range=False)
+        )
+        async with HTTPDownloader(
+            transport=transport, resumable=True, partial_dir=tmp_path / "partials"
+        ) as downloader:
+            streamed = await downloader.download_to_file("https://portal.test/big.pdf")
+
+        assert streamed.read_bytes() == self.BODY
+        assert streamed.resumed_from == 0
+        streamed.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_hash_mismatch_is_an_error(self, tmp_path):
+        calls = []
+        transport = httpx.MockTransport(resumable_handler(self.BODY, calls))
+        async with HTTPDownloader(
+            transport=transport, resumable=True, partial_dir=tmp_path / "partials"
+        ) as downloader:
+            with pytest.raises(DownloadError, match="SHA-256 mismatch"):
+                await downloader.download_to_file(
+                    "https://portal.test/big.pdf", expected_sha256="0" * 64
+                )
+
+        assert list((tmp_path / "partials").iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_progress_reaches_pipeline_logger(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            "scrapers.base.http_downloader.PROGRESS_INTERVAL_BYTES", 256 * 1024
+        )
+
+        class RecordingLogger:
+            def __init__(self):
+                self.events = []
+
+            def debug(self, event, **fields):
+                self.events.append(("debug", fields))
+
+            def info(self, event, **fields):
+                self.events.append(("info", fields))
+
+        pipeline_logger = RecordingLogger()
+        transport = httpx.MockTransport(resumable_handler(self.BODY, []))
+        async with HTTPDownloader(
+            transport=transport,
+            progress=log_download_progress(pipeline_logger, state="MN"),
+        ) as downloader:
+            streamed = await downloader.download_to_file("https://portal.test/big.pdf")
+        streamed.cleanup()
+
+        levels = [level for level, _ in pipeline_logger.events]
+        assert levels[-1] == "info" and "debug" in levels
+        final = pipeline_logger.events[-1][1]
+        assert final["percent"] == 100.0
+        assert final["bytes_done"] == len(self.BODY)
+        assert final["state"] == "MN"
@@ -0,0 +1,131 @@
+# ABOUTME: Test suite for the local Bloom filter of stored FDDs
+# ABOUTME: Covers lookups, incremental refresh, persistence and save merging
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from scrapers.base.known_documents import KnownDocumentFilter
+from scrapers.base.watermark import REFRESH_OVERLAP
+
+
+def sha(n):
+    return f"{n:064x}"
+
+
+def fdd_row(n, created_at, filing_number=None):
+    return {
+        "sha256_hash": sha(n),
+        "filing_state": "MN",
+        "filing_number": filing_number,
+        "created_at": created_at,
+    }
+
+
+class TestKnownDocumentFilter:
+    """Test membership answers and sizing."""
+
+    def test_no_false_negatives(self, tmp_path):
+        known = KnownDocumentFilter(tmp_path / "f.bloom", capacity=1000, error_rate=0.01)
+        for n in range(1000):
+            known.add(sha256_hash=sha(n))
+        known.add(filing_state="wi", filing_number=" f-12 ")
+
+        assert all(known.might_contain_hash(sha(n)) for n in range(1000))
+        assert known.might_contain_filing("WI", "F-12")
+        false_positives = sum(known.might_contain_hash(sha(n)) for n in range(1000, 11000))
+        assert false_positives < 300
+        assert known.possible_hashes([sha(1), sha(5000)])[0] == sha(1)
+
+    def test_invalid_sizing_rejected(self):
+        with pytest.raises(ValueError):
+            KnownDocumentFilter(None, capacity=0)
+
+
+class TestRefresh:
+    """Test loading stored FDDs from the database."""
+
+    def test_incremental_refresh_uses_watermark(self, watermark_db, tmp_path):
+        start = datetime(2024, 1, 1)
+        db = watermark_db(
+            "fdds", "created_at", [fdd_row(n, start + timedelta(hours=n), f"F-{n}") for n in range(5)]
+        )
+        known = KnownDocumentFilter(tmp_path / "f.bloom", capacity=100)
+
+        assert known.refresh(db, page_size=2) == 5
+        assert db.queries == [None, None, None]
+        assert known.might_contain_filing("MN", "F-3")
+        assert known.watermark == start + timedelta(hours=4)
+
+        db.rows.append(fdd_row(99, start + timedelta(hours=5)))
+        db.queries.clear()
+        known.refresh(db)
+
+        assert db.queries == [start + timedelta(hours=4) - REFRESH_OVERLAP]
+        assert known.might_contain_hash(sha(99))
+
+    def test_saturated_filter_is_rebuilt_larger(self, watermark_db, tmp_path):
+        db = watermark_db(
+            "fdds", "created_at", [fdd_row(n, datetime(2024, 1, 1)) for n in range(30)]
+        )
+        known = KnownDocumentFilter(tmp_path / "f.bloom", capacity=10)
+        known.refresh(db)
+        assert known.is_saturated
+
+        known.refresh(db)
+
+        assert known.capacity == 20
+        assert db.queries[-1] is None
+        assert all(known.might_contain_hash(sha(n)) for n in range(30))
+
+    def test_rebuild_keeps_answers_until_swapped_in(self, watermark_db, tmp_path):
+        db = watermark_db(
+            "fdds", "created_at", [fdd_row(n, datetime(2024, 1, 1)) for n in range(30)]
+        )
+        known = KnownDocumentFilter(tmp_path / "f.bloom", capacity=10)
+        known.refresh(db)
+        answers = []
+        query = db.query
+
+        def query_during_scan():
+            # Another state flow checking and storing documents mid-scan
+            answers.append(all(known.might_contain_hash(sha(n)) for n in range(30)))
+            known.add(sha256_hash=sha(99))
+            return query()
+
+        db.query = query_during_scan
+        known.refresh(db, page_size=10)
+
+        assert answers == [True] * 4
+        assert known.capacity == 20
+        assert known.might_contain_hash(sha(99))
+
+
+class TestPersistence:
+    """Test saving, reloading and merging with other runs."""
+
+    def test_reload_and_merge_concurrent_saves(self, tmp_path):
+        path = tmp_path / "known" / "f.bloom"
+        first = KnownDocumentFilter(path, capacity=100)
+        second = KnownDocumentFilter(path, capacity=100)
+        first.add(sha256_hash=sha(1))
+        first.watermark = datetime(2024, 1, 2)
+        first.save()
+        second.add(sha256_hash=sha(2))
+        second.watermark = datetime(2024, 1, 1)
+        second.save()
+
+        reloaded = KnownDocumentFilter(path, capacity=100)
+
+        assert reloaded.might_contain_hash(sha(1))
+        assert reloaded.might_contain_hash(sha(2))
+        assert reloaded.watermark == datetime(2024, 1, 2)
+
+    def test_corrupt_file_starts_empty(self, tmp_path):
+        path = tmp_path / "f.bloom"
+        path.write_bytes(b"not a filter")
+
+        known = KnownDocumentFilter(path, capacity=100)
+
+        assert known.count == 0
+        assert known.watermark is None
@@ -0,0 +1,138 @@
+# ABOUTME: Test suite for "Load more" request capture and replay
+# ABOUTME: Uses a fake Playwright request context serving numbered pages
+
+import asyncio
+import json
+
+import pytest
+
+from scrapers.base.load_more_replay import (
+    CapturedRequest,
+    LoadMoreReplayer,
+    PageParameter,
+    build_page_request,
+    extract_html,
+    find_page_parameter,
+)
+from scrapers.base.rate_limiter import AdaptiveRateLimiter
+
+
+@pytest.fixture(autouse=True)
+def fast_limiter(monkeypatch):
+    monkeypatch.setattr(
+        "scrapers.base.load_more_replay.get_rate_limiter",
+        lambda url: AdaptiveRateLimiter("example.com", initial_rate=1000, burst=100),
+    )
+
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self._body = body
+
+    async def text(self):
+        return self._body
+
+
+class FakeRequestContext:
+    """Serves ``total_pages`` pages of three rows keyed by the ``page`` parameter."""
+
+    def __init__(self, total_pages):
+        self.total_pages = total_pages
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch(self, url, method=None, headers=None, data=None, timeout=None):
+        self.requested.append(url)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        page = int(url.rsplit("page=", 1)[1])
+        if page > self.total_pages:
+            return FakeResponse(200, "")
+        return FakeResponse(200, ",".join(f"{page}-{i}" for i in range(3)))
+
+
+def parse_rows(body):
+    return body.split(",") if body else []
+
+
+class TestLoadMoreReplay:
+    """Test cases for the load-more replay helpers."""
+
+    def test_find_page_parameter_in_query(self):
+        """A page counter in the query string advances by one."""
+        request = CapturedRequest("https://example.com/results?q=x&page=1")
+
+        parameter = find_page_parameter(request)
+
+        assert parameter == PageParameter("page", "query", 1, 1)
+        assert build_page_request(request, parameter, 2).url == (
+            "https://example.com/results?q=x&page=3"
+        )
+
+    def test_find_offset_parameter_in_body(self):
+        """An offset in a form body advances by the page size."""
+        request = CapturedRequest(
+            "https://example.com/ajax", method="POST", post_data="view=reg&start=20"
+        )
+
+        parameter = find_page_parameter(request)
+
+        assert parameter == PageParameter("start", "body", 20, 20)
+        assert build_page_request(request, parameter, 1).post_data == "view=reg&start=40"
+
+    def test_find_page_parameter_none(self):
+        """Requests without a recognisable counter cannot be replayed."""
+        assert find_page_parameter(CapturedRequest("https://example.com/more?id=abc")) is None
+
+    def test_extract_html_from_ajax_commands(self):
+        """HTML is pulled out of JSON command lists; plain HTML passes through."""
+        body = json.dumps([
+            {"command": "settings", "settings": {}},
+            {"command": "insert", "data": "<tr><td>a</td></tr>"},
+        ])
+
+        assert extract_html(body) == "<tr><td>a</td></tr>"
+        assert extract_html("<tr><td>b</td></tr>") == "<tr><td>b</td></tr>"
+
+    @pytest.mark.asyncio
+    async def test_replayer_pages_concurrently_in_order(self):
+        """Pages are fetched in parallel, yielded in order, and stop at the end."""
+        context = FakeRequestContext(total_pages=5)
+        replayer = LoadMoreReplayer(
+            context,
+            CapturedRequest("https://example.com/results?page=1"),
+            PageParameter("page", "query", 1, 1),
+            parse_rows,
+            concurrency=3,
+        )
+
+        pages = [rows async for rows in replayer.pages()]
+
+        assert [rows[0] for rows in pages] == ["1-0", "2-0", "3-0", "4-0", "5-0"]
+        assert replayer.stats["rows"] == 15
+        assert context.max_in_flight == 3
+        # Look-ahead past the last page is bounded by the window
+        assert len(context.requested) <= 5 + 3
+
+    @pytest.mark.asyncio
+    async def test_replayer_stops_on_repeated_page(self):
+        """A server that clamps to its last page does not loop forever."""
+
+        class ClampingContext(FakeRequestContext):
+            async def fetch(self, url, **kwargs):
+                return FakeResponse(200, "last-0,last-1")
+
+        replayer = LoadMoreReplayer(
+            ClampingContext(total_pages=0),
+            CapturedRequest("https://example.com/results?page=1"),
+            PageParameter("page", "query", 1, 1),
+            parse_rows,
+        )
+
+        pages = [rows async for rows in replayer.pages()]
+
+        assert pages == [["last-0", "last-1"]]
@@ -0,0 +1,74 @@
+# ABOUTME: Test suite for the blocking index behind franchisor similarity lookups
+# ABOUTME: Checks candidates against a full scan and index maintenance
+
+from scrapers.base.name_index import NameBlockingIndex
+from scrapers.base.similarity import SimilarityCalculator
+from tests.scrapers.base.franchisor_corpus import corpus, franchisor
+
+
+def full_scan(calc, name, franchisors, threshold):
+    return {
+        f["id"]
+        for f in franchisors
+        if max(calc.calculate_similarity(name, n) for n in calc._franchisor_names(f) if n) >= threshold
+    }
+
+
+class TestNameBlockingIndex:
+    """Test candidate generation and incremental updates."""
+
+    def test_candidates_cover_full_scan(self):
+        calc = SimilarityCalculator()
+        franchisors = corpus(size=400, seed=3)
+        calc.build_index(franchisors)
+        queries = ["Pizza Grill", "Burgr Express", "Smart Kids Learning Center",
+                   "Kids", "pet", "Home Care Services Inc", "Cofee Hair"]
+
+        for threshold in (0.6, 0.85):
+            for query in queries:
+                found = {r["id"] for r in calc.find_similar_franchisors(query, threshold, limit=1000)}
+                assert found == full_scan(calc, query, franchisors, threshold), query
+
+    def test_typo_substring_and_word_matches(self):
+        index = NameBlockingIndex(SimilarityCalculator().normalize_name)
+        index.add(1, ["Anytime Fitness LLC"])
+        index.add(2, ["Fit"])
+        index.add(3, ["Super Cuts Hair Salon"])
+        index.add(4, ["Kumon"])
+        index.add(5, ["Care"])
+
+        assert 1 in index.candidates("Anytime Fitnes", 0.85)["anytime fitness"]
+        assert "fit" in index.candidates("Anytime Fitness", 0.85)
+        assert "super cuts hair salon" in index.candidates("Cuts Hair", 0.4)
+        assert "kumon" in index.candidates("Kumn", 0.8)
+        assert "care" in index.candidates("Cre", 0.85)
+        assert "kumon" not in index.candidates("Super Cuts", 0.85)
+
+    def test_add_remove_and_shared_names(self):
+        index = NameBlockingIndex(str.lower)
+        index.add(1, ["Acme", None, "Acme Tools"])
+        index.add(2, ["acme"])
+
+        assert index.ids_of("acme") == {1, 2}
+        index.remove(1)
+        assert 1 not in index
+        assert index.ids_of("acme") == {2}
+        assert "acme tools" not in index.candidates("acme tools", 0.85)
+
+        index.add(1, ["Acme Tools"])
+        assert index.candidates("acme tools", 0.85)["acme tools"] == {1}
+        assert len(index) == 2
+
+
+class TestSimilarityLookups:
+    """Test SimilarityCalculator lookups through the index."""
+
+    def test_index_franchisor_updates_names(self):
+        calc = SimilarityCalculator()
+        calc.build_index([franchisor(1, "Mathnasium LLC")])
+
+        calc.index_franchisor(franchisor(1, "Mathnasium LLC", dba_names=["Math Learning Center"]))
+        calc.index_franchisor(franchisor(2, "Code Ninjas"))
+
+        assert [r["id"] for r in calc.find_similar_franchisors("Math Learning Centre")] == [1]
+        assert calc.find_similar_franchisors("Code Ninjas")[0]["match_type"] == "exact"
@@ -0,0 +1,146 @@
+# ABOUTME: Test suite for the PDF cache
+# ABOUTME: Covers byte and file-based inserts plus hash/URL lookups
+
+import hashlib
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from scrapers.base.pdf_cache import PDFCache
+
+PDF_BYTES = b"%PDF-1.4\n" + b"z" * 2048
+
+
+def add_from_process(cache_dir, url):
+    cache = PDFCache(cache_dir=cache_dir)
+    path, _ = cache.add(PDF_BYTES, url, "shared.pdf")
+    return str(path)
+
+
+class TestPDFCache:
+    """Test suite for PDFCache."""
+
+    def test_add_and_lookup(self, tmp_path):
+        cache = PDFCache(cache_dir=tmp_path / "cache")
+        path, hash_value = cache.add(PDF_BYTES, "https://portal.test/a.pdf", "a.pdf")
+
+        assert path.read_bytes() == PDF_BYTES
+        assert cache.get_by_url("https://portal.test/a.pdf") == path
+        assert cache.get_by_hash(hash_value) == path
+
+    def test_add_file_moves_without_copy(self, tmp_path):
+        cache = PDFCache(cache_dir=tmp_path / "cache")
+        source = tmp_path / "download.pdf.part"
+        source.write_bytes(PDF_BYTES)
+        expected_hash = hashlib.sha256(PDF_BYTES).hexdigest()
+
+        path, hash_value = cache.add_file(
+            source, "https://portal.test/a.pdf", "a.pdf", hash_value=expected_hash
+        )
+
+        assert hash_value == expected_hash
+        assert not source.exists()
+        assert path.read_bytes() == PDF_BYTES
+        assert cache.get_stats()["total_entries"] == 1
+
+    def test_add_file_duplicate_consumes_source(self, tmp_path):
+        cache = PDFCache(cache_dir=tmp_path / "cache")
+        first, _ = cache.add(PDF_BYTES, "https://portal.test/a.pdf", "a.pdf")
+        source = tmp_path / "again.pdf.part"
+        source.write_bytes(PDF_BYTES)
+
+        path, _ = cache.add_file(source, "https://portal.test/b.pdf", "b.pdf")
+
+        assert path == first
+        assert not source.exists()
+
+    def test_running_total_and_lru_eviction(self, tmp_path):
+        # Room for two 2 KB documents
+        cache = PDFCache(cache_dir=tmp_path / "cache", max_size_gb=5000 / 1024 ** 3)
+        first, first_hash = cache.add(PDF_BYTES + b"1", "https://portal.test/1.pdf", "1.pdf")
+        cache.add(PDF_BYTES + b"2", "https://portal.test/2.pdf", "2.pdf")
+
+        # Touch the first entry so the second becomes least recently used
+        assert cache.get_by_hash(first_hash) == first
+        cache.add(PDF_BYTES + b"3", "https://portal.test/3.pdf", "3.pdf")
+
+        assert cache.get_by_url("https://portal.test/1.pdf") == first
+        assert cache.get_by_url("https://portal.test/2.pdf") is None
+        assert cache.get_stats()["total_entries"] == 2
+        assert cache._total_size() == 2 * (len(PDF_BYTES) + 1)
+
+    def test_index_shared_between_instances(self, tmp_path):
+        writer = PDFCache(cache_dir=tmp_path / "cache")
+        reader = PDFCache(cache_dir=tmp_path / "cache")
+        path, hash_value = writer.add(PDF_BYTES, "https://portal.test/a.pdf", "a.pdf")
+
+        assert reader.get_by_hash(hash_value) == path
+
+    def test_migrates_legacy_json_index(self, tmp_path):
+        cache_dir = tmp_path / "cache"
+        cache_dir.mkdir()
+        hash_value = hashlib.sha256(PDF_BYTES).hexdigest()
+        pdf_path = cache_dir / f"{hash_value[:8]}_a.pdf"
+        pdf_path.write_bytes(PDF_BYTES)
+        (cache_dir / "index.json").write_text(json.dumps({
+            "hashes": {hash_value: {
+                "path": str(pdf_path),
+                "url": "https://portal.test/a.pdf",
+                "timestamp": datetime.now().isoformat(),
+                "filename": "a.pdf",
+                "size": len(PDF_BYTES),
+            }},
+            "urls": {"https://portal.test/a.pdf": hash_value},
+        }))
+
+        cache = PDFCache(cache_dir=cache_dir)
+
+        assert cache.get_by_url("https://portal.test/a.pdf") == pdf_path
+        assert not (cache_dir / "index.json").exists()
+
+    def test_content_addressed_sharded_layout(self, tmp_path):
+        cache = PDFCache(cache_dir=tmp_path / "cache")
+        path, hash_value = cache.add(PDF_BYTES, "https://mn.test/a.pdf", "a.pdf")
+
+        assert path == (
+            tmp_path / "cache" / "objects" / hash_value[:2] / hash_value[2:4]
+            / f"{hash_value}.pdf"
+        )
+        assert not list((tmp_path / "cache" / "tmp").iterdir())
+
+    def test_same_document_from_two_states_stored_once(self, tmp_path):
+        cache = PDFCache(cache_dir=tmp_path / "cache")
+        mn_path, _ = cache.add(PDF_BYTES, "https://mn.test/a.pdf", "mn.pdf")
+        wi_path, _ = cache.add(PDF_BYTES, "https://wi.test/b.pdf", "wi.pdf")
+
+        assert mn_path == wi_path
+        assert cache.get_by_url("https://wi.test/b.pdf") == mn_path
+        stats = cache.get_stats()
+        assert stats["total_entries"] == 1
+        assert stats["unique_urls"] == 2
+
+    def test_link_exposes_readable_name(self, tmp_path):
+        cache = PDFCache(cache_dir=tmp_path / "cache")
+        path, hash_value = cache.add(PDF_BYTES, "https://mn.test/a.pdf", "a.pdf")
+
+        linked = cache.link(hash_value, tmp_path / "export" / "Alpha_2024.pdf")
+
+        assert linked.read_bytes() == PDF_BYTES
+        assert linked.stat().st_ino == path.stat().st_ino
+
+    def test_concurrent_processes_write_once(self, tmp_path):
+        cache_dir = tmp_path / "cache"
+        PDFCache(cache_dir=cache_dir)
+        urls = [f"https://portal.test/{i}.pdf" for i in range(8)]
+
+        # Spawn rather than fork: workers are independent processes in production
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=4, mp_context=context) as pool:
+            paths = list(pool.map(add_from_process, [cache_dir] * len(urls), urls))
+
+        assert len(set(paths)) == 1
+        assert len(list((cache_dir / "objects").rglob("*.pdf"))) == 1
+        stats = PDFCache(cache_dir=cache_dir).get_stats()
+        assert stats["total_entries"] == 1
+        assert stats["unique_urls"] == 8
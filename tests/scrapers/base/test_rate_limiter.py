@@ -0,0 +1,131 @@
+# ABOUTME: Test suite for the adaptive per-host rate limiter
+# ABOUTME: Covers token-bucket pacing, AIMD adaptation and the SQLite backend
+
+import time
+
+import httpx
+import pytest
+
+from scrapers.base.http_downloader import HTTPDownloader
+from scrapers.base.rate_limiter import (
+    AdaptiveRateLimiter,
+    MemoryRateBackend,
+    SQLiteRateBackend,
+    parse_retry_after,
+)
+import scrapers.base.rate_limiter as rate_limiter_module
+
+
+class TestAdaptiveRateLimiter:
+    """Test cases for AdaptiveRateLimiter."""
+
+    @pytest.mark.asyncio
+    async def test_burst_then_paced(self):
+        """Requests beyond the burst wait for tokens at the current rate."""
+        limiter = AdaptiveRateLimiter("example.com", initial_rate=20.0, burst=2.0)
+
+        start = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire()
+        elapsed = time.monotonic() - start
+
+        # Two burst tokens, then two more at 20/s
+        assert 0.08 <= elapsed < 0.5
+        assert limiter.get_stats()["acquired"] == 4
+
+    def test_additive_increase_on_success(self):
+        """Healthy responses raise the rate additively up to the maximum."""
+        limiter = AdaptiveRateLimiter(
+            "example.com", initial_rate=1.0, max_rate=1.2, additive_increase=0.1
+        )
+
+        for _ in range(5):
+            limiter.record(200, 0.1)
+
+        assert limiter.current_rate == pytest.approx(1.2)
+
+    def test_multiplicative_decrease_on_throttle(self):
+        """429/5xx halve the rate, once per cooldown window."""
+        limiter = AdaptiveRateLimiter(
+            "example.com", initial_rate=4.0, decrease_factor=0.5, decrease_cooldown=60
+        )
+
+        limiter.record(429, 0.1)
+        limiter.record(503, 0.1)  # inside cooldown, ignored
+
+        assert limiter.current_rate == pytest.approx(2.0)
+        stats = limiter.get_stats()
+        assert stats["decreases"] == 1
+        assert stats["throttled_responses"] == 2
+
+    def test_slow_response_decreases_and_floor_holds(self):
+        """Slow responses count as congestion; the rate never drops below min."""
+        limiter = AdaptiveRateLimiter(
+            "example.com",
+            initial_rate=0.3,
+            min_rate=0.2,
+            slow_response_seconds=5.0,
+            decrease_cooldown=0,
+        )
+
+        limiter.record(200, 12.0)
+        limiter.record(200, 12.0)
+
+        assert limiter.current_rate == pytest.approx(0.2)
+
+    @pytest.mark.asyncio
+    async def test_retry_after_blocks_acquire(self):
+        """A Retry-After pauses the host for every caller."""
+        backend = MemoryRateBackend()
+        first = AdaptiveRateLimiter("example.com", initial_rate=50.0, backend=backend)
+        second = AdaptiveRateLimiter("example.com", initial_rate=50.0, backend=backend)
+
+        first.record(429, 0.1, retry_after=0.2)
+        start = time.monotonic()
+        await second.acquire()
+
+        assert time.monotonic() - start >= 0.15
+
+    def test_sqlite_backend_shares_state(self, tmp_path):
+        """Limiters on separate connections to one database share the bucket."""
+        db_path = tmp_path / "rates.db"
+        first = AdaptiveRateLimiter(
+            "example.com", initial_rate=2.0, backend=SQLiteRateBackend(db_path)
+        )
+        second = AdaptiveRateLimiter(
+            "example.com", initial_rate=2.0, backend=SQLiteRateBackend(db_path)
+        )
+
+        first.record(500, 0.1)
+
+        assert second.current_rate == pytest.approx(1.0)
+
+    def test_parse_retry_after(self):
+        """Only delta-seconds Retry-After values are honoured."""
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+
+    @pytest.mark.asyncio
+    async def test_downloader_feeds_limiter(self, monkeypatch):
+        """A rate-limited downloader reports throttling to the host limiter."""
+        monkeypatch.setattr(rate_limiter_module, "_limiters", {})
+        monkeypatch.setattr(rate_limiter_module, "_default_backend", MemoryRateBackend())
+        responses = iter([
+            httpx.Response(429, headers={"retry-after": "0"}),
+            httpx.Response(200, content=b"%PDF-1.4 body",
+                           headers={"content-type": "application/pdf"}),
+        ])
+        transport = httpx.MockTransport(lambda request: next(responses))
+        monkeypatch.setattr(
+            "scrapers.base.http_downloader.calculate_retry_delay", lambda attempt: 0
+        )
+
+        async with HTTPDownloader(transport=transport, rate_limited=True) as downloader:
+            result = await downloader.download("https://docs.example.com/a.pdf")
+
+        assert result.content.startswith(b"%PDF")
+        stats = rate_limiter_module.get_rate_limiter("docs.example.com").get_stats()
+        assert stats["acquired"] == 2
+        assert stats["decreases"] == 1
+        assert stats["increases"] == 1
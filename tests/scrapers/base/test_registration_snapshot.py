@@ -0,0 +1,123 @@
+# ABOUTME: Test suite for incremental-scrape registration snapshots
+# ABOUTME: Covers diffing, pending rows and removal of filings dropped by the portal
+
+import pandas as pd
+
+from scrapers.base.registration_snapshot import RegistrationSnapshot, compute_row_hash
+
+
+def make_rows():
+    return [
+        {"filing_number": "F-1", "franchise_name": "Alpha", "filing_date": "2024-01-01"},
+        {"filing_number": "F-2", "franchise_name": "Beta", "filing_date": "2024-02-01"},
+    ]
+
+
+class TestRegistrationSnapshot:
+    """Test suite for RegistrationSnapshot."""
+
+    def test_row_hash_ignores_whitespace_and_key_order(self):
+        a = {"filing_number": "F-1", "franchise_name": "Alpha  Inc"}
+        b = {"franchise_name": " Alpha Inc ", "filing_number": "F-1"}
+        assert compute_row_hash(a) == compute_row_hash(b)
+
+    def test_first_run_everything_is_new(self, tmp_path):
+        snapshot = RegistrationSnapshot("mn", db_path=tmp_path / "snap.db")
+        diff = snapshot.diff(make_rows())
+
+        assert [e.key for e in diff.new] == ["F-1", "F-2"]
+        assert not diff.changed and not diff.unchanged and not diff.removed
+
+    def test_stored_rows_are_unchanged_and_edits_are_changed(self, tmp_path):
+        snapshot = RegistrationSnapshot("MN", db_path=tmp_path / "snap.db")
+        diff = snapshot.diff(make_rows())
+        snapshot.record(diff)
+        snapshot.mark_stored_many((e.key, e.row_hash) for e in diff.to_enqueue)
+
+        rows = make_rows()
+        rows[1]["filing_date"] = "2025-02-01"
+        rows.append({"filing_number": "F-3", "franchise_name": "Gamma", "filing_date": ""})
+        diff = snapshot.diff(rows)
+
+        assert [e.key for e in diff.unchanged] == ["F-1"]
+        assert [e.key for e in diff.changed] == ["F-2"]
+        assert [e.key for e in diff.new] == ["F-3"]
+        assert [e.key for e in diff.to_enqueue] == ["F-2", "F-3"]
+
+    def test_unconfirmed_rows_are_enqueued_again(self, tmp_path):
+        snapshot = RegistrationSnapshot("MN", db_path=tmp_path / "snap.db")
+        snapshot.record(snapshot.diff(make_rows()))
+
+        diff = snapshot.diff(make_rows())
+        assert len(diff.to_enqueue) == 2
+        assert snapshot.get_stats()["pending_rows"] == 2
+
+    def test_removed_filings(self, tmp_path):
+        snapshot = RegistrationSnapshot("WI", db_path=tmp_path / "snap.db")
+        diff = snapshot.diff(make_rows())
+        snapshot.record(diff)
+        snapshot.mark_stored_many((e.key, e.row_hash) for e in diff.to_enqueue)
+
+        diff = snapshot.diff(make_rows()[:1])
+        assert [filing for filing, _ in diff.removed] == ["F-2"]
+        snapshot.record(diff)
+        assert snapshot.get_stats()["stored_rows"] == 1
+
+    def test_new_document_keeps_stored_siblings(self, tmp_path):
+        snapshot = RegistrationSnapshot("MN", db_path=tmp_path / "snap.db")
+        rows = [
+            {"filing_number": "F-1", "franchise_name": "Alpha", "year": "2023"},
+            {"filing_number": "F-1", "franchise_name": "Alpha", "year": "2024"},
+        ]
+        diff = snapshot.diff(rows)
+        snapshot.record(diff)
+        snapshot.mark_stored_many((e.key, e.row_hash) for e in diff.to_enqueue)
+
+        rows.append({"filing_number": "F-1", "franchise_name": "Alpha", "year": "2025"})
+        for _ in range(2):
+            diff = snapshot.diff(rows)
+            snapshot.record(diff)
+            snapshot.mark_stored_many((e.key, e.row_hash) for e in diff.to_enqueue)
+
+        # The filing settles: siblings are never re-enqueued or dropped
+        assert [e.position for e in diff.unchanged] == [0, 1, 2]
+        assert not diff.to_enqueue and not diff.removed
+        assert snapshot.get_stats()["stored_rows"] == 3
+
+    def test_document_dropped_from_filing_is_removed_per_row(self, tmp_path):
+        snapshot = RegistrationSnapshot("MN", db_path=tmp_path / "snap.db")
+        rows = [
+            {"filing_number": "F-1", "year": "2023"},
+            {"filing_number": "F-1", "year": "2024"},
+        ]
+        diff = snapshot.diff(rows)
+        snapshot.record(diff)
+        snapshot.mark_stored_many((e.key, e.row_hash) for e in diff.to_enqueue)
+
+        diff = snapshot.diff(rows[1:])
+        assert diff.removed == [("F-1", compute_row_hash(rows[0]))]
+        assert [e.position for e in diff.unchanged] == [0]
+        snapshot.record(diff)
+        assert snapshot.get_stats()["stored_rows"] == 1
+
+    def test_sources_are_isolated(self, tmp_path):
+        db_path = tmp_path / "snap.db"
+        mn = RegistrationSnapshot("MN", db_path=db_path)
+        diff = mn.diff(make_rows())
+        mn.record(diff)
+        mn.mark_stored_many((e.key, e.row_hash) for e in diff.to_enqueue)
+
+        wi = RegistrationSnapshot("WI", db_path=db_path)
+        assert len(wi.diff(make_rows()).new) == 2
+
+    def test_diff_dataframe(self, tmp_path):
+        snapshot = RegistrationSnapshot("MN", db_path=tmp_path / "snap.db")
+        df = pd.DataFrame(
+            {"File Number": ["1", "2"], "Franchisor": ["Alpha", "Beta"], "Year": [2024, None]}
+        )
+        diff = snapshot.diff_dataframe(df, key_column="File Number")
+        snapshot.record(diff)
+        snapshot.mark_stored_many((e.key, e.row_hash) for e in diff.new[:1])
+
+        diff = snapshot.diff_dataframe(df, key_column="File Number")
+        assert [e.position for e in diff.to_enqueue] == [1]
@@ -0,0 +1,160 @@
+# ABOUTME: Test suite for the offline record/replay harness
+# ABOUTME: Records through httpx.MockTransport and replays from a local stand-in server
+
+import gzip
+
+import httpx
+import pytest
+
+from scrapers.base.http_downloader import HTTPDownloader
+from scrapers.base.replay_harness import (
+    MISS_HEADER,
+    MODE_REPLAY,
+    FixtureArchive,
+    RecordingTransport,
+    ReplayHarness,
+    ReplayServer,
+    ReplayTransport,
+    fixture_key,
+    get_replay_harness,
+    use_replay_harness,
+)
+
+PDF_BYTES = b"%PDF-1.4\n" + b"x" * 2048
+PAGE = b"<html><table id='results'><tr><td>Acme</td></tr></table></html>"
+
+
+def portal_transport(calls):
+    """Mock portal: a gzipped results page, a PDF and a form post."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if request.url.path == "/results":
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/html", "content-encoding": "gzip"},
+                content=gzip.compress(PAGE),
+            )
+        if request.url.path == "/doc.pdf":
+            if request.headers.get("range"):
+                return httpx.Response(206, headers={"content-type": "application/pdf"},
+                                      content=PDF_BYTES[10:])
+            return httpx.Response(200, headers={"content-type": "application/pdf"}, content=PDF_BYTES)
+        if request.method == "POST":
+            return httpx.Response(200, headers={"content-type": "text/html"},
+                                  content=b"results for " + request.content)
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+async def record(archive, requests):
+    calls = []
+    transport = RecordingTransport(archive, portal_transport(calls))
+    async with httpx.AsyncClient(transport=transport) as client:
+        responses = [await client.request(method, url, **kwargs) for method, url, kwargs in requests]
+    return responses
+
+
+class TestFixtureArchive:
+    """Test fixture storage and lookup."""
+
+    def test_key_ignores_cache_busters_and_query_order(self):
+        assert fixture_key("get", "https://p.test/a?b=2&a=1&_=123#top") == fixture_key(
+            "GET", "https://p.test/a?a=1&b=2"
+        )
+        assert fixture_key("POST", "https://p.test/a", b"name=x") != fixture_key(
+            "POST", "https://p.test/a", b"name=y"
+        )
+
+    def test_put_get_and_reload(self, tmp_path):
+        archive = FixtureArchive(tmp_path)
+        archive.put("GET", "https://p.test/doc.pdf", 200,
+                    [("Content-Type", "application/pdf"), ("Content-Length", "9")], PDF_BYTES)
+
+        reloaded = FixtureArchive(tmp_path)
+        fixture = reloaded.get("GET", "https://p.test/doc.pdf")
+
+        assert fixture.kind == "document"
+        assert ("Content-Length", "9") not in fixture.headers
+        assert reloaded.read_body(fixture) == PDF_BYTES
+        assert reloaded.get("GET", "https://p.test/other") is None
+
+
+class TestRecording:
+    """Test the recording transport."""
+
+    @pytest.mark.asyncio
+    async def test_records_decoded_bodies_and_form_posts(self, tmp_path):
+        archive = FixtureArchive(tmp_path)
+        responses = await record(archive, [
+            ("GET", "https://p.test/results", {}),
+            ("POST", "https://p.test/search", {"content": b"name=acme"}),
+        ])
+
+        assert responses[0].content == PAGE
+        page = archive.get("GET", "https://p.test/results")
+        assert archive.read_body(page) == PAGE
+        assert all(name.lower() != "content-encoding" for name, _ in page.headers)
+        post = archive.get("POST", "https://p.test/search", b"name=acme")
+        assert archive.read_body(post) == b"results for name=acme"
+        assert archive.get_stats()["recorded"] == {"page": 2}
+
+    @pytest.mark.asyncio
+    async def test_partial_responses_are_not_recorded(self, tmp_path):
+        archive = FixtureArchive(tmp_path)
+        await record(archive, [("GET", "https://p.test/doc.pdf", {"headers": {"range": "bytes=10-"}})])
+
+        assert len(archive) == 0
+
+
+class TestReplay:
+    """Test serving fixtures from the local stand-in."""
+
+    @pytest.mark.asyncio
+    async def test_replays_through_stand_in_server(self, tmp_path):
+        archive = FixtureArchive(tmp_path)
+        await record(archive, [
+            ("GET", "https://p.test/results", {}),
+            ("POST", "https://p.test/search", {"content": b"name=acme"}),
+        ])
+        server = ReplayServer(archive)
+        server.start()
+        try:
+            async with httpx.AsyncClient(transport=ReplayTransport(server)) as client:
+                page = await client.get("https://p.test/results?_=999")
+                post = await client.post("https://p.test/search", content=b"name=acme")
+                missing = await client.get("https://p.test/nope")
+        finally:
+            server.stop()
+
+        assert page.status_code == 200
+        assert page.content == PAGE
+        assert str(page.url) == "https://p.test/results?_=999"
+        assert post.content == b"results for name=acme"
+        assert missing.status_code == 404
+        assert missing.headers[MISS_HEADER] == "1"
+        stats = server.get_stats()
+        assert stats["pages"] == 2
+        assert stats["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_downloader_uses_active_harness(self, tmp_path):
+        archive = FixtureArchive(tmp_path)
+        await record(archive, [("GET", "https://p.test/doc.pdf", {})])
+        harness = ReplayHarness(MODE_REPLAY, tmp_path)
+
+        with use_replay_harness(harness):
+            assert get_replay_harness() is harness
+            async with HTTPDownloader() as downloader:
+                result = await downloader.download("https://p.test/doc.pdf")
+            stats = harness.get_stats()
+
+        assert result.success
+        assert result.content == PDF_BYTES
+        assert stats["documents"] == 1
+        assert get_replay_harness() is None
+
+    def test_unknown_mode_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            ReplayHarness("live", tmp_path)
@@ -0,0 +1,85 @@
+# ABOUTME: Test suite for request-interception blocking profiles
+# ABOUTME: Drives the route handler with fake Playwright route objects
+
+import pytest
+
+from scrapers.base.resource_blocking import (
+    LIGHT_PROFILE,
+    TABLE_SCRAPING_PROFILE,
+    apply_blocking_profile,
+    get_profile,
+)
+
+
+class FakeRequest:
+    def __init__(self, resource_type, url):
+        self.resource_type = resource_type
+        self.url = url
+
+
+class FakeRoute:
+    def __init__(self, resource_type, url):
+        self.request = FakeRequest(resource_type, url)
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+    async def fallback(self):
+        self.outcome = "continued"
+
+
+class FakeTarget:
+    def __init__(self):
+        self.handler = None
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+
+class TestResourceBlocking:
+    """Test suite for blocking profiles."""
+
+    def test_table_scraping_profile(self):
+        profile = TABLE_SCRAPING_PROFILE
+        assert profile.should_block("image", "https://portal.test/logo.png")
+        assert profile.should_block("stylesheet", "https://portal.test/site.css")
+        assert profile.should_block("script", "https://www.googletagmanager.com/gtm.js")
+        assert not profile.should_block("document", "https://portal.test/search")
+        assert not profile.should_block("xhr", "https://portal.test/api/results")
+        assert not profile.should_block("script", "https://portal.test/app.js")
+
+    def test_light_profile_keeps_stylesheets(self):
+        assert not LIGHT_PROFILE.should_block("stylesheet", "https://portal.test/site.css")
+        assert LIGHT_PROFILE.should_block("font", "https://portal.test/font.woff2")
+
+    def test_get_profile(self):
+        assert get_profile("table_scraping") is TABLE_SCRAPING_PROFILE
+        assert get_profile("none") is None
+        assert get_profile(None) is None
+        with pytest.raises(ValueError):
+            get_profile("bogus")
+
+    @pytest.mark.asyncio
+    async def test_route_handler_aborts_and_counts(self):
+        target = FakeTarget()
+        stats = await apply_blocking_profile(target, TABLE_SCRAPING_PROFILE)
+
+        image = FakeRoute("image", "https://portal.test/a.png")
+        page = FakeRoute("document", "https://portal.test/")
+        await target.handler(image)
+        await target.handler(page)
+
+        assert image.outcome == "aborted"
+        assert page.outcome == "continued"
+        assert stats.to_dict() == {
+            "blocked": 1,
+            "blocked_by_type": {"image": 1},
+            "allowed": 1,
+        }
+
+    @pytest.mark.asyncio
+    async def test_no_profile_installs_nothing(self):
+        target = FakeTarget()
+        assert await apply_blocking_profile(target, None) is None
+        assert target.handler is None
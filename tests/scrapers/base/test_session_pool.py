@@ -0,0 +1,228 @@
+# ABOUTME: Test suite for the elastic browser SessionPool
+# ABOUTME: Uses fake browser/context objects so no real browser is launched
+
+import asyncio
+
+import pytest
+
+from scrapers.base.session_pool import SessionPool
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+
+    async def close(self):
+        self.context.pages.remove(self)
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self.closed = False
+        self.crashed = False
+        self.origins = []
+        self.routes = []
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+
+    async def cookies(self):
+        if self.crashed:
+            raise RuntimeError("Target closed")
+        return []
+
+    async def clear_cookies(self):
+        pass
+
+    async def storage_state(self):
+        return {"cookies": [], "origins": list(self.origins)}
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeSessionPool(SessionPool):
+    """SessionPool that launches fake browsers."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.browsers = []
+
+    async def _launch_browser(self):
+        browser = FakeBrowser()
+        self.browsers.append(browser)
+        return browser
+
+
+class TestSessionPool:
+    """Test suite for SessionPool."""
+
+    @pytest.mark.asyncio
+    async def test_grows_on_demand_up_to_max(self):
+        pool = FakeSessionPool(min_sessions=1, max_sessions=3)
+        await pool.initialize()
+        assert pool.get_stats()["total_sessions"] == 1
+
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with pool.acquire_session():
+                peak = max(peak, pool.get_stats()["in_use_sessions"])
+                await asyncio.sleep(0.02)
+
+        await asyncio.gather(*(work() for _ in range(6)))
+
+        stats = pool.get_stats()
+        assert peak == 3
+        assert stats["total_sessions"] == 3
+        assert stats["acquisitions"] == 6
+        assert stats["max_wait_seconds"] > 0
+        assert 0 < stats["average_utilization"] <= 1
+        await pool.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_recycles_after_max_uses(self):
+        pool = FakeSessionPool(min_sessions=1, max_sessions=1, max_uses=2)
+        contexts = []
+        for _ in range(3):
+            async with pool.acquire_session() as context:
+                contexts.append(context)
+
+        assert contexts[0] is contexts[1]
+        assert contexts[2] is not contexts[0]
+        assert contexts[0].closed
+        assert pool.get_stats()["recycled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_replaces_context_with_site_storage_and_closes_pages(self):
+        pool = FakeSessionPool(min_sessions=1, max_sessions=1)
+        async with pool.acquire_session() as context:
+            await context.new_page()
+            context.origins.append({"origin": "https://portal.test", "localStorage": []})
+        assert context.closed and not context.pages
+
+        async with pool.acquire_session() as fresh:
+            await fresh.new_page()
+        assert fresh is not context
+        assert not fresh.closed and not fresh.pages
+
+    @pytest.mark.asyncio
+    async def test_expired_idle_context_not_handed_out(self):
+        pool = FakeSessionPool(min_sessions=1, max_sessions=1, max_age_seconds=60)
+        await pool.initialize()
+        stale = pool._idle[0]
+        stale.created_at -= 61
+
+        async with pool.acquire_session() as context:
+            assert context is not stale.context
+        assert stale.context.closed
+        assert pool.get_stats()["recycled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_recycled_contexts_replenished_to_min(self):
+        pool = FakeSessionPool(min_sessions=2, max_sessions=2, max_uses=1)
+        await pool.initialize()
+
+        async with pool.acquire_session():
+            pass
+
+        stats = pool.get_stats()
+        assert stats["recycled"] == 1
+        assert stats["total_sessions"] == stats["available_sessions"] == 2
+
+    @pytest.mark.asyncio
+    async def test_idle_contexts_above_min_are_closed(self):
+        pool = FakeSessionPool(min_sessions=1, max_sessions=3, idle_timeout_seconds=60)
+
+        async def work():
+            async with pool.acquire_session():
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(3)))
+        assert pool.get_stats()["total_sessions"] == 3
+        for session in pool._idle:
+            session.idle_since -= 61
+
+        async with pool.acquire_session():
+            pass
+
+        stats = pool.get_stats()
+        assert stats["trimmed"] == 2
+        assert stats["total_sessions"] == 1
+        assert sum(context.closed for context in pool.browsers[0].contexts) == 2
+
+    @pytest.mark.asyncio
+    async def test_unhealthy_context_replaced(self):
+        pool = FakeSessionPool(min_sessions=1, max_sessions=1)
+        await pool.initialize()
+        pool._idle[0].context.crashed = True
+
+        async with pool.acquire_session() as context:
+            assert not context.crashed
+        assert pool.get_stats()["unhealthy"] == 1
+
+    @pytest.mark.asyncio
+    async def test_browser_relaunched_after_crash(self):
+        pool = FakeSessionPool(min_sessions=1, max_sessions=2)
+        await pool.initialize()
+        pool.browsers[0].connected = False
+
+        async with pool.acquire_session() as context:
+            assert context in pool.browsers[1].contexts
+        stats = pool.get_stats()
+        assert stats["browser_restarts"] == 1
+        assert stats["total_sessions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_per_host_cap(self):
+        pool = FakeSessionPool(
+            min_sessions=0, max_sessions=4, per_host_limits={"slow.portal.test": 1}
+        )
+        active = 0
+        peak = 0
+
+        async def work():
+            nonlocal active, peak
+            async with pool.acquire_session(host="slow.portal.test"):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(work() for _ in range(4)))
+        assert peak == 1
+
+    @pytest.mark.asyncio
+    async def test_blocking_profile_applied_to_new_contexts(self):
+        pool = FakeSessionPool(min_sessions=1, max_sessions=1)
+        async with pool.acquire_session() as context:
+            assert [pattern for pattern, _ in context.routes] == ["**/*"]
+        assert pool.get_stats()["blocking_profile"] == "table_scraping"
+
+        unblocked = FakeSessionPool(min_sessions=1, max_sessions=1, blocking_profile=None)
+        async with unblocked.acquire_session() as context:
+            assert context.routes == []
@@ -0,0 +1,95 @@
+# ABOUTME: Test suite for the shared single-pass HTML table extractor
+# ABOUTME: Covers text/link extraction, table selection and DataFrame output
+
+import pandas as pd
+
+from scrapers.base.table_extraction import extract_table, iter_table_rows
+
+
+RESULTS_PAGE = """
+<html><body>
+<table id="nav"><tr><td>Home</td></tr></table>
+<table id="results">
+  <thead><tr><th>Franchisor</th><th>Document</th><th>Year</th></tr></thead>
+  <tbody>
+    <tr><td>Acme
+      Inc</td><td><a href="/docs/1.pdf">Clean FDD</a></td><td>2024</td></tr>
+    <tr><td>Beta <b>LLC</b></td><td>Pending</td><td>2023</td></tr>
+    <tr><td colspan="3"><table><tr><td>1</td><td>2</td></tr></table></td></tr>
+  </tbody>
+</table>
+</body></html>
+"""
+
+
+class TestIterTableRows:
+    """Test row streaming."""
+
+    def test_text_and_links_in_one_pass(self):
+        rows = list(iter_table_rows(RESULTS_PAGE, table_id="results",
+                                    base_url="https://example.com/search/"))
+
+        assert rows[0].is_header
+        assert rows[0].cells == ["Franchisor", "Document", "Year"]
+        assert rows[1].cells == ["Acme Inc", "Clean FDD", "2024"]
+        assert rows[1].links == [None, "https://example.com/docs/1.pdf", None]
+        assert rows[2].cells == ["Beta LLC", "Pending", "2023"]
+        assert rows[2].link(1) is None
+
+    def test_skips_other_and_nested_tables(self):
+        rows = list(iter_table_rows(RESULTS_PAGE, table_id="results"))
+
+        texts = [row.cells for row in rows]
+        assert ["Home"] not in texts
+        assert ["1", "2"] not in texts
+        assert len(rows) == 4  # header, two results and the pager row
+
+    def test_line_separator_keeps_line_breaks(self):
+        rows = list(iter_table_rows(RESULTS_PAGE, table_id="results", line_separator=" | "))
+
+        assert rows[1].cells[0].startswith("Acme | ")
+
+    def test_bare_row_fragment(self):
+        rows = list(iter_table_rows('<tr><td>X</td><td><a href="a.pdf">A</a></td></tr>'))
+
+        assert [row.cells for row in rows] == [["X", "A"]]
+        assert rows[0].links == [None, "a.pdf"]
+
+    def test_large_table_streams(self):
+        body = "".join(f"<tr><td>{i}</td><td><a href='{i}.pdf'>d</a></td></tr>" for i in range(20000))
+        html = f"<table id='results'><tbody>{body}</tbody></table>"
+
+        count = 0
+        for row in iter_table_rows(html, table_id="results"):
+            # Earlier rows are released as the parse moves on
+            assert row.link(1) == f"{count}.pdf"
+            count += 1
+        assert count == 20000
+
+
+class TestExtractTable:
+    """Test whole-table extraction."""
+
+    def test_headers_and_rows(self):
+        table = extract_table(RESULTS_PAGE, table_id="results")
+
+        assert table.headers == ["Franchisor", "Document", "Year"]
+        assert len(table) == 3
+
+    def test_missing_table_is_empty(self):
+        table = extract_table(RESULTS_PAGE, table_id="missing")
+
+        assert table.headers == []
+        assert len(table) == 0
+        assert table.to_dataframe().empty
+
+    def test_to_dataframe_with_link_columns(self):
+        table = extract_table(RESULTS_PAGE, table_id="results", base_url="https://example.com/")
+
+        df = table.to_dataframe(link_columns={"Document": "Document_URL", 0: "Name_URL"})
+
+        assert list(df.columns) == ["Franchisor", "Document", "Year", "Document_URL", "Name_URL"]
+        assert df.loc[0, "Document_URL"] == "https://example.com/docs/1.pdf"
+        assert df["Document_URL"].isna().tolist() == [False, True, True]
+        # The short pager row is padded to the header width
+        assert pd.isna(df.loc[2, "Year"])
@@ -1,9 +1,16 @@
 # ABOUTME: Test suite for scraping utility functions
 # ABOUTME: Tests helper functions for filename sanitization, date parsing, URL normalization, etc.
 
+import pandas as pd
 import pytest
 from datetime import datetime
 from utils.scraping_utils import (
+    extract_filing_numbers,
+    extract_state_codes,
+    format_franchise_names,
+    parse_addresses,
+    parse_dates,
+    parse_file_sizes,
     sanitize_filename,
     get_default_headers,
     parse_date_formats,
@@ -273,3 +280,65 @@ class TestScrapingUtils:
         # Test custom parameters
         assert calculate_retry_delay(2, base_delay=2.0) == 8.0  # 2 * 2^2
         assert calculate_retry_delay(5, max_delay=20.0) == 20.0  # Capped at 20
+
+
+class TestBatchParsers:
+    """The Series variants must agree with the scalar parsers."""
+
+    def test_parse_dates_matches_scalar(self):
+        values = [
+            "12/31/2023", "2023-12-31", "Dec 31, 2023", "31-Dec-2023", "12-31-23",
+            "20231231", "December 2023", "Filed in 2023", "13/45/2023", "not a date",
+            "", None, " 2024-03-01 ", "2/29/2023", "0001-01-01", "12/31/2023",
+        ]
+        series = pd.Series(values, index=range(100, 100 + len(values)))
+
+        parsed = parse_dates(series)
+
+        assert list(parsed.index) == list(series.index)
+        for value, result in zip(values, parsed):
+            expected = parse_date_formats(value) if value else None
+            if expected is None:
+                assert pd.isna(result)
+            else:
+                assert result == expected
+
+    def test_text_parsers_match_scalar(self):
+        values = [
+            "Filing Number: 12345", "Minneapolis, MN 55401", "2.5 MB", "tx-based #99999",
+            "test llc company", "Franchise (USA)", "", None, "1024 KB",
+        ]
+        texts = pd.Series(values, dtype=object)
+
+        def scalar(func, value, missing):
+            return func(value) if value else missing
+
+        assert extract_filing_numbers(texts).tolist() == [
+            scalar(extract_filing_number, t, None) for t in values
+        ]
+        assert extract_state_codes(texts).tolist() == [
+            scalar(extract_state_code, t, None) for t in values
+        ]
+        sizes = parse_file_sizes(texts)
+        assert [None if pd.isna(v) else v for v in sizes] == [
+            scalar(parse_file_size, t, None) for t in values
+        ]
+        assert format_franchise_names(texts).tolist() == [
+            format_franchise_name(t or "") for t in values
+        ]
+
+    def test_parse_addresses_returns_frame(self):
+        addresses = pd.Series(["123 Main St, Minneapolis, MN 55401", None], index=[5, 7])
+
+        frame = parse_addresses(addresses)
+
+        assert list(frame.index) == [5, 7]
+        assert frame.loc[5].to_dict() == parse_address("123 Main St, Minneapolis, MN 55401")
+        assert frame.loc[7, "full_address"] == ""
+
+    def test_scalar_parsers_are_memoized(self):
+        parse_date_formats.cache_clear()
+        parse_date_formats("12/31/2023")
+        parse_date_formats("12/31/2023")
+
+        assert parse_date_formats.cache_info().hits == 1
@@ -0,0 +1,46 @@
+# ABOUTME: Test suite for the on-disk embedding cache
+# ABOUTME: Checks keying by model and text, persistence and chunked lookups
+
+import numpy as np
+
+from utils.embedding_cache import LOOKUP_CHUNK_SIZE, EmbeddingCache
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def vector(seed):
+    return np.random.default_rng(seed).random(384, dtype=np.float32)
+
+
+class TestEmbeddingCache:
+    """Test cases for EmbeddingCache."""
+
+    def test_round_trip_keyed_by_model_and_text(self, tmp_path):
+        cache = EmbeddingCache(tmp_path / "e.db")
+        cache.put_many(MODEL, {"anytime fitness": vector(1), "kumon": vector(2)})
+
+        found = cache.get_many(MODEL, ["kumon", "anytime fitness", "unknown", "kumon"])
+
+        assert set(found) == {"kumon", "anytime fitness"}
+        np.testing.assert_array_equal(found["kumon"], vector(2))
+        assert cache.get_many("other-model", ["kumon"]) == {}
+        assert cache.get_stats() == {"hits": 2, "misses": 2, "stored": 2}
+
+    def test_persists_and_replaces(self, tmp_path):
+        path = tmp_path / "cache" / "e.db"
+        first = EmbeddingCache(path)
+        first.put_many(MODEL, {"kumon": vector(1)})
+        first.put_many(MODEL, {"kumon": vector(2)})
+        first.close()
+
+        reloaded = EmbeddingCache(path)
+
+        assert len(reloaded) == 1
+        np.testing.assert_array_equal(reloaded.get_many(MODEL, ["kumon"])["kumon"], vector(2))
+
+    def test_lookups_beyond_one_chunk(self, tmp_path):
+        cache = EmbeddingCache(tmp_path / "e.db")
+        texts = [f"brand {n}" for n in range(LOOKUP_CHUNK_SIZE * 2 + 7)]
+        cache.put_many(MODEL, {text: vector(n) for n, text in enumerate(texts)})
+
+        assert len(cache.get_many(MODEL, texts)) == len(texts)
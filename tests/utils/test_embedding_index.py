@@ -0,0 +1,186 @@
+# ABOUTME: Test suite for the local ANN index over franchisor embeddings
+# ABOUTME: Checks recall against exact search, incremental updates, persistence and refresh
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from scrapers.base.watermark import REFRESH_OVERLAP
+from utils import embedding_index
+from utils.embedding_index import EmbeddingIndex
+
+DIMENSIONS = 384
+
+
+def clustered(count, seed=0, clusters=200):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIMENSIONS)).astype(np.float32)
+    return centers[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal(
+        (count, DIMENSIONS)
+    ).astype(np.float32)
+
+
+def entries(vectors):
+    return [(f"id-{i}", f"Brand {i}", vector) for i, vector in enumerate(vectors)]
+
+
+class TestSearch:
+    """Test top-k search quality and incremental updates."""
+
+    def test_ivf_recall_against_exact_search(self, monkeypatch):
+        monkeypatch.setattr(embedding_index, "MIN_VECTORS_FOR_LISTS", 1000)
+        vectors = clustered(5000)
+        index = EmbeddingIndex(None)
+        index.build(entries(vectors))
+        assert index.get_stats()["lists"] == 70
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        rng = np.random.default_rng(1)
+        found = 0
+        for row in rng.integers(0, len(vectors), 50):
+            query = vectors[row] + 0.2 * rng.standard_normal(DIMENSIONS).astype(np.float32)
+            scores = normalized @ (query / np.linalg.norm(query))
+            exact = {f"id-{i}" for i in np.argsort(-scores)[:5]}
+            results = index.search(query, k=5)
+            assert [score for _, _, score in results] == sorted((s for _, _, s in results), reverse=True)
+            found += len(exact & {franchise_id for franchise_id, _, _ in results})
+        assert found / 250 >= 0.95
+
+    def test_add_replace_remove_and_min_score(self):
+        vectors = clustered(50)
+        index = EmbeddingIndex(None)
+        index.build(entries(vectors))
+
+        index.add("new", "New Brand", vectors[3])
+        assert {franchise_id for franchise_id, _, _ in index.search(vectors[3], k=2)} == {"id-3", "new"}
+
+        index.add("id-3", "Renamed", -vectors[3])
+        index.remove("new")
+        assert index.search(vectors[3], k=1, min_score=0.99) == []
+        franchise_id, name, score = index.search(-vectors[3], k=1)[0]
+        assert (franchise_id, name) == ("id-3", "Renamed")
+        assert score > 0.999
+        assert len(index) == 50
+        assert "new" not in index
+
+
+class TestPersistence:
+    """Test saving, memory-mapped loading and re-clustering."""
+
+    def test_save_and_memory_mapped_reload(self, tmp_path):
+        vectors = clustered(100)
+        index = EmbeddingIndex(tmp_path)
+        index.build(entries(vectors))
+        index.add("new", "New Brand", vectors[0] * 2)
+        index.remove("id-5")
+        index.save()
+
+        reloaded = EmbeddingIndex(tmp_path)
+
+        assert isinstance(reloaded._vectors, np.memmap)
+        assert len(reloaded) == 100
+        assert "id-5" not in reloaded
+        assert reloaded.search(vectors[7], k=1)[0][:2] == ("id-7", "Brand 7")
+
+    def test_save_rebuilds_after_drift_and_drops_old_files(self, tmp_path):
+        vectors = clustered(40)
+        index = EmbeddingIndex(tmp_path, rebuild_ratio=0.2)
+        index.build(entries(vectors[:20]))
+        index.save()
+        for i in range(20, 40):
+            index.add(f"id-{i}", f"Brand {i}", vectors[i])
+
+        index.save()
+
+        assert index.get_stats()["delta"] == 0
+        assert index.get_stats()["base"] == 40
+        assert len(list(tmp_path.glob("vectors-*.npy"))) == 1
+        assert EmbeddingIndex(tmp_path).search(vectors[30], k=1)[0][0] == "id-30"
+
+    def test_save_keeps_files_it_did_not_replace(self, tmp_path):
+        vectors = clustered(40)
+        first = EmbeddingIndex(tmp_path, rebuild_ratio=0.2)
+        first.build(entries(vectors[:20]))
+        first.save()
+        second = EmbeddingIndex(tmp_path, rebuild_ratio=0.2)
+        # A concurrent writer's files, written before its meta.json
+        (tmp_path / "vectors-inflight.npy").write_bytes(b"")
+        (tmp_path / "delta-inflight.npy").write_bytes(b"")
+
+        for i in range(20, 40):
+            first.add(f"id-{i}", f"Brand {i}", vectors[i])
+        first.save()
+        second.add("new", "New Brand", vectors[0] * 2)
+        second.save()
+
+        assert (tmp_path / "vectors-inflight.npy").exists()
+        assert (tmp_path / "delta-inflight.npy").exists()
+        # The second index lost its generation to the first one's rebuild
+        reloaded = EmbeddingIndex(tmp_path)
+        assert len(reloaded) == 21
+        assert reloaded.search(vectors[0] * 2, k=1)[0][0] in {"id-0", "new"}
+
+
+class TestRefresh:
+    """Test loading embeddings from the database."""
+
+    def test_full_then_incremental_refresh(self, watermark_db, tmp_path):
+        start = datetime(2024, 1, 1)
+        vectors = clustered(6)
+        db = watermark_db("franchisors", "updated_at", [
+            {
+                "id": f"id-{i}",
+                "canonical_name": f"Brand {i}",
+                # pgvector columns come back from PostgREST as text
+                "name_embedding": str(vectors[i].tolist()),
+                "updated_at": start + timedelta(hours=i),
+            }
+            for i in range(5)
+        ])
+        index = EmbeddingIndex(tmp_path)
+
+        assert index.refresh(db, page_size=2) == 5
+        assert db.queries == [None, None, None]
+        assert index.get_stats()["base"] == 5
+
+        db.rows.append({
+            "id": "id-5",
+            "canonical_name": "Brand 5",
+            "name_embedding": vectors[5].tolist(),
+            "updated_at": start + timedelta(hours=5),
+        })
+        db.queries.clear()
+        index.refresh(db)
+
+        assert db.queries == [start + timedelta(hours=4) - REFRESH_OVERLAP]
+        # Re-read overlap rows are unchanged and stay in the base
+        assert index.get_stats()["delta"] == 1
+        assert EmbeddingIndex(tmp_path).search(vectors[5], k=1)[0][0] == "id-5"
+
+    def test_periodic_full_scan_drops_deleted_franchisors(self, watermark_db, tmp_path):
+        start = datetime(2024, 1, 1)
+        vectors = clustered(3)
+        db = watermark_db("franchisors", "updated_at", [
+            {
+                "id": f"id-{i}",
+                "canonical_name": f"Brand {i}",
+                "name_embedding": vectors[i].tolist(),
+                "updated_at": start + timedelta(hours=i),
+            }
+            for i in range(3)
+        ])
+        index = EmbeddingIndex(tmp_path)
+        index.refresh(db)
+
+        # Merged away by another process: an incremental refresh cannot see it
+        del db.rows[1]
+        index.refresh(db)
+        assert "id-1" in index
+
+        reloaded = EmbeddingIndex(tmp_path, full_scan_interval=timedelta(0))
+        db.queries.clear()
+        reloaded.refresh(db)
+
+        assert db.queries == [None]
+        assert "id-1" not in reloaded
+        assert "id-1" not in EmbeddingIndex(tmp_path)
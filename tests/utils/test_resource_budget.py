@@ -0,0 +1,128 @@
+# ABOUTME: Test suite for the shared, fair resource budget
+# ABOUTME: Checks global caps, fair sharing between states and no-op behaviour
+
+import asyncio
+
+import pytest
+
+from utils.resource_budget import (
+    RESOURCE_HTTP,
+    FairLimiter,
+    ResourceBudget,
+    get_resource_budget,
+    resource_slot,
+    tenant_scope,
+    use_resource_budget,
+)
+
+
+async def hold(limiter, tenant, seconds, log):
+    async with limiter.slot(tenant):
+        log.append(tenant)
+        await asyncio.sleep(seconds)
+
+
+class TestFairLimiter:
+    """Test cases for FairLimiter."""
+
+    @pytest.mark.asyncio
+    async def test_capacity_is_global(self):
+        """No more than ``capacity`` slots are ever held across tenants."""
+        limiter = FairLimiter("http", 3)
+        peak = 0
+
+        async def work(tenant):
+            nonlocal peak
+            async with limiter.slot(tenant):
+                peak = max(peak, limiter.in_use)
+                await asyncio.sleep(0.005)
+
+        await asyncio.gather(*(work(t) for t in ["MN", "WI"] * 10))
+
+        assert peak == 3
+        assert limiter.in_use == 0
+
+    @pytest.mark.asyncio
+    async def test_busy_tenant_does_not_starve_others(self):
+        """A tenant queueing late still gets its share of freed slots."""
+        limiter = FairLimiter("http", 2)
+        order = []
+        first = [asyncio.create_task(hold(limiter, "MN", 0.01, order)) for _ in range(10)]
+        await asyncio.sleep(0)
+        late = [asyncio.create_task(hold(limiter, "WI", 0.01, order)) for _ in range(2)]
+
+        await asyncio.gather(*first, *late)
+
+        # The first freed slot goes to WI, and from then on the two states
+        # alternate instead of WI waiting behind MN's whole backlog
+        assert order[:5] == ["MN", "MN", "WI", "MN", "WI"]
+
+    @pytest.mark.asyncio
+    async def test_single_tenant_uses_whole_capacity(self):
+        """With nobody else waiting, one tenant can hold every slot."""
+        limiter = FairLimiter("browser", 4)
+        held = []
+
+        async def work():
+            async with limiter.slot("MN"):
+                held.append(limiter.in_use)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(4)))
+
+        assert max(held) == 4
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_releases_nothing(self):
+        """Cancelling a queued acquire leaves the accounting intact."""
+        limiter = FairLimiter("llm", 1)
+        await limiter.acquire("MN")
+        waiter = asyncio.create_task(limiter.acquire("WI"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        limiter.release("MN")
+
+        assert limiter.in_use == 0
+        assert await limiter.acquire("WI") == "WI"
+
+
+class TestResourceSlot:
+    """Test cases for resource_slot and tenant scoping."""
+
+    @pytest.mark.asyncio
+    async def test_noop_without_active_budget(self):
+        """Outside a parallel run, slots do not limit anything."""
+        assert get_resource_budget() is None
+        async with resource_slot(RESOURCE_HTTP) as tenant:
+            assert tenant is None
+
+    @pytest.mark.asyncio
+    async def test_slots_are_charged_to_current_tenant(self):
+        """Tasks spawned inside a tenant scope are charged to that tenant."""
+        budget = ResourceBudget({RESOURCE_HTTP: 2})
+
+        async def fetch():
+            async with resource_slot(RESOURCE_HTTP):
+                await asyncio.sleep(0)
+
+        async def state(code, requests):
+            with tenant_scope(code):
+                await asyncio.gather(*(fetch() for _ in range(requests)))
+
+        with use_resource_budget(budget):
+            await asyncio.gather(state("MN", 3), state("WI", 5))
+
+        assert budget.tenant_stats("MN")[RESOURCE_HTTP]["completed"] == 3
+        assert budget.tenant_stats("WI")[RESOURCE_HTTP]["completed"] == 5
+        assert get_resource_budget() is None
+
+    def test_from_env_overrides(self, monkeypatch):
+        """Explicit caps win over environment variables, which win over defaults."""
+        monkeypatch.setenv("RESOURCE_BUDGET_HTTP", "7")
+
+        budget = ResourceBudget.from_env(browser=2)
+
+        assert budget.limiter("browser").capacity == 2
+        assert budget.limiter("http").capacity == 7
@@ -0,0 +1,106 @@
+"""On-disk cache of sentence embeddings.
+
+Embeddings are keyed by model name and the exact text that was encoded
+(callers pass normalized names), so re-running a backfill or resolving a
+name seen before does not run the model again. Vectors are stored as
+float32 blobs in a SQLite file (WAL mode, safe to share between
+processes), next to the other caches under ``.cache``.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Mapping
+
+import numpy as np
+
+from utils.logging import get_logger
+
+
+DEFAULT_CACHE_PATH = Path(".cache/embeddings/embeddings.db")
+# Keys per SELECT ... IN (...), below SQLite's bound-variable limit
+LOOKUP_CHUNK_SIZE = 500
+
+logger = get_logger(__name__)
+
+
+class EmbeddingCache:
+    """Embedding vectors per (model name, text), persisted in SQLite."""
+
+    def __init__(self, db_path: Path = DEFAULT_CACHE_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.db_path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text)
+            )
+            """
+        )
+        self._stats = {"hits": 0, "misses": 0, "stored": 0}
+
+    def get_many(self, model: str, texts: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Cached embeddings for the texts that have one."""
+        unique = list(dict.fromkeys(texts))
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for i in range(0, len(unique), LOOKUP_CHUNK_SIZE):
+                chunk = unique[i:i + LOOKUP_CHUNK_SIZE]
+                rows = self._conn.execute(
+                    f"SELECT text, dimensions, vector FROM embeddings "
+                    f"WHERE model = ? AND text IN ({', '.join('?' * len(chunk))})",
+                    (model, *chunk),
+                ).fetchall()
+                for text, dimensions, vector in rows:
+                    embedding = np.frombuffer(vector, dtype=np.float32)
+                    if embedding.shape[0] == dimensions:
+                        found[text] = embedding
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(unique) - len(found)
+        return found
+
+    def put_many(self, model: str, embeddings: Mapping[str, np.ndarray]) -> int:
+        """Store embeddings in one transaction; returns the number stored."""
+        rows = []
+        for text, embedding in embeddings.items():
+            vector = np.asarray(embedding, dtype=np.float32)
+            rows.append((model, text, vector.shape[0], vector.tobytes()))
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text, dimensions, vector) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._stats["stored"] += len(rows)
+        return len(rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Lookup outcomes and writes since start-up."""
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
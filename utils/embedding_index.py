@@ -0,0 +1,544 @@
+"""Local approximate-nearest-neighbour index over franchisor name embeddings.
+
+Entity resolution used to depend on the ``match_franchises`` vector RPC,
+with a token scan as its only fallback. :class:`EmbeddingIndex` answers the
+same top-k cosine queries from local files:
+
+- vectors are L2-normalized, so cosine similarity is a dot product
+- an IVF layout groups them into ``sqrt(N)`` lists by spherical k-means;
+  a query scores the list centroids and then only the rows of the
+  ``nprobe`` nearest lists (small indexes use one list, i.e. exact search)
+- the base vectors are stored in list order in one ``.npy`` file and
+  memory-mapped on load, so each probed list is one contiguous slice
+
+Updates are incremental: added vectors go to an in-memory delta scanned
+exactly, replaced and removed rows are masked out, and :meth:`save`
+re-clusters everything once the delta or the removals outgrow
+``rebuild_ratio`` of the base. :meth:`refresh` reads franchisors updated
+since the last refresh, like the franchisor cache, and rebuilds from a full
+scan every ``full_scan_interval`` so franchisors merged or deleted by other
+processes drop out.
+"""
+
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from scrapers.base.watermark import parse_timestamp, read_since
+from utils.logging import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+DEFAULT_INDEX_DIR = Path(".cache/embeddings/franchisors")
+DIMENSIONS = 384
+DEFAULT_NPROBE = 8
+# Below this many vectors a single list (exact search) is fast enough
+MIN_VECTORS_FOR_LISTS = 4096
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_SIZE = 50_000
+# Seconds between incremental refreshes triggered by lookups
+DEFAULT_MAX_AGE = 60.0
+# A full scan drops franchisors deleted (e.g. merged) by other processes
+FULL_SCAN_INTERVAL = timedelta(hours=1)
+REFRESH_PAGE_SIZE = 2000
+_FORMAT_VERSION = 1
+
+logger = get_logger(__name__)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def parse_embedding(value: Any) -> Optional[np.ndarray]:
+    """Embedding column value as a vector; pgvector arrives as "[...]" text."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def _kmeans(vectors: np.ndarray, lists: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids of normalized vectors, fitted on a sample."""
+    rng = np.random.default_rng(seed)
+    size = min(len(vectors), KMEANS_SAMPLE_SIZE)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), size, replace=False))])
+    centroids = sample[rng.choice(size, lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        # Empty lists keep their centroid
+        empty = np.bincount(assignment, minlength=lists) == 0
+        sums[empty] = centroids[empty]
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 50_000) -> np.ndarray:
+    return np.concatenate([
+        np.argmax(np.asarray(vectors[i:i + chunk_size]) @ centroids.T, axis=1)
+        for i in range(0, len(vectors), chunk_size)
+    ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+
+class EmbeddingIndex:
+    """IVF index of normalized embeddings keyed by franchisor id.
+
+    Safe to share between threads. Files under ``index_dir`` are replaced
+    atomically: ``meta.json`` names the generation of vector files to load.
+    Loads and saves hold a cross-process lock on the directory, so another
+    process never removes files named by a ``meta.json`` being read or written.
+
+    Args:
+        index_dir: Directory of the persisted index (None keeps it in memory)
+        dimensions: Embedding size
+        nprobe: Lists scanned per query; more is slower and more exact
+        rebuild_ratio: Delta or removed share of the base that triggers a
+            re-clustering on save
+        max_age: Seconds after which :meth:`refresh_if_stale` refreshes
+        full_scan_interval: Age of the last full scan after which a refresh
+            rebuilds the index from every franchisor
+    """
+
+    def __init__(
+        self,
+        index_dir: Optional[Path] = DEFAULT_INDEX_DIR,
+        dimensions: int = DIMENSIONS,
+        nprobe: int = DEFAULT_NPROBE,
+        rebuild_ratio: float = 0.2,
+        max_age: float = DEFAULT_MAX_AGE,
+        full_scan_interval: timedelta = FULL_SCAN_INTERVAL,
+    ):
+        self.index_dir = Path(index_dir) if index_dir is not None else None
+        self.dimensions = dimensions
+        self.nprobe = nprobe
+        self.rebuild_ratio = rebuild_ratio
+        self.max_age = max_age
+        self.full_scan_interval = full_scan_interval
+        self.watermark: Optional[datetime] = None
+        self.full_scan_at: Optional[datetime] = None
+        self._lock = threading.RLock()
+        self._refreshed_at: Optional[float] = None
+        self._set_base(np.zeros((0, dimensions), dtype=np.float32), [], [],
+                       np.zeros((1, dimensions), dtype=np.float32), [0, 0])
+        self._generation: Optional[str] = None
+        # Replaced files an earlier save could not remove
+        self._stale_files: set = set()
+        if self.index_dir is not None:
+            self._load()
+
+    # -- state -------------------------------------------------------------
+
+    def _set_base(self, vectors, ids, names, centroids, offsets):
+        self._vectors = vectors
+        self._ids: List[str] = list(ids)
+        self._names: List[Optional[str]] = list(names)
+        self._centroids = np.asarray(centroids, dtype=np.float32)
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+        self._live = np.ones(len(self._ids), dtype=bool)
+        self._rows: Dict[str, int] = {franchisor_id: row for row, franchisor_id in enumerate(self._ids)}
+        # Added since the last build: id -> (name, normalized vector)
+        self._delta: Dict[str, Tuple[Optional[str], np.ndarray]] = {}
+        self._delta_matrix: Optional[Tuple[List[str], np.ndarray]] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._live.sum()) + len(self._delta)
+
+    def __contains__(self, franchisor_id: Any) -> bool:
+        franchisor_id = str(franchisor_id)
+        with self._lock:
+            row = self._rows.get(franchisor_id)
+            return franchisor_id in self._delta or (row is not None and bool(self._live[row]))
+
+    # -- updates -----------------------------------------------------------
+
+    def add(self, franchisor_id: Any, name: Optional[str], embedding: Any):
+        """Add or replace the embedding of a franchisor."""
+        with self._lock:
+            self._add(str(franchisor_id), name, embedding)
+
+    def add_many(self, records: Iterable[Mapping[str, Any]]) -> int:
+        """Add ``franchisors`` rows with an embedding; returns the number added."""
+        count = 0
+        with self._lock:
+            for record in records:
+                embedding = parse_embedding(record.get("name_embedding"))
+                if embedding is not None:
+                    self._add(str(record["id"]), record.get("canonical_name"), embedding)
+                    count += 1
+        return count
+
+    def _add(self, franchisor_id: str, name: Optional[str], embedding: Any):
+        vector = _normalize_rows(embedding)
+        if vector.shape != (self.dimensions,):
+            raise ValueError(f"Expected {self.dimensions} dimensions, got {vector.shape}")
+        row = self._rows.get(franchisor_id)
+        if row is not None and self._live[row]:
+            # Refresh overlap re-reads unchanged rows; keep them in the base
+            if self._names[row] == name and np.allclose(self._vectors[row], vector, atol=1e-6):
+                return
+            self._live[row] = False
+        self._delta[franchisor_id] = (name, vector)
+        self._delta_matrix = None
+
+    def remove(self, franchisor_id: Any):
+        """Drop a franchisor, e.g. after merging it into another."""
+        franchisor_id = str(franchisor_id)
+        with self._lock:
+            row = self._rows.get(franchisor_id)
+            if row is not None:
+                self._live[row] = False
+            if self._delta.pop(franchisor_id, None) is not None:
+                self._delta_matrix = None
+
+    def build(self, records: Iterable[Tuple[Any, Optional[str], Any]]):
+        """Replace the index with (id, name, embedding) entries, re-clustered."""
+        entries = {str(franchisor_id): (name, embedding) for franchisor_id, name, embedding in records}
+        ids = list(entries)
+        names = [entries[franchisor_id][0] for franchisor_id in ids]
+        vectors = (
+            _normalize_rows(np.stack([np.asarray(entries[i][1], dtype=np.float32) for i in ids]))
+            if ids else np.zeros((0, self.dimensions), dtype=np.float32)
+        )
+        lists = int(math.sqrt(len(ids))) if len(ids) >= MIN_VECTORS_FOR_LISTS else 1
+        if lists > 1:
+            centroids = _kmeans(vectors, lists)
+            assignment = _assign(vectors, centroids)
+        else:
+            centroids = _normalize_rows(vectors.mean(axis=0, keepdims=True)) if ids else (
+                np.zeros((1, self.dimensions), dtype=np.float32)
+            )
+            assignment = np.zeros(len(ids), dtype=np.int64)
+        # Rows in list order, so every list is one contiguous slice
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=lists))])
+        with self._lock:
+            self._set_base(
+                vectors[order],
+                [ids[i] for i in order],
+                [names[i] for i in order],
+                centroids,
+                offsets,
+            )
+            # The base changed: the next save writes a new generation
+            self._generation = None
+        logger.info("embedding_index_built", vectors=len(ids), lists=lists)
+
+    def _live_entries(self):
+        for row in np.flatnonzero(self._live):
+            yield self._ids[row], self._names[row], self._vectors[row]
+        for franchisor_id, (name, vector) in self._delta.items():
+            yield franchisor_id, name, vector
+
+    @property
+    def needs_rebuild(self) -> bool:
+        base = len(self._ids)
+        removed = base - int(self._live.sum())
+        return max(len(self._delta), removed) > self.rebuild_ratio * max(base, 1)
+
+    # -- search ------------------------------------------------------------
+
+    def search(
+        self,
+        embedding: Any,
+        k: int = 10,
+        min_score: Optional[float] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[str, Optional[str], float]]:
+        """Approximate top-k franchisors by cosine similarity.
+
+        Returns:
+            (franchisor id, canonical name, score) tuples, best first
+        """
+        query = _normalize_rows(embedding)
+        with self._lock:
+            probe = min(nprobe or self.nprobe, len(self._centroids))
+            if len(self._centroids) > 1:
+                lists = np.argpartition(-(self._centroids @ query), probe - 1)[:probe]
+            else:
+                lists = np.zeros(1, dtype=np.int64)
+            rows, scores = [], []
+            for list_id in lists:
+                start, stop = self._offsets[list_id], self._offsets[list_id + 1]
+                if stop > start:
+                    rows.append(np.arange(start, stop))
+                    scores.append(np.asarray(self._vectors[start:stop]) @ query)
+            candidates: List[Tuple[str, Optional[str], float]] = []
+            if rows:
+                rows_array, scores_array = np.concatenate(rows), np.concatenate(scores)
+                keep = self._live[rows_array]
+                candidates.extend(
+                    (self._ids[row], self._names[row], float(score))
+                    for row, score in self._top(rows_array[keep], scores_array[keep], k, min_score)
+                )
+            if self._delta:
+                delta_ids, delta_vectors = self._delta_vectors()
+                delta_scores = delta_vectors @ query
+                candidates.extend(
+                    (delta_ids[i], self._delta[delta_ids[i]][0], float(score))
+                    for i, score in self._top(np.arange(len(delta_ids)), delta_scores, k, min_score)
+                )
+        candidates.sort(key=lambda candidate: -candidate[2])
+        return candidates[:k]
+
+    @staticmethod
+    def _top(rows: np.ndarray, scores: np.ndarray, k: int, min_score: Optional[float]):
+        if min_score is not None:
+            passing = scores >= min_score
+            rows, scores = rows[passing], scores[passing]
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[best], scores[best]
+        return zip(rows, scores)
+
+    def _delta_vectors(self) -> Tuple[List[str], np.ndarray]:
+        if self._delta_matrix is None:
+            ids = list(self._delta)
+            self._delta_matrix = (ids, np.stack([self._delta[i][1] for i in ids]))
+        return self._delta_matrix
+
+    # -- refresh -----------------------------------------------------------
+
+    @property
+    def is_stale(self) -> bool:
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.max_age
+
+    def refresh_if_stale(self, db_manager) -> int:
+        """Refresh if the last refresh is older than ``max_age``."""
+        if not self.is_stale:
+            return 0
+        return self.refresh(db_manager)
+
+    def refresh(self, db_manager, page_size: int = REFRESH_PAGE_SIZE) -> int:
+        """Add franchisors whose embedding was set since the last refresh.
+
+        An index never refreshed (nothing on disk), or whose last full scan
+        is older than ``full_scan_interval``, is rebuilt from a full scan.
+        Rows read are saved to disk right away.
+
+        Returns:
+            Number of ``franchisors`` rows read
+        """
+        started = datetime.utcnow()
+        full_scan = (
+            self.watermark is None
+            or self.full_scan_at is None
+            or started - self.full_scan_at >= self.full_scan_interval
+        )
+        rows: List[Dict[str, Any]] = []
+        _, watermark = read_since(
+            db_manager,
+            "franchisors",
+            ("id", "canonical_name", "name_embedding", "updated_at"),
+            "updated_at",
+            None if full_scan else self.watermark,
+            rows.extend,
+            page_size,
+            where=lambda query: query.where_null("name_embedding", False),
+        )
+
+        if full_scan:
+            self.build(
+                (record["id"], record.get("canonical_name"), parse_embedding(record["name_embedding"]))
+                for record in rows
+                if record.get("name_embedding") is not None
+            )
+        else:
+            self.add_many(rows)
+        with self._lock:
+            self.watermark = watermark
+            if full_scan:
+                self.full_scan_at = started
+            self._refreshed_at = time.monotonic()
+        if rows or full_scan:
+            self.save()
+        logger.info(
+            "embedding_index_refreshed",
+            rows=len(rows),
+            vectors=len(self),
+            full_scan=full_scan,
+            watermark=self.watermark.isoformat(),
+        )
+        return len(rows)
+
+    # -- persistence -------------------------------------------------------
+
+    @contextmanager
+    def _dir_lock(self):
+        """Hold an exclusive cross-process lock on the index directory."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.index_dir / "index.lock", "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads((self.index_dir / "meta.json").read_text())
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _meta_files(meta: Optional[Dict[str, Any]]) -> set:
+        """Names of the files a ``meta.json`` points at."""
+        if not meta or "generation" not in meta:
+            return set()
+        generation = meta["generation"]
+        return {
+            f"vectors-{generation}.npy",
+            f"centroids-{generation}.npy",
+            f"base-{generation}.json",
+            f"delta-{meta.get('delta')}.npy",
+        }
+
+    def _load(self):
+        with self._dir_lock():
+            self._load_locked()
+
+    def _load_locked(self):
+        meta_path = self.index_dir / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text())
+            if meta.get("version") != _FORMAT_VERSION or meta["dimensions"] != self.dimensions:
+                logger.warning("embedding_index_incompatible", path=str(meta_path))
+                return
+            generation = meta["generation"]
+            base = json.loads((self.index_dir / f"base-{generation}.json").read_text())
+            vectors = np.load(self.index_dir / f"vectors-{generation}.npy", mmap_mode="r")
+            centroids = np.load(self.index_dir / f"centroids-{generation}.npy")
+            delta_vectors = np.load(self.index_dir / f"delta-{meta['delta']}.npy")
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("embedding_index_unreadable", path=str(meta_path), error=str(e))
+            return
+        self._set_base(vectors, base["ids"], base["names"], centroids, base["offsets"])
+        self._generation = generation
+        for row in meta["removed"]:
+            self._live[row] = False
+        for (franchisor_id, name), vector in zip(meta["delta_entries"], delta_vectors):
+            self._delta[franchisor_id] = (name, vector)
+        self.watermark = parse_timestamp(meta["watermark"])
+        self.full_scan_at = parse_timestamp(meta.get("full_scan_at"))
+
+    def _write_atomic(self, name: str, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, self.index_dir / name)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def save(self):
+        """Persist the index, re-clustering first if it drifted too far.
+
+        The base files are only rewritten after a rebuild; otherwise a save
+        writes the delta vectors and the small metadata file.
+        """
+        if self.index_dir is None:
+            return
+        with self._lock, self._dir_lock():
+            if self.needs_rebuild:
+                self.build(list(self._live_entries()))
+            previous = self._read_meta()
+            if self._generation is not None and not (
+                self.index_dir / f"vectors-{self._generation}.npy"
+            ).exists():
+                # Another process replaced the generation this one loaded
+                self._generation = None
+            if self._generation is None:
+                generation = uuid.uuid4().hex[:12]
+                self._write_atomic(
+                    f"vectors-{generation}.npy", lambda f: np.save(f, np.asarray(self._vectors))
+                )
+                self._write_atomic(f"centroids-{generation}.npy", lambda f: np.save(f, self._centroids))
+                base = {"ids": self._ids, "names": self._names, "offsets": self._offsets.tolist()}
+                self._write_atomic(f"base-{generation}.json", lambda f: f.write(json.dumps(base).encode()))
+                self._generation = generation
+            delta = uuid.uuid4().hex[:12]
+            delta_ids = list(self._delta)
+            delta_vectors = (
+                np.stack([self._delta[i][1] for i in delta_ids])
+                if delta_ids else np.zeros((0, self.dimensions), dtype=np.float32)
+            )
+            self._write_atomic(f"delta-{delta}.npy", lambda f: np.save(f, delta_vectors))
+            meta = {
+                "version": _FORMAT_VERSION,
+                "dimensions": self.dimensions,
+                "generation": self._generation,
+                "delta": delta,
+                "delta_entries": [[i, self._delta[i][0]] for i in delta_ids],
+                "removed": np.flatnonzero(~self._live).tolist(),
+                "watermark": self.watermark.isoformat() if self.watermark else None,
+                "full_scan_at": self.full_scan_at.isoformat() if self.full_scan_at else None,
+            }
+            self._write_atomic("meta.json", lambda f: f.write(json.dumps(meta).encode()))
+            # Drop only the files of the meta.json just replaced. A memory map
+            # of an unlinked file stays readable; Windows refuses, so those
+            # are retried on the next save.
+            current = self._meta_files(meta)
+            for name in (self._meta_files(previous) | self._stale_files) - current:
+                try:
+                    (self.index_dir / name).unlink()
+                except FileNotFoundError:
+                    self._stale_files.discard(name)
+                except OSError:
+                    self._stale_files.add(name)
+                else:
+                    self._stale_files.discard(name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Size, layout and watermark."""
+        with self._lock:
+            return {
+                "vectors": len(self),
+                "base": len(self._ids),
+                "delta": len(self._delta),
+                "lists": len(self._centroids),
+                "watermark": self.watermark.isoformat() if self.watermark else None,
+            }
+
+
+_indexes: Dict[Path, EmbeddingIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_embedding_index(index_dir: Path = DEFAULT_INDEX_DIR) -> EmbeddingIndex:
+    """Get the process-wide index persisted at ``index_dir``."""
+    key = Path(index_dir).resolve()
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = EmbeddingIndex(index_dir)
+        return _indexes[key]
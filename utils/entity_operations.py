@@ -6,17 +6,26 @@ Uses sentence transformers for name embeddings and cosine similarity for matchin
 """
 
 import re
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from supabase import Client
 import logging
 
+from scrapers.base.franchisor_cache import get_franchisor_cache, get_fresh_franchisor_cache
 from storage.database.manager import get_supabase_client, DatabaseManager
+from utils.embedding_cache import EmbeddingCache
+from utils.embedding_index import EmbeddingIndex, get_embedding_index
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_DIMENSIONS = 384
+# Texts per model.encode call
+DEFAULT_EMBEDDING_BATCH_SIZE = 64
+# Franchisors embedded and written back per round of the backfill
+BACKFILL_CHUNK_SIZE = 1000
+
 
 class EntityResolver:
     """
@@ -26,14 +35,33 @@ class EntityResolver:
     that match the database schema.
     """
 
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_index: Optional[EmbeddingIndex] = None,
+    ):
         """
         Initialize the entity resolver with a sentence transformer model.
 
         Args:
             model_name: Name of the sentence transformer model to use
+            batch_size: Texts per model.encode call
+            embedding_cache: On-disk embedding cache (default: .cache/embeddings)
+            embedding_index: Local ANN index of franchisor embeddings
+                (default: the process-wide one under .cache/embeddings)
         """
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
+        self.batch_size = batch_size
+        # Both define __len__: an injected empty cache or index is falsy
+        self.embedding_cache = (
+            EmbeddingCache() if embedding_cache is None else embedding_cache
+        )
+        self.embedding_index = (
+            get_embedding_index() if embedding_index is None else embedding_index
+        )
         self.db = DatabaseManager()
         self.supabase = get_supabase_client()
 
@@ -99,15 +127,47 @@ class EntityResolver:
         Returns:
             384-dimensional embedding vector
         """
-        # Generate embedding
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        return self.generate_embeddings([text])[0]
+
+    def generate_embeddings(
+        self, texts: Sequence[str], batch_size: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Generate sentence embeddings for many texts.
+
+        Texts already in the on-disk cache for this model are not encoded
+        again; the others are encoded in batches of ``batch_size`` and cached.
+
+        Args:
+            texts: Texts to embed (normalized names)
+            batch_size: Texts per model.encode call (default: self.batch_size)
+
+        Returns:
+            Array of shape (len(texts), 384), one row per text
+        """
+        if not texts:
+            return np.empty((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+
+        embeddings = self.embedding_cache.get_many(self.model_name, texts)
+        missing = [text for text in dict.fromkeys(texts) if text not in embeddings]
+        if missing:
+            encoded = self.model.encode(
+                missing,
+                batch_size=batch_size or self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+
+            # Ensure it's 384 dimensions (MiniLM-L6-v2 default)
+            assert (
+                encoded.shape[1] == EMBEDDING_DIMENSIONS
+            ), f"Expected {EMBEDDING_DIMENSIONS} dimensions, got {encoded.shape[1]}"
 
-        # Ensure it's 384 dimensions (MiniLM-L6-v2 default)
-        assert (
-            embedding.shape[0] == 384
-        ), f"Expected 384 dimensions, got {embedding.shape[0]}"
+            new_embeddings = dict(zip(missing, encoded))
+            self.embedding_cache.put_many(self.model_name, new_embeddings)
+            embeddings.update(new_embeddings)
 
-        return embedding
+        return np.stack([embeddings[text] for text in texts]).astype(np.float32, copy=False)
 
     def find_similar_franchises(
         self, franchise_name: str, threshold: float = 0.85, limit: int = 10
@@ -115,6 +175,9 @@ class EntityResolver:
         """
         Find franchises similar to the given name using vector similarity.
 
+        The local embedding index answers first; the match_franchises RPC is
+        only used while the index is unavailable, and text search after that.
+
         Args:
             franchise_name: Name to search for
             threshold: Minimum similarity score (0-1)
@@ -127,6 +190,15 @@ class EntityResolver:
         normalized_name = self.normalize_franchise_name(franchise_name)
         embedding = self.generate_embedding(normalized_name)
 
+        index = self._local_embedding_index()
+        if index is not None:
+            return [
+                {"id": franchise_id, "canonical_name": name, "similarity": score}
+                for franchise_id, name, score in index.search(
+                    embedding, k=limit, min_score=threshold
+                )
+            ]
+
         # Convert to list for Supabase
         embedding_list = embedding.tolist()
 
@@ -150,6 +222,15 @@ class EntityResolver:
             # Fallback to text-based search
             return self._text_similarity_search(franchise_name, limit)
 
+    def _local_embedding_index(self) -> Optional[EmbeddingIndex]:
+        """The local embedding index, refreshed if stale; None if unusable."""
+        try:
+            self.embedding_index.refresh_if_stale(self.db)
+        except Exception as e:
+            logger.warning(f"Local embedding index refresh failed: {e}")
+            return None
+        return self.embedding_index if len(self.embedding_index) else None
+
     def _text_similarity_search(self, franchise_name: str, limit: int) -> List[Dict]:
         """
         Fallback text-based similarity search using normalized names.
@@ -163,8 +244,12 @@ class EntityResolver:
         """
         normalized_search = self.normalize_franchise_name(franchise_name)
 
-        # Get all franchises
-        franchises = self.db.read("franchisors", limit=1000)
+        # Get all franchises, from the shared cache when it is available
+        cache = get_fresh_franchisor_cache(self.db)
+        if cache is not None:
+            franchises = cache.records()
+        else:
+            franchises = self.db.read("franchisors", limit=1000)
 
         results = []
         for franchise in franchises:
@@ -225,20 +310,27 @@ class EntityResolver:
         # Check for similar franchises
         similar = self.find_similar_franchises(franchise_name, threshold=0.9)
 
-        if similar:
-            # If very high similarity, assume it's the same franchise
-            best_match = similar[0]
-            if best_match.get("similarity", 0) >= 0.95:
-                logger.info(
-                    f"Found high-similarity match: '{franchise_name}' -> "
-                    f"'{best_match['canonical_name']}' (score: {best_match['similarity']})"
-                )
+        # If very high similarity, assume it's the same franchise
+        for best_match in similar or []:
+            if best_match.get("similarity", 0) < 0.95:
+                break
+            match = self.db.read("franchisors", id=best_match["id"])
+            if not match:
+                # Merged or deleted since the embedding index last saw it
+                self.embedding_index.remove(best_match["id"])
+                continue
 
-                # Update DBA names if needed
-                if additional_names:
-                    self._update_dba_names(best_match["id"], additional_names)
+            logger.info(
+                f"Found high-similarity match: '{franchise_name}' -> "
+                f"'{best_match['canonical_name']}' (score: {best_match['similarity']})"
+            )
 
-                return self.db.read("franchisors", id=best_match["id"])[0]
+            # Update DBA names if needed
+            if additional_names:
+                self._update_dba_names(best_match["id"], additional_names)
+                match = self.db.read("franchisors", id=best_match["id"]) or match
+
+            return match[0]
 
         # No good match found
         if auto_create:
@@ -280,7 +372,10 @@ class EntityResolver:
         }
 
         # Create the franchise
-        return self.db.create("franchisors", franchise_data)
+        franchise = self.db.create("franchisors", franchise_data)
+        get_franchisor_cache().put(franchise)
+        self.embedding_index.add(franchise["id"], canonical_name, embedding)
+        return franchise
 
     def _update_dba_names(self, franchise_id: str, new_names: List[str]):
         """
@@ -301,6 +396,7 @@ class EntityResolver:
             # Update if changed
             if len(updated_dbas) > len(existing_dbas):
                 self.db.update("franchisors", franchise_id, {"dba_names": updated_dbas})
+                get_franchisor_cache().put({**franchise, "dba_names": updated_dbas})
                 logger.info(f"Updated DBA names for franchise {franchise_id}")
 
         except Exception as e:
@@ -324,21 +420,7 @@ class EntityResolver:
         )
 
         # Generate embeddings for those that don't have them
-        for franchise in franchises_without_embeddings.data:
-            try:
-                embedding = self.generate_embedding(
-                    self.normalize_franchise_name(franchise["canonical_name"])
-                )
-
-                self.db.update(
-                    "franchisors",
-                    franchise["id"],
-                    {"name_embedding": embedding.tolist()},
-                )
-
-            except Exception as e:
-                logger.error(f"Failed to generate embedding for {franchise['id']}: {e}")
-                stats["errors"] += 1
+        stats["errors"] += self.backfill_embeddings(franchises_without_embeddings.data)
 
         # Now process all franchises for deduplication
         offset = 0
@@ -379,9 +461,62 @@ class EntityResolver:
 
             offset += batch_size
 
+        # Persist the index without the merged-away franchises
+        self.embedding_index.save()
         logger.info(f"Deduplication complete: {stats}")
         return stats
 
+    def backfill_embeddings(
+        self, franchises: List[Dict], chunk_size: int = BACKFILL_CHUNK_SIZE
+    ) -> int:
+        """
+        Embed franchise names in batches and write them back in bulk.
+
+        Each chunk is embedded with one generate_embeddings call and written
+        with one batch upsert, instead of an encode and an update per row.
+
+        Args:
+            franchises: Franchise records with id and canonical_name
+            chunk_size: Franchises embedded and written per round
+
+        Returns:
+            Number of franchises whose embedding could not be stored
+        """
+        errors = 0
+        for i in range(0, len(franchises), chunk_size):
+            chunk = franchises[i : i + chunk_size]
+            try:
+                embeddings = self.generate_embeddings(
+                    [self.normalize_franchise_name(f["canonical_name"]) for f in chunk]
+                )
+                # canonical_name is NOT NULL, so the upsert rows carry it
+                self.db.batch.batch_upsert(
+                    "franchisors",
+                    [
+                        {
+                            "id": franchise["id"],
+                            "canonical_name": franchise["canonical_name"],
+                            "name_embedding": embedding.tolist(),
+                        }
+                        for franchise, embedding in zip(chunk, embeddings)
+                    ],
+                    conflict_columns=["id"],
+                )
+                for franchise, embedding in zip(chunk, embeddings):
+                    self.embedding_index.add(
+                        franchise["id"], franchise["canonical_name"], embedding
+                    )
+            except Exception as e:
+                logger.error(f"Failed to store embeddings for {len(chunk)} franchises: {e}")
+                errors += len(chunk)
+                continue
+            logger.info(
+                f"Stored embeddings for {min(i + chunk_size, len(franchises))}/"
+                f"{len(franchises)} franchises"
+            )
+        self.embedding_index.save()
+        return errors
+
     def _merge_franchises(self, primary_id: str, duplicate_id: str):
         """
         Merge a duplicate franchise into the primary one.
@@ -419,9 +554,12 @@ class EntityResolver:
             updates["website"] = duplicate["website"]
 
         self.db.update("franchisors", primary_id, updates)
+        get_franchisor_cache().put({**primary, **updates})
 
         # Delete the duplicate
         self.db.delete("franchisors", duplicate_id)
+        get_franchisor_cache().remove(duplicate_id)
+        self.embedding_index.remove(duplicate_id)
 
         logger.info(
             f"Merged franchise '{duplicate['canonical_name']}' ({duplicate_id}) "
@@ -0,0 +1,241 @@
+"""Global concurrency budget shared by state flows running in parallel.
+
+When several state flows run at once (``main.py run-all --parallel``) they
+compete for the same machine and accounts: browser contexts (memory), HTTP
+connections and LLM calls (API quota). A :class:`ResourceBudget` caps each
+resource globally and hands free slots out fairly: when a slot frees up it
+goes to the waiting state that currently holds the fewest slots of that
+resource, so a state with a long backlog cannot starve the others, while a
+state running alone can still use the whole budget.
+
+The caller's state is carried in a context variable, so code deep inside a
+flow (``HTTPDownloader``, ``SessionPool``, the LLM connection pool) only has
+to wrap its work in :func:`resource_slot`. Outside :func:`use_resource_budget`
+the slots are no-ops and single-state runs behave as before.
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional, Tuple
+
+
+RESOURCE_BROWSER = "browser"
+RESOURCE_HTTP = "http"
+RESOURCE_LLM = "llm"
+
+# Global caps, overridable per resource via e.g. RESOURCE_BUDGET_HTTP=20
+DEFAULT_CAPACITIES = {
+    RESOURCE_BROWSER: 4,
+    RESOURCE_HTTP: 16,
+    RESOURCE_LLM: 5,
+}
+
+DEFAULT_TENANT = "default"
+
+_current_tenant: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "resource_budget_tenant", default=DEFAULT_TENANT
+)
+_active_budget: Optional["ResourceBudget"] = None
+
+
+@dataclass
+class TenantUsage:
+    """Per-tenant accounting for one resource."""
+
+    in_use: int = 0
+    acquired: int = 0
+    released: int = 0
+    wait_seconds: float = 0.0
+    busy_seconds: float = 0.0
+    # (enqueued at, future) per waiting acquire, oldest first
+    waiters: Deque[Tuple[float, asyncio.Future]] = field(default_factory=deque)
+
+
+class FairLimiter:
+    """Counting semaphore that shares its slots fairly between tenants.
+
+    Each tenant waits in its own FIFO queue. A freed slot goes to the waiting
+    tenant holding the fewest slots, ties broken by whoever has waited
+    longest, which converges on an equal share per busy tenant.
+    """
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self._in_use = 0
+        self._usage: Dict[str, TenantUsage] = {}
+
+    def _tenant(self, tenant: str) -> TenantUsage:
+        usage = self._usage.get(tenant)
+        if usage is None:
+            usage = self._usage[tenant] = TenantUsage()
+        return usage
+
+    def _grant(self, tenant: str, usage: TenantUsage):
+        self._in_use += 1
+        usage.in_use += 1
+        usage.acquired += 1
+
+    def _wake_next(self):
+        """Hand free slots to the waiting tenants with the smallest share."""
+        while self._in_use < self.capacity:
+            candidates = []
+            for tenant, usage in self._usage.items():
+                while usage.waiters and usage.waiters[0][1].done():
+                    usage.waiters.popleft()  # cancelled waiters
+                if usage.waiters:
+                    candidates.append((usage.in_use, usage.waiters[0][0], tenant))
+            if not candidates:
+                return
+            _, _, tenant = min(candidates)
+            usage = self._usage[tenant]
+            self._grant(tenant, usage)
+            usage.waiters.popleft()[1].set_result(None)
+
+    async def acquire(self, tenant: Optional[str] = None) -> str:
+        """Wait for a slot on behalf of ``tenant`` (default: current tenant).
+
+        Returns:
+            The tenant the slot was charged to; pass it back to :meth:`release`
+        """
+        tenant = tenant or _current_tenant.get()
+        usage = self._tenant(tenant)
+        start = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        usage.waiters.append((start, waiter))
+        # Grants immediately when there is spare capacity
+        self._wake_next()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we were cancelled; give the slot back
+                self.release(tenant)
+            raise
+        usage.wait_seconds += time.monotonic() - start
+        return tenant
+
+    def release(self, tenant: str, busy_seconds: float = 0.0):
+        """Return a slot acquired for ``tenant``."""
+        usage = self._tenant(tenant)
+        usage.in_use -= 1
+        usage.released += 1
+        usage.busy_seconds += busy_seconds
+        self._in_use -= 1
+        self._wake_next()
+
+    @asynccontextmanager
+    async def slot(self, tenant: Optional[str] = None):
+        """Hold one slot for the duration of the block."""
+        tenant = await self.acquire(tenant)
+        start = time.monotonic()
+        try:
+            yield tenant
+        finally:
+            self.release(tenant, time.monotonic() - start)
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    def get_stats(self) -> dict:
+        """Get global and per-tenant usage."""
+        return {
+            "capacity": self.capacity,
+            "in_use": self._in_use,
+            "waiting": sum(len(u.waiters) for u in self._usage.values()),
+            "tenants": {
+                tenant: {
+                    "in_use": usage.in_use,
+                    "waiting": len(usage.waiters),
+                    "completed": usage.released,
+                    "wait_seconds": round(usage.wait_seconds, 3),
+                    "busy_seconds": round(usage.busy_seconds, 3),
+                }
+                for tenant, usage in self._usage.items()
+            },
+        }
+
+
+class ResourceBudget:
+    """Set of fair limiters, one per shared resource."""
+
+    def __init__(self, capacities: Optional[Dict[str, int]] = None):
+        capacities = {**DEFAULT_CAPACITIES, **(capacities or {})}
+        self.limiters: Dict[str, FairLimiter] = {
+            name: FairLimiter(name, capacity) for name, capacity in capacities.items()
+        }
+
+    @classmethod
+    def from_env(cls, **overrides: Optional[int]) -> "ResourceBudget":
+        """Build a budget from ``RESOURCE_BUDGET_<NAME>`` env vars and overrides."""
+        capacities = {}
+        for name, default in DEFAULT_CAPACITIES.items():
+            value = overrides.get(name)
+            if value is None:
+                value = int(os.getenv(f"RESOURCE_BUDGET_{name.upper()}", default))
+            capacities[name] = value
+        return cls(capacities)
+
+    def limiter(self, resource: str) -> FairLimiter:
+        return self.limiters[resource]
+
+    def get_stats(self) -> Dict[str, dict]:
+        return {name: limiter.get_stats() for name, limiter in self.limiters.items()}
+
+    def tenant_stats(self, tenant: str) -> Dict[str, dict]:
+        """Usage of every resource by one tenant."""
+        stats = {}
+        for name, limiter in self.limiters.items():
+            stats[name] = limiter.get_stats()["tenants"].get(
+                tenant, {"in_use": 0, "waiting": 0, "completed": 0,
+                         "wait_seconds": 0.0, "busy_seconds": 0.0}
+            )
+        return stats
+
+
+def get_resource_budget() -> Optional[ResourceBudget]:
+    """Return the active budget, or None when running unconstrained."""
+    return _active_budget
+
+
+@contextmanager
+def use_resource_budget(budget: Optional[ResourceBudget]):
+    """Make ``budget`` the active budget for the duration of the block."""
+    global _active_budget
+    previous = _active_budget
+    _active_budget = budget
+    try:
+        yield budget
+    finally:
+        _active_budget = previous
+
+
+@contextmanager
+def tenant_scope(tenant: str):
+    """Charge resource slots taken in this block (and tasks it spawns) to ``tenant``."""
+    token = _current_tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+def current_tenant() -> str:
+    return _current_tenant.get()
+
+
+@asynccontextmanager
+async def resource_slot(resource: str):
+    """Hold a slot of ``resource`` from the active budget, if there is one."""
+    budget = _active_budget
+    if budget is None or resource not in budget.limiters:
+        yield None
+        return
+    async with budget.limiter(resource).slot() as tenant:
+        yield tenant
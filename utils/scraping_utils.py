@@ -1,15 +1,111 @@
-"""Common utilities for web scraping operations."""
+"""Common utilities for web scraping operations.
+
+The field parsers (dates, filing numbers, file sizes, state codes, franchise
+names, addresses) use precompiled patterns and memoize their results, since
+scraped tables repeat the same values many times. Each also has a batch
+variant taking a pandas Series (``parse_dates``, ``extract_filing_numbers``,
+...) that parses every distinct value of a column once, with vectorized
+pandas operations where the parser allows it.
+"""
 
 import re
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from urllib.parse import urljoin, urlparse
 
+import pandas as pd
+
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Distinct values remembered per memoized parser
+PARSE_CACHE_SIZE = 65536
+
+# Common date formats in franchise filings, tried in order
+DATE_FORMATS = (
+    "%m/%d/%Y",  # 12/31/2023
+    "%m-%d-%Y",  # 12-31-2023
+    "%Y-%m-%d",  # 2023-12-31
+    "%Y/%m/%d",  # 2023/12/31
+    "%B %d, %Y",  # December 31, 2023
+    "%b %d, %Y",  # Dec 31, 2023
+    "%d-%b-%Y",  # 31-Dec-2023
+    "%m/%d/%y",  # 12/31/23
+    "%m-%d-%y",  # 12-31-23
+    "%Y%m%d",  # 20231231
+    "%b %Y",  # Dec 2023
+    "%B %Y",  # December 2023
+)
+_YEAR_RE = re.compile(r"(20\d{2})")
+
+# Common filing number patterns, tried in order
+_FILING_NUMBER_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"Filing Number[:\s]*#?\s*(\d{4,})",
+        r"Registration Number[:\s]*#?\s*(\d{4,})",
+        r"File Number[:\s]*#?\s*(\d{4,})",
+        r"File No[.:\s]*#?\s*(\d{4,})",
+        r"Number[:\s]*#?\s*(\d{4,})",
+        r"#\s*(\d{4,})",
+        r"\b(\d{6,})\b",  # Any 6+ digit number
+    )
+)
+
+_FILE_SIZE_RE = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(B|KB|MB|GB|BYTES?|KILOBYTES?|MEGABYTES?|GIGABYTES?)"
+)
+_FILE_SIZE_MULTIPLIERS = {
+    "B": 1,
+    "BYTE": 1,
+    "BYTES": 1,
+    "KB": 1024,
+    "KILOBYTE": 1024,
+    "KILOBYTES": 1024,
+    "MB": 1024 * 1024,
+    "MEGABYTE": 1024 * 1024,
+    "MEGABYTES": 1024 * 1024,
+    "GB": 1024 * 1024 * 1024,
+    "GIGABYTE": 1024 * 1024 * 1024,
+    "GIGABYTES": 1024 * 1024 * 1024,
+}
+
+# All US state codes, including DC
+STATE_CODES = frozenset(
+    (
+        "AL AK AZ AR CA CO CT DE FL GA HI ID IL IN IA KS KY LA ME MD MA MI MN MS "
+        "MO MT NE NV NH NJ NM NY NC ND OH OK OR PA RI SC SD TN TX UT VT VA WA WV "
+        "WI WY DC"
+    ).split()
+)
+# The first standalone two-letter word that is a state code
+_STATE_CODE_RE = re.compile(r"\b(" + "|".join(sorted(STATE_CODES)) + r")\b")
+
+_HTML_ENTITIES = (
+    ("&amp;", "&"),
+    ("&lt;", "<"),
+    ("&gt;", ">"),
+    ("&#39;", "'"),
+    ("&quot;", '"'),
+    ("&nbsp;", " "),
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+_NAME_SUFFIX_RE = re.compile(
+    r"\s*,?\s*(LLC|L\.L\.C\.|Inc\.|INC\.|Corp\.|Corporation)$", re.IGNORECASE
+)
+_TRAILING_PARENS_RE = re.compile(r"\s*\([^)]*\)$")
+_NAME_CASE_FIXES = (
+    (re.compile(r"\bLlc\b"), "LLC"),
+    (re.compile(r"\bInc\b"), "Inc"),
+    (re.compile(r"\bCorp\b"), "Corp"),
+    (re.compile(r"\bFdd\b"), "FDD"),
+)
+_ZIP_RE = re.compile(r"\b(\d{5}(?:-\d{4})?)\b")
+ADDRESS_FIELDS = ("full_address", "street", "city", "state", "zip")
+
 
 def sanitize_filename(name: str, max_length: int = 200) -> str:
     """
@@ -66,6 +162,7 @@ def get_default_headers() -> Dict[str, str]:
     }
 
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse_date_formats(date_string: str) -> Optional[datetime]:
     """
     Parse various date formats commonly found in franchise filings.
@@ -82,30 +179,14 @@ def parse_date_formats(date_string: str) -> Optional[datetime]:
     # Clean the string
     date_string = date_string.strip()
 
-    # Common date formats in franchise filings
-    date_formats = [
-        "%m/%d/%Y",  # 12/31/2023
-        "%m-%d-%Y",  # 12-31-2023
-        "%Y-%m-%d",  # 2023-12-31
-        "%Y/%m/%d",  # 2023/12/31
-        "%B %d, %Y",  # December 31, 2023
-        "%b %d, %Y",  # Dec 31, 2023
-        "%d-%b-%Y",  # 31-Dec-2023
-        "%m/%d/%y",  # 12/31/23
-        "%m-%d-%y",  # 12-31-23
-        "%Y%m%d",  # 20231231
-        "%b %Y",  # Dec 2023
-        "%B %Y",  # December 2023
-    ]
-
-    for fmt in date_formats:
+    for fmt in DATE_FORMATS:
         try:
             return datetime.strptime(date_string, fmt)
         except ValueError:
             continue
 
     # Try to extract year if nothing else works
-    year_match = re.search(r"20\d{2}", date_string)
+    year_match = _YEAR_RE.search(date_string)
     if year_match:
         try:
             year = int(year_match.group())
@@ -117,6 +198,7 @@ def parse_date_formats(date_string: str) -> Optional[datetime]:
     return None
 
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def extract_filing_number(text: str) -> Optional[str]:
     """
     Extract filing number from text using common patterns.
@@ -130,25 +212,15 @@ def extract_filing_number(text: str) -> Optional[str]:
     if not text:
         return None
 
-    # Common filing number patterns
-    patterns = [
-        r"Filing Number[:\s]*#?\s*(\d{4,})",
-        r"Registration Number[:\s]*#?\s*(\d{4,})",
-        r"File Number[:\s]*#?\s*(\d{4,})",
-        r"File No[.:\s]*#?\s*(\d{4,})",
-        r"Number[:\s]*#?\s*(\d{4,})",
-        r"#\s*(\d{4,})",
-        r"\b(\d{6,})\b",  # Any 6+ digit number
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _FILING_NUMBER_PATTERNS:
+        match = pattern.search(text)
         if match:
             return match.group(1)
 
     return None
 
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse_file_size(size_string: str) -> Optional[int]:
     """
     Parse file size from string to bytes.
@@ -166,10 +238,7 @@ def parse_file_size(size_string: str) -> Optional[int]:
     size_string = size_string.strip().upper()
 
     # Extract number and unit
-    match = re.search(
-        r"(\d+(?:\.\d+)?)\s*(B|KB|MB|GB|BYTES?|KILOBYTES?|MEGABYTES?|GIGABYTES?)",
-        size_string,
-    )
+    match = _FILE_SIZE_RE.search(size_string)
     if not match:
         return None
 
@@ -177,22 +246,7 @@ def parse_file_size(size_string: str) -> Optional[int]:
     unit = match.group(2)
 
     # Convert to bytes
-    multipliers = {
-        "B": 1,
-        "BYTE": 1,
-        "BYTES": 1,
-        "KB": 1024,
-        "KILOBYTE": 1024,
-        "KILOBYTES": 1024,
-        "MB": 1024 * 1024,
-        "MEGABYTE": 1024 * 1024,
-        "MEGABYTES": 1024 * 1024,
-        "GB": 1024 * 1024 * 1024,
-        "GIGABYTE": 1024 * 1024 * 1024,
-        "GIGABYTES": 1024 * 1024 * 1024,
-    }
-
-    multiplier = multipliers.get(unit, 1)
+    multiplier = _FILE_SIZE_MULTIPLIERS.get(unit, 1)
     return int(size_value * multiplier)
 
 
@@ -223,6 +277,7 @@ def normalize_url(url: str, base_url: str) -> str:
     return urljoin(base_url, url)
 
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def extract_state_code(text: str) -> Optional[str]:
     """
     Extract US state code from text.
@@ -236,73 +291,15 @@ def extract_state_code(text: str) -> Optional[str]:
     if not text:
         return None
 
-    # All US state codes
-    state_codes = {
-        "AL",
-        "AK",
-        "AZ",
-        "AR",
-        "CA",
-        "CO",
-        "CT",
-        "DE",
-        "FL",
-        "GA",
-        "HI",
-        "ID",
-        "IL",
-        "IN",
-        "IA",
-        "KS",
-        "KY",
-        "LA",
-        "ME",
-        "MD",
-        "MA",
-        "MI",
-        "MN",
-        "MS",
-        "MO",
-        "MT",
-        "NE",
-        "NV",
-        "NH",
-        "NJ",
-        "NM",
-        "NY",
-        "NC",
-        "ND",
-        "OH",
-        "OK",
-        "OR",
-        "PA",
-        "RI",
-        "SC",
-        "SD",
-        "TN",
-        "TX",
-        "UT",
-        "VT",
-        "VA",
-        "WA",
-        "WV",
-        "WI",
-        "WY",
-        "DC",  # Include DC
-    }
-
-    # Look for state codes in the text - match only if already uppercase or standalone
     # First try to find state codes that are already uppercase (more likely to be actual state codes)
-    uppercase_matches = re.findall(r"\b[A-Z]{2}\b", text)
-    for match in uppercase_matches:
-        if match in state_codes:
-            return match
+    match = _STATE_CODE_RE.search(text)
+    if match:
+        return match.group(1)
 
-    # If no uppercase matches, try the original approach
-    words = re.findall(r"\b[A-Z]{2}\b", text.upper())
-    for word in words:
-        if word in state_codes:
-            return word
+    # If no uppercase matches, accept state codes in any case
+    match = _STATE_CODE_RE.search(text.upper())
+    if match:
+        return match.group(1)
 
     return None
 
@@ -321,17 +318,11 @@ def clean_text(text: str) -> str:
         return ""
 
     # Decode HTML entities if present
-    text = (
-        text.replace("&amp;", "&")
-        .replace("&lt;", "<")
-        .replace("&gt;", ">")
-        .replace("&#39;", "'")
-        .replace("&quot;", '"')
-        .replace("&nbsp;", " ")
-    )
+    for entity, char in _HTML_ENTITIES:
+        text = text.replace(entity, char)
 
     # Remove extra whitespace
-    text = re.sub(r"\s+", " ", text)
+    text = _WHITESPACE_RE.sub(" ", text)
 
     # Strip leading/trailing whitespace
     text = text.strip()
@@ -339,6 +330,7 @@ def clean_text(text: str) -> str:
     return text
 
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def format_franchise_name(name: str) -> str:
     """
     Format franchise name for consistency.
@@ -360,22 +352,15 @@ def format_franchise_name(name: str) -> str:
         return "Unknown Franchise"
 
     # Common patterns to clean up
-    name = re.sub(
-        r"\s*,?\s*(LLC|L\.L\.C\.|Inc\.|INC\.|Corp\.|Corporation)$",
-        "",
-        name,
-        flags=re.IGNORECASE,
-    )
-    name = re.sub(r"\s*\([^)]*\)$", "", name)  # Remove trailing parentheses
+    name = _NAME_SUFFIX_RE.sub("", name)
+    name = _TRAILING_PARENS_RE.sub("", name)  # Remove trailing parentheses
 
     # Ensure proper capitalization for common words
     name = name.title()
 
     # Fix common issues with title case
-    name = re.sub(r"\bLlc\b", "LLC", name)
-    name = re.sub(r"\bInc\b", "Inc", name)
-    name = re.sub(r"\bCorp\b", "Corp", name)
-    name = re.sub(r"\bFdd\b", "FDD", name)
+    for pattern, replacement in _NAME_CASE_FIXES:
+        name = pattern.sub(replacement, name)
 
     return name
 
@@ -476,27 +461,28 @@ def parse_address(address_text: str) -> Dict[str, str]:
     Returns:
         Dictionary with address components
     """
-    result = {
-        "full_address": clean_text(address_text),
-        "street": "",
-        "city": "",
-        "state": "",
-        "zip": "",
-    }
+    return dict(zip(ADDRESS_FIELDS, _parse_address(address_text)))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_address(address_text: str) -> Tuple[str, str, str, str, str]:
+    """Memoized address parsing; returns the ADDRESS_FIELDS values in order."""
+    full_address = clean_text(address_text)
+    street = city = state = zip_code = ""
 
     if not address_text:
-        return result
+        return full_address, street, city, state, zip_code
 
     # Extract ZIP code
-    zip_match = re.search(r"\b(\d{5}(?:-\d{4})?)\b", address_text)
+    zip_match = _ZIP_RE.search(address_text)
     if zip_match:
-        result["zip"] = zip_match.group(1)
+        zip_code = zip_match.group(1)
         address_text = address_text.replace(zip_match.group(0), "")
 
     # Extract state
     state_code = extract_state_code(address_text)
     if state_code:
-        result["state"] = state_code
+        state = state_code
         # Remove state from text for further parsing
         address_text = re.sub(
             rf"\b{state_code}\b", "", address_text, flags=re.IGNORECASE
@@ -505,13 +491,13 @@ def parse_address(address_text: str) -> Dict[str, str]:
     # Split remaining text
     parts = [p.strip() for p in address_text.split(",")]
     if len(parts) >= 2:
-        result["street"] = parts[0]
-        result["city"] = parts[1] if len(parts) > 1 else ""
+        street = parts[0]
+        city = parts[1] if len(parts) > 1 else ""
     elif parts:
         # If no commas, try to guess
-        result["street"] = parts[0]
+        street = parts[0]
 
-    return result
+    return full_address, street, city, state, zip_code
 
 
 def calculate_retry_delay(
@@ -530,3 +516,141 @@ def calculate_retry_delay(
     """
     delay = base_delay * (2**attempt)
     return min(delay, max_delay)
+
+
+# Column-wise variants for scraped tables. Each parses the distinct values of
+# a Series once and maps the results back onto the original index.
+
+
+def _text_values(values: pd.Series) -> pd.Series:
+    """Column as str, with "" for missing values."""
+    return values.astype(object).where(values.notna(), "").astype(str)
+
+
+def _map_distinct(values: pd.Series, parse: Callable[[pd.Series], Any]):
+    """Run a parser over the distinct text values of a column only."""
+    codes, uniques = pd.factorize(_text_values(values))
+    parsed = parse(pd.Series(uniques, dtype=object)).take(codes)
+    parsed.index = values.index
+    return parsed
+
+
+def _first_match(text: pd.Series, patterns) -> pd.Series:
+    """Group 1 of the first pattern that matches each value, else NaN."""
+    result = pd.Series(float("nan"), index=text.index, dtype=object)
+    for pattern in patterns:
+        pending = result.isna() & (text != "")
+        if not pending.any():
+            break
+        result[pending] = text[pending].str.extract(pattern, expand=False)
+    return result
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """
+    Parse a column of dates; the batch variant of ``parse_date_formats``.
+
+    Args:
+        values: Series of date strings (other values are converted to str)
+
+    Returns:
+        datetime64 Series on the same index, NaT where parsing fails
+    """
+
+    def parse(text: pd.Series) -> pd.Series:
+        text = text.str.strip()
+        parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[us]")
+        for fmt in DATE_FORMATS:
+            pending = parsed.isna() & (text != "")
+            if not pending.any():
+                return parsed
+            parsed[pending] = pd.to_datetime(text[pending], format=fmt, errors="coerce")
+        # Fall back to January 1st of a year mentioned anywhere
+        pending = parsed.isna() & (text != "")
+        if pending.any():
+            years = text[pending].str.extract(_YEAR_RE, expand=False)
+            parsed[pending] = pd.to_datetime(years + "-01-01", format="%Y-%m-%d", errors="coerce")
+        return parsed
+
+    return _map_distinct(values, parse)
+
+
+def extract_filing_numbers(values: pd.Series) -> pd.Series:
+    """
+    Extract filing numbers from a column; the batch variant of ``extract_filing_number``.
+
+    Returns:
+        Series of filing number strings, None where none is found
+    """
+
+    def parse(text: pd.Series) -> pd.Series:
+        numbers = _first_match(text, _FILING_NUMBER_PATTERNS)
+        return numbers.where(numbers.notna(), None)
+
+    return _map_distinct(values, parse)
+
+
+def parse_file_sizes(values: pd.Series) -> pd.Series:
+    """
+    Parse a column of file sizes; the batch variant of ``parse_file_size``.
+
+    Returns:
+        Nullable Int64 Series of sizes in bytes
+    """
+
+    def parse(text: pd.Series) -> pd.Series:
+        parts = text.str.strip().str.upper().str.extract(_FILE_SIZE_RE)
+        sizes = pd.to_numeric(parts[0], errors="coerce") * parts[1].map(_FILE_SIZE_MULTIPLIERS)
+        # Truncate like int() on the scalar path
+        return sizes.floordiv(1).astype("Int64")
+
+    return _map_distinct(values, parse)
+
+
+def extract_state_codes(values: pd.Series) -> pd.Series:
+    """
+    Extract state codes from a column; the batch variant of ``extract_state_code``.
+
+    Returns:
+        Series of two-letter state codes, None where none is found
+    """
+
+    def parse(text: pd.Series) -> pd.Series:
+        codes = text.str.extract(_STATE_CODE_RE, expand=False)
+        pending = codes.isna() & (text != "")
+        if pending.any():
+            codes[pending] = text[pending].str.upper().str.extract(_STATE_CODE_RE, expand=False)
+        return codes.astype(object).where(codes.notna(), None)
+
+    return _map_distinct(values, parse)
+
+
+def format_franchise_names(values: pd.Series) -> pd.Series:
+    """
+    Format a column of franchise names; the batch variant of ``format_franchise_name``.
+
+    Missing values become "Unknown Franchise", like empty names.
+    """
+
+    def parse(text: pd.Series) -> pd.Series:
+        return text.map(format_franchise_name)
+
+    return _map_distinct(values, parse)
+
+
+def parse_addresses(values: pd.Series) -> pd.DataFrame:
+    """
+    Parse a column of addresses; the batch variant of ``parse_address``.
+
+    Returns:
+        DataFrame with one column per address component, on the same index
+    """
+
+    def parse(text: pd.Series) -> pd.DataFrame:
+        return pd.DataFrame(
+            [_parse_address(address) for address in text],
+            columns=list(ADDRESS_FIELDS),
+            index=text.index,
+        )
+
+    return _map_distinct(values, parse)
@@ -1,9 +1,10 @@
 """Base state portal scraping flow with common functionality."""
 
 import asyncio
+import hashlib
 import time
 from datetime import datetime
-from typing import List, Optional, Type, Dict, Any
+from typing import List, Optional, Set, Tuple, Type, Dict, Any
 from uuid import UUID, uuid4
 from abc import ABC, abstractmethod
 
@@ -11,12 +12,29 @@ from prefect import flow, task, get_run_logger
 from prefect.task_runners import ConcurrentTaskRunner
 
 from scrapers.base.base_scraper import BaseScraper, DocumentMetadata, create_scraper
+from scrapers.base.download_queue import (
+    STATE_FAILED,
+    STATE_STORED,
+    DownloadJob,
+    DownloadQueue,
+)
 from scrapers.base.exceptions import WebScrapingException
+from scrapers.base.franchisor_cache import get_franchisor_cache, get_fresh_franchisor_cache
+from scrapers.base.http_downloader import HTTPDownloader, log_download_progress
+from scrapers.base.known_documents import get_known_documents
+from scrapers.base.pdf_cache import PDFCache
+from scrapers.base.registration_snapshot import (
+    DOCUMENT_FIELDS,
+    RegistrationSnapshot,
+    SnapshotEntry,
+    compute_row_hash,
+)
 from models.scrape_metadata import ScrapeMetadata
 from models.franchisor import Franchisor
 from models.fdd import FDD, ProcessingStatus
 from storage.database.manager import get_database_manager, serialize_for_db
 from utils.logging import PipelineLogger
+from utils.resource_budget import RESOURCE_BROWSER, resource_slot
 
 
 class StateConfig:
@@ -81,8 +99,8 @@ async def scrape_state_portal(
             retry_attempt=0,  # Will be updated on retries
         )
 
-        # Create and run scraper
-        async with create_scraper(
+        # Create and run scraper; its browser counts against the global budget
+        async with resource_slot(RESOURCE_BROWSER), create_scraper(
             state_config.scraper_class, prefect_run_id=prefect_run_id
         ) as scraper:
             pipeline_logger.debug("scraper_created", scraper_type=type(scraper).__name__)
@@ -199,6 +217,7 @@ async def process_state_documents(
                             "download_url": doc.download_url,
                             "file_size": doc.file_size,
                             "additional_metadata": doc.additional_metadata,
+                            "row_hash": compute_row_hash(doc, DOCUMENT_FIELDS),
                         },
                         prefect_run_id=prefect_run_id,
                         scraped_at=datetime.utcnow(),
@@ -267,16 +286,165 @@ async def process_state_documents(
         raise
 
 
+# Documents are downloaded in chunks of this size; each chunk is resolved
+# against the database with set-based queries and bulk writes.
+RESOLVE_BATCH_SIZE = 200
+# Values per ``IN (...)`` filter, keeping PostgREST query strings short.
+LOOKUP_CHUNK_SIZE = 200
+# Workers draining the download queue concurrently
+DOWNLOAD_WORKERS = 2
+# Seconds before a duplicate of a document another worker is still storing
+# is claimed again; by then that document's FDD is usually written
+DUPLICATE_DEFER_SECONDS = 60.0
+
+
+async def fetch_records_by_values(
+    db_manager, table_name: str, column: str, values: List[Any]
+) -> Dict[Any, Dict[str, Any]]:
+    """Fetch the records whose ``column`` is one of ``values``.
+
+    Returns:
+        Mapping of column value to the first matching record
+    """
+    unique = list(dict.fromkeys(value for value in values if value))
+    found: Dict[Any, Dict[str, Any]] = {}
+    for i in range(0, len(unique), LOOKUP_CHUNK_SIZE):
+        records = await db_manager.get_records_by_filter(
+            table_name, {column: unique[i:i + LOOKUP_CHUNK_SIZE]}
+        )
+        for record in records:
+            found.setdefault(record[column], record)
+    return found
+
+
+async def resolve_franchisor_ids(db_manager, names: List[str]) -> Dict[str, str]:
+    """Map canonical names to franchisor IDs, creating missing ones in bulk.
+
+    Names the process-wide franchisor cache knows skip the database; the
+    rest are looked up, and what is found or created is written through.
+    """
+    cache = await asyncio.to_thread(get_fresh_franchisor_cache, db_manager)
+    existing = cache.get_by_canonical_names(names) if cache else {}
+    fetched = await fetch_records_by_values(
+        db_manager,
+        "franchisors",
+        "canonical_name",
+        [name for name in names if name not in existing],
+    )
+    get_franchisor_cache().put_many(fetched.values())
+    existing.update(fetched)
+    missing = [name for name in dict.fromkeys(names) if name and name not in existing]
+    if missing:
+        now = datetime.utcnow()
+        await db_manager.batch.batch_upsert(
+            "franchisors",
+            [
+                serialize_for_db(
+                    Franchisor(
+                        id=uuid4(), canonical_name=name, created_at=now, updated_at=now
+                    ).model_dump()
+                )
+                for name in missing
+            ],
+            conflict_columns=["canonical_name"],
+        )
+        # Re-read so IDs reflect rows a concurrent run may have created first
+        created = await fetch_records_by_values(
+            db_manager, "franchisors", "canonical_name", missing
+        )
+        get_franchisor_cache().put_many(created.values())
+        existing.update(created)
+    return {name: str(record["id"]) for name, record in existing.items()}
+
+
+def document_job_id(
+    state_code: str,
+    filing_number: Optional[str],
+    row_hash: Optional[str],
+    download_url: Optional[str],
+) -> Optional[str]:
+    """Stable download job key for a document, or None if nothing identifies it."""
+    if filing_number and row_hash:
+        return f"{state_code}:{filing_number}:{row_hash}"
+    if download_url:
+        return f"{state_code}:url:{hashlib.sha256(download_url.encode()).hexdigest()[:32]}"
+    return None
+
+
+def download_job_id(state_code: str, metadata: ScrapeMetadata) -> str:
+    """Stable download job key for a document, the same across runs."""
+    return document_job_id(
+        state_code,
+        metadata.filing_metadata.get("filing_number"),
+        metadata.filing_metadata.get("row_hash"),
+        metadata.filing_metadata.get("download_url"),
+    ) or f"{state_code}:id:{metadata.id}"
+
+
+def skip_finished_filings(
+    state_code: str,
+    entries: List[SnapshotEntry],
+    snapshot: RegistrationSnapshot,
+    queue: DownloadQueue,
+    retry_failed: bool = False,
+) -> Tuple[List[SnapshotEntry], Dict[str, int]]:
+    """Drop snapshot rows whose download jobs already finished.
+
+    A run that stopped between storing a document and confirming its
+    snapshot row leaves the row pending; it is confirmed here instead of
+    creating scrape metadata for it again. Rows whose jobs failed for good
+    are skipped until ``retry_failed`` is set.
+
+    Returns:
+        Entries still to process, and counts of ``stored`` and ``failed`` rows skipped
+    """
+    keyed = [
+        (
+            entry,
+            document_job_id(
+                state_code, entry.record.filing_number, entry.row_hash, entry.record.download_url
+            ),
+        )
+        for entry in entries
+    ]
+    states = queue.get_states(job_id for _, job_id in keyed if job_id)
+    remaining, stored, failed = [], [], []
+    for entry, job_id in keyed:
+        state = states.get(job_id)
+        if state == STATE_STORED:
+            stored.append(entry)
+        elif state == STATE_FAILED and not retry_failed:
+            failed.append(entry)
+        else:
+            remaining.append(entry)
+    snapshot.mark_stored_many((e.key, e.row_hash) for e in stored)
+    return (
+        remaining,
+        {"stored": len(stored), "failed": len(failed)},
+    )
+
+
 @task(name="download_state_documents", retries=3)
 async def download_state_documents(
-    metadata_list: List[ScrapeMetadata], state_config: StateConfig, prefect_run_id: UUID
+    metadata_list: List[ScrapeMetadata],
+    state_config: StateConfig,
+    prefect_run_id: UUID,
+    download_workers: int = DOWNLOAD_WORKERS,
+    retry_failed: bool = False,
 ) -> List[str]:
     """Download FDD documents and store in Google Drive.
 
+    Every document is journaled as a job in the download queue before any
+    work starts, so a crashed or killed run picks up where it stopped: jobs
+    already stored are not downloaded again, and jobs leased by a dead worker
+    become claimable once their lease expires.
+
     Args:
         metadata_list: List of scrape metadata records
         state_config: State-specific configuration
         prefect_run_id: Prefect run ID for tracking
+        download_workers: Concurrent workers draining the queue
+        retry_failed: Give jobs that exhausted their attempts another try
 
     Returns:
         List of Google Drive file paths for downloaded documents
@@ -306,223 +474,466 @@ async def download_state_documents(
         duplicate_count = 0
         error_count = 0
         total_bytes_downloaded = 0
-
-        # Create scraper for downloading
-        async with create_scraper(
-            state_config.scraper_class, prefect_run_id=prefect_run_id
-        ) as scraper:
-            pipeline_logger.debug("download_scraper_created", scraper_type=type(scraper).__name__)
-            
-            for i, metadata in enumerate(metadata_list):
-                doc_start_time = time.time()
-                
-                try:
+        source = state_config.state_code
+        snapshot = RegistrationSnapshot(source)
+        # sha256 -> FDD id for documents known to the database or stored this run
+        known_hashes: Dict[str, str] = {}
+        # Hashes uploaded by a chunk whose FDD records are not written yet
+        in_flight_hashes: Set[str] = set()
+        drive_manager = None
+        state_folder_id = None
+
+        # Journal one job per document. Unfinished jobs of an interrupted
+        # earlier run are resumed; jobs already stored are not redone.
+        queue = DownloadQueue()
+        if retry_failed:
+            queue.requeue_failed(source)
+        current_metadata = {download_job_id(source, m): m for m in metadata_list}
+        enqueued = queue.enqueue(
+            source,
+            [
+                (job_id, m.filing_metadata.get("download_url"), m.model_dump(mode="json"))
+                for job_id, m in current_metadata.items()
+            ],
+        )
+        # Jobs stored by a run that stopped before confirming their snapshot
+        # rows; confirm the rows so later runs see them as unchanged
+        job_states = queue.get_states(current_metadata)
+        snapshot.mark_stored_many(
+            (m.filing_metadata["filing_number"], m.filing_metadata["row_hash"])
+            for job_id, m in current_metadata.items()
+            if job_states.get(job_id) == STATE_STORED
+            and m.filing_metadata.get("filing_number")
+            and m.filing_metadata.get("row_hash")
+        )
+        pending_jobs = queue.pending_count(source)
+        pipeline_logger.info(
+            "download_jobs_enqueued",
+            pending_jobs=pending_jobs,
+            workers=download_workers,
+            **enqueued,
+        )
+        if not pending_jobs:
+            logger.info(f"No {state_config.state_name} documents waiting for download")
+            return downloaded_files
+        download_workers = max(1, download_workers)
+        claim_size = max(1, min(RESOLVE_BATCH_SIZE, -(-pending_jobs // download_workers)))
+
+        # Franchisors are resolved per chunk, and only for documents that were
+        # actually stored, so failed downloads and duplicates create none
+        franchisor_ids: Dict[str, str] = {}
+        async with get_database_manager() as db_manager:
+            # Bring the local filter of stored documents up to date, so hashes
+            # it has never seen skip the database duplicate check
+            known_documents = get_known_documents()
+            try:
+                await asyncio.to_thread(known_documents.refresh, db_manager)
+            except Exception as e:
+                # A stale filter could call a stored document new; check
+                # every hash against the database instead
+                known_documents = None
+                pipeline_logger.warning(
+                    "known_documents_refresh_failed", error=str(e), error_type=type(e).__name__
+                )
+
+        def get_state_folder_id() -> str:
+            """Look up the state's Drive folder once, on first upload."""
+            nonlocal drive_manager, state_folder_id
+            if state_folder_id is None:
+                from storage.google_drive import get_drive_manager
+
+                drive_manager = get_drive_manager()
+                root_folder_id = drive_manager.settings.gdrive_folder_id
+                state_folder_id = drive_manager.get_or_create_folder(
+                    state_config.folder_name, parent_id=root_folder_id
+                )
+            return state_folder_id
+
+        async def process_jobs(jobs: List[DownloadJob], worker_id: str):
+            """Download a claimed chunk of jobs, then resolve and store it in bulk."""
+            nonlocal skipped_count, duplicate_count, error_count
+            nonlocal total_bytes_downloaded
+
+            batch = [
+                (job, current_metadata.get(job.job_id) or ScrapeMetadata.model_validate(job.payload))
+                for job in jobs
+            ]
+
+            downloaded = []  # (job, metadata, streamed, start time)
+            # sha256 -> FDD id of this chunk's uploads, published to
+            # known_hashes only once the chunk's FDDs are written
+            chunk_hashes: Dict[str, str] = {}
+            try:
+                for position, (job, metadata) in enumerate(batch):
+                    doc_start_time = time.time()
                     franchise_name = metadata.filing_metadata.get(
                         "franchise_name", "unknown"
                     )
-                    download_url = metadata.filing_metadata.get("download_url")
-                    file_size = metadata.filing_metadata.get("file_size", 0)
-
-                    if not download_url:
-                        logger.warning(f"No download URL for {franchise_name}")
-                        skipped_count += 1
-                        pipeline_logger.debug(
-                            "document_skipped_no_url",
-                            franchise_name=franchise_name,
-                            metadata_id=str(metadata.id),
-                        )
-                        continue
-
-                    logger.debug(
-                        f"Downloading document {i+1}/{len(metadata_list)}: {franchise_name}"
-                    )
-                    
-                    pipeline_logger.debug(
-                        "downloading_document",
-                        document_index=i+1,
-                        total_documents=len(metadata_list),
-                        franchise_name=franchise_name,
-                        download_url=download_url,
-                        expected_size=file_size,
-                        progress_percentage=(i / len(metadata_list) * 100),
-                    )
-
-                    # Download document content
-                    content = await scraper.download_document(download_url)
-                    total_bytes_downloaded += len(content)
-                    
-                    pipeline_logger.debug(
-                        "document_downloaded",
-                        franchise_name=franchise_name,
-                        content_size=len(content),
-                        download_time_seconds=time.time() - doc_start_time,
-                    )
-
-                    # Compute hash for deduplication
-                    doc_hash = scraper.compute_document_hash(content)
-                    
-                    pipeline_logger.debug(
-                        "document_hash_computed",
-                        franchise_name=franchise_name,
-                        sha256_hash=doc_hash[:16],
-                    )
 
-                    # Get database manager
-                    async with get_database_manager() as db_manager:
-                        # Check for duplicates in database
-                        existing_fdd = await db_manager.get_records_by_filter(
-                            "fdds", {"sha256_hash": doc_hash}
-                        )
+                    try:
+                        download_url = metadata.filing_metadata.get("download_url")
+                        file_size = metadata.filing_metadata.get("file_size", 0)
 
-                        if existing_fdd:
-                            duplicate_count += 1
-                            logger.info(
-                                f"Document already exists in database (hash: {doc_hash[:16]})"
-                            )
-                            pipeline_logger.info(
-                                "duplicate_document_found",
+                        if not download_url:
+                            logger.warning(f"No download URL for {franchise_name}")
+                            skipped_count += 1
+                            queue.fail(job.job_id, worker_id, "No download URL", retry=False)
+                            pipeline_logger.debug(
+                                "document_skipped_no_url",
                                 franchise_name=franchise_name,
-                                sha256_hash=doc_hash[:16],
-                                existing_fdd_id=existing_fdd[0]["id"],
                                 metadata_id=str(metadata.id),
                             )
-                            # Update scrape metadata to point to existing FDD
-                            await db_manager.update_record(
-                                "scrape_metadata",
-                                str(metadata.id),
-                                {
-                                    "fdd_id": str(existing_fdd[0]["id"]),
-                                    "scrape_status": "skipped",
-                                    "failure_reason": "Duplicate document",
-                                },
-                            )
                             continue
 
-                        # Check if franchisor exists
-                        existing_franchisor = await db_manager.get_records_by_filter(
-                            "franchisors", {"canonical_name": franchise_name}
+                        logger.debug(
+                            f"Downloading document for {franchise_name} "
+                            f"(attempt {job.attempts}/{job.max_attempts})"
                         )
 
-                        if existing_franchisor:
-                            franchisor_id = existing_franchisor[0]["id"]
-                        else:
-                            # Create new franchisor
-                            franchisor = Franchisor(
-                                id=uuid4(),
-                                canonical_name=franchise_name,
-                                created_at=datetime.utcnow(),
-                                updated_at=datetime.utcnow(),
-                            )
-                            franchisor_dict = serialize_for_db(franchisor.model_dump())
-                            await db_manager.batch.batch_upsert(
-                                "franchisors",
-                                [franchisor_dict],
-                                conflict_columns=["canonical_name"],
-                            )
-                            franchisor_id = str(franchisor.id)
-
-                        # Create FDD record
-                        fdd = FDD(
-                            id=metadata.fdd_id,
-                            franchise_id=UUID(franchisor_id),
-                            source_name=state_config.state_code,
-                            processing_status=ProcessingStatus.PENDING,
-                            issue_date=metadata.filing_metadata.get(
-                                "filing_date", datetime.utcnow().date()
-                            ),
-                            document_type=metadata.filing_metadata.get(
-                                "document_type", "Initial"
-                            ),
-                            filing_state=state_config.state_code,
-                            drive_path="",  # Will be updated after upload
-                            drive_file_id="",  # Will be updated after upload
-                            created_at=datetime.utcnow(),
-                            updated_at=datetime.utcnow(),
+                        pipeline_logger.debug(
+                            "downloading_document",
+                            job_id=job.job_id,
+                            attempt=job.attempts,
+                            franchise_name=franchise_name,
+                            download_url=download_url,
+                            expected_size=file_size,
                         )
-                        fdd_dict = serialize_for_db(fdd.model_dump())
-                        await db_manager.batch.batch_upsert("fdds", [fdd_dict])
 
-                    # Upload to Google Drive
-                    from storage.google_drive import get_drive_manager
+                        # Stream document to a temp file, hashing as it downloads
+                        streamed = await downloader.download_to_file(download_url)
+                        downloaded.append((job, metadata, streamed, doc_start_time))
+                        total_bytes_downloaded += streamed.size
 
-                    drive_manager = get_drive_manager()
+                        pipeline_logger.debug(
+                            "document_downloaded",
+                            franchise_name=franchise_name,
+                            content_size=streamed.size,
+                            downloaded_via=streamed.via,
+                            sha256_hash=streamed.sha256[:16],
+                            download_time_seconds=time.time() - doc_start_time,
+                        )
 
-                    # Create state-specific folder structure
-                    root_folder_id = drive_manager.settings.gdrive_folder_id
-                    state_folder_id = drive_manager.get_or_create_folder(
-                        state_config.folder_name, parent_id=root_folder_id
-                    )
+                    except Exception as e:
+                        error_count += 1
+                        state = queue.fail(job.job_id, worker_id, f"{type(e).__name__}: {e}")
+                        logger.error(
+                            f"Failed to download document for {franchise_name}: {e}"
+                        )
+                        pipeline_logger.error(
+                            f"{source.lower()}_document_download_failed",
+                            franchise_name=franchise_name,
+                            error=str(e),
+                            error_type=type(e).__name__,
+                            metadata_id=str(metadata.id),
+                            job_id=job.job_id,
+                            job_state=state,
+                            download_time_seconds=time.time() - doc_start_time,
+                        )
 
-                    # Clean franchise name for filename
-                    clean_name = franchise_name.replace("/", "_").replace("\\", "_")
-                    # Include UUID in filename for unique identification and tracking
-                    file_name = f"{str(fdd.id)}_{clean_name}_{datetime.utcnow().strftime('%Y%m%d')}.pdf"
-
-                    # Upload file
-                    uploaded_file_id = drive_manager.upload_file(
-                        file_content=content,
-                        filename=file_name,
-                        parent_id=state_folder_id,
-                        mime_type="application/pdf",
+                    # Keep the leases of the jobs still held by this worker alive
+                    queue.heartbeat(
+                        [j.job_id for j, _ in batch[position + 1:]]
+                        + [j.job_id for j, _, _, _ in downloaded],
+                        worker_id,
                     )
 
-                    # Update FDD record with file path and hash
+                if not downloaded:
+                    return
+
+                # One set-based duplicate check for the whole chunk
+                unseen = [s.sha256 for _, _, s, _ in downloaded if s.sha256 not in known_hashes]
+                if known_documents is not None:
+                    # Only possible hits need the database
+                    unseen = known_documents.possible_hashes(unseen)
+                if unseen:
                     async with get_database_manager() as db_manager:
-                        update_data = serialize_for_db(
+                        existing = await fetch_records_by_values(
+                            db_manager, "fdds", "sha256_hash", unseen
+                        )
+                    known_hashes.update(
+                        {doc_hash: str(record["id"]) for doc_hash, record in existing.items()}
+                    )
+
+                fdd_records = []
+                metadata_updates = []
+                stored = []  # (job, metadata, drive path or None for duplicates)
+                uploaded = []  # (job, metadata, streamed, start time, file name, Drive id)
+                deferred = []  # job ids of duplicates of another chunk's uploads
+
+                for job, metadata, streamed, doc_start_time in downloaded:
+                    franchise_name = metadata.filing_metadata.get(
+                        "franchise_name", "unknown"
+                    )
+                    doc_hash = streamed.sha256
+
+                    # Copies within the chunk can link to its own uploads: the
+                    # FDDs are written before the scrape metadata pointing at them
+                    existing_fdd_id = known_hashes.get(doc_hash) or chunk_hashes.get(doc_hash)
+                    if existing_fdd_id:
+                        duplicate_count += 1
+                        logger.info(
+                            f"Document already exists in database (hash: {doc_hash[:16]})"
+                        )
+                        pipeline_logger.info(
+                            "duplicate_document_found",
+                            franchise_name=franchise_name,
+                            sha256_hash=doc_hash[:16],
+                            existing_fdd_id=existing_fdd_id,
+                            metadata_id=str(metadata.id),
+                        )
+                        # Point scrape metadata at the existing FDD
+                        metadata_updates.append(
                             {
-                                "drive_path": f"/{state_config.folder_name}/{file_name}",
-                                "drive_file_id": uploaded_file_id,
-                                "sha256_hash": doc_hash,
-                                "total_pages": None,  # Will be set during processing
-                                "processing_status": "pending",
-                                "updated_at": datetime.utcnow(),
+                                "id": str(metadata.id),
+                                "fdd_id": existing_fdd_id,
+                                "scrape_status": "skipped",
+                                "failure_reason": "Duplicate document",
                             }
                         )
-                        await db_manager.update_record("fdds", str(fdd.id), update_data)
+                        stored.append((job, metadata, None))
+                        continue
+
+                    if doc_hash in in_flight_hashes:
+                        # Another worker is storing this document and its FDD
+                        # does not exist yet; link this copy on a later claim
+                        deferred.append(job.job_id)
+                        pipeline_logger.debug(
+                            "duplicate_document_deferred",
+                            franchise_name=franchise_name,
+                            sha256_hash=doc_hash[:16],
+                            metadata_id=str(metadata.id),
+                        )
+                        continue
+
+                    try:
+                        # Clean franchise name for filename
+                        clean_name = franchise_name.replace("/", "_").replace("\\", "_")
+                        # Include UUID in filename for unique identification and tracking
+                        file_name = f"{str(metadata.fdd_id)}_{clean_name}_{datetime.utcnow().strftime('%Y%m%d')}.pdf"
+
+                        # Upload to Google Drive; the client blocks, so keep it
+                        # off the event loop the other workers stream on
+                        folder_id = get_state_folder_id()
+                        # Claim the hash before the upload yields to the other workers
+                        in_flight_hashes.add(doc_hash)
+                        chunk_hashes[doc_hash] = str(metadata.fdd_id)
+                        uploaded_file_id = await asyncio.to_thread(
+                            drive_manager.upload_file_from_path,
+                            file_path=streamed.path,
+                            filename=file_name,
+                            parent_id=folder_id,
+                            mime_type="application/pdf",
+                        )
+                        uploaded.append(
+                            (job, metadata, streamed, doc_start_time, file_name, uploaded_file_id)
+                        )
 
-                        # Update scrape metadata with successful status
-                        await db_manager.update_record(
-                            "scrape_metadata",
-                            str(metadata.id),
-                            {"scrape_status": "completed", "fdd_id": str(fdd.id)},
+                    except Exception as e:
+                        chunk_hashes.pop(doc_hash, None)
+                        in_flight_hashes.discard(doc_hash)
+                        error_count += 1
+                        state = queue.fail(job.job_id, worker_id, f"{type(e).__name__}: {e}")
+                        logger.error(
+                            f"Failed to store document for {franchise_name}: {e}"
+                        )
+                        pipeline_logger.error(
+                            f"{source.lower()}_document_download_failed",
+                            franchise_name=franchise_name,
+                            error=str(e),
+                            error_type=type(e).__name__,
+                            metadata_id=str(metadata.id),
+                            job_id=job.job_id,
+                            job_state=state,
+                            download_time_seconds=time.time() - doc_start_time,
+                        )
+
+                    # A chunk of large uploads can outlast the lease; renew it
+                    # so no other worker reclaims documents being stored here
+                    queue.heartbeat([j.job_id for j, _, _, _ in downloaded], worker_id)
+
+                if deferred:
+                    queue.defer(deferred, worker_id, DUPLICATE_DEFER_SECONDS)
+
+                # Resolve franchisors only for documents that were uploaded; the
+                # whole chunk needs one lookup and at most one bulk insert
+                unresolved = {
+                    m.filing_metadata.get("franchise_name", "unknown")
+                    for _, m, _, _, _, _ in uploaded
+                } - franchisor_ids.keys()
+                if unresolved:
+                    try:
+                        async with get_database_manager() as db_manager:
+                            franchisor_ids.update(
+                                await resolve_franchisor_ids(db_manager, sorted(unresolved))
+                            )
+                    except Exception as e:
+                        # Nothing from this chunk can be stored
+                        failed = [job for job, _, _ in stored] + [job for job, *_ in uploaded]
+                        error_count += len(failed)
+                        for job in failed:
+                            queue.fail(job.job_id, worker_id, f"Franchisor lookup failed: {e}")
+                        logger.error(f"Failed to resolve franchisors for document batch: {e}")
+                        pipeline_logger.error(
+                            f"{source.lower()}_batch_store_failed",
+                            document_count=len(failed),
+                            error=str(e),
+                            error_type=type(e).__name__,
                         )
+                        return
+
+                for job, metadata, streamed, doc_start_time, file_name, uploaded_file_id in uploaded:
+                    franchise_name = metadata.filing_metadata.get(
+                        "franchise_name", "unknown"
+                    )
+                    doc_hash = streamed.sha256
+                    drive_path = f"/{state_config.folder_name}/{file_name}"
+
+                    # FDD record is written once, after upload, with its Drive
+                    # location and hash already known
+                    fdd = FDD(
+                        id=metadata.fdd_id,
+                        franchise_id=UUID(franchisor_ids[franchise_name]),
+                        source_name=source,
+                        processing_status=ProcessingStatus.PENDING,
+                        issue_date=metadata.filing_metadata.get(
+                            "filing_date", datetime.utcnow().date()
+                        ),
+                        document_type=metadata.filing_metadata.get(
+                            "document_type", "Initial"
+                        ),
+                        filing_state=source,
+                        drive_path=drive_path,
+                        drive_file_id=uploaded_file_id,
+                        sha256_hash=doc_hash,
+                        total_pages=None,  # Will be set during processing
+                        created_at=datetime.utcnow(),
+                        updated_at=datetime.utcnow(),
+                    )
+                    fdd_records.append(serialize_for_db(fdd.model_dump()))
+                    metadata_updates.append(
+                        {
+                            "id": str(metadata.id),
+                            "scrape_status": "completed",
+                            "fdd_id": str(fdd.id),
+                        }
+                    )
+                    stored.append((job, metadata, drive_path))
 
                     doc_elapsed = time.time() - doc_start_time
-                    
                     pipeline_logger.info(
-                        f"{state_config.state_code.lower()}_document_downloaded",
+                        f"{source.lower()}_document_downloaded",
                         franchise_name=franchise_name,
-                        file_size=len(content),
+                        file_size=streamed.size,
                         sha256_hash=doc_hash[:16],
                         metadata_id=str(metadata.id),
                         drive_file_id=uploaded_file_id,
-                        drive_path=f"/{state_config.folder_name}/{file_name}",
+                        drive_path=drive_path,
                         download_time_seconds=doc_elapsed,
-                        download_speed_mbps=(len(content) / 1024 / 1024 / doc_elapsed) if doc_elapsed > 0 else 0,
+                        download_speed_mbps=(streamed.size / 1024 / 1024 / doc_elapsed) if doc_elapsed > 0 else 0,
                     )
 
-                    downloaded_files.append(f"/{state_config.folder_name}/{file_name}")
-
-                    # Add delay between downloads to be respectful
-                    await asyncio.sleep(2.0)
-
+                # Bulk writes for the chunk: FDDs, then scrape metadata
+                try:
+                    async with get_database_manager() as db_manager:
+                        await db_manager.batch.batch_upsert(
+                            "fdds", fdd_records, conflict_columns=["id"]
+                        )
+                        await db_manager.batch.batch_update_by_ids(
+                            "scrape_metadata", metadata_updates
+                        )
                 except Exception as e:
-                    error_count += 1
-                    doc_elapsed = time.time() - doc_start_time
-                    
-                    logger.error(
-                        f"Failed to download document for {franchise_name}: {e}"
-                    )
+                    error_count += len(stored)
+                    # Nothing from this chunk reached the database
+                    for job, _, _ in stored:
+                        queue.fail(job.job_id, worker_id, f"Batch store failed: {e}")
+                    logger.error(f"Failed to store document batch: {e}")
                     pipeline_logger.error(
-                        f"{state_config.state_code.lower()}_document_download_failed",
-                        franchise_name=franchise_name,
+                        f"{source.lower()}_batch_store_failed",
+                        document_count=len(stored),
                         error=str(e),
                         error_type=type(e).__name__,
-                        metadata_id=str(metadata.id),
-                        document_index=i+1,
-                        download_time_seconds=doc_elapsed,
                     )
-                    continue
+                    return
+
+                # The FDDs exist now; later copies in this run link to them
+                known_hashes.update(chunk_hashes)
+                completed = queue.complete_many([job.job_id for job, _, _ in stored], worker_id)
+                if completed < len(stored):
+                    # The leases expired and another worker reclaimed these
+                    # jobs; their documents are stored, so it will find them
+                    # as duplicates rather than store them twice
+                    logger.warning(
+                        f"{len(stored) - completed} stored {source} documents had lost "
+                        "their download job lease"
+                    )
+                    pipeline_logger.warning(
+                        f"{source.lower()}_job_lease_lost",
+                        lost_jobs=len(stored) - completed,
+                        stored_jobs=len(stored),
+                        worker_id=worker_id,
+                    )
+                if known_documents is not None:
+                    known_documents.add_records(fdd_records)
+                downloaded_files.extend(path for _, _, path in stored if path)
+                snapshot.mark_stored_many(
+                    (m.filing_metadata.get("filing_number"), m.filing_metadata.get("row_hash"))
+                    for _, m, _ in stored
+                    if m.filing_metadata.get("filing_number") and m.filing_metadata.get("row_hash")
+                )
+
+            finally:
+                in_flight_hashes.difference_update(chunk_hashes)
+                for _, _, streamed, _ in downloaded:
+                    streamed.cleanup()
+
+        async def run_worker(worker_number: int):
+            """Claim and process chunks until the queue is drained."""
+            worker_id = f"{prefect_run_id}-{uuid4().hex[:8]}-{worker_number}"
+            try:
+                while True:
+                    jobs = queue.claim(source, worker_id, limit=claim_size)
+                    if not jobs:
+                        return
+                    await process_jobs(jobs, worker_id)
+                    pipeline_logger.info(
+                        f"{source.lower()}_download_progress",
+                        worker=worker_number,
+                        **queue.get_stats(source),
+                    )
+            finally:
+                # Hand back anything still leased so a task retry need not
+                # wait for the leases to expire
+                queue.release(worker_id)
+
+        # Create scraper for downloading. Documents are streamed to temp files
+        # over HTTP; the scraper's browser download is only used as a fallback.
+        # Unchanged documents are revalidated against the local PDF cache.
+        async with create_scraper(
+            state_config.scraper_class, prefect_run_id=prefect_run_id
+        ) as scraper:
+            # Workers share one browser, so fallback downloads take turns
+            browser_lock = asyncio.Lock()
+
+            async def browser_fallback(url: str) -> bytes:
+                async with browser_lock, resource_slot(RESOURCE_BROWSER):
+                    return await scraper.download_document(url)
+
+            # Interrupted transfers resume with Range requests, also across
+            # task retries and reruns of the flow
+            async with HTTPDownloader(
+                browser_fallback=browser_fallback,
+                cache=PDFCache(),
+                rate_limited=True,
+                resumable=True,
+                progress=log_download_progress(pipeline_logger, state_code=source),
+            ) as downloader:
+                pipeline_logger.debug("download_scraper_created", scraper_type=type(scraper).__name__)
+                await asyncio.gather(
+                    *(run_worker(n) for n in range(download_workers))
+                )
+
+        if known_documents is not None:
+            known_documents.save()
 
         elapsed_time = time.time() - start_time
         
@@ -532,6 +943,9 @@ async def download_state_documents(
         pipeline_logger.info(
             f"{state_config.state_code.lower()}_download_completed",
             downloaded_count=len(downloaded_files),
+            http_stats=downloader.get_stats(),
+            queue_stats=queue.get_stats(source),
+            known_document_stats=known_documents.get_stats() if known_documents else None,
             total_documents=len(metadata_list),
             skipped_count=skipped_count,
             duplicate_count=duplicate_count,
@@ -652,6 +1066,9 @@ async def scrape_state_flow(
     state_config: StateConfig,
     download_documents: bool = True,
     max_documents: Optional[int] = None,
+    incremental: bool = True,
+    download_workers: int = DOWNLOAD_WORKERS,
+    retry_failed: bool = False,
 ) -> dict:
     """Main flow for scraping any state franchise portal.
 
@@ -659,6 +1076,10 @@ async def scrape_state_flow(
         state_config: Configuration for the specific state
         download_documents: Whether to download document content
         max_documents: Optional limit on number of documents to process
+        incremental: Only process filings that are new or changed since the
+            last stored registration snapshot
+        download_workers: Concurrent workers draining the download queue
+        retry_failed: Retry downloads that failed in earlier runs
 
     Returns:
         Dictionary with flow execution results and metrics
@@ -683,6 +1104,7 @@ async def scrape_state_flow(
             portal_name=state_config.portal_name,
             download_documents=download_documents,
             max_documents=max_documents,
+            incremental=incremental,
             scraper_class=state_config.scraper_class.__name__,
         )
 
@@ -694,6 +1116,38 @@ async def scrape_state_flow(
             step="scrape_portal",
             documents_found=len(documents)
         )
+        documents_discovered = len(documents)
+
+        if incremental:
+            snapshot = RegistrationSnapshot(state_config.state_code)
+            diff = snapshot.diff_documents(documents)
+            if download_documents:
+                # Rows are recorded pending and confirmed by their downloads;
+                # without downloads nothing would ever confirm them
+                snapshot.record(diff)
+            entries, finished = skip_finished_filings(
+                state_config.state_code,
+                diff.to_enqueue,
+                snapshot,
+                DownloadQueue(),
+                retry_failed=retry_failed,
+            )
+            documents = [entry.record for entry in entries]
+            logger.info(
+                f"Incremental mode: {len(documents)} of {documents_discovered} "
+                f"{state_config.state_name} filings are new or changed"
+            )
+            pipeline_logger.info(
+                "registration_snapshot_diff",
+                already_stored=finished["stored"],
+                failed_before=finished["failed"],
+                **diff.summary(),
+            )
+            if finished["failed"]:
+                logger.warning(
+                    f"Skipping {finished['failed']} {state_config.state_name} filings whose "
+                    "downloads failed in earlier runs; run with retry_failed=True to retry them"
+                )
 
         if max_documents and len(documents) > max_documents:
             logger.info(f"Limiting processing to {max_documents} documents")
@@ -717,10 +1171,16 @@ async def scrape_state_flow(
 
         # Step 3: Download documents if requested
         downloaded_files = []
-        if download_documents and metadata_list:
+        # Runs even without new metadata: unfinished jobs of an earlier run
+        # are still waiting in the download queue
+        if download_documents:
             pipeline_logger.debug("flow_step_3_starting", step="download_documents")
             downloaded_files = await download_state_documents(
-                metadata_list, state_config, prefect_run_id
+                metadata_list,
+                state_config,
+                prefect_run_id,
+                download_workers=download_workers,
+                retry_failed=retry_failed,
             )
             pipeline_logger.debug(
                 "flow_step_3_completed",
@@ -735,7 +1195,7 @@ async def scrape_state_flow(
         execution_time = (datetime.utcnow() - start_time).total_seconds()
         metrics = await collect_state_metrics(
             state_config=state_config,
-            documents_discovered=len(documents),
+            documents_discovered=documents_discovered,
             metadata_records_created=len(metadata_list),
             documents_downloaded=len(downloaded_files),
             prefect_run_id=prefect_run_id,
@@ -749,7 +1209,8 @@ async def scrape_state_flow(
             "prefect_run_id": str(prefect_run_id),
             "state": state_config.state_code,
             "state_name": state_config.state_name,
-            "documents_discovered": len(documents),
+            "documents_discovered": documents_discovered,
+            "documents_enqueued": len(documents),
             "metadata_records_created": len(metadata_list),
             "documents_downloaded": len(downloaded_files),
             "execution_time_seconds": execution_time,
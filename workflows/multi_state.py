@@ -0,0 +1,184 @@
+"""Run every state flow concurrently under one shared resource budget.
+
+States are independent, so a run-all should take as long as the slowest
+state rather than the sum of all of them. Each state runs in its own task,
+charged to its own tenant of a :class:`~utils.resource_budget.ResourceBudget`,
+which caps browser contexts, HTTP connections and LLM calls globally and
+shares them fairly between the states. Progress and throughput per state are
+logged while the run is in flight and summarised at the end.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional
+
+from utils.logging import PipelineLogger
+from utils.resource_budget import ResourceBudget, tenant_scope, use_resource_budget
+
+if TYPE_CHECKING:
+    from workflows.base_state_flow import StateConfig
+
+
+StateStage = Callable[["StateConfig"], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class StateRun:
+    """Progress of one state within a multi-state run."""
+
+    state_code: str
+    state_name: str
+    started_at: float = 0.0
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        if self.finished_at is None:
+            return "running" if self.started_at else "pending"
+        if self.error or not (self.result or {}).get("success", True):
+            return "failed"
+        return "completed"
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def summary(self, budget: ResourceBudget) -> Dict[str, Any]:
+        """Status, timings, throughput and resource usage of the state."""
+        elapsed = self.elapsed_seconds
+        usage = budget.tenant_stats(self.state_code)
+        result = self.result or {}
+        downloaded = result.get("documents_downloaded", 0)
+        return {
+            "state": self.state_code,
+            "status": self.status,
+            "elapsed_seconds": round(elapsed, 2),
+            "documents_discovered": result.get("documents_discovered", 0),
+            "documents_downloaded": downloaded,
+            "documents_per_second": round(downloaded / elapsed, 3) if elapsed > 0 else 0,
+            "resources": {
+                name: {
+                    "in_use": stats["in_use"],
+                    "completed": stats["completed"],
+                    "per_second": round(stats["completed"] / elapsed, 3) if elapsed > 0 else 0,
+                    "wait_seconds": stats["wait_seconds"],
+                }
+                for name, stats in usage.items()
+            },
+            "error": self.error or result.get("error"),
+        }
+
+
+def _scrape_stage(**flow_kwargs) -> StateStage:
+    """Default stage: the full scrape + download flow of a state."""
+
+    async def run(state_config: "StateConfig") -> Dict[str, Any]:
+        from workflows.base_state_flow import scrape_state_flow
+
+        return await scrape_state_flow.fn(state_config=state_config, **flow_kwargs)
+
+    return run
+
+
+async def run_states_in_parallel(
+    state_configs: Optional[Dict[str, "StateConfig"]] = None,
+    budget: Optional[ResourceBudget] = None,
+    stage: Optional[StateStage] = None,
+    progress_interval: float = 30.0,
+    **flow_kwargs,
+) -> Dict[str, Any]:
+    """Run a stage for every state concurrently under a shared budget.
+
+    Args:
+        state_configs: States to run, keyed by state code (default: all
+            configured states)
+        budget: Global resource caps (default: from ``RESOURCE_BUDGET_*``
+            environment variables)
+        stage: Coroutine run per state (default: ``scrape_state_flow``
+            called with ``flow_kwargs``)
+        progress_interval: Seconds between progress log lines
+        **flow_kwargs: Passed to ``scrape_state_flow`` by the default stage
+
+    Returns:
+        Per-state summaries, per-state results, and wall-clock versus the
+        sequential (summed) time
+    """
+    if state_configs is None:
+        from workflows.state_configs import get_all_state_configs
+
+        state_configs = get_all_state_configs()
+    budget = budget or ResourceBudget.from_env()
+    stage = stage or _scrape_stage(**flow_kwargs)
+    pipeline_logger = PipelineLogger("multi_state_run")
+
+    runs = {
+        code: StateRun(state_code=code, state_name=config.state_name)
+        for code, config in state_configs.items()
+    }
+    pipeline_logger.info(
+        "multi_state_run_started",
+        states=list(runs),
+        capacities={name: limiter.capacity for name, limiter in budget.limiters.items()},
+    )
+
+    async def run_state(code: str, config: "StateConfig"):
+        run = runs[code]
+        # Every slot taken by this state's flow, however deep, is charged to it
+        with tenant_scope(code):
+            run.started_at = time.monotonic()
+            try:
+                run.result = await stage(config)
+            except Exception as e:
+                run.error = f"{type(e).__name__}: {e}"
+                pipeline_logger.error(
+                    "state_run_failed", state=code, error=str(e), error_type=type(e).__name__
+                )
+            finally:
+                run.finished_at = time.monotonic()
+        pipeline_logger.info("state_run_finished", **run.summary(budget))
+
+    async def report_progress():
+        while True:
+            await asyncio.sleep(progress_interval)
+            for run in runs.values():
+                pipeline_logger.info("state_run_progress", **run.summary(budget))
+
+    start = time.monotonic()
+    with use_resource_budget(budget):
+        reporter = asyncio.create_task(report_progress())
+        try:
+            await asyncio.gather(
+                *(run_state(code, config) for code, config in state_configs.items())
+            )
+        finally:
+            reporter.cancel()
+            await asyncio.gather(reporter, return_exceptions=True)
+    wall_clock = time.monotonic() - start
+
+    summaries = {code: run.summary(budget) for code, run in runs.items()}
+    sequential = sum(run.elapsed_seconds for run in runs.values())
+    results = {
+        "states": summaries,
+        "results": {code: run.result for code, run in runs.items()},
+        "wall_clock_seconds": round(wall_clock, 2),
+        "sequential_seconds": round(sequential, 2),
+        "slowest_state_seconds": round(
+            max((run.elapsed_seconds for run in runs.values()), default=0.0), 2
+        ),
+        "success": all(run.status == "completed" for run in runs.values()),
+    }
+    pipeline_logger.info(
+        "multi_state_run_completed",
+        wall_clock_seconds=results["wall_clock_seconds"],
+        sequential_seconds=results["sequential_seconds"],
+        slowest_state_seconds=results["slowest_state_seconds"],
+        speedup=round(sequential / wall_clock, 2) if wall_clock > 0 else 0,
+        states={code: s["status"] for code, s in summaries.items()},
+        budget=budget.get_stats(),
+    )
+    return results